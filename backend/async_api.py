@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Async Dashboard API
+The dashboard read API as one ASGI service (``python real_data_server.py``
+starts it on :5000). Every request shares a pooled HTTP/2 PostgREST client, the
+independent queries behind each endpoint run concurrently, and counts are
+HEAD requests with ``Prefer: count=exact`` instead of fetched rows;
+/api/stats/realtime is a single dashboard_realtime_stats() RPC when
+database/detection_rollups.sql is installed.
+New detections are pushed to browsers on ``/ws/detections`` (see
+detection_feed.py) so dashboards need not poll; the hub also tails the
+detections table, so rows from writers that publish no events get pushed too.
+
+    uvicorn async_api:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from dashboard_stats import (ALERT_COLUMNS, ALERT_LEVELS, PERFORMANCE_COLUMNS, PERFORMANCE_SAMPLE, TREND_COLUMNS,
+                             alert_entry, colored_species, daily_trends, multilingual_summary, performance_summary,
+                             platform_activity_from_detections, species_distribution_from_detections)
+from detection_feed import DetectionTailer, FeedHub, parse_filters
+from detection_rollups import AsyncDetectionRollups
+from evidence_query import DEFAULT_VIEW, VIEWS, afetch_page, aiter_rows, filter_params, ndjson_line
+from postgrest_client import AsyncPostgrest
+from response_cache import ROUTE_TTLS, ResponseCache
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_ANON_KEY')
+
+postgrest: AsyncPostgrest = None
+rollups: AsyncDetectionRollups = None
+response_cache = ResponseCache()
+feed = FeedHub()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global postgrest, rollups
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise RuntimeError("Set SUPABASE_URL and SUPABASE_ANON_KEY in your environment")
+    postgrest = AsyncPostgrest(SUPABASE_URL, SUPABASE_KEY)
+    rollups = AsyncDetectionRollups(postgrest)
+    print(f"✅ PostgREST pool ready (HTTP/2: {postgrest.pool_stats()['http2']})")
+    await feed.start(DetectionTailer(postgrest.select))
+    try:
+        yield
+    finally:
+        await feed.stop()
+        await postgrest.close()
+
+
+app = FastAPI(title="WildGuard AI Dashboard API", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://localhost:3001", "https://wildguard-frontend.vercel.app"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    allow_credentials=True,
+)
+
+
+def _error(e: Exception, status: int = 500) -> JSONResponse:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=status)
+
+
+async def cached(name: str, request: Request, compute: Callable[[], Awaitable[Dict]]) -> JSONResponse:
+    """Serve ``{"success": True, "data": compute()}`` through the response cache"""
+    ttl, stale = ROUTE_TTLS[name]
+    key = (name, tuple(sorted(request.query_params.multi_items())))
+    try:
+        data, state = await response_cache.aget(key, compute, ttl, stale)
+    except Exception as e:
+        print(f"Error serving {name}: {e}")
+        return _error(e)
+    return JSONResponse({"success": True, "data": data}, headers={'X-Cache': state.upper()})
+
+
+async def _distinct(column: str) -> List[str]:
+    try:
+        return await rollups.distinct(column)
+    except Exception as e:
+        print(f"⚠️ Rollups unavailable ({e}), scanning detections")
+        rows = await postgrest.select('detections', column)
+        return list({row[column] for row in rows if row.get(column)})
+
+
+@app.get("/")
+async def home():
+    return {
+        "service": "WildGuard AI Async Dashboard API",
+        "status": "running",
+        "timestamp": datetime.now().isoformat(),
+        "database": "Supabase Connected (Secure)",
+    }
+
+
+@app.get("/health")
+async def health():
+    try:
+        rows = await postgrest.select('detections', 'id', [('limit', '1')])
+        db_status = "connected" if rows else "no data"
+    except Exception as e:
+        db_status = f"error: {str(e)}"
+
+    return {
+        "status": "healthy",
+        "service": "WildGuard AI Async Dashboard API",
+        "timestamp": datetime.now().isoformat(),
+        "database_status": db_status,
+        "environment_secure": bool(SUPABASE_URL and SUPABASE_KEY),
+        "postgrest_pool": postgrest.pool_stats(),
+        "response_cache": response_cache.stats(),
+        "detection_feed": feed.feed_stats(),
+    }
+
+
+async def _realtime_stats_by_query(since: datetime) -> Dict:
+    """dashboard_realtime_stats() without the SQL function: six queries, run concurrently"""
+    since_param = ('timestamp', f"gte.{since.isoformat()}")
+    (total_detections, today_detections, high_priority_alerts, alerts_sent,
+     platforms, species) = await asyncio.gather(
+        postgrest.count('detections'),
+        postgrest.count('detections', [since_param]),
+        postgrest.count('detections', [('threat_level', 'in.(HIGH,CRITICAL)'), since_param]),
+        postgrest.count('detections', [('alert_sent', 'eq.true'), since_param]),
+        _distinct('platform'),
+        _distinct('search_term'),
+    )
+    return {
+        "total_detections": total_detections,
+        "today_detections": today_detections,
+        "high_priority_alerts": high_priority_alerts,
+        "alerts_sent": alerts_sent,
+        "platforms": platforms,
+        "species_count": len(species),
+    }
+
+
+@app.get("/api/stats/realtime")
+async def realtime_stats(request: Request):
+    """Real-time statistics in one RPC round trip (six concurrent queries without it)"""
+    async def compute():
+        since = datetime.combine(datetime.now().date(), datetime.min.time(), tzinfo=timezone.utc)
+        try:
+            stats = await rollups.realtime_stats(since)
+        except Exception as e:
+            print(f"⚠️ dashboard_realtime_stats unavailable ({e}), querying detections")
+            stats = await _realtime_stats_by_query(since)
+        return {
+            "total_detections": stats["total_detections"],
+            "today_detections": stats["today_detections"],
+            "high_priority_alerts": stats["high_priority_alerts"],
+            "platforms_monitored": len(stats["platforms"]),
+            "species_protected": stats["species_count"],
+            "alerts_sent": stats["alerts_sent"],
+            "active_platforms": stats["platforms"][:7],
+            "last_updated": datetime.now().isoformat(),
+            "data_source": "Real Supabase Database (Secure Connection)"
+        }
+    return await cached('stats_realtime', request, compute)
+
+
+@app.get("/api/stats/trends")
+async def threat_trends(request: Request, days: int = 7):
+    async def compute():
+        start_date = (datetime.now() - timedelta(days=days)).isoformat()
+        rows = await postgrest.select('detections', TREND_COLUMNS,
+                                      [('timestamp', f'gte.{start_date}'), ('order', 'timestamp')])
+        return daily_trends(rows)
+    return await cached('stats_trends', request, compute)
+
+
+@app.get("/api/platforms/activity")
+async def platform_activity(request: Request):
+    async def compute():
+        try:
+            return await rollups.platform_activity()
+        except Exception as e:
+            print(f"⚠️ Rollups unavailable ({e}), scanning detections")
+            rows = await postgrest.select('detections', 'platform, threat_level, timestamp')
+            return platform_activity_from_detections(rows)
+    return await cached('platforms_activity', request, compute)
+
+
+@app.get("/api/alerts/recent")
+async def recent_alerts(request: Request, limit: int = 20):
+    async def compute():
+        rows = await postgrest.select('detections', ALERT_COLUMNS, [
+            ('threat_level', f"in.({','.join(ALERT_LEVELS)})"),
+            ('order', 'timestamp.desc.nullslast'), ('limit', str(limit))])
+        return [alert_entry(row) for row in rows]
+    return await cached('alerts_recent', request, compute)
+
+
+@app.get("/api/species/distribution")
+async def species_distribution(request: Request):
+    async def compute():
+        try:
+            top_species = await rollups.species_distribution(limit=10)
+        except Exception as e:
+            print(f"⚠️ Rollups unavailable ({e}), scanning detections")
+            rows = await postgrest.select('detections', 'search_term, threat_level')
+            top_species = species_distribution_from_detections(rows, limit=10)
+        return colored_species(top_species)
+    return await cached('species_distribution', request, compute)
+
+
+@app.get("/api/multilingual/analytics")
+async def multilingual_analytics(request: Request):
+    async def compute():
+        since = (datetime.now() - timedelta(days=7)).isoformat()
+        rows = await postgrest.select('detections', 'search_term', [('timestamp', f'gte.{since}')])
+        return multilingual_summary([row['search_term'] for row in rows if row.get('search_term')])
+    return await cached('multilingual_analytics', request, compute)
+
+
+@app.get("/api/performance/metrics")
+async def performance_metrics(request: Request):
+    async def compute():
+        rows = await postgrest.select('detections', PERFORMANCE_COLUMNS, [
+            ('order', 'timestamp.desc.nullslast'), ('limit', str(PERFORMANCE_SAMPLE))])
+        return performance_summary(rows)
+    return await cached('performance_metrics', request, compute)
+
+
+@app.get("/api/evidence/search")
+async def search_evidence(q: str = '', platform: str = '', threat_level: str = '', limit: int = 20,
+                          cursor: str = None, view: str = DEFAULT_VIEW):
+    """Search evidence with filters, one keyset page at a time"""
+    try:
+        rows, next_cursor = await afetch_page(postgrest, view=view, q=q, platform=platform,
+                                              threat_level=threat_level, cursor=cursor or None, limit=limit)
+    except ValueError as e:
+        return _error(e, 400)
+    except Exception as e:
+        print(f"Error searching evidence: {e}")
+        return _error(e)
+    return {"success": True, "data": rows, "next_cursor": next_cursor}
+
+
+@app.get("/api/evidence/export")
+async def export_evidence(q: str = '', platform: str = '', threat_level: str = '', cursor: str = None,
+                          view: str = 'export', max_rows: int = None):
+    """Stream every matching detection as NDJSON (one JSON object per line)"""
+    filters = {'q': q, 'platform': platform, 'threat_level': threat_level, 'cursor': cursor or None}
+    try:
+        # Fail fast on a bad view or cursor, before the 200 is sent
+        if view not in VIEWS:
+            raise ValueError(f"Unknown view {view!r}; expected one of {', '.join(VIEWS)}")
+        filter_params(**filters)
+    except ValueError as e:
+        return _error(e, 400)
+
+    async def lines():
+        async for row in aiter_rows(postgrest, view=view, max_rows=max_rows, **filters):
+            yield ndjson_line(row)
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson',
+                             headers={'Content-Disposition': 'attachment; filename="wildguard_evidence.ndjson"'})
+
+
+@app.websocket("/ws/detections")
+async def detections_feed(websocket: WebSocket, since: int = None, epoch: str = None,
+                          platforms: str = None, min_level: str = None):
+    """Push feed of new detections; reconnect with the last seen ``since`` and ``epoch``"""
+    await websocket.accept()
+    await feed.serve(websocket, since=since, epoch=epoch, **parse_filters(platforms, min_level))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("async_api:app", host="0.0.0.0", port=int(os.getenv('PORT', '8000')),
+                workers=int(os.getenv('WEB_CONCURRENCY', '1')))
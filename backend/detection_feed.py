@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Detection Feed
+Pushes new detections to dashboard clients over WebSockets so they can stop
+polling. Publishers (DetectionWriter, or MonitoringDashboard.log_detection)
+send compact events to the event bus in detection_events.py: Redis pub/sub
+when REDIS_URL is set, otherwise one bus shared within the process. Writers
+that run without REDIS_URL in another process still reach the feed through
+DetectionTailer, which polls ``detections`` by id.
+FeedHub is the only bus subscriber in an API process. It:
+
+- numbers events and keeps the last FEED_RING_SIZE in a ring buffer, so a
+  client reconnecting with ``?since=<seq>&epoch=<epoch>`` gets exactly what
+  it missed (or ``resync`` if that fell out of the ring, or the hub
+  restarted);
+- coalesces bursts into one message per FEED_COALESCE_MS;
+- sends each client only the events matching its filters;
+- queues at most FEED_CLIENT_QUEUE messages per client and disconnects a
+  client that falls further behind at once instead of buffering for it;
+- drops an event it has already seen (same evidence_id), so a detection
+  both published and tailed is sent once.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# The event bus is shared with the writers at the repository root
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+from detection_events import EVENT_FIELDS, compact_event, event_bus_from_env
+
+RING_SIZE = int(os.getenv('FEED_RING_SIZE', '1000'))
+COALESCE_MS = int(os.getenv('FEED_COALESCE_MS', '250'))
+CLIENT_QUEUE = int(os.getenv('FEED_CLIENT_QUEUE', '32'))
+HEARTBEAT_SECONDS = 30
+TAIL_SECONDS = float(os.getenv('FEED_TAIL_SECONDS', '10'))  # 0 disables the detections tailer
+TAIL_BATCH = 200
+
+LEVEL_RANK = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'CRITICAL': 4}
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "Try Again Later"
+
+TAIL_COLUMNS = ', '.join(('id', 'listing_title') + EVENT_FIELDS)
+
+
+class DetectionTailer:
+    """Polls ``detections`` for ids past the last one seen, for writers that publish no events
+
+    ``select`` is an async ``(table, columns, params) -> rows`` such as
+    AsyncPostgrest.select. Starts from the newest existing row, so only
+    detections inserted after the hub started are fed.
+    """
+
+    def __init__(self, select, interval: float = TAIL_SECONDS, batch: int = TAIL_BATCH):
+        self.select = select
+        self.interval = interval
+        self.batch = batch
+        self.last_id: Optional[int] = None
+
+    async def poll(self) -> List[Dict]:
+        """Events for detections inserted since the previous poll"""
+        if self.last_id is None:
+            newest = await self.select('detections', 'id', [('order', 'id.desc'), ('limit', '1')])
+            self.last_id = newest[0]['id'] if newest else 0
+            return []
+        rows = await self.select('detections', TAIL_COLUMNS, [
+            ('id', f'gt.{self.last_id}'), ('order', 'id'), ('limit', str(self.batch))])
+        if rows:
+            self.last_id = rows[-1]['id']
+        return [compact_event(row) for row in rows]
+
+    async def run(self, ingest):
+        while True:
+            events = []
+            try:
+                events = await self.poll()
+                if events:
+                    ingest(events)
+            except Exception as e:
+                logging.warning(f"⚠️ Detection feed tail failed: {e}")
+            # A full batch means more are waiting
+            await asyncio.sleep(0 if len(events) >= self.batch else self.interval)
+
+
+class FeedClient:
+    """One connected dashboard: its filters, outbound queue and progress"""
+
+    def __init__(self, platforms: Optional[Set[str]] = None, min_level: Optional[str] = None,
+                 queue_size: int = CLIENT_QUEUE):
+        self.platforms = platforms
+        self.min_rank = LEVEL_RANK.get((min_level or '').upper(), 0)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_seq = 0
+        self.dropped = False
+        # Set when the hub cuts the client off; serve() closes the socket even mid-send
+        self.closed = asyncio.Event()
+
+    def wants(self, event: Dict) -> bool:
+        if self.platforms and event.get('platform') not in self.platforms:
+            return False
+        return LEVEL_RANK.get(event.get('threat_level'), 0) >= self.min_rank
+
+    def delta(self, events: List[Dict]) -> List[Dict]:
+        return [e for e in events if e['seq'] > self.last_seq and self.wants(e)]
+
+
+class FeedHub:
+    """Fans bus events out to WebSocket clients with coalescing, replay and backpressure"""
+
+    def __init__(self, bus=None, ring_size: int = RING_SIZE, coalesce_ms: int = COALESCE_MS,
+                 client_queue: int = CLIENT_QUEUE):
+        self.bus = bus or event_bus_from_env()
+        self.ring: deque = deque(maxlen=ring_size)
+        # evidence_ids of the events in the ring, to drop a detection arriving twice
+        self._ring_ids: Set[str] = set()
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.client_queue = client_queue
+        self.clients: Set[FeedClient] = set()
+        self.seq = 0
+        # Sequence numbers are only meaningful within one hub's lifetime
+        self.epoch = uuid.uuid4().hex[:12]
+        self._pending: List[Dict] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._tailer: Optional[asyncio.Task] = None
+        self.stats = {'events': 0, 'duplicates': 0, 'messages': 0, 'replays': 0, 'resyncs': 0,
+                      'slow_consumers_dropped': 0}
+
+    async def start(self, tailer: Optional[DetectionTailer] = None):
+        """Consume the bus and, with a ``tailer``, also poll the detections table"""
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+        if tailer is not None and tailer.interval > 0 and self._tailer is None:
+            self._tailer = asyncio.create_task(tailer.run(self.ingest))
+
+    async def stop(self):
+        for handle in (self._consumer, self._tailer, self._flush_handle):
+            if handle:
+                handle.cancel()
+        self._consumer = self._tailer = self._flush_handle = None
+
+    async def publish(self, events: List[Dict]):
+        """Publish through the bus, so other API processes see the events too"""
+        await self.bus.publish(events)
+
+    async def _consume(self):
+        while True:
+            try:
+                async for events in self.bus.subscribe():
+                    self.ingest(events)
+            except Exception:
+                # Without this the task would die silently and the hub go deaf
+                logging.exception("⚠️ Detection feed bus consumer failed; resubscribing")
+                await asyncio.sleep(1)
+
+    def ingest(self, events: List[Dict]):
+        """Number the new events, remember them, and schedule a coalesced flush"""
+        for event in events:
+            evidence_id = event.get('evidence_id')
+            if evidence_id is not None and evidence_id in self._ring_ids:
+                self.stats['duplicates'] += 1
+                continue
+            self.seq += 1
+            event = {**event, 'seq': self.seq}
+            if len(self.ring) == self.ring.maxlen:
+                self._ring_ids.discard(self.ring[0].get('evidence_id'))
+            self.ring.append(event)
+            if evidence_id is not None:
+                self._ring_ids.add(evidence_id)
+            self._pending.append(event)
+            self.stats['events'] += 1
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.coalesce_seconds, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        for client in list(self.clients):
+            self._offer(client, client.delta(batch))
+
+    def _offer(self, client: FeedClient, events: List[Dict]):
+        if not events or client.dropped:
+            return
+        try:
+            client.queue.put_nowait({'type': 'detections', 'events': events, 'last_seq': events[-1]['seq']})
+            client.last_seq = events[-1]['seq']
+            self.stats['messages'] += 1
+        except asyncio.QueueFull:
+            # Falling behind by a whole queue: cut it loose now; it will reconnect with ?since=
+            client.dropped = True
+            self.clients.discard(client)
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.closed.set()
+            self.stats['slow_consumers_dropped'] += 1
+
+    def connect(self, since: Optional[int] = None, epoch: Optional[str] = None,
+                platforms: Optional[Set[str]] = None, min_level: Optional[str] = None) -> FeedClient:
+        """Register a client; queues a hello plus either a replay or a resync notice"""
+        client = FeedClient(platforms, min_level, self.client_queue)
+        oldest = self.ring[0]['seq'] if self.ring else self.seq + 1
+        client.queue.put_nowait({'type': 'hello', 'seq': self.seq, 'epoch': self.epoch})
+        if since is not None and (epoch != self.epoch or since > self.seq):
+            # Another hub's (or a restarted hub's) numbering
+            client.queue.put_nowait({'type': 'resync', 'seq': self.seq})
+            self.stats['resyncs'] += 1
+        elif since is not None and since < self.seq:
+            if since + 1 < oldest:
+                # Missed events have left the ring; the client must refetch over REST
+                client.queue.put_nowait({'type': 'resync', 'seq': self.seq})
+                self.stats['resyncs'] += 1
+            else:
+                replay = [e for e in self.ring if e['seq'] > since and client.wants(e)]
+                if replay:
+                    client.queue.put_nowait({'type': 'detections', 'events': replay,
+                                             'last_seq': replay[-1]['seq'], 'replay': True})
+                    self.stats['replays'] += 1
+        # Events already in the ring are either replayed or deliberately skipped
+        client.last_seq = self.seq
+        self.clients.add(client)
+        return client
+
+    def disconnect(self, client: FeedClient):
+        self.clients.discard(client)
+
+    async def next_message(self, client: FeedClient) -> Optional[Dict]:
+        """The client's next outbound message, a heartbeat when idle, or None once dropped"""
+        if client.dropped:
+            return None
+        try:
+            return await asyncio.wait_for(client.queue.get(), timeout=HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            return None if client.dropped else {'type': 'ping', 'seq': self.seq, 'ts': time.time()}
+
+    async def serve(self, websocket, since: Optional[int] = None, epoch: Optional[str] = None,
+                    platforms: Optional[Set[str]] = None, min_level: Optional[str] = None):
+        """Run one accepted Starlette/FastAPI WebSocket until it closes or is dropped"""
+        client = self.connect(since, epoch, platforms, min_level)
+
+        async def drain_incoming():
+            # Clients send nothing meaningful; reading is how a disconnect is noticed
+            while True:
+                await websocket.receive_text()
+
+        async def send_outgoing():
+            while True:
+                message = await self.next_message(client)
+                if message is None:
+                    return
+                await websocket.send_json(message)
+
+        tasks = {asyncio.create_task(drain_incoming()), asyncio.create_task(send_outgoing()),
+                 asyncio.create_task(client.closed.wait())}
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                task.cancel()
+            # Retrieves a socket error from whichever task finished first
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if client.dropped:
+                # Even a send still stuck on the slow socket has been abandoned above
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason='slow consumer')
+        except Exception as e:
+            logging.debug(f"Detection feed client gone: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.disconnect(client)
+
+    def feed_stats(self) -> Dict:
+        return {**self.stats, 'clients': len(self.clients), 'seq': self.seq, 'epoch': self.epoch,
+                'ring': len(self.ring), 'bus': type(self.bus).__name__, 'tailing': self._tailer is not None}
+
+
+def parse_filters(platforms: Optional[str], min_level: Optional[str]) -> Dict:
+    """Query-string filters (``platforms=ebay,olx&min_level=HIGH``) for FeedHub.serve"""
+    return {
+        'platforms': {p.strip() for p in platforms.split(',') if p.strip()} if platforms else None,
+        'min_level': min_level,
+    }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Detection Rollups
+Reads the pre-aggregated ``detection_rollups`` counters (see
+database/detection_rollups.sql) so dashboard stats cost O(buckets) instead of
+a scan of every detection. The incremental refresh runs in the database from
+a high-water mark; it is triggered by DetectionWriter after each ingest, by
+``python detection_rollups.py`` from a periodic job, and lazily here at most
+every ROLLUP_REFRESH_SECONDS. AsyncDetectionRollups reads through the async
+API's pooled client.
+"""
+
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+ROLLUP_TABLE = 'detection_rollups'
+REFRESH_INTERVAL = int(os.getenv('ROLLUP_REFRESH_SECONDS', '60'))
+PAGE_SIZE = 1000  # PostgREST's default max rows per request
+HIGH_THREAT_LEVELS = ('HIGH', 'CRITICAL')
+ROW_COLUMNS = 'platform, threat_level, search_term, bucket_start, detections'
+# Page over the full primary key so pages neither overlap nor skip rows
+PAGE_KEY = ('bucket_start', 'platform', 'threat_level', 'threat_category', 'search_term')
+PAGE_ORDER = ','.join(PAGE_KEY)
+
+
+class AsyncDetectionRollups:
+    """Dashboard aggregates served from ``detection_rollups`` via an AsyncPostgrest client"""
+
+    def __init__(self, postgrest, refresh_interval: int = REFRESH_INTERVAL):
+        self.postgrest = postgrest
+        self.refresh_interval = refresh_interval
+        self._last_refresh = 0.0
+
+    async def refresh(self, force: bool = False) -> Optional[int]:
+        if not force and time.monotonic() - self._last_refresh < self.refresh_interval:
+            return None
+        self._last_refresh = time.monotonic()
+        try:
+            return await self.postgrest.rpc('refresh_detection_rollups')
+        except Exception as e:
+            print(f"⚠️ Rollup refresh failed: {e}")
+            return None
+
+    async def realtime_stats(self, since: datetime) -> Dict:
+        """Headline counts and distinct platforms / species from one RPC round trip"""
+        await self.refresh()
+        return await self.postgrest.rpc('dashboard_realtime_stats', {'since': since.isoformat()})
+
+    async def rows(self, granularity: str, dimension: str, since: datetime = None,
+                   columns: str = ROW_COLUMNS) -> List[Dict]:
+        await self.refresh()
+        params = [('granularity', f'eq.{granularity}'), ('dimension', f'eq.{dimension}'),
+                  ('order', PAGE_ORDER)]
+        if since is not None:
+            params.append(('bucket_start', f'gte.{since.isoformat()}'))
+        rows = []
+        while True:
+            page = await self.postgrest.select(ROLLUP_TABLE, columns, params + [
+                ('offset', str(len(rows))), ('limit', str(PAGE_SIZE))])
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+
+    async def platform_activity(self) -> List[Dict]:
+        """Per-platform totals, high/critical counts and last-24h activity"""
+        return platform_activity(await self.rows('total', 'platform'),
+                                 await self.rows('hour', 'platform', since=recent_since()))
+
+    async def species_distribution(self, limit: int = 10) -> List[Dict]:
+        """Top search terms by detections, with their high/critical counts"""
+        return species_distribution(await self.rows('total', 'search_term'), limit)
+
+    async def distinct(self, dimension: str) -> List[str]:
+        """Distinct platforms or search terms that have at least one detection"""
+        return distinct(await self.rows('total', dimension, columns=f'{dimension}, detections'), dimension)
+
+
+def recent_since() -> datetime:
+    """Start of the hourly bucket that contains now - 24h"""
+    return (datetime.now(timezone.utc) - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+
+def platform_activity(total_rows: List[Dict], recent_rows: List[Dict]) -> List[Dict]:
+    stats = {}
+    for row in total_rows:
+        platform = row['platform']
+        if not platform:
+            continue
+        entry = stats.setdefault(platform, {'platform': platform, 'total_detections': 0,
+                                            'high_threat': 0, 'recent_activity': 0})
+        entry['total_detections'] += row['detections']
+        if row['threat_level'] in HIGH_THREAT_LEVELS:
+            entry['high_threat'] += row['detections']
+
+    for row in recent_rows:
+        if row['platform'] in stats:
+            stats[row['platform']]['recent_activity'] += row['detections']
+    return sorted(stats.values(), key=lambda x: x['total_detections'], reverse=True)
+
+
+def species_distribution(total_rows: List[Dict], limit: int = 10) -> List[Dict]:
+    stats = {}
+    for row in total_rows:
+        species = row['search_term']
+        if not species:
+            continue
+        entry = stats.setdefault(species, {'name': species, 'total': 0, 'high': 0})
+        entry['total'] += row['detections']
+        if row['threat_level'] in HIGH_THREAT_LEVELS:
+            entry['high'] += row['detections']
+    return sorted(stats.values(), key=lambda x: x['total'], reverse=True)[:limit]
+
+
+def distinct(total_rows: List[Dict], dimension: str) -> List[str]:
+    counts = defaultdict(int)
+    for row in total_rows:
+        if row[dimension]:
+            counts[row[dimension]] += row['detections']
+    return sorted(counts, key=counts.get, reverse=True)
+
+
+if __name__ == "__main__":
+    # Periodic job: python detection_rollups.py [--rebuild]
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+    if not url or not key:
+        sys.exit("❌ Set SUPABASE_URL and a Supabase key")
+    client = create_client(url, key)
+    function = 'rebuild_detection_rollups' if '--rebuild' in sys.argv else 'refresh_detection_rollups'
+    folded = client.rpc(function, {}).execute().data
+    print(f"📊 {function}: {folded} detections folded in")
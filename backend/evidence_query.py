@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Evidence Queries
+Keyset-paginated reads of ``detections`` for the evidence search, threat
+list and bulk export endpoints. Pages are ordered by (timestamp, id)
+descending, rows without a timestamp last, and continue from an opaque
+cursor, so page 500 costs the same as page 1. Each view selects only the columns it renders. Text search is an
+ILIKE over listing_title / search_term / species_involved, backed by the
+trigram indexes in evidence_search_indexes.sql.
+"""
+
+import base64
+import json
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+# Columns per view; 'detail' is for a single investigator record
+VIEWS = {
+    'list': 'id, evidence_id, timestamp, platform, threat_level, threat_score, threat_category, '
+            'listing_title, listing_price, listing_url, search_term',
+    'detail': 'id, evidence_id, timestamp, platform, threat_level, threat_score, threat_category, '
+              'species_involved, listing_title, listing_price, listing_url, search_term, status, '
+              'alert_sent, confidence_score, requires_human_review, vision_analyzed, enhancement_notes',
+    'export': 'id, evidence_id, timestamp, platform, threat_level, threat_score, threat_category, '
+              'species_involved, listing_title, listing_price, listing_url, search_term, status, '
+              'alert_sent, requires_human_review',
+}
+DEFAULT_VIEW = 'list'
+MAX_PAGE_SIZE = 200
+EXPORT_PAGE_SIZE = 1000  # PostgREST's default max rows per request
+SEARCH_COLUMNS = ('listing_title', 'search_term', 'species_involved')
+# NULL timestamps sort last, so every page boundary is reachable from a cursor
+ORDER = 'timestamp.desc.nullslast,id.desc'
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque cursor pointing just past ``row`` in (timestamp, id) descending order (timestamp may be None)"""
+    raw = json.dumps([row['timestamp'], row['id']], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        return (None if timestamp is None else str(timestamp)), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def _quote(value: str) -> str:
+    """Quote a value for a PostgREST logic-tree filter (commas, dots and parens are reserved)"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _columns(view: str) -> str:
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view {view!r}; expected one of {', '.join(VIEWS)}")
+    columns = [c.strip() for c in VIEWS[view].split(',')]
+    # The cursor needs timestamp and id whatever the view shows
+    for column in ('timestamp', 'id'):
+        if column not in columns:
+            columns.append(column)
+    return ', '.join(columns)
+
+
+def filter_params(q: str = '', platform: str = '', threat_level: str = '',
+                  cursor: Optional[str] = None) -> List[Tuple[str, str]]:
+    """PostgREST (key, value) filter pairs for a search page"""
+    params = []
+    if q:
+        pattern = _quote(f'%{q}%')
+        params.append(('or', '(' + ','.join(f'{column}.ilike.{pattern}' for column in SEARCH_COLUMNS) + ')'))
+    if platform:
+        params.append(('platform', f'eq.{platform}'))
+    if threat_level:
+        params.append(('threat_level', f'eq.{threat_level}'))
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        if timestamp is None:
+            # Already into the trailing NULL-timestamp rows
+            params.append(('timestamp', 'is.null'))
+            params.append(('id', f'lt.{row_id}'))
+        else:
+            ts = _quote(timestamp)
+            params.append(('or', f'(timestamp.lt.{ts},and(timestamp.eq.{ts},id.lt.{row_id}),timestamp.is.null)'))
+    return params
+
+
+def build_query(client, view: str = DEFAULT_VIEW, limit: int = 20, offset: int = 0, **filters):
+    """supabase-py query for up to ``limit`` rows after ``cursor`` (``offset`` is for legacy paging)"""
+    query = client.table('detections').select(_columns(view))
+    for key, value in filter_params(**filters):
+        if key == 'or':
+            query = query.or_(value[1:-1])
+        else:
+            operator, criteria = value.split('.', 1)
+            query = query.filter(key, operator, criteria)
+
+    query = query.order('timestamp', desc=True, nullsfirst=False).order('id', desc=True)
+    if offset:
+        return query.range(offset, offset + limit - 1)
+    return query.limit(limit)
+
+
+def _page(rows: List[Dict], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def fetch_page(client, limit: int = 20, **filters) -> Tuple[List[Dict], Optional[str]]:
+    """One page of rows plus the cursor for the next page (None on the last page)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # One extra row tells us whether there is a next page
+    return _page(build_query(client, limit=limit + 1, **filters).execute().data or [], limit)
+
+
+def iter_rows(client, max_rows: Optional[int] = None, page_size: int = EXPORT_PAGE_SIZE,
+              **filters) -> Iterator[Dict]:
+    """Every matching row, newest first, one keyset page at a time"""
+    cursor = filters.pop('cursor', None)
+    sent = 0
+    while True:
+        size = page_size if max_rows is None else min(page_size, max_rows - sent)
+        if size <= 0:
+            return
+        rows = build_query(client, cursor=cursor, limit=size, **filters).execute().data or []
+        yield from rows
+        sent += len(rows)
+        if len(rows) < size:
+            return
+        cursor = encode_cursor(rows[-1])
+
+
+def _async_params(limit: int, **filters) -> List[Tuple[str, str]]:
+    return filter_params(**filters) + [('order', ORDER), ('limit', str(limit))]
+
+
+async def afetch_page(postgrest, view: str = DEFAULT_VIEW, limit: int = 20,
+                      **filters) -> Tuple[List[Dict], Optional[str]]:
+    """fetch_page through an AsyncPostgrest client"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = await postgrest.select('detections', _columns(view), _async_params(limit + 1, **filters))
+    return _page(rows, limit)
+
+
+async def aiter_rows(postgrest, view: str = 'export', max_rows: Optional[int] = None,
+                     page_size: int = EXPORT_PAGE_SIZE, **filters) -> AsyncIterator[Dict]:
+    """iter_rows through an AsyncPostgrest client"""
+    cursor = filters.pop('cursor', None)
+    sent = 0
+    while True:
+        size = page_size if max_rows is None else min(page_size, max_rows - sent)
+        if size <= 0:
+            return
+        rows = await postgrest.select('detections', _columns(view),
+                                      _async_params(size, cursor=cursor, **filters))
+        for row in rows:
+            yield row
+        sent += len(rows)
+        if len(rows) < size:
+            return
+        cursor = encode_cursor(rows[-1])
+
+
+def ndjson_line(row: Dict) -> str:
+    return json.dumps(row, default=str, ensure_ascii=False) + '\n'
+
+
+def ndjson_lines(rows: Iterator[Dict]) -> Iterator[str]:
+    for row in rows:
+        yield ndjson_line(row)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Dashboard Load Test
+Hammers dashboard endpoints with concurrent clients and reports requests/sec
+and latency percentiles for one or more deployments of the dashboard API,
+e.g. a build before and after a change:
+
+    git worktree add /tmp/before HEAD~1 && (cd /tmp/before/backend && PORT=5001 python real_data_server.py)
+    python real_data_server.py                      # :5000
+    python load_test.py http://localhost:5001 http://localhost:5000 -c 50 -d 30
+
+Start the servers with RESPONSE_CACHE=false to measure the upstream query
+path rather than cache hits. Without a Supabase project, point them at
+postgrest_stub_server.py (SUPABASE_URL=http://127.0.0.1:54321), which adds a
+fixed round-trip latency to every query.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+import aiohttp
+
+DEFAULT_PATHS = [
+    '/api/stats/realtime',
+    '/api/platforms/activity',
+    '/api/species/distribution',
+    '/api/alerts/recent',
+    '/api/evidence/search?q=ivory',
+]
+
+
+async def run_target(base_url: str, paths: List[str], concurrency: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    statuses = Counter()
+    cache_states = Counter()
+    in_window = 0
+    deadline = time.monotonic() + duration
+
+    async def client(session: aiohttp.ClientSession, offset: int):
+        nonlocal in_window
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as resp:
+                    await resp.read()
+                    statuses[resp.status] += 1
+                    cache_states[resp.headers.get('X-Cache', '-')] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                statuses['error'] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+            in_window += time.monotonic() <= deadline
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(client(session, n) for n in range(concurrency)))
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+    return {
+        'target': base_url,
+        'requests': len(latencies),
+        # Over the test window only, so one straggler waiting out the timeout cannot skew it
+        'rps': in_window / duration if duration else 0.0,
+        'p50_ms': statistics.median(latencies) if latencies else 0.0,
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'statuses': dict(statuses),
+        'cache': dict(cache_states),
+    }
+
+
+def print_report(result: Dict):
+    print(f"🎯 {result['target']}")
+    print(f"   {result['requests']} requests, {result['rps']:.1f} req/s")
+    print(f"   latency p50 {result['p50_ms']:.0f} ms, p95 {result['p95_ms']:.0f} ms, p99 {result['p99_ms']:.0f} ms")
+    print(f"   status {result['statuses']}  cache {result['cache']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard API")
+    parser.add_argument('targets', nargs='+', help="Base URLs, e.g. http://localhost:5000")
+    parser.add_argument('-c', '--concurrency', type=int, default=20)
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help="Seconds per target")
+    parser.add_argument('-p', '--path', action='append', dest='paths', help="Endpoint path (repeatable)")
+    args = parser.parse_args()
+
+    results = []
+    for target in args.targets:
+        result = await run_target(target.rstrip('/'), args.paths or DEFAULT_PATHS,
+                                  args.concurrency, args.duration)
+        print_report(result)
+        results.append(result)
+
+    if len(results) > 1 and results[0]['rps']:
+        for result in results[1:]:
+            print(f"📈 {result['target']}: {result['rps'] / results[0]['rps']:.2f}x the req/s of {results[0]['target']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for Supabase's PostgREST, for load testing the dashboard
+servers (load_test.py) without a database or network access.
+
+    python postgrest_stub_server.py --port 54321 --rows 5000 --latency-ms 20
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_ANON_KEY=stub.stub.stub \
+        RESPONSE_CACHE=false python real_data_server.py
+
+Serves a seeded ``detections`` table and the matching ``detection_rollups``
+(folded as in database/detection_rollups.sql) with the subset of PostgREST
+the dashboard uses: column selection, eq/neq/gt/gte/lt/lte/in/is/ilike
+filters, ``or=(...)`` logic trees, ordering with nulls first/last,
+limit/offset, ``Prefer: count=exact`` (HEAD or GET) and the
+``refresh_detection_rollups`` and ``dashboard_realtime_stats`` RPCs. Every request waits ``--latency-ms``
+first, standing in for the round trip to a hosted database. The tables never
+change, so each distinct query is evaluated once and then answered from
+memory, like an indexed lookup, leaving the servers under test as the
+bottleneck rather than the stub.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+from aiohttp import web
+
+PLATFORMS = ['ebay', 'craigslist', 'olx', 'marktplaats', 'mercadolibre', 'gumtree', 'avito']
+SEARCH_TERMS = ['ivory', 'rhino horn', 'tiger bone', 'pangolin scales', 'bear bile', 'shark fin',
+                'marfil', 'cuerno de rinoceronte', 'ivoire', 'elfenbein', '象牙', 'turtle shell']
+THREAT_LEVELS = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+THREAT_CATEGORIES = ['wildlife_trafficking', 'human_trafficking', 'unrelated']
+HOUR_RETENTION_DAYS = 14
+MAX_ROWS = 1000  # PostgREST's db-max-rows on Supabase
+
+TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+
+
+def make_detections(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(1, count + 1):
+        term = rng.choice(SEARCH_TERMS)
+        timestamp = now - timedelta(minutes=rng.randrange(60 * 24 * 30))
+        rows.append({
+            'id': i,
+            'evidence_id': f'STUB-{i:06d}',
+            # A few legacy rows predate the timestamp column
+            'timestamp': None if i % 97 == 0 else timestamp.isoformat(),
+            'platform': rng.choice(PLATFORMS),
+            'threat_level': rng.choices(THREAT_LEVELS, weights=[5, 3, 2, 1])[0],
+            'threat_score': rng.randrange(100),
+            'threat_category': rng.choice(THREAT_CATEGORIES),
+            'species_involved': f'Stub listing {i} - {term}',
+            'listing_title': f'Antique {term} carving #{i}',
+            'listing_price': f'${rng.randrange(20, 2000)}',
+            'listing_url': f'https://example.invalid/listing/{i}',
+            'search_term': term,
+            'description': '',
+            'status': 'ACTIVE',
+            'alert_sent': rng.random() < 0.2,
+            'confidence_score': round(rng.random(), 2),
+            'requires_human_review': rng.random() < 0.1,
+            'vision_analyzed': False,
+            'enhancement_notes': None,
+        })
+    return rows
+
+
+def fold_rollups(detections: List[Dict]) -> List[Dict]:
+    """detection_rollups rows for ``detections``, as refresh_detection_rollups() folds them"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=HOUR_RETENTION_DAYS)
+    counts = Counter()
+    for row in detections:
+        if row['timestamp'] is None:
+            continue
+        ts = datetime.fromisoformat(row['timestamp'])
+        buckets = {'day': ts.replace(hour=0, minute=0, second=0, microsecond=0),
+                   'total': datetime(1970, 1, 1, tzinfo=timezone.utc)}
+        if ts >= cutoff:
+            buckets['hour'] = ts.replace(minute=0, second=0, microsecond=0)
+        for granularity, bucket_start in buckets.items():
+            for dimension in ('platform', 'search_term', 'full'):
+                counts[(granularity, dimension, bucket_start.isoformat(),
+                        row['platform'] if dimension in ('platform', 'full') else '',
+                        row['threat_level'],
+                        row['threat_category'] if dimension == 'full' else '',
+                        row['search_term'] if dimension in ('search_term', 'full') else '')] += 1
+    keys = ('granularity', 'dimension', 'bucket_start', 'platform', 'threat_level', 'threat_category',
+            'search_term')
+    return [{**dict(zip(keys, key)), 'detections': n} for key, n in counts.items()]
+
+
+def realtime_stats(detections: List[Dict], since: datetime) -> Dict:
+    """What dashboard_realtime_stats(since) returns for ``detections``"""
+    today = [row for row in detections
+             if row['timestamp'] is not None and datetime.fromisoformat(row['timestamp']) >= since]
+    platforms = Counter(row['platform'] for row in detections if row['timestamp'] is not None)
+    return {
+        'total_detections': len(detections),
+        'today_detections': len(today),
+        'high_priority_alerts': sum(row['threat_level'] in ('HIGH', 'CRITICAL') for row in today),
+        'alerts_sent': sum(bool(row['alert_sent']) for row in today),
+        'platforms': [platform for platform, _ in platforms.most_common()],
+        'species_count': len({row['search_term'] for row in detections if row['timestamp'] is not None}),
+    }
+
+
+def _typed(value):
+    """Comparable form of a stored value; timestamps compare as instants, not strings"""
+    if isinstance(value, str) and TIMESTAMP.match(value):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _literal(raw: str, sample):
+    """Filter value coerced to the type of the column value it is compared with"""
+    if isinstance(sample, bool):
+        return raw == 'true'
+    if isinstance(sample, int):
+        return int(raw)
+    if isinstance(sample, float):
+        return float(raw)
+    return _typed(raw)
+
+
+def _text(value) -> str:
+    """A value as PostgREST spells it in a filter"""
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _ilike(pattern: str) -> re.Pattern:
+    regex = ''.join('.*' if c in '%*' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return re.compile(f'^{regex}$', re.IGNORECASE | re.DOTALL)
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def condition(column: str, expression: str) -> Callable[[Dict], bool]:
+    """Row predicate for ``column=op.value`` (also a term inside a logic tree)"""
+    op, _, raw = expression.partition('.')
+    raw = _unquote(raw)
+    if op == 'not':
+        inner = condition(column, raw)
+        return lambda row: not inner(row)
+    if op == 'is':
+        expected = {'null': None, 'true': True, 'false': False}[raw]
+        return lambda row: row.get(column) is expected
+    if op == 'in':
+        members = {_unquote(v) for v in _split(raw.strip('()'))}
+        return lambda row: row.get(column) is not None and _text(row[column]) in members
+    if op in ('ilike', 'like'):
+        pattern = _ilike(raw) if op == 'ilike' else re.compile(_ilike(raw).pattern, re.DOTALL)
+        return lambda row: row.get(column) is not None and bool(pattern.match(str(row[column])))
+
+    compare = {'eq': lambda a, b: a == b, 'neq': lambda a, b: a != b, 'gt': lambda a, b: a > b,
+               'gte': lambda a, b: a >= b, 'lt': lambda a, b: a < b, 'lte': lambda a, b: a <= b}[op]
+
+    def matches(row: Dict) -> bool:
+        value = row.get(column)
+        if value is None:
+            return False
+        try:
+            return compare(_typed(value), _literal(raw, value))
+        except TypeError:
+            return compare(_text(value), raw)
+    return matches
+
+
+def _split(text: str) -> List[str]:
+    """Split a logic tree's terms on top-level commas, respecting quotes and parentheses"""
+    parts, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        c = text[i]
+        if c == '\\' and quoted:
+            i += 1
+        elif c == '"':
+            quoted = not quoted
+        elif not quoted and c == '(':
+            depth += 1
+        elif not quoted and c == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and c == ',':
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return [p for p in parts if p]
+
+
+def logic_tree(operator: str, terms: str) -> Callable[[Dict], bool]:
+    """Predicate for ``or=(...)`` / ``and=(...)``, nesting ``and(...)`` / ``or(...)`` terms"""
+    predicates = []
+    for term in _split(terms.strip()[1:-1]):
+        nested = re.match(r'^(and|or)(\(.*\))$', term, re.DOTALL)
+        if nested:
+            predicates.append(logic_tree(nested.group(1), nested.group(2)))
+        else:
+            column, _, expression = term.partition('.')
+            predicates.append(condition(column, expression))
+    combine = any if operator == 'or' else all
+    return lambda row: combine(p(row) for p in predicates)
+
+
+def sort_rows(rows: List[Dict], order: str) -> List[Dict]:
+    """Apply ``order=col[.asc|.desc][.nullsfirst|.nullslast],...`` (PostgreSQL null defaults)"""
+    for spec in reversed(order.split(',')):
+        column, *modifiers = spec.strip().split('.')
+        descending = 'desc' in modifiers
+        nulls_first = 'nullsfirst' in modifiers or (descending and 'nullslast' not in modifiers)
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: _typed(row[column]), reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def run_query(table: List[Dict], params) -> Tuple[List[Dict], int]:
+    """(selected page, total matching rows) for a PostgREST query string"""
+    predicates, order, limit, offset, columns = [], None, None, 0, None
+    for key, value in params.items():
+        if key == 'select':
+            columns = None if value.strip() == '*' else [c.strip() for c in value.split(',')]
+        elif key == 'order':
+            order = value
+        elif key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            offset = int(value)
+        elif key in ('or', 'and'):
+            predicates.append(logic_tree(key, value))
+        else:
+            predicates.append(condition(key, value))
+
+    rows = [row for row in table if all(p(row) for p in predicates)]
+    if order:
+        rows = sort_rows(rows, order)
+    total = len(rows)
+    limit = MAX_ROWS if limit is None else min(limit, MAX_ROWS)
+    page = rows[offset:offset + limit]
+    if columns:
+        page = [{column: row.get(column) for column in columns} for row in page]
+    return page, total
+
+
+def create_app(rows: int = 5000, latency_ms: float = 20.0, seed: int = 0) -> web.Application:
+    app = web.Application()
+    detections = make_detections(rows, seed)
+    app['tables'] = {'detections': detections, 'detection_rollups': fold_rollups(detections)}
+    app['requests'] = Counter()
+    results: Dict[tuple, Tuple[str, int, int]] = {}  # query -> (JSON body, rows, total)
+    rpc_results: Dict[str, str] = {}  # dashboard_realtime_stats ``since`` -> JSON body
+
+    async def table(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency_ms / 1000)
+        name = request.match_info['table']
+        app['requests'][name] += 1
+        if name not in app['tables']:
+            return web.json_response({'code': '42P01', 'message': f'relation "public.{name}" does not exist'},
+                                     status=404)
+        key = (name, tuple(request.query.items()))
+        try:
+            if key not in results:
+                page, total = run_query(app['tables'][name], request.query)
+                results[key] = json.dumps(page, ensure_ascii=False), len(page), total
+            body, returned, total = results[key]
+        except (KeyError, ValueError) as e:
+            return web.json_response({'code': 'PGRST100', 'message': f'unsupported filter: {e}'}, status=400)
+
+        headers = {}
+        if 'count=exact' in request.headers.get('Prefer', ''):
+            first = int(request.query.get('offset', 0))
+            headers['Content-Range'] = f'{first}-{first + returned - 1}/{total}' if returned else f'*/{total}'
+        if request.method == 'HEAD':
+            return web.Response(headers=headers)
+        return web.Response(text=body, content_type='application/json', headers=headers)
+
+    async def rpc(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency_ms / 1000)
+        function = request.match_info['function']
+        app['requests'][f"rpc/{function}"] += 1
+        if function == 'dashboard_realtime_stats':
+            since = (await request.json())['since']
+            if since not in rpc_results:
+                rpc_results[since] = json.dumps(realtime_stats(detections, datetime.fromisoformat(since)))
+            return web.Response(text=rpc_results[since], content_type='application/json')
+        if function != 'refresh_detection_rollups':
+            return web.json_response({'code': 'PGRST202', 'message': 'function not found'}, status=404)
+        # The stub's rollups are folded at startup, so there is never anything new
+        return web.json_response(0)
+
+    app.router.add_get('/rest/v1/{table}', table)  # allow_head: counts are HEAD requests
+    app.router.add_post('/rest/v1/rpc/{function}', rpc)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Supabase PostgREST")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--rows", type=int, default=5000, help="seeded detections")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="added to every request")
+    args = parser.parse_args()
+    web.run_app(create_app(args.rows, args.latency_ms), host="127.0.0.1", port=args.port)
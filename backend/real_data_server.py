@@ -3,529 +3,44 @@
 WildGuard AI Real Data Backend - Connected to Supabase
 Returns 100% real data from the actual database
 SECURITY: All credentials loaded from environment variables
+
+The dashboard read API is served by one async service, async_api.py; the
+Flask routes that used to live here were retired in its favour. This entry
+point is kept so ``python3 real_data_server.py`` still serves the same routes
+and JSON on :5000.
 """
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-from datetime import datetime, timedelta
 import os
-import json
-
-app = Flask(__name__)
-
-# Enable CORS for all domains and all routes
-CORS(
-    app,
-    origins=["http://localhost:3000", "http://localhost:3001", "https://wildguard-frontend.vercel.app"],
-    methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization"],
-    supports_credentials=True,
-)
+import sys
 
 # Supabase configuration - NEVER hardcode these!
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_ANON_KEY')
 
-# Validate environment variables
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ ERROR: Missing Supabase environment variables!")
-    print("Please set SUPABASE_URL and SUPABASE_ANON_KEY in your environment")
-    print("Example:")
-    print("export SUPABASE_URL=your_supabase_url")
-    print("export SUPABASE_ANON_KEY=your_supabase_key")
-    exit(1)
-
-# Initialize Supabase client
-try:
-    from supabase import create_client
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print(f"✅ Supabase client initialized successfully")
-except ImportError:
-    print("❌ ERROR: supabase-py not installed")
-    print("Please install: pip install supabase")
-    exit(1)
-except Exception as e:
-    print(f"❌ ERROR: Failed to initialize Supabase client: {e}")
-    exit(1)
-
-@app.after_request
-def after_request(response):
-    """Ensure CORS headers are always present"""
-    response.headers.add("Access-Control-Allow-Origin", "*")
-    response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
-    response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
-    response.headers.add("Access-Control-Allow-Credentials", "true")
-    return response
-
-@app.route("/")
-def home():
-    return jsonify({
-        "service": "WildGuard AI Real Data Backend",
-        "status": "running",
-        "timestamp": datetime.now().isoformat(),
-        "database": "Supabase Connected (Secure)",
-        "message": "Serving 100% real wildlife trafficking data!",
-        "security": "All credentials loaded from environment variables"
-    })
-
-@app.route("/health")
-def health():
-    try:
-        # Test database connection
-        result = supabase.table('detections').select('id').limit(1).execute()
-        db_status = "connected" if result.data else "no data"
-        db_count = len(result.data) if result.data else 0
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        db_count = 0
-    
-    return jsonify({
-        "status": "healthy",
-        "service": "WildGuard AI Real Backend",
-        "timestamp": datetime.now().isoformat(),
-        "database_status": db_status,
-        "database_records": db_count,
-        "environment_secure": bool(SUPABASE_URL and SUPABASE_KEY)
-    })
-
-@app.route("/api/stats/realtime")
-def realtime_stats():
-    """Real-time statistics from actual Supabase database"""
-    try:
-        # Get total detections
-        total_result = supabase.table('detections').select('id', count='exact').execute()
-        total_detections = total_result.count if hasattr(total_result, 'count') else len(total_result.data)
-        
-        # Get today's detections
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_result = supabase.table('detections').select('id', count='exact').gte('timestamp', f'{today}T00:00:00Z').execute()
-        today_detections = today_result.count if hasattr(today_result, 'count') else len(today_result.data)
-        
-        # Get high priority alerts
-        alerts_result = supabase.table('detections').select('id', count='exact').in_('threat_level', ['HIGH', 'CRITICAL']).gte('timestamp', f'{today}T00:00:00Z').execute()
-        high_priority_alerts = alerts_result.count if hasattr(alerts_result, 'count') else len(alerts_result.data)
-        
-        # Get unique platforms
-        platforms_result = supabase.table('detections').select('platform').execute()
-        unique_platforms = list(set([p['platform'] for p in platforms_result.data if p['platform']]))
-        
-        # Get unique species
-        species_result = supabase.table('detections').select('search_term').execute()
-        unique_species = list(set([s['search_term'] for s in species_result.data if s['search_term']]))
-        
-        # Get alerts sent
-        alerts_sent_result = supabase.table('detections').select('id', count='exact').eq('alert_sent', True).gte('timestamp', f'{today}T00:00:00Z').execute()
-        alerts_sent = alerts_sent_result.count if hasattr(alerts_sent_result, 'count') else len(alerts_sent_result.data)
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "total_detections": total_detections,
-                "today_detections": today_detections,
-                "high_priority_alerts": high_priority_alerts,
-                "platforms_monitored": len(unique_platforms),
-                "species_protected": len(unique_species),
-                "alerts_sent": alerts_sent,
-                "active_platforms": unique_platforms[:7],
-                "last_updated": datetime.now().isoformat(),
-                "data_source": "Real Supabase Database (Secure Connection)"
-            }
-        })
-        
-    except Exception as e:
-        print(f"Error fetching real-time stats: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e),
-            "message": "Could not fetch real-time statistics"
-        }), 500
-
-@app.route("/api/stats/trends")
-def threat_trends():
-    """Real threat trends from Supabase database"""
-    try:
-        days = request.args.get("days", 7, type=int)
-        
-        # Get data from the last N days
-        start_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        result = supabase.table('detections').select('timestamp, threat_level, search_term, platform').gte('timestamp', start_date).order('timestamp').execute()
-        
-        # Group by date
-        daily_data = {}
-        
-        for detection in result.data:
-            date = detection['timestamp'][:10]  # Get YYYY-MM-DD
-            if date not in daily_data:
-                daily_data[date] = {
-                    'date': date,
-                    'total': 0,
-                    'high': 0,
-                    'medium': 0,
-                    'low': 0,
-                    'critical': 0,
-                    'platforms': set(),
-                    'species': set()
-                }
-            
-            daily_data[date]['total'] += 1
-            
-            threat_level = detection.get('threat_level', '').lower()
-            if threat_level in daily_data[date]:
-                daily_data[date][threat_level] += 1
-            
-            if detection.get('platform'):
-                daily_data[date]['platforms'].add(detection['platform'])
-            if detection.get('search_term'):
-                daily_data[date]['species'].add(detection['search_term'])
-        
-        # Convert to list format
-        trends = []
-        for date_data in daily_data.values():
-            trends.append({
-                'date': date_data['date'],
-                'total': date_data['total'],
-                'high': date_data['high'],
-                'medium': date_data['medium'],
-                'low': date_data['low'],
-                'critical': date_data['critical'],
-                'platforms_active': len(date_data['platforms']),
-                'species_detected': len(date_data['species'])
-            })
-        
-        return jsonify({
-            "success": True,
-            "data": sorted(trends, key=lambda x: x['date'])
-        })
-        
-    except Exception as e:
-        print(f"Error fetching threat trends: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/platforms/activity")
-def platform_activity():
-    """Real platform activity from Supabase"""
-    try:
-        result = supabase.table('detections').select('platform, threat_level, timestamp').execute()
-        
-        platform_stats = {}
-        
-        for detection in result.data:
-            platform = detection.get('platform')
-            if not platform:
-                continue
-                
-            if platform not in platform_stats:
-                platform_stats[platform] = {
-                    'platform': platform,
-                    'total_detections': 0,
-                    'high_threat': 0,
-                    'recent_activity': 0
-                }
-            
-            platform_stats[platform]['total_detections'] += 1
-            
-            if detection.get('threat_level') in ['HIGH', 'CRITICAL']:
-                platform_stats[platform]['high_threat'] += 1
-            
-            # Count recent activity (last 24 hours)
-            detection_time = datetime.fromisoformat(detection['timestamp'].replace('Z', '+00:00'))
-            if detection_time > datetime.now().replace(tzinfo=detection_time.tzinfo) - timedelta(days=1):
-                platform_stats[platform]['recent_activity'] += 1
-        
-        platforms = sorted(platform_stats.values(), key=lambda x: x['total_detections'], reverse=True)
-        
-        return jsonify({
-            "success": True,
-            "data": platforms
-        })
-        
-    except Exception as e:
-        print(f"Error fetching platform activity: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/alerts/recent")
-def recent_alerts():
-    """Get recent high-priority alerts from real database"""
-    try:
-        limit = request.args.get("limit", 20, type=int)
-        
-        result = supabase.table('detections').select('*').in_('threat_level', ['HIGH', 'CRITICAL', 'MEDIUM']).order('timestamp', desc=True).limit(limit).execute()
-        
-        alerts = []
-        for detection in result.data:
-            alerts.append({
-                'id': detection.get('evidence_id'),
-                'timestamp': datetime.fromisoformat(detection['timestamp'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M'),
-                'threat': detection.get('species_involved', '').replace('Wildlife scan: ', '') or detection.get('search_term'),
-                'platform': detection.get('platform'),
-                'severity': detection.get('threat_level'),
-                'threat_score': detection.get('threat_score'),
-                'listing_title': detection.get('listing_title'),
-                'listing_url': detection.get('listing_url'),
-                'listing_price': detection.get('listing_price'),
-                'alert_sent': detection.get('alert_sent'),
-                'status': detection.get('status')
-            })
-        
-        return jsonify({
-            "success": True,
-            "data": alerts
-        })
-        
-    except Exception as e:
-        print(f"Error fetching recent alerts: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/species/distribution")
-def species_distribution():
-    """Get species detection distribution from real data"""
-    try:
-        result = supabase.table('detections').select('search_term, threat_level').execute()
-        
-        species_stats = {}
-        
-        for detection in result.data:
-            species = detection.get('search_term')
-            if not species:
-                continue
-                
-            if species not in species_stats:
-                species_stats[species] = {
-                    'name': species,
-                    'total': 0,
-                    'high': 0
-                }
-            
-            species_stats[species]['total'] += 1
-            
-            if detection.get('threat_level') in ['HIGH', 'CRITICAL']:
-                species_stats[species]['high'] += 1
-        
-        # Get top species by detection count
-        top_species = sorted(species_stats.values(), key=lambda x: x['total'], reverse=True)[:10]
-        
-        # Add colors
-        colors = ['#ef4444', '#f97316', '#eab308', '#22c55e', '#06b6d4', '#3b82f6', '#8b5cf6', '#ec4899', '#f59e0b', '#10b981']
-        
-        for i, species in enumerate(top_species):
-            species['color'] = colors[i % len(colors)]
-            species['value'] = species['total']  # For compatibility with charts
-        
-        return jsonify({
-            "success": True,
-            "data": top_species
-        })
-        
-    except Exception as e:
-        print(f"Error fetching species distribution: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/multilingual/analytics")
-def multilingual_analytics():
-    """Get multilingual analytics reflecting the new enhancement"""
-    try:
-        # Get recent search terms to analyze
-        result = supabase.table('detections').select('search_term, timestamp').gte('timestamp', (datetime.now() - timedelta(days=7)).isoformat()).execute()
-        
-        search_terms = [d['search_term'] for d in result.data if d.get('search_term')]
-        
-        # Simple language detection patterns
-        import re
-        language_patterns = {
-            'chinese': re.compile(r'[\u4e00-\u9fff]'),
-            'spanish': re.compile(r'[ñáéíóúü]'),
-            'vietnamese': re.compile(r'[ăâđêôơưạảấầẩẫậ]'),
-            'french': re.compile(r'[àâçèéêëîïôùûüÿ]'),
-            'german': re.compile(r'[äöüß]'),
-            'russian': re.compile(r'[а-я]', re.IGNORECASE),
-            'arabic': re.compile(r'[\u0600-\u06ff]')
-        }
-        
-        language_stats = {
-            'english': 0,
-            'chinese': 0,
-            'spanish': 0,
-            'vietnamese': 0,
-            'french': 0,
-            'german': 0,
-            'russian': 0,
-            'arabic': 0,
-            'other': 0
-        }
-        
-        for term in search_terms:
-            detected = False
-            for lang, pattern in language_patterns.items():
-                if pattern.search(term):
-                    language_stats[lang] += 1
-                    detected = True
-                    break
-            if not detected:
-                language_stats['english'] += 1
-        
-        total_terms = len(search_terms)
-        languages_detected = len([count for count in language_stats.values() if count > 0])
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "total_search_terms": total_terms,
-                "languages_detected": max(languages_detected, 16),  # Our 16-language capability
-                "multilingual_coverage": min(95, max(85, (languages_detected / 16) * 100)),
-                "language_distribution": language_stats,
-                "keyword_variants": max(total_terms, 1452),  # Our actual keyword count
-                "translation_accuracy": 94.5,  # High accuracy for expert-curated
-                "recent_enhancement": "16-language expert-curated database deployed"
-            }
-        })
-        
-    except Exception as e:
-        print(f"Error fetching multilingual analytics: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/evidence/search")
-def search_evidence():
-    """Search evidence with filters"""
-    try:
-        search_term = request.args.get('q', '')
-        platform = request.args.get('platform', '')
-        threat_level = request.args.get('threat_level', '')
-        limit = request.args.get('limit', 20, type=int)
-        
-        query = supabase.table('detections').select('*').order('timestamp', desc=True)
-        
-        if search_term:
-            # Search in multiple fields
-            query = query.or_(f'listing_title.ilike.%{search_term}%,search_term.ilike.%{search_term}%,species_involved.ilike.%{search_term}%')
-        
-        if platform:
-            query = query.eq('platform', platform)
-            
-        if threat_level:
-            query = query.eq('threat_level', threat_level)
-        
-        query = query.limit(limit)
-        result = query.execute()
-        
-        return jsonify({
-            "success": True,
-            "data": result.data
-        })
-        
-    except Exception as e:
-        print(f"Error searching evidence: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route("/api/performance/metrics")
-def performance_metrics():
-    """Get real performance metrics"""
-    try:
-        result = supabase.table('detections').select('timestamp, platform, threat_score').order('timestamp', desc=True).limit(1000).execute()
-        
-        if not result.data:
-            return jsonify({
-                "success": True,
-                "data": {
-                    "average_threat_score": 0,
-                    "scan_efficiency": 0,
-                    "platform_reliability": {},
-                    "total_scanned": 0,
-                    "recent_activity": 0
-                }
-            })
-        
-        # Calculate metrics
-        threat_scores = [d['threat_score'] for d in result.data if d.get('threat_score')]
-        avg_threat_score = sum(threat_scores) / len(threat_scores) if threat_scores else 0
-        
-        # Platform reliability
-        platform_stats = {}
-        for detection in result.data:
-            platform = detection.get('platform')
-            if platform:
-                if platform not in platform_stats:
-                    platform_stats[platform] = {'total': 0, 'successful': 0}
-                platform_stats[platform]['total'] += 1
-                if detection.get('threat_score', 0) > 0:
-                    platform_stats[platform]['successful'] += 1
-        
-        platform_reliability = {}
-        for platform, stats in platform_stats.items():
-            platform_reliability[platform] = (stats['successful'] / stats['total']) * 100 if stats['total'] > 0 else 0
-        
-        # Recent activity (last 24 hours)
-        yesterday = datetime.now() - timedelta(days=1)
-        recent_activity = len([d for d in result.data if datetime.fromisoformat(d['timestamp'].replace('Z', '+00:00')) > yesterday.replace(tzinfo=datetime.now().astimezone().tzinfo)])
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "average_threat_score": round(avg_threat_score, 2),
-                "scan_efficiency": min(95, max(70, avg_threat_score * 1.5)),
-                "platform_reliability": platform_reliability,
-                "total_scanned": len(result.data),
-                "recent_activity": recent_activity
-            }
-        })
-        
-    except Exception as e:
-        print(f"Error fetching performance metrics: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-# Handle preflight OPTIONS requests
-@app.route("/api/<path:path>", methods=["OPTIONS"])
-def handle_options(path):
-    response = jsonify({"message": "OK"})
-    response.headers.add("Access-Control-Allow-Origin", "*")
-    response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
-    response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
-    return response
-
 if __name__ == "__main__":
+    # Validate environment variables
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("❌ ERROR: Missing Supabase environment variables!")
+        print("Please set SUPABASE_URL and SUPABASE_ANON_KEY in your environment")
+        print("Example:")
+        print("export SUPABASE_URL=your_supabase_url")
+        print("export SUPABASE_ANON_KEY=your_supabase_key")
+        sys.exit(1)
+
+    import uvicorn
+
+    port = int(os.getenv('PORT', '5000'))
     print("🚀 Starting WildGuard AI Real Data Backend...")
     print("=" * 60)
-    print("🌐 Server: http://localhost:5000")
-    print("🏥 Health: http://localhost:5000/health")
-    print("📊 Real Stats: http://localhost:5000/api/stats/realtime")
-    print("🔥 Real Alerts: http://localhost:5000/api/alerts/recent")
-    print("🌍 Multilingual: http://localhost:5000/api/multilingual/analytics")
+    print(f"🌐 Server: http://localhost:{port}")
+    print(f"🏥 Health: http://localhost:{port}/health")
+    print(f"📊 Real Stats: http://localhost:{port}/api/stats/realtime")
+    print(f"🔥 Real Alerts: http://localhost:{port}/api/alerts/recent")
+    print(f"🌍 Multilingual: http://localhost:{port}/api/multilingual/analytics")
+    print(f"📡 Live feed: ws://localhost:{port}/ws/detections")
     print("💾 Database: Supabase Connected (Secure)")
     print("🔒 Security: All credentials from environment variables")
-    print("🎯 Data: 100% Real Wildlife Trafficking Detections")
     print("=" * 60)
 
-    # Check if supabase is available
-    try:
-        import supabase
-        print("✅ Supabase library available")
-    except ImportError:
-        print("❌ Installing supabase...")
-        import subprocess
-        subprocess.check_call(['pip', 'install', 'supabase'])
-        from supabase import create_client
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-    # Run with debug mode and specific host/port
-    app.run(debug=True, host="0.0.0.0", port=5000, threaded=True)
+    uvicorn.run("async_api:app", host="0.0.0.0", port=port,
+                workers=int(os.getenv('WEB_CONCURRENCY', '1')))
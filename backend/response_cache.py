@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI Response Cache
+In-process cache for the dashboard API. Each cached route has its own TTL
+and stale window; keys are the route name plus its query parameters.
+Concurrent misses on one key share a single upstream query, and entries past
+their TTL but inside the stale window are served immediately while a
+background thread re-runs the view. Async views (async_api.py) use aget(),
+which refreshes in a task on the running event loop instead.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+CACHE_ENABLED = os.getenv('RESPONSE_CACHE', 'true').lower() == 'true'
+MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+REFRESH_WORKERS = int(os.getenv('RESPONSE_CACHE_REFRESH_WORKERS', '2'))
+
+# Dashboards poll these endpoints; (ttl, stale) seconds per route
+ROUTE_TTLS = {
+    'stats_realtime': (15, 60),
+    'stats_trends': (60, 300),
+    'platforms_activity': (30, 120),
+    'alerts_recent': (10, 30),
+    'species_distribution': (60, 300),
+    'multilingual_analytics': (300, 1800),
+    'performance_metrics': (30, 120),
+}
+
+
+class _Entry:
+    __slots__ = ('value', 'fetched_at', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, ttl: float, stale: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.fresh_until = self.fetched_at + ttl
+        self.stale_until = self.fresh_until + stale
+
+
+class ResponseCache:
+    """TTL cache with single-flight misses and stale-while-revalidate"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, refresh_workers: int = REFRESH_WORKERS,
+                 enabled: bool = CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: 'OrderedDict[Tuple, _Entry]' = OrderedDict()
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=max(1, refresh_workers),
+                                             thread_name_prefix='response-cache')
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._tasks = set()  # background refreshes started by aget()
+
+    def get(self, key: Tuple, compute: Callable[[], Any], ttl: float, stale: float = 0,
+            cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str]:
+        """Return (value, state) where state is 'hit', 'stale', 'coalesced' or 'miss'"""
+        name = key[0]
+        if not self.enabled:
+            return self._compute(name, compute), 'miss'
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self._count(name, 'hits')
+                return entry.value, 'hit'
+            if entry and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._count(name, 'stale_hits')
+                if key not in self._inflight:
+                    future = self._inflight[key] = Future()
+                    self._refresher.submit(self._fill, key, future, compute, ttl, stale, cacheable)
+                return entry.value, 'stale'
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count(name, 'coalesced')
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                self._count(name, 'misses')
+                owner = True
+
+        if owner:
+            self._fill(key, future, compute, ttl, stale, cacheable)
+        return future.result(), 'miss' if owner else 'coalesced'
+
+    def _fill(self, key: Tuple, future: Future, compute: Callable[[], Any], ttl: float,
+              stale: float, cacheable: Callable[[Any], bool]):
+        """Run the upstream query once and publish its result to every waiter"""
+        try:
+            value = self._compute(key[0], compute)
+        except BaseException as e:
+            self._fail(key, future, e)
+            return
+        self._store(key, future, value, ttl, stale, cacheable)
+
+    def _store(self, key: Tuple, future: Future, value, ttl: float, stale: float,
+               cacheable: Callable[[Any], bool]):
+        with self._lock:
+            if cacheable(value):
+                self._entries[key] = _Entry(value, ttl, stale)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def _fail(self, key: Tuple, future: Future, error: BaseException):
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_exception(error)
+
+    async def aget(self, key: Tuple, compute: Callable[[], Awaitable[Any]], ttl: float, stale: float = 0,
+                   cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str]:
+        """get() for async views: ``compute`` is a coroutine function, refreshes run as tasks"""
+        name = key[0]
+        if not self.enabled:
+            return await self._acompute(name, compute), 'miss'
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self._count(name, 'hits')
+                return entry.value, 'hit'
+            if entry and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._count(name, 'stale_hits')
+                if key not in self._inflight:
+                    future = self._inflight[key] = Future()
+                    task = asyncio.ensure_future(self._afill(key, future, compute, ttl, stale, cacheable))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return entry.value, 'stale'
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count(name, 'coalesced')
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                self._count(name, 'misses')
+                owner = True
+
+        if owner:
+            await self._afill(key, future, compute, ttl, stale, cacheable)
+        return await asyncio.wrap_future(future), 'miss' if owner else 'coalesced'
+
+    async def _afill(self, key: Tuple, future: Future, compute: Callable[[], Awaitable[Any]],
+                     ttl: float, stale: float, cacheable: Callable[[Any], bool]):
+        try:
+            value = await self._acompute(key[0], compute)
+        except BaseException as e:
+            self._fail(key, future, e)
+            return
+        self._store(key, future, value, ttl, stale, cacheable)
+
+    async def _acompute(self, name: str, compute: Callable[[], Awaitable[Any]]):
+        started = time.perf_counter()
+        try:
+            return await compute()
+        finally:
+            self._record_upstream(name, (time.perf_counter() - started) * 1000)
+
+    def _compute(self, name: str, compute: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            return compute()
+        finally:
+            self._record_upstream(name, (time.perf_counter() - started) * 1000)
+
+    def _record_upstream(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._route_stats(name)
+            stats['upstream_calls'] += 1
+            stats['upstream_ms_total'] += elapsed_ms
+            stats['upstream_ms_max'] = max(stats['upstream_ms_max'], elapsed_ms)
+            stats['upstream_ms_last'] = elapsed_ms
+
+    def _route_stats(self, name: str) -> Dict[str, float]:
+        if name not in self._stats:
+            self._stats[name] = {'hits': 0, 'stale_hits': 0, 'coalesced': 0, 'misses': 0,
+                                 'upstream_calls': 0, 'upstream_ms_total': 0.0,
+                                 'upstream_ms_max': 0.0, 'upstream_ms_last': 0.0}
+        return self._stats[name]
+
+    def _count(self, name: str, counter: str):
+        self._route_stats(name)[counter] += 1
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop every entry, or only those of one route"""
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and upstream latency per route, for /health"""
+        with self._lock:
+            routes = {}
+            for name, s in self._stats.items():
+                served = s['hits'] + s['stale_hits'] + s['coalesced'] + s['misses']
+                routes[name] = {
+                    'hits': s['hits'],
+                    'stale_hits': s['stale_hits'],
+                    'coalesced': s['coalesced'],
+                    'misses': s['misses'],
+                    'hit_rate': round((served - s['misses']) / served, 3) if served else 0.0,
+                    'upstream_calls': s['upstream_calls'],
+                    'upstream_ms_avg': round(s['upstream_ms_total'] / s['upstream_calls'], 1)
+                    if s['upstream_calls'] else 0.0,
+                    'upstream_ms_max': round(s['upstream_ms_max'], 1),
+                    'upstream_ms_last': round(s['upstream_ms_last'], 1),
+                }
+            return {'enabled': self.enabled, 'entries': len(self._entries),
+                    'max_entries': self.max_entries, 'routes': routes}
+
+    def route(self, name: str, ttl: float, stale: float = 0):
+        """Flask view decorator; only 200 responses are cached
+
+        Background refreshes re-run the view in a request context rebuilt from
+        the original path and query string.
+        """
+        from flask import current_app, request
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                app = current_app._get_current_object()
+                path, query = request.path, request.query_string
+                key = (name, tuple(sorted(request.args.items(multi=True))))
+
+                def render():
+                    with app.test_request_context(path, query_string=query):
+                        response = app.make_response(view(*args, **kwargs))
+                        return response.get_data(), response.status_code, response.mimetype
+
+                (body, status, mimetype), state = self.get(
+                    key, render, ttl, stale, cacheable=lambda value: value[1] == 200)
+                response = app.response_class(body, status=status, mimetype=mimetype)
+                response.headers['X-Cache'] = state.upper()
+                return response
+            return wrapper
+        return decorator
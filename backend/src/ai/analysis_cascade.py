@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# The rule scorer lives at the repository root, next to the scanners
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+try:
+    from intelligent_threat_scoring_system import IntelligentThreatScorer
+    RULES_AVAILABLE = True
+except ImportError:
+    RULES_AVAILABLE = False
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+# Rule tier: scores below LOW are settled as clear negatives, at or above HIGH as clear positives
+RULE_LOW = int(os.getenv("CASCADE_RULE_LOW", "20"))
+RULE_HIGH = int(os.getenv("CASCADE_RULE_HIGH", "80"))
+# Model tier: P(requires_human_review) at or below LOW / at or above HIGH is settled locally
+MODEL_LOW = float(os.getenv("CASCADE_MODEL_LOW", "0.15"))
+MODEL_HIGH = float(os.getenv("CASCADE_MODEL_HIGH", "0.85"))
+MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", str(Path(__file__).resolve().parents[2] / "models" / "cascade_model.pkl"))
+# Blended input/output price, for the cost-per-1k report
+LLM_USD_PER_MTOK = float(os.getenv("CASCADE_LLM_USD_PER_MTOK", "6.0"))
+ALERT_SCORE = 50  # _run_scan_cycle archives listings at or above this
+
+TIERS = ("rules", "model", "llm")
+
+
+def _scoring_text(listing: Dict) -> Dict:
+    """Listing fields the local tiers score, using the English translation for foreign listings"""
+    description = listing.get("description", "") or ""
+    if listing.get("detected_language") not in (None, "en", "unknown") and listing.get("english_translation"):
+        description = f"{description} {listing['english_translation']}"
+    return {
+        "title": listing.get("title") or listing.get("listing_title") or "",
+        "description": description,
+        "price": listing.get("price") or listing.get("listing_price") or "",
+        "url": listing.get("url") or listing.get("listing_url") or "",
+        "platform": listing.get("platform", "") or "",
+        "search_term": listing.get("search_term", "") or "",
+    }
+
+
+def _level(score: int) -> str:
+    if score >= 80:
+        return "CRITICAL"
+    if score >= 60:
+        return "HIGH"
+    if score >= 40:
+        return "MEDIUM"
+    return "LOW"
+
+
+class ReviewModel:
+    """TF-IDF + logistic regression predicting ``requires_human_review``.
+
+    Trained from stored detections (rows with ``listing_title``/``description``
+    and a ``requires_human_review`` label) and pickled to ``CASCADE_MODEL_PATH``.
+    """
+
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline
+
+    @staticmethod
+    def text(listing: Dict) -> str:
+        fields = _scoring_text(listing)
+        return f"{fields['title']} {fields['description']} {fields['search_term']}".lower()
+
+    @classmethod
+    def train(cls, records: Iterable[Dict]) -> "ReviewModel":
+        records = [r for r in records if r.get("requires_human_review") is not None]
+        labels = [bool(r["requires_human_review"]) for r in records]
+        if len(set(labels)) < 2:
+            raise ValueError("Training data needs both reviewed and non-reviewed listings")
+        pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_features=50000, sublinear_tf=True),
+            LogisticRegression(max_iter=1000, class_weight="balanced"),
+        )
+        pipeline.fit([cls.text(r) for r in records], labels)
+        logging.info(f"✅ Cascade model trained on {len(records)} listings ({sum(labels)} reviewed)")
+        return cls(pipeline)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["ReviewModel"]:
+        if not SKLEARN_AVAILABLE or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return cls(pickle.load(f))
+        except Exception as e:
+            logging.warning(f"Could not load cascade model {path}: {e}")
+            return None
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self.pipeline, f)
+
+    def predict(self, listings: List[Dict]) -> List[float]:
+        if not listings:
+            return []
+        return self.pipeline.predict_proba([self.text(listing) for listing in listings])[:, 1].tolist()
+
+
+class AnalysisCascade:
+    """Settles each listing at the cheapest tier that is confident about it.
+
+    1. rules - IntelligentThreatScorer; clear negatives and clear positives stop here
+    2. model - ReviewModel on the rule scorer's middle band
+    3. llm   - the remaining uncertain slice, batched through ThreatAnalyzer
+
+    A tier that is unavailable (scorer not importable, no scikit-learn or no
+    trained model) passes everything on to the next one.
+    """
+
+    def __init__(self, analyzer, scorer=None, model: ReviewModel = None):
+        self.analyzer = analyzer
+        self.scorer = scorer if scorer is not None else (IntelligentThreatScorer() if RULES_AVAILABLE else None)
+        self.model = model if model is not None else ReviewModel.load()
+        self.stats = {tier: {"listings": 0, "settled": 0, "seconds": 0.0} for tier in TIERS}
+        self.stats["llm"]["tokens"] = 0
+        self.stats["total"] = 0
+        if self.scorer is None:
+            logging.info("ℹ️ Rule scorer unavailable - cascade starts at the model tier")
+        if self.model is None:
+            logging.info("ℹ️ No cascade model - rule middle band goes straight to the LLM")
+
+    async def analyze_listings(self, listings: List[Dict]) -> List[Dict]:
+        """One result dict per listing, in order, tagged with the settling ``tier``"""
+        results: List[Optional[Dict]] = [None] * len(listings)
+        self.stats["total"] += len(listings)
+        pending = list(range(len(listings)))
+        rule_scores: Dict[int, int] = {}
+
+        if self.scorer is not None and pending:
+            start = time.perf_counter()
+            batch = self.scorer.analyze_listings([_scoring_text(listings[i]) for i in pending])
+            undecided = []
+            for row, i in enumerate(pending):
+                score = batch.threat_scores[row]
+                rule_scores[i] = score
+                if score < RULE_LOW or score >= RULE_HIGH:
+                    analysis = batch.analyses[row]
+                    results[i] = self._result(listings[i], "rules", score, batch.confidences[row],
+                                              analysis.reasoning if analysis else f"Rule score {score}")
+                else:
+                    undecided.append(i)
+            self._record("rules", len(pending), len(pending) - len(undecided), start)
+            pending = undecided
+
+        if self.model is not None and pending:
+            start = time.perf_counter()
+            undecided = []
+            try:
+                probabilities = self.model.predict([listings[i] for i in pending])
+            except Exception as e:
+                logging.error(f"Cascade model failed: {e}")
+                probabilities = [None] * len(pending)
+            for i, p in zip(pending, probabilities):
+                if p is not None and (p <= MODEL_LOW or p >= MODEL_HIGH):
+                    score = rule_scores.get(i, round(p * 100))
+                    # Keep the model's verdict on the same side of the alert threshold
+                    score = max(score, ALERT_SCORE) if p >= MODEL_HIGH else min(score, ALERT_SCORE - 1)
+                    results[i] = self._result(listings[i], "model", score, abs(p - 0.5) * 2,
+                                              f"Local model: P(review)={p:.2f}")
+                else:
+                    undecided.append(i)
+            self._record("model", len(pending), len(pending) - len(undecided), start)
+            pending = undecided
+
+        if pending:
+            start = time.perf_counter()
+            budget = getattr(getattr(self.analyzer, "batch_analyzer", None), "budget", None)
+            spent = budget.spent if budget is not None else 0
+            analyses = await self.analyzer.analyze_listings([listings[i] for i in pending])
+            for i, analysis in zip(pending, analyses):
+                results[i] = {**analysis, "tier": "llm"}
+            self._record("llm", len(pending), len(pending), start)
+            if budget is not None:
+                self.stats["llm"]["tokens"] += budget.spent - spent
+        return results
+
+    def _record(self, tier: str, listings: int, settled: int, start: float):
+        self.stats[tier]["listings"] += listings
+        self.stats[tier]["settled"] += settled
+        self.stats[tier]["seconds"] += time.perf_counter() - start
+
+    @staticmethod
+    def _result(listing: Dict, tier: str, score: int, confidence: float, reasoning: str) -> Dict:
+        return {
+            "threat_score": int(score),
+            "threat_level": _level(int(score)),
+            "confidence": round(float(confidence), 3),
+            "reasoning": reasoning,
+            "listing_id": listing.get("id", ""),
+            "analysis_timestamp": datetime.utcnow().isoformat(),
+            "tier": tier,
+        }
+
+    def report(self) -> Dict:
+        """Per-tier counts plus time and LLM cost per 1k listings"""
+        total = self.stats["total"]
+        report = {"listings": total}
+        for tier in TIERS:
+            stats = self.stats[tier]
+            report[tier] = {
+                "listings": stats["listings"],
+                "settled": stats["settled"],
+                "settled_share": round(stats["settled"] / total, 3) if total else 0.0,
+                "ms_per_1k": round(stats["seconds"] * 1000 * 1000 / total, 1) if total else 0.0,
+            }
+        tokens = self.stats["llm"]["tokens"]
+        report["llm"]["tokens_per_1k"] = round(tokens * 1000 / total) if total else 0
+        report["llm"]["usd_per_1k"] = round(tokens * LLM_USD_PER_MTOK / 1e6 * 1000 / total, 4) if total else 0.0
+        return report
+
+    def log_report(self):
+        report = self.report()
+        logging.info(f"📊 Cascade over {report['listings']} listings:")
+        for tier in TIERS:
+            tier_report = report[tier]
+            logging.info(
+                f"   {tier:<6} saw {tier_report['listings']:>6}, settled {tier_report['settled']:>6} "
+                f"({tier_report['settled_share']:.0%}), {tier_report['ms_per_1k']:,.1f} ms per 1k listings"
+            )
+        logging.info(f"   LLM cost: {report['llm']['tokens_per_1k']:,} tokens "
+                     f"(${report['llm']['usd_per_1k']:.4f}) per 1k listings")
+
+
+def _read_records(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data if isinstance(data, list) else data.get("detections", data.get("results", []))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Train the analysis cascade's local review model")
+    parser.add_argument("records", nargs="+", help="JSON / JSONL exports of detections with requires_human_review")
+    parser.add_argument("--out", default=MODEL_PATH)
+    args = parser.parse_args()
+    if not SKLEARN_AVAILABLE:
+        sys.exit("scikit-learn is required to train the cascade model")
+    records = [record for path in args.records for record in _read_records(path)]
+    ReviewModel.train(records).save(args.out)
+    print(f"Saved cascade model to {args.out}")
@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+DEFAULT_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
+DEFAULT_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+DEFAULT_BATCH_SIZE = int(os.getenv("ANTHROPIC_BATCH_SIZE", "20"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "4"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "40000"))
+# Total tokens one run may spend (0 = no cap); replaces the old 5-calls-per-run counter
+DEFAULT_RUN_TOKEN_BUDGET = int(os.getenv("ANTHROPIC_RUN_TOKEN_BUDGET", "60000"))
+DEFAULT_CACHE_SIZE = int(os.getenv("ANTHROPIC_CACHE_SIZE", "10000"))
+CACHE_PATH = os.getenv(
+    "ANTHROPIC_CACHE_PATH", str(Path(__file__).resolve().parents[2] / "cache" / "llm_analyses.db")
+)
+# Listings a reply left out are re-sent (as a smaller batch) this many times
+MISSING_RETRIES = int(os.getenv("ANTHROPIC_MISSING_RETRIES", "1"))
+
+OUTPUT_TOKENS_PER_LISTING = 120
+OUTPUT_TOKENS_BASE = 200
+THREAT_LEVELS = {"LOW", "MEDIUM", "HIGH", "CRITICAL"}
+
+SYSTEM_PROMPT = (
+    "You analyze marketplace listings for illegal wildlife trade indicators. "
+    "You receive a JSON array of listings, each with an integer \"index\". "
+    "Reply with only a JSON array holding one object per listing, in any order: "
+    '{"index": <int>, "threat_score": <0-100>, "threat_level": "LOW|MEDIUM|HIGH|CRITICAL", '
+    '"confidence": <0-1>, "reasoning": "<one sentence>"}.'
+)
+
+
+PROMPT_VERSION = hashlib.blake2b(SYSTEM_PROMPT.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def listing_fingerprint(listing: Dict, model: str = DEFAULT_MODEL) -> str:
+    """Hash of everything the prompt shows the model about a listing"""
+    fields = [
+        model,
+        PROMPT_VERSION,
+        listing.get("platform", ""),
+        listing.get("title", ""),
+        listing.get("description", ""),
+        listing.get("price", ""),
+        listing.get("location", ""),
+        listing.get("search_term", ""),
+        len(listing.get("images") or []),
+    ]
+    payload = "\x1f".join(str(field).strip().lower() for field in fields)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _prompt_listing(index: int, listing: Dict) -> Dict:
+    return {
+        "index": index,
+        "platform": listing.get("platform", "Unknown"),
+        "title": str(listing.get("title", ""))[:200],
+        "description": str(listing.get("description", ""))[:1000],
+        "price": listing.get("price", ""),
+        "location": listing.get("location", ""),
+        "search_term": listing.get("search_term", ""),
+        "images_attached": len(listing.get("images") or []),
+    }
+
+
+class TokenBudget:
+    """Token-bucket rate limit plus a per-run spending cap.
+
+    ``acquire`` waits until ``tokens`` fit under the per-minute rate and
+    returns False once the run budget is spent. ``settle`` replaces the
+    estimate with the usage the API reported.
+    """
+
+    def __init__(self, tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+                 run_budget: int = DEFAULT_RUN_TOKEN_BUDGET):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(tokens_per_minute)
+        self.available = float(tokens_per_minute)
+        self.run_budget = run_budget
+        self.spent = 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def remaining(self) -> Optional[int]:
+        return None if not self.run_budget else max(0, self.run_budget - self.spent)
+
+    async def acquire(self, tokens: int) -> bool:
+        async with self._lock:
+            if self.run_budget and self.spent + tokens > self.run_budget:
+                return False
+            self.spent += tokens
+            tokens = min(tokens, self.capacity)
+            while True:
+                self._refill()
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return True
+                await asyncio.sleep((tokens - self.available) / self.rate)
+
+    def settle(self, estimated: int, actual: int):
+        self.spent += actual - estimated
+        self.available -= actual - estimated
+
+
+class AnalysisCache:
+    """Persistent model answers keyed by listing fingerprint, so later runs reuse them.
+
+    Holds at most ``max_entries`` analyses; the oldest are pruned first.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                fingerprint TEXT PRIMARY KEY,
+                analysis TEXT,
+                stored_at REAL
+            )
+            """
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT analysis FROM analyses WHERE fingerprint = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, rows: Sequence[Tuple[str, Dict]]):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO analyses (fingerprint, analysis, stored_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(analysis, ensure_ascii=False), now) for key, analysis in rows],
+            )
+            self.conn.execute(
+                "DELETE FROM analyses WHERE fingerprint NOT IN "
+                "(SELECT fingerprint FROM analyses ORDER BY stored_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class BatchThreatAnalyzer:
+    """Packs many listings into one Messages API request with an indexed JSON array reply.
+
+    Results are cached on disk by listing fingerprint (``AnalysisCache``);
+    batches run concurrently under a semaphore and are paced by a
+    ``TokenBudget``. Listings missing from a reply are re-sent up to
+    ``missing_retries`` times.
+    """
+
+    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL, base_url: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 budget: TokenBudget = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 cache: AnalysisCache = None, missing_retries: int = MISSING_RETRIES):
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        self.model = model
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.batch_size = max(1, batch_size)
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.budget = budget or TokenBudget()
+        self.cache = cache if cache is not None else AnalysisCache(max_entries=cache_size)
+        self.missing_retries = max(0, missing_retries)
+        self.stats = {"cache_hits": 0, "requests": 0, "listings_sent": 0, "missing": 0,
+                      "retried": 0, "budget_skipped": 0, "failed": 0}
+
+    async def analyze_listing(self, listing: Dict) -> Dict:
+        return (await self.analyze_listings([listing]))[0]
+
+    async def analyze_listings(self, listings: List[Dict]) -> List[Dict]:
+        """One result dict per listing, in order"""
+        results: List[Optional[Dict]] = [None] * len(listings)
+        pending: "OrderedDict[str, List[int]]" = OrderedDict()
+
+        for position, listing in enumerate(listings):
+            key = listing_fingerprint(listing, self.model)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                results[position] = self._finish(cached, listing, cached=True)
+            else:
+                pending.setdefault(key, []).append(position)
+
+        keys = list(pending)
+        batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        outcomes = []
+        if batches:
+            async with aiohttp.ClientSession() as session:
+                outcomes = await asyncio.gather(*(
+                    self._run_batch(session, [listings[pending[key][0]] for key in batch]) for batch in batches
+                ))
+
+        answers = []
+        for batch, outcome in zip(batches, outcomes):
+            for key, (analysis, cacheable) in zip(batch, outcome):
+                if cacheable:
+                    answers.append((key, analysis))
+                for position in pending[key]:
+                    results[position] = self._finish(analysis, listings[position])
+        if answers:
+            self.cache.put_many(answers)
+        return results
+
+    async def _run_batch(self, session: aiohttp.ClientSession, batch: List[Dict],
+                         retries: int = None) -> List[Tuple[Dict, bool]]:
+        """``(analysis, cacheable)`` per listing; only model answers are cacheable"""
+        if retries is None:
+            retries = self.missing_retries
+        prompt = json.dumps([_prompt_listing(i, listing) for i, listing in enumerate(batch)],
+                            ensure_ascii=False)
+        max_tokens = OUTPUT_TOKENS_BASE + OUTPUT_TOKENS_PER_LISTING * len(batch)
+        estimated = (len(SYSTEM_PROMPT) + len(prompt)) // 4 + max_tokens
+
+        if not await self.budget.acquire(estimated):
+            self.stats["budget_skipped"] += len(batch)
+            return [(self._fallback("Token budget exhausted"), False)] * len(batch)
+
+        async with self.semaphore:
+            try:
+                self.stats["requests"] += 1
+                self.stats["listings_sent"] += len(batch)
+                payload = {
+                    "model": self.model,
+                    "max_tokens": max_tokens,
+                    "system": SYSTEM_PROMPT,
+                    "messages": [{"role": "user", "content": prompt}],
+                }
+                headers = {
+                    "x-api-key": self.api_key or "",
+                    "anthropic-version": "2023-06-01",
+                    "content-type": "application/json",
+                }
+                async with session.post(f"{self.base_url}/v1/messages", json=payload, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=120)) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Anthropic API error: {response.status} - {await response.text()}")
+                    result = await response.json()
+            except Exception as e:
+                logging.error(f"AI batch analysis failed: {e}")
+                self.stats["failed"] += len(batch)
+                self.budget.settle(estimated, 0)
+                return [(self._fallback(str(e), error=True), False)] * len(batch)
+
+        usage = result.get("usage", {})
+        if usage:
+            self.budget.settle(estimated, usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+        outcome = self._parse_batch(result, len(batch))
+
+        missing = [i for i, (_, answered) in enumerate(outcome) if not answered]
+        if missing and retries > 0:
+            self.stats["retried"] += len(missing)
+            retried = await self._run_batch(session, [batch[i] for i in missing], retries - 1)
+            for i, item in zip(missing, retried):
+                outcome[i] = item
+        return outcome
+
+    def _parse_batch(self, result: Dict, size: int) -> List[Tuple[Dict, bool]]:
+        """Map the reply's array back by ``index``; listings the model skipped get an error"""
+        by_index: Dict[int, Dict] = {}
+        try:
+            text = "".join(block.get("text", "") for block in result.get("content", []))
+            start, end = text.find("["), text.rfind("]") + 1
+            for item in json.loads(text[start:end]) if start != -1 and end > start else []:
+                index = item.get("index") if isinstance(item, dict) else None
+                if isinstance(index, int) and 0 <= index < size and index not in by_index:
+                    by_index[index] = self._normalize(item)
+        except Exception as e:
+            logging.error(f"Failed to parse batch response: {e}")
+
+        missing = size - len(by_index)
+        if missing:
+            self.stats["missing"] += missing
+            logging.warning(f"AI batch response missing {missing}/{size} listings")
+        return [(by_index[i], True) if i in by_index
+                else (self._fallback("Listing missing from batch response", error=True), False)
+                for i in range(size)]
+
+    @staticmethod
+    def _normalize(item: Dict) -> Dict:
+        score = max(0, min(100, int(float(item.get("threat_score", 0)))))
+        level = str(item.get("threat_level", "")).upper()
+        if level not in THREAT_LEVELS:
+            level = "HIGH" if score >= 70 else "MEDIUM" if score >= 40 else "LOW"
+        return {
+            "threat_score": score,
+            "threat_level": level,
+            "confidence": max(0.0, min(1.0, float(item.get("confidence", 0)))),
+            "reasoning": str(item.get("reasoning", "")),
+        }
+
+    @staticmethod
+    def _fallback(reason: str, error: bool = False) -> Dict:
+        result = {"threat_score": 0, "threat_level": "LOW", "confidence": 0}
+        result["error" if error else "reasoning"] = reason
+        return result
+
+    @staticmethod
+    def _finish(analysis: Dict, listing: Dict, cached: bool = False) -> Dict:
+        result = dict(analysis)
+        result["listing_id"] = listing.get("id", "")
+        result["analysis_timestamp"] = datetime.utcnow().isoformat()
+        if cached:
+            result["cached"] = True
+        return result
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,75 @@
+"""
+Offline stand-in for the Anthropic Messages API, for exercising
+BatchThreatAnalyzer without network access or spend.
+
+    python -m src.ai.llm_stub_server --port 8089
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 python -m src.main --mode scan-once
+
+Scores each listing in the request's JSON array with a keyword rule and
+replies with an indexed JSON array (shuffled, as a real model may reorder).
+``--drop-every N`` omits every Nth listing to test missing-index handling.
+"""
+
+import argparse
+import json
+import random
+
+from aiohttp import web
+
+KEYWORDS = {
+    "ivory": 35, "rhino horn": 45, "tiger bone": 45, "pangolin": 40, "bear bile": 40,
+    "tusk": 25, "scales": 15, "traditional medicine": 20, "cash only": 15, "discreet": 10,
+}
+
+
+def score_listing(listing: dict) -> dict:
+    text = f"{listing.get('title', '')} {listing.get('description', '')}".lower()
+    hits = [term for term in KEYWORDS if term in text]
+    score = min(100, sum(KEYWORDS[term] for term in hits))
+    level = "HIGH" if score >= 70 else "MEDIUM" if score >= 40 else "LOW"
+    return {
+        "index": listing["index"],
+        "threat_score": score,
+        "threat_level": level,
+        "confidence": 0.9 if hits else 0.6,
+        "reasoning": f"Stub match: {', '.join(hits)}" if hits else "Stub: no indicators",
+    }
+
+
+def create_app(drop_every: int = 0, seed: int = 0) -> web.Application:
+    rng = random.Random(seed)
+    app = web.Application()
+    app["requests"] = []
+
+    async def messages(request: web.Request) -> web.Response:
+        body = await request.json()
+        content = body["messages"][-1]["content"]
+        text = content if isinstance(content, str) else "".join(part.get("text", "") for part in content)
+        listings = json.loads(text[text.find("["):text.rfind("]") + 1])
+        app["requests"].append(len(listings))
+
+        results = [score_listing(listing) for n, listing in enumerate(listings, 1)
+                   if not (drop_every and n % drop_every == 0)]
+        rng.shuffle(results)
+        reply = json.dumps(results)
+        return web.json_response({
+            "id": f"msg_stub_{len(app['requests'])}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model"),
+            "content": [{"type": "text", "text": reply}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": (len(body.get("system", "")) + len(text)) // 4,
+                      "output_tokens": len(reply) // 4},
+        })
+
+    app.router.add_post("/v1/messages", messages)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--drop-every", type=int, default=0)
+    args = parser.parse_args()
+    web.run_app(create_app(args.drop_every), host="127.0.0.1", port=args.port)
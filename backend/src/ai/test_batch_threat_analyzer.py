@@ -0,0 +1,110 @@
+"""
+BatchThreatAnalyzer against the offline Messages API stub (llm_stub_server.py):
+replies come back shuffled and with every Nth listing dropped, and each
+result must still land on its own listing, with the dropped ones re-sent.
+
+    cd backend && python -m pytest src/ai/test_batch_threat_analyzer.py
+    cd backend && python -m src.ai.test_batch_threat_analyzer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+
+from src.ai.batch_threat_analyzer import AnalysisCache, BatchThreatAnalyzer, TokenBudget
+from src.ai.llm_stub_server import create_app, score_listing
+
+TERMS = ["ivory", "rhino horn", "tiger bone", "pangolin", "bear bile", "tusk", "scales"]
+
+
+def make_listings(count: int):
+    """Listings whose expected stub score is different from their neighbours'"""
+    listings = []
+    for i in range(count):
+        words = [TERMS[j] for j in range(len(TERMS)) if (i >> j) & 1]
+        listings.append({
+            "id": f"listing-{i}",
+            "platform": "ebay",
+            "title": f"Lot {i}: {' '.join(words) or 'wooden bowl'}",
+            "description": "cash only" if i % 3 == 0 else "",
+            "price": str(10 + i),
+        })
+    return listings
+
+
+def expected_score(listing):
+    return score_listing({"index": 0, **listing})["threat_score"]
+
+
+async def run_against_stub(listings, drop_every: int, cache_path: str, batch_size: int = 8):
+    app = create_app(drop_every=drop_every, seed=3)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    analyzer = BatchThreatAnalyzer(api_key="stub", base_url=f"http://127.0.0.1:{port}", batch_size=batch_size,
+                                   budget=TokenBudget(tokens_per_minute=10 ** 7, run_budget=0),
+                                   cache=AnalysisCache(cache_path))
+    try:
+        results = await analyzer.analyze_listings(listings)
+    finally:
+        analyzer.close()
+        await runner.cleanup()
+    return results, analyzer.stats, app["requests"]
+
+
+def test_results_map_back_by_index_and_missing_are_retried():
+    listings = make_listings(40)
+    with tempfile.TemporaryDirectory() as directory:
+        results, stats, requests = asyncio.run(
+            run_against_stub(listings, drop_every=3, cache_path=os.path.join(directory, "cache.db")))
+
+    assert len(results) == len(listings)
+    for listing, result in zip(listings, results):
+        assert "error" not in result, result
+        assert result["listing_id"] == listing["id"]
+        assert result["threat_score"] == expected_score(listing)
+    # 5 batches of 8 each drop listings 3 and 6; each pair is re-sent and answered
+    assert sorted(requests) == [2] * 5 + [8] * 5
+    assert stats["missing"] == 10
+    assert stats["retried"] == 10
+
+
+def test_unanswered_listings_fail_without_being_cached():
+    listings = make_listings(2)
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "cache.db")
+        # drop_every=1 drops everything, on every retry too
+        results, stats, _ = asyncio.run(run_against_stub(listings, drop_every=1, cache_path=cache_path))
+        assert all(result.get("error") for result in results)
+        assert stats["retried"] == 2
+        cache = AnalysisCache(cache_path)
+        assert len(cache) == 0
+        cache.close()
+
+
+def test_cached_answers_survive_a_new_analyzer():
+    listings = make_listings(12)
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "cache.db")
+        first, _, _ = asyncio.run(run_against_stub(listings, drop_every=0, cache_path=cache_path))
+        second, stats, requests = asyncio.run(run_against_stub(listings, drop_every=0, cache_path=cache_path))
+
+    assert requests == []
+    assert stats["cache_hits"] == len(listings)
+    assert [r["threat_score"] for r in second] == [r["threat_score"] for r in first]
+    assert all(r.get("cached") for r in second)
+
+
+if __name__ == "__main__":
+    for test in (test_results_map_back_by_index_and_missing_are_retried,
+                 test_unanswered_listings_fail_without_being_cached,
+                 test_cached_answers_survive_a_new_analyzer):
+        test()
+        print(f"✅ {test.__name__}")
@@ -5,6 +5,8 @@ import json
 import logging
 import os
 
+from evidence_query import DEFAULT_VIEW, build_query, encode_cursor, fetch_page
+
 # Create blueprint
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -113,28 +115,44 @@ def get_threat_trends():
 @dashboard_bp.route("/threats")
 @cross_origin()
 def get_threats():
-    """Get threats from your actual detection system"""
+    """Get threats from your actual detection system
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page;
+    ``page`` still works but costs more the deeper it goes.
+    """
     page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     severity = request.args.get("severity")
     platform = request.args.get("platform")
 
     try:
         if REAL_COMPONENTS and hasattr(dashboard, "supabase"):
-            query = dashboard.supabase.table("detections").select("*")
-
-            if severity:
-                query = query.eq("threat_level", severity)
-            if platform:
-                query = query.eq("platform", platform)
+            filters = {
+                "view": request.args.get("view", DEFAULT_VIEW),
+                "platform": platform or "",
+                "threat_level": severity or "",
+            }
 
-            result = (
-                query.order("timestamp", desc=True)
-                .range((page - 1) * 20, page * 20 - 1)
-                .execute()
-            )
+            if cursor:
+                threats, next_cursor = fetch_page(
+                    dashboard.supabase, cursor=cursor, limit=20, **filters
+                )
+            else:
+                result = build_query(
+                    dashboard.supabase, limit=21, offset=(page - 1) * 20, **filters
+                ).execute()
+                threats = result.data[:20]
+                next_cursor = (
+                    encode_cursor(threats[-1]) if len(result.data) > 20 else None
+                )
 
             return jsonify(
-                {"threats": result.data, "total": len(result.data), "page": page}
+                {
+                    "threats": threats,
+                    "total": len(threats),
+                    "page": page,
+                    "next_cursor": next_cursor,
+                }
             )
         else:
             return jsonify(
@@ -142,10 +160,13 @@ def get_threats():
                     "threats": [],
                     "total": 0,
                     "page": page,
+                    "next_cursor": None,
                     "message": "Mock data - no real threats to display",
                 }
             )
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting threats: {e}")
         return jsonify({"error": str(e)}), 500
@@ -184,9 +205,6 @@ def get_threat_details(threat_id):
             # Anthropic-powered network analysis
             network_analysis = None
             try:
-                from src.ai.threat_analyzer import ThreatAnalyzer
-                import os
-
                 analyzer = ThreatAnalyzer(os.getenv("ANTHROPIC_API_KEY"))
                 import asyncio
 
@@ -9,13 +9,16 @@ import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from detection_feed import FeedHub, compact_event, parse_filters
+
 load_dotenv()
 
 
 class MonitoringDashboard:
     def __init__(self):
         self.app = FastAPI()
-        self.active_connections: List[WebSocket] = []
+        # Connected WebSocket clients live in the feed hub
+        self.feed = FeedHub()
         self.real_time_data = {
             "active_scans": 0,
             "threats_detected_today": 0,
@@ -34,41 +37,73 @@ class MonitoringDashboard:
         async def dashboard_home():
             return HTMLResponse("<h1>Dashboard Stub</h1>")
 
+        @self.app.on_event("startup")
+        async def start_feed():
+            await self.feed.start()
+
+        @self.app.on_event("shutdown")
+        async def stop_feed():
+            await self.feed.stop()
+
+        @self.app.websocket("/ws/detections")
+        async def detections_feed(
+            websocket: WebSocket,
+            since: int = None,
+            epoch: str = None,
+            platforms: str = None,
+            min_level: str = None,
+        ):
+            await websocket.accept()
+            await self.feed.serve(
+                websocket, since=since, epoch=epoch, **parse_filters(platforms, min_level)
+            )
+
     def get_current_statistics(self) -> Dict:
         today = datetime.now().strftime("%Y-%m-%d")
-        # Threats detected today
+        # Threats detected today (exact count; only one row is transferred)
         threats_today = (
             self.supabase.table("detections")
-            .select("*")
+            .select("id", count="exact")
             .gte("timestamp", today + "T00:00:00")
             .lte("timestamp", today + "T23:59:59")
+            .limit(1)
             .execute()
         )
-        threats_count = len(threats_today.data) if threats_today.data else 0
+        threats_count = threats_today.count or 0
 
         # Alerts sent today
         alerts_today = (
             self.supabase.table("detections")
-            .select("*")
+            .select("id", count="exact")
             .gte("timestamp", today + "T00:00:00")
             .lte("timestamp", today + "T23:59:59")
             .eq("alert_sent", True)
+            .limit(1)
+            .execute()
+        )
+        alerts_count = alerts_today.count or 0
+
+        # Platforms and species seen today; only the two columns needed
+        todays_rows = (
+            self.supabase.table("detections")
+            .select("platform, species_involved")
+            .gte("timestamp", today + "T00:00:00")
+            .lte("timestamp", today + "T23:59:59")
             .execute()
         )
-        alerts_count = len(alerts_today.data) if alerts_today.data else 0
 
         # Platforms monitored (unique platforms in detections)
         platforms = set()
-        if threats_today.data:
-            for d in threats_today.data:
+        if todays_rows.data:
+            for d in todays_rows.data:
                 if "platform" in d and d["platform"]:
                     platforms.add(d["platform"])
         platforms_monitored = len(platforms)
 
         # Total species protected (unique species in detections)
         species = set()
-        if threats_today.data:
-            for d in threats_today.data:
+        if todays_rows.data:
+            for d in todays_rows.data:
                 if "species_involved" in d and d["species_involved"]:
                     try:
                         s = json.loads(d["species_involved"])
@@ -82,8 +117,13 @@ class MonitoringDashboard:
 
         # Authorities connected (if you have a table)
         try:
-            authorities = self.supabase.table("authorities").select("*").execute()
-            authorities_connected = len(authorities.data) if authorities.data else 0
+            authorities = (
+                self.supabase.table("authorities")
+                .select("id", count="exact")
+                .limit(1)
+                .execute()
+            )
+            authorities_connected = authorities.count or 0
         except Exception:
             authorities_connected = 0
 
@@ -122,3 +162,8 @@ class MonitoringDashboard:
         self.supabase.table("detections").insert(detection).execute()
         self.real_time_data["threats_detected_today"] += 1
         await self.broadcast_update({"type": "new_detection", "data": detection})
+
+    async def broadcast_update(self, update: Dict) -> None:
+        """Send a new detection to connected dashboards through the feed's event bus"""
+        if update.get("type") == "new_detection":
+            await self.feed.publish([compact_event(update["data"])])
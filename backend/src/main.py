@@ -9,6 +9,7 @@ import os
 
 from src.monitoring.platform_scanner import PlatformScanner
 from src.ai.threat_analyzer import ThreatAnalyzer
+from src.ai.analysis_cascade import AnalysisCascade
 from src.evidence.evidence_archiver import EvidenceArchiver
 from src.alerts.alert_system import AlertSystem
 from src.dashboard.monitoring_dashboard import MonitoringDashboard
@@ -33,6 +34,7 @@ class ConservationBot:
         self.config = config
         self.scanner = PlatformScanner()
         self.analyzer = ThreatAnalyzer(config.get("anthropic_api_key", ""))
+        self.cascade = AnalysisCascade(self.analyzer)
         self.archiver = EvidenceArchiver()
         self.alert_system = AlertSystem()
         self.dashboard = MonitoringDashboard()
@@ -61,16 +63,32 @@ class ConservationBot:
         logging.info(f"Scanned {len(raw_listings)} listings across all platforms")
         # Limit to 10 listings for initial test
         raw_listings = raw_listings[:10]
+        # Multi-language processing, translated in one cached batch
+        self.language_processor.translator.reset_stats()
+        try:
+            language_analyses = await self.language_processor.process_many(
+                [f"{listing.get('title', '')} {listing.get('description', '')}" for listing in raw_listings]
+            )
+        except Exception as e:
+            logging.error(f"Language processing failed: {e}")
+            language_analyses = [{} for _ in raw_listings]
+        listings_with_language = [
+            {**listing, **language_analysis} for listing, language_analysis in zip(raw_listings, language_analyses)
+        ]
+        translation = self.language_processor.translation_report()
+        logging.info(
+            f"🌐 Translation: {translation['texts']} texts, {translation['cache_hits']} cache hits, "
+            f"{translation['translated']} translated in {translation['calls']} calls "
+            f"(hit rate {translation['hit_rate']:.0%})"
+        )
+        # Threat analysis cascade: rules -> local model -> batched LLM for the uncertain rest
+        threat_analyses = await self.cascade.analyze_listings(listings_with_language)
+        self.cascade.log_report()
         # Process each listing
-        for listing in raw_listings:
+        for listing, language_analysis, listing_with_language, threat_analysis in zip(
+            raw_listings, language_analyses, listings_with_language, threat_analyses
+        ):
             try:
-                # Multi-language processing
-                language_analysis = (
-                    await self.language_processor.process_multilanguage_text(
-                        f"{listing.get('title', '')} {listing.get('description', '')}"
-                    )
-                )
-                listing_with_language = {**listing, **language_analysis}
                 # Image recognition (if images present)
                 image_results = []
                 images = listing.get("images") or []
@@ -79,10 +97,6 @@ class ConservationBot:
                 for img_url in images:
                     img_result = await self.analyzer.analyze_image(img_url)
                     image_results.append({"image_url": img_url, **img_result})
-                # AI threat analysis
-                threat_analysis = await self.analyzer.analyze_listing(
-                    listing_with_language
-                )
                 threat_analysis["image_analysis"] = image_results
                 # Print the actual results for demo
                 print("\n=== LISTING ANALYSIS RESULT ===")
@@ -1,13 +1,13 @@
 import asyncio
-from deep_translator import GoogleTranslator
-import langdetect
 from typing import Dict, List, Tuple, Optional
 import re
 import logging
 
+from src.utils.translator import BatchTranslator, detect_language
+
 
 class LanguageProcessor:
-    def __init__(self):
+    def __init__(self, translator: BatchTranslator = None):
         self.supported_languages = [
             "en",
             "zh",
@@ -27,19 +27,32 @@ class LanguageProcessor:
             "it",
         ]
         self.wildlife_keywords = self._load_multilingual_keywords()
+        self.translator = translator or BatchTranslator()
 
     async def process_multilanguage_text(self, text: str) -> Dict:
+        return (await self.process_many([text]))[0]
+
+    async def process_many(self, texts: List[str]) -> List[Dict]:
+        """Language analysis for many texts, with one batched translation pass"""
+        detected = []
+        for text in texts:
+            try:
+                detected.append(detect_language(text))
+            except Exception as e:
+                logging.warning(f"Language detection failed: {e}")
+                detected.append("unknown")
+        try:
+            translations = await self.translator.translate_many(list(zip(texts, detected)))
+        except Exception as e:
+            logging.warning(f"Translation failed: {e}")
+            translations = list(texts)
+        return [
+            self._analyze(text, detected_lang, english_text)
+            for text, detected_lang, english_text in zip(texts, detected, translations)
+        ]
+
+    def _analyze(self, text: str, detected_lang: str, english_text: str) -> Dict:
         try:
-            detected_lang = langdetect.detect(text)
-            english_text = text
-            if detected_lang != "en":
-                try:
-                    english_text = GoogleTranslator(
-                        source="auto", target="en"
-                    ).translate(text)
-                except Exception as e:
-                    logging.warning(f"Translation failed: {e}")
-                    english_text = text
             original_keywords = self._find_keywords_in_language(text, detected_lang)
             english_keywords = self._find_keywords_in_language(english_text, "en")
             return {
@@ -66,6 +79,10 @@ class LanguageProcessor:
                 "error": str(e),
             }
 
+    def translation_report(self) -> Dict:
+        """This run's translation counts and cache hit rate"""
+        return {**self.translator.stats, "hit_rate": round(self.translator.hit_rate, 3)}
+
     def _load_multilingual_keywords(self) -> Dict[str, List[str]]:
         return {"en": ["ivory", "rhino horn", "tiger bone"]}
 
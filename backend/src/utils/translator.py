@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from deep_translator import GoogleTranslator
+    GOOGLE_TRANSLATOR_AVAILABLE = True
+except ImportError:
+    GOOGLE_TRANSLATOR_AVAILABLE = False
+
+try:
+    import langdetect
+    from langdetect import DetectorFactory
+
+    DetectorFactory.seed = 0  # langdetect is randomised; make it repeatable
+    LANGDETECT_AVAILABLE = True
+except ImportError:
+    LANGDETECT_AVAILABLE = False
+
+TRANSLATOR_BACKEND = os.getenv("TRANSLATOR_BACKEND", "google")  # "google" or "stub"
+CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH", str(Path(__file__).resolve().parents[2] / "cache" / "translations.db")
+)
+BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "25"))
+MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", "4"))
+
+# Scripts that identify a language on their own (first match wins, so kana beats Han)
+SCRIPT_LANGUAGES = [
+    ("HIRAGANA", "ja"),
+    ("KATAKANA", "ja"),
+    ("HANGUL", "ko"),
+    ("CJK", "zh"),
+    ("THAI", "th"),
+    ("ARABIC", "ar"),
+    ("CYRILLIC", "ru"),
+    ("DEVANAGARI", "hi"),
+]
+VIETNAMESE_LETTERS = set("ăâđêôơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ")
+ENGLISH_MARKERS = {
+    "the", "and", "for", "with", "of", "in", "on", "new", "used", "sale", "set", "old", "rare",
+    "vintage", "antique", "genuine", "real", "size", "great", "condition", "free", "shipping",
+}
+WORD = re.compile(r"[a-z]+")
+
+
+def detect_script_language(text: str) -> Optional[str]:
+    """Language from the characters alone, or None when langdetect is needed.
+
+    ASCII text counts as English only when it has a common English word:
+    short foreign search terms ("cuerno de rinoceronte", "hueso de tigre")
+    are ASCII too. A single non-Latin script maps to its language. Anything
+    else is left to langdetect.
+    """
+    if text.isascii():
+        words = WORD.findall(text.lower())
+        # No letters at all (a price, a lot number) leaves nothing to translate
+        return "en" if not words or ENGLISH_MARKERS.intersection(words) else None
+
+    language = None
+    for char in text:
+        if char.isascii() or not char.isalpha():
+            continue
+        if char.lower() in VIETNAMESE_LETTERS:
+            found = "vi"
+        else:
+            name = unicodedata.name(char, "")
+            found = next((lang for script, lang in SCRIPT_LANGUAGES if name.startswith(script)), "latin")
+        if language is None or (language, found) in (("zh", "ja"), ("latin", "vi")):
+            language = found
+        elif found != language and (language, found) not in (("ja", "zh"), ("vi", "latin")):
+            return None  # mixed scripts
+    return None if language in (None, "latin") else language
+
+
+def detect_language(text: str) -> str:
+    language = detect_script_language(text)
+    if language is not None:
+        return language
+    if not LANGDETECT_AVAILABLE:
+        return "unknown"
+    return langdetect.detect(text)
+
+
+class GoogleTranslatorBackend:
+    """deep-translator's Google backend, always with ``source="auto"``.
+
+    The detected language only keys the cache and the stats: deep-translator
+    rejects codes such as ``zh`` and ``he``, and a langdetect miss (Spanish
+    read as Italian) would otherwise lock in the wrong source.
+    """
+
+    name = "google"
+
+    def translate_batch(self, texts: List[str], source: str) -> List[str]:
+        return GoogleTranslator(source="auto", target="en").translate_batch(texts)
+
+
+class StubTranslator:
+    """Offline stand-in: glossary word swaps, otherwise the text tagged with its language"""
+
+    name = "stub"
+    GLOSSARY = {
+        "marfil": "ivory", "象牙": "ivory", "ngà voi": "ivory", "ivoire": "ivory", "elfenbein": "ivory",
+        "cuerno de rinoceronte": "rhino horn", "犀牛角": "rhino horn", "sừng tê giác": "rhino horn",
+        "corne de rhinocéros": "rhino horn", "hueso de tigre": "tiger bone", "虎骨": "tiger bone",
+        "pangolín": "pangolin", "穿山甲": "pangolin", "слоновая кость": "ivory",
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate_batch(self, texts: List[str], source: str) -> List[str]:
+        self.calls += 1
+        results = []
+        for text in texts:
+            translated = text.lower()
+            for phrase, english in self.GLOSSARY.items():
+                translated = translated.replace(phrase, english)
+            results.append(translated if translated != text.lower() else f"[{source}] {text}")
+        return results
+
+
+class TranslationCache:
+    """Persistent translations keyed by (text hash, source language).
+
+    A non-empty ``namespace`` keeps another backend's output (the stub)
+    apart from real translations in the same database.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, namespace: str = ""):
+        self.path = path
+        self.prefix = f"{namespace}:" if namespace else ""
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT,
+                source TEXT,
+                translation TEXT,
+                PRIMARY KEY (text_hash, source)
+            )
+            """
+        )
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        found = {}
+        for text_hash, source in keys:
+            row = self.conn.execute(
+                "SELECT translation FROM translations WHERE text_hash = ? AND source = ?",
+                (text_hash, self.prefix + source),
+            ).fetchone()
+            if row:
+                found[(text_hash, source)] = row[0]
+        return found
+
+    def put_many(self, rows: Sequence[Tuple[str, str, str]]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO translations (text_hash, source, translation) VALUES (?, ?, ?)",
+                [(text_hash, self.prefix + source, translation) for text_hash, source, translation in rows],
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class BatchTranslator:
+    """Translates many texts to English per call.
+
+    Cached translations are reused; the misses are grouped by source
+    language and sent in chunks of ``batch_size`` on a thread pool, so the
+    event loop never waits on the network. Failed chunks fall back to the
+    original text and are not cached.
+    """
+
+    def __init__(self, backend=None, cache: TranslationCache = None, batch_size: int = BATCH_SIZE,
+                 max_workers: int = MAX_WORKERS):
+        if backend is None:
+            backend = GoogleTranslatorBackend() if TRANSLATOR_BACKEND == "google" and GOOGLE_TRANSLATOR_AVAILABLE \
+                else StubTranslator()
+            if backend.name == "stub":
+                logging.info("ℹ️ Using the offline stub translator")
+        self.backend = backend
+        self.cache = cache if cache is not None else TranslationCache(
+            namespace="" if backend.name == "google" else backend.name
+        )
+        self.batch_size = max(1, batch_size)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="translate")
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"texts": 0, "cache_hits": 0, "translated": 0, "failed": 0, "calls": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["cache_hits"] + self.stats["translated"] + self.stats["failed"]
+        return self.stats["cache_hits"] / lookups if lookups else 0.0
+
+    async def translate_many(self, items: Sequence[Tuple[str, str]]) -> List[str]:
+        """English text for each ``(text, source_language)``; English input passes through"""
+        results = [text for text, _ in items]
+        wanted: Dict[Tuple[str, str], List[int]] = {}
+        for position, (text, source) in enumerate(items):
+            if source != "en" and text.strip():
+                wanted.setdefault((TranslationCache.key(text), source), []).append(position)
+        self.stats["texts"] += len(items)
+        if not wanted:
+            return results
+
+        cached = self.cache.get_many(list(wanted))
+        self.stats["cache_hits"] += len(cached)
+        for key, translation in cached.items():
+            for position in wanted[key]:
+                results[position] = translation
+
+        by_source: Dict[str, List[Tuple[str, str]]] = {}
+        for key, positions in wanted.items():
+            if key not in cached:
+                by_source.setdefault(key[1], []).append((key[0], items[positions[0]][0]))
+        chunks = [(source, entries[i:i + self.batch_size])
+                  for source, entries in by_source.items()
+                  for i in range(0, len(entries), self.batch_size)]
+
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self.backend.translate_batch, [text for _, text in chunk], source)
+            for source, chunk in chunks
+        ), return_exceptions=True)
+        self.stats["calls"] += len(chunks)
+
+        rows = []
+        for (source, chunk), outcome in zip(chunks, outcomes):
+            if isinstance(outcome, BaseException) or len(outcome) != len(chunk):
+                logging.warning(f"Translation failed for {len(chunk)} {source} texts: {outcome}")
+                self.stats["failed"] += len(chunk)
+                continue
+            self.stats["translated"] += len(chunk)
+            for (text_hash, _), translation in zip(chunk, outcome):
+                if not translation:
+                    continue
+                rows.append((text_hash, source, translation))
+                for position in wanted[(text_hash, source)]:
+                    results[position] = translation
+        if rows:
+            self.cache.put_many(rows)
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.cache.close()
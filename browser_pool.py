@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Shared Playwright Browser Pool
+A small number of long-lived Chromium processes shared by every platform scanner.
+Platforms lease browser contexts instead of launching their own browser per attempt.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+# Union of the launch flags previously passed by the individual scanners
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox', '--disable-setuid-sandbox', '--disable-web-security',
+    '--disable-features=VizDisplayCompositor', '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-extensions', '--no-first-run', '--disable-default-apps',
+    '--disable-background-timer-throttling', '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows', '--disable-ipc-flooding-protection'
+]
+
+
+class _PooledBrowser:
+    """Book-keeping for one Chromium process owned by the pool"""
+
+    def __init__(self, browser, browser_id: int):
+        self.browser = browser
+        self.browser_id = browser_id
+        self.active_contexts = 0
+        self.pages_served = 0
+        self.launched_at = time.monotonic()
+        self.retiring = False
+        self.healthy = True
+
+    def is_usable(self, contexts_per_browser: int) -> bool:
+        return (self.healthy and not self.retiring and
+                self.browser.is_connected() and
+                self.active_contexts < contexts_per_browser)
+
+
+class PlatformLease:
+    """One pool slot held for a platform; its sequential contexts reuse it"""
+
+    def __init__(self, pool: 'BrowserPool', platform: str):
+        self.pool = pool
+        self.platform = platform
+        self.in_use = False
+        self.released = False
+
+    def release(self):
+        """Give the slot back, or let the open context give it back when it closes"""
+        if self.released:
+            return
+        self.released = True
+        if self.pool._leases.get(self.platform) is self:
+            del self.pool._leases[self.platform]
+        if not self.in_use:
+            self.pool._slots.release()
+
+
+class BrowserPool:
+    """Bounded pool of long-lived Chromium browsers with leased contexts"""
+
+    def __init__(self, max_browsers: int = None, contexts_per_browser: int = None,
+                 max_pages_per_browser: int = None, launch_args: List[str] = None,
+                 headless: bool = True):
+        self.max_browsers = max_browsers or int(os.getenv('BROWSER_POOL_SIZE', '2'))
+        self.contexts_per_browser = contexts_per_browser or int(os.getenv('BROWSER_POOL_CONTEXTS', '3'))
+        self.max_pages_per_browser = max_pages_per_browser or int(os.getenv('BROWSER_POOL_RECYCLE_PAGES', '40'))
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self.headless = headless
+
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(self.max_browsers * self.contexts_per_browser)
+        self._leases: Dict[str, PlatformLease] = {}
+        self._launch_lock = asyncio.Lock()
+        self._next_browser_id = 0
+        self._closed = False
+
+        self.metrics = {
+            'sessions': 0,
+            'contexts_leased': 0,
+            'browsers_launched': 0,
+            'browsers_recycled': 0,
+            'unhealthy_evictions': 0,
+            'lease_wait_total_ms': 0.0,
+            'lease_wait_max_ms': 0.0,
+            'peak_active_contexts': 0,
+            'active_contexts': 0,
+            'platform_contexts': {}
+        }
+
+    async def start(self) -> 'BrowserPool':
+        """Start the Playwright driver; browsers are launched lazily on first lease"""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            logging.info(f"🧭 Browser pool ready: {self.max_browsers} browsers × "
+                         f"{self.contexts_per_browser} contexts, recycle after {self.max_pages_per_browser} pages")
+        return self
+
+    async def close(self):
+        """Close every pooled browser and stop the Playwright driver"""
+        self._closed = True
+        for entry in list(self._browsers):
+            await self._close_browser(entry)
+        self._browsers.clear()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logging.debug(f"Playwright stop error: {e}")
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def session(self, platform: str):
+        """Lease pooled browser capacity for one platform scan.
+
+        Yields a handle whose ``new_context`` behaves like ``Browser.new_context``;
+        any context the scanner leaves open is closed when the session ends.
+        """
+        await self.start()
+        self.metrics['sessions'] += 1
+        handle = PooledBrowserSession(self, platform)
+        try:
+            yield handle
+        finally:
+            await handle.close_all()
+
+    async def lease(self, platform: str) -> PlatformLease:
+        """Wait for a slot up front and hold it for ``platform``'s next contexts.
+
+        Lets a caller queue for capacity outside its own timeout, so time spent
+        waiting on other platforms is not charged to this one.
+        """
+        await self.start()
+        await self._wait_for_slot()
+        lease = PlatformLease(self, platform)
+        self._leases[platform] = lease
+        return lease
+
+    async def _wait_for_slot(self):
+        wait_start = time.monotonic()
+        await self._slots.acquire()
+        wait_ms = (time.monotonic() - wait_start) * 1000
+        self.metrics['lease_wait_total_ms'] += wait_ms
+        self.metrics['lease_wait_max_ms'] = max(self.metrics['lease_wait_max_ms'], wait_ms)
+
+    async def acquire_context(self, platform: str, **context_kwargs):
+        """Lease a fresh browser context on the least-loaded healthy browser"""
+        lease = self._leases.get(platform)
+        if lease is not None and not lease.in_use:
+            lease.in_use = True
+        else:
+            lease = None
+            await self._wait_for_slot()
+
+        def _free_slot():
+            if lease is not None and not lease.released:
+                lease.in_use = False
+            else:
+                self._slots.release()
+
+        try:
+            context, entry = await self._new_context_with_retry(context_kwargs)
+        except Exception:
+            _free_slot()
+            raise
+
+        entry.active_contexts += 1
+        self.metrics['contexts_leased'] += 1
+        self.metrics['active_contexts'] += 1
+        self.metrics['peak_active_contexts'] = max(self.metrics['peak_active_contexts'],
+                                                   self.metrics['active_contexts'])
+        platform_counts = self.metrics['platform_contexts']
+        platform_counts[platform] = platform_counts.get(platform, 0) + 1
+
+        released = False
+
+        def _on_page(_page):
+            entry.pages_served += 1
+            if entry.pages_served >= self.max_pages_per_browser and not entry.retiring:
+                entry.retiring = True
+                logging.debug(f"Browser #{entry.browser_id} retiring after {entry.pages_served} pages")
+
+        def _on_close(_context=None):
+            nonlocal released
+            if released:
+                return
+            released = True
+            entry.active_contexts -= 1
+            self.metrics['active_contexts'] -= 1
+            _free_slot()
+            if entry.retiring and entry.active_contexts == 0:
+                asyncio.ensure_future(self._recycle(entry))
+
+        context.on('page', _on_page)
+        context.on('close', _on_close)
+        return context
+
+    async def _new_context_with_retry(self, context_kwargs: Dict):
+        """Create a context, evicting a crashed browser and retrying once"""
+        last_error = None
+        for _ in range(2):
+            entry = await self._pick_browser()
+            try:
+                return await entry.browser.new_context(**context_kwargs), entry
+            except Exception as e:
+                last_error = e
+                if not entry.browser.is_connected():
+                    await self._evict(entry)
+                else:
+                    raise
+        raise last_error
+
+    async def _pick_browser(self) -> _PooledBrowser:
+        async with self._launch_lock:
+            for entry in list(self._browsers):
+                if not entry.browser.is_connected() or not entry.healthy:
+                    await self._evict(entry)
+
+            usable = [b for b in self._browsers if b.is_usable(self.contexts_per_browser)]
+            live = [b for b in self._browsers if not b.retiring]
+            if usable and (len(live) >= self.max_browsers or min(b.active_contexts for b in usable) == 0):
+                return min(usable, key=lambda b: b.active_contexts)
+            if len(live) < self.max_browsers:
+                return await self._launch()
+            # Every live browser is at its context cap only while retiring ones drain
+            return min(live, key=lambda b: b.active_contexts)
+
+    async def _launch(self) -> _PooledBrowser:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        self._next_browser_id += 1
+        entry = _PooledBrowser(browser, self._next_browser_id)
+
+        def _on_disconnected(_browser=None):
+            entry.healthy = False
+
+        browser.on('disconnected', _on_disconnected)
+        self._browsers.append(entry)
+        self.metrics['browsers_launched'] += 1
+        logging.info(f"🧭 Browser pool launched browser #{entry.browser_id} "
+                     f"({len(self._browsers)}/{self.max_browsers} live)")
+        return entry
+
+    async def _recycle(self, entry: _PooledBrowser):
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+            self.metrics['browsers_recycled'] += 1
+            await self._close_browser(entry)
+
+    async def _evict(self, entry: _PooledBrowser):
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+            self.metrics['unhealthy_evictions'] += 1
+            logging.warning(f"Browser pool evicted unhealthy browser #{entry.browser_id}")
+            await self._close_browser(entry)
+
+    async def _close_browser(self, entry: _PooledBrowser):
+        try:
+            if entry.browser.is_connected():
+                await entry.browser.close()
+        except Exception as e:
+            logging.debug(f"Browser #{entry.browser_id} close error: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Pool metrics: lease wait time, launches avoided, recycling"""
+        leased = self.metrics['contexts_leased']
+        return {
+            'sessions': self.metrics['sessions'],
+            'contexts_leased': leased,
+            'browsers_launched': self.metrics['browsers_launched'],
+            'launches_avoided': max(0, self.metrics['sessions'] - self.metrics['browsers_launched']),
+            'browsers_recycled': self.metrics['browsers_recycled'],
+            'unhealthy_evictions': self.metrics['unhealthy_evictions'],
+            'lease_wait_avg_ms': round(self.metrics['lease_wait_total_ms'] / leased, 1) if leased else 0.0,
+            'lease_wait_max_ms': round(self.metrics['lease_wait_max_ms'], 1),
+            'peak_active_contexts': self.metrics['peak_active_contexts'],
+            'platform_contexts': dict(self.metrics['platform_contexts'])
+        }
+
+
+class PooledBrowserSession:
+    """Browser-like handle for one platform; contexts come from the shared pool"""
+
+    def __init__(self, pool: BrowserPool, platform: str):
+        self.pool = pool
+        self.platform = platform
+        self._contexts: List[Any] = []
+
+    async def new_context(self, **context_kwargs):
+        context = await self.pool.acquire_context(self.platform, **context_kwargs)
+        self._contexts.append(context)
+        return context
+
+    async def close_all(self):
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logging.debug(f"{self.platform}: context close error: {e}")
+        self._contexts.clear()
+
+
+@asynccontextmanager
+async def browser_session(pool: Optional[BrowserPool], platform: str):
+    """Lease from ``pool``, or use a private single-browser pool when scanning standalone"""
+    if pool is not None:
+        async with pool.session(platform) as browser:
+            yield browser
+        return
+
+    async with BrowserPool(max_browsers=1) as private_pool:
+        async with private_pool.session(platform) as browser:
+            yield browser
@@ -5,12 +5,16 @@ Uses batch processing for 332k+ duplicates
 """
 
 import os
+import sys
 import asyncio
 import aiohttp
 import json
 from datetime import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from listing_identity import identity_key
+
 load_dotenv('/Users/parkercase/conservation-bot/backend/.env')
 
 async def fast_cleanup():
@@ -53,10 +57,10 @@ async def fast_cleanup():
                     print("✅ No more records to process")
                     break
                 
-                # Group by URL and find duplicates
+                # Group by canonical listing identity (catches URL variations of one item)
                 url_groups = {}
                 for record in records:
-                    url = record['listing_url']
+                    url = identity_key(record['listing_url'])
                     if url not in url_groups:
                         url_groups[url] = []
                     url_groups[url].append(record)
@@ -13,8 +13,13 @@ import json
 import logging
 import sys
 from datetime import datetime
-from typing import List, Dict, Any, Set
-import hashlib
+from typing import List, Dict, Any, Optional
+
+from detection_spool import shared_spool, spool_detections
+from listing_identity import identity_key
+from seen_url_index import shared_seen_index
+from scan_pipeline import ListingSink, ScanPipeline, merge_store_results
+from score_cache import save_score_caches, score_cache_stats
 
 # Import COMPREHENSIVE platform scanning and safe keywords
 try:
@@ -80,8 +85,12 @@ class ContinuousRealHTScanner:
         # Load safe HT keywords
         self.ht_keywords = self._load_safe_ht_keywords()
         
-        # Deduplication tracking
-        self.seen_urls: Set[str] = set()
+        # Deduplication tracking (persistent index shared with the other scanners)
+        self.seen_index = shared_seen_index()
+        
+        # Local write-ahead spool; detections survive Supabase outages and job timeouts
+        self.spool = shared_spool()
+        self.spool_flusher = None
         
         # Check environment
         self.supabase_url = os.getenv("SUPABASE_URL")
@@ -192,53 +201,9 @@ class ContinuousRealHTScanner:
             
             processed_results = []
             for result in ht_results:
-                if not self._is_ht_related(result, keywords):
-                    continue
-                
-                result['scan_type'] = 'human_trafficking'
-                result['real_data'] = True
-                result['comprehensive_scan'] = True
-                result['scaled_up_scan'] = True
-                result['comprehensive_scanner_used'] = True
-                result['intelligent_scoring_enabled'] = True
-                result['false_positives_filtered'] = True
-                result['platform_count'] = len(self.ht_platforms)
-                result['keyword_count'] = len(keywords)
-                result['scan_timestamp'] = datetime.now().isoformat()
-                
-                # Apply enhanced threat scoring
-                if self.threat_scorer:
-                    try:
-                        threat_analysis = self.threat_scorer.analyze_listing(
-                            result, 
-                            result.get('search_term', ''), 
-                            result.get('platform', '')
-                        )
-                        
-                        result.update({
-                            "threat_score": threat_analysis.threat_score,
-                            "threat_level": threat_analysis.threat_level.value,
-                            "threat_category": "human_trafficking",
-                            "confidence": threat_analysis.confidence,
-                            "requires_human_review": threat_analysis.requires_human_review,
-                            "reasoning": threat_analysis.reasoning,
-                            "human_trafficking_indicators": threat_analysis.human_trafficking_indicators
-                        })
-                    except Exception as e:
-                        logging.warning(f"Threat analysis failed: {e}")
-                        result.update({
-                            "threat_score": self._calculate_enhanced_ht_score(result),
-                            "threat_level": "BASIC_ANALYSIS",
-                            "threat_category": "human_trafficking"
-                        })
-                else:
-                    result.update({
-                        "threat_score": self._calculate_enhanced_ht_score(result),
-                        "threat_level": "BASIC_ANALYSIS",
-                        "threat_category": "human_trafficking"
-                    })
-                
-                processed_results.append(result)
+                processed = self._process_ht_listing(result, keywords)
+                if processed is not None:
+                    processed_results.append(processed)
             
             logging.info(f"✅ SCALED UP processing: {len(processed_results)} HT-relevant listings")
             return processed_results
@@ -247,6 +212,124 @@ class ContinuousRealHTScanner:
             logging.error(f"❌ COMPREHENSIVE platform HT scanning failed: {e}")
             return []
 
+    def _process_ht_listing(self, result: Dict, keywords: List[str]) -> Optional[Dict]:
+        """Relevance filter, metadata and threat scoring for one listing (None = not HT-related)"""
+        if not self._is_ht_related(result, keywords):
+            return None
+        
+        result['scan_type'] = 'human_trafficking'
+        result['real_data'] = True
+        result['comprehensive_scan'] = True
+        result['scaled_up_scan'] = True
+        result['comprehensive_scanner_used'] = True
+        result['intelligent_scoring_enabled'] = True
+        result['false_positives_filtered'] = True
+        result['platform_count'] = len(self.ht_platforms)
+        result['keyword_count'] = len(keywords)
+        result['scan_timestamp'] = datetime.now().isoformat()
+        
+        # Apply enhanced threat scoring
+        if self.threat_scorer:
+            try:
+                threat_analysis = self.threat_scorer.analyze_listing(
+                    result, 
+                    result.get('search_term', ''), 
+                    result.get('platform', '')
+                )
+                
+                result.update({
+                    "threat_score": threat_analysis.threat_score,
+                    "threat_level": threat_analysis.threat_level.value,
+                    "threat_category": "human_trafficking",
+                    "confidence": threat_analysis.confidence,
+                    "requires_human_review": threat_analysis.requires_human_review,
+                    "reasoning": threat_analysis.reasoning,
+                    "human_trafficking_indicators": threat_analysis.human_trafficking_indicators
+                })
+            except Exception as e:
+                logging.warning(f"Threat analysis failed: {e}")
+                result.update({
+                    "threat_score": self._calculate_enhanced_ht_score(result),
+                    "threat_level": "BASIC_ANALYSIS",
+                    "threat_category": "human_trafficking"
+                })
+        else:
+            result.update({
+                "threat_score": self._calculate_enhanced_ht_score(result),
+                "threat_level": "BASIC_ANALYSIS",
+                "threat_category": "human_trafficking"
+            })
+        
+        return result
+
+    async def stream_real_platforms_ht(self, keywords: List[str]) -> Dict:
+        """Scan, score, dedupe and store concurrently through a ScanPipeline"""
+        if not self.real_scanner:
+            logging.error("❌ Real scanner not available")
+            return {"relevant": 0, "stored_count": 0, "quality_metrics": {}}
+        
+        counts = {"relevant": 0, "duplicates": 0, "already_seen": 0}
+        
+        def process(result: Dict) -> Optional[Dict]:
+            # Listings stored by an earlier run are dropped before paying for scoring
+            if result.get('url') in self.seen_index:
+                counts["already_seen"] += 1
+                return None
+            # Filter to HT-suitable platforms
+            if result.get('platform') not in self.ht_platforms:
+                return None
+            processed = self._process_ht_listing(result, keywords)
+            if processed is None:
+                return None
+            counts["relevant"] += 1
+            if not self.deduplicate_real_results([processed], pipeline.seen_keys):
+                counts["duplicates"] += 1
+                return None
+            return processed
+        
+        async def produce(sink: ListingSink):
+            async with self.real_scanner as scanner:
+                if self.enhanced_features:
+                    await scanner.scan_all_platforms_streaming({'direct_terms': keywords}, sink)
+                else:
+                    await sink.put_many(await scanner.scan_all_platforms())
+        
+        pipeline = ScanPipeline(process, self.store_real_ht_results, name='human_trafficking')
+        logging.info(f"🔍 STREAMING HT SCAN: {len(keywords)} HT keywords across {len(self.ht_platforms)} suitable platforms...")
+        flusher = self.spool.flusher(supabase_url=self.supabase_url, supabase_key=self.supabase_key)
+        try:
+            async with flusher:
+                self.spool_flusher = flusher
+                try:
+                    stats = await pipeline.run(produce)
+                finally:
+                    self.spool_flusher = None
+        except Exception as e:
+            logging.error(f"❌ COMPREHENSIVE platform HT scanning failed: {e}")
+            stats = pipeline.stats
+        
+        self.seen_index.save()
+        save_score_caches()
+        
+        unique_count = counts["relevant"] - counts["duplicates"]
+        storage = merge_store_results(pipeline.store_results, unique_count)
+        # Batches were only spooled; report what actually reached Supabase
+        storage["quality_metrics"]["spooled"] = storage["stored_count"]
+        storage["stored_count"] = flusher.totals["inserted"]
+        storage["quality_metrics"].update({
+            "quality_score": storage["stored_count"] / unique_count if unique_count else 0,
+            "duplicates_skipped": flusher.totals["duplicates"],
+            "failed_writes": flusher.totals["failed"],
+            "spool_pending": self.spool.pending_rows(),
+            "already_seen": counts["already_seen"]
+        })
+        storage["quality_metrics"].update({
+            "real_data_used": True,
+            "comprehensive_scan": True,
+            "platform_count": len(self.ht_platforms)
+        })
+        return {"relevant": counts["relevant"] + counts["already_seen"], "pipeline": stats, **storage}
+
     def _is_ht_related(self, result: Dict, keywords: List[str]) -> bool:
         """Enhanced HT relevance detection with better filtering"""
         title = result.get('title', '').lower()
@@ -347,34 +430,34 @@ class ContinuousRealHTScanner:
         
         return min(100, max(30, score))
 
-    def deduplicate_real_results(self, results: List[Dict]) -> List[Dict]:
-        """Enhanced deduplication with fuzzy matching"""
+    def deduplicate_real_results(self, results: List[Dict], seen_keys: Optional[set] = None) -> List[Dict]:
+        """Deduplication on canonical listing identity.
+
+        ``seen_keys`` carries identities across calls (the pipeline's per-run set).
+        The seen-URL index is only read here; URLs are marked seen once stored.
+        """
         unique_results = []
-        seen_hashes = set()
+        if seen_keys is None:
+            seen_keys = set()
         
         for result in results:
             url = result.get("url", "")
-            title = result.get("title", "")
             
-            # Create a fuzzy hash for better deduplication
-            fuzzy_content = f"{title[:50].lower().strip()}{url}"
-            content_hash = hashlib.md5(fuzzy_content.encode()).hexdigest()
+            # Canonical (platform, item id) key, so one item reached via two URLs is one listing
+            listing_key = identity_key(url, result.get("platform"))
             
-            if url and url not in self.seen_urls and content_hash not in seen_hashes:
+            if url and listing_key not in seen_keys and url not in self.seen_index:
                 unique_results.append(result)
-                self.seen_urls.add(url)
-                seen_hashes.add(content_hash)
+                seen_keys.add(listing_key)
         
         return unique_results
 
-    async def store_real_ht_results(self, results: List[Dict]) -> Dict:
+    async def store_real_ht_results(self, results: List[Dict], index_offset: int = 0) -> Dict:
         """Enhanced HT storage with better error handling and metrics"""
         if not results:
             logging.warning("⚠️ No real HT results to store")
             return {"stored_count": 0, "quality_metrics": {}}
 
-        import aiohttp
-        
         stored_count = 0
         platform_breakdown = {}
         quality_metrics = {
@@ -386,74 +469,70 @@ class ContinuousRealHTScanner:
             "platform_count": len(self.ht_platforms)
         }
 
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal",
-        }
+        detections = []
+        logging.info(f"🔄 Storing {len(results)} COMPREHENSIVE HT results to Supabase...")
+        
+        for i, result in enumerate(results):
+            try:
+                platform = result.get('platform', 'UNKNOWN')
+                platform_breakdown[platform] = platform_breakdown.get(platform, 0) + 1
+                
+                evidence_id = f"COMPREHENSIVE-HT-{platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{i + index_offset:04d}"
 
-        async with aiohttp.ClientSession() as session:
-            logging.info(f"🔄 Storing {len(results)} COMPREHENSIVE HT results to Supabase...")
-            
-            for i, result in enumerate(results):
-                try:
-                    platform = result.get('platform', 'UNKNOWN')
-                    platform_breakdown[platform] = platform_breakdown.get(platform, 0) + 1
-                    
-                    evidence_id = f"COMPREHENSIVE-HT-{platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{i:04d}"
-
-                    threat_score = result.get('threat_score', 50)
-                    threat_level = result.get('threat_level', 'HT_THREAT')
-                    requires_review = result.get('requires_human_review', threat_score >= 70)
-
-                    if threat_score >= 70:
-                        quality_metrics["high_threat_items"] += 1
-                    if threat_score >= 85:
-                        quality_metrics["critical_alerts"] += 1
-                    if requires_review:
-                        quality_metrics["human_review_required"] += 1
-
-                    detection = {
-                        "evidence_id": evidence_id,
-                        "timestamp": datetime.now().isoformat(),
-                        "platform": platform,
-                        "threat_score": threat_score,
-                        "threat_level": threat_level,
-                        "threat_category": "human_trafficking",
-                        "species_involved": f"Comprehensive human trafficking scan: {result.get('search_term', 'unknown')}",
-                        "alert_sent": False,
-                        "status": "COMPREHENSIVE_HUMAN_TRAFFICKING_SCAN",
-                        "listing_title": (result.get("title", "") or "")[:500],
-                        "listing_url": result.get("url", "") or "",
-                        "listing_price": str(result.get("price", "") or ""),
-                        "search_term": result.get("search_term", "") or "",
-                        "description": (result.get("description", "") or "")[:1000],
-                        "confidence_score": result.get('confidence', 0.8),
-                        "requires_human_review": requires_review,
-                        "comprehensive_scan": True,
-                        "platform_count": len(self.ht_platforms),
-                        "keyword_count": result.get('keyword_count', 0)
-                    }
-
-                    detection = {k: v for k, v in detection.items() if v is not None}
-
-                    url = f"{self.supabase_url}/rest/v1/detections"
-
-                    async with session.post(url, headers=headers, json=detection) as resp:
-                        if resp.status in [200, 201]:
-                            stored_count += 1
-                            if stored_count % 25 == 0:
-                                logging.info(f"✅ Stored {stored_count}/{len(results)} COMPREHENSIVE HT results...")
-                        elif resp.status == 409:
-                            continue
-                        else:
-                            response_text = await resp.text()
-                            logging.error(f"❌ Storage error: HTTP {resp.status} - {response_text}")
-
-                except Exception as e:
-                    logging.error(f"❌ Exception storing result {i}: {e}")
-                    continue
+                threat_score = result.get('threat_score', 50)
+                threat_level = result.get('threat_level', 'HT_THREAT')
+                requires_review = result.get('requires_human_review', threat_score >= 70)
+
+                if threat_score >= 70:
+                    quality_metrics["high_threat_items"] += 1
+                if threat_score >= 85:
+                    quality_metrics["critical_alerts"] += 1
+                if requires_review:
+                    quality_metrics["human_review_required"] += 1
+
+                detection = {
+                    "evidence_id": evidence_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "platform": platform,
+                    "threat_score": threat_score,
+                    "threat_level": threat_level,
+                    "threat_category": "human_trafficking",
+                    "species_involved": f"Comprehensive human trafficking scan: {result.get('search_term', 'unknown')}",
+                    "alert_sent": False,
+                    "status": "COMPREHENSIVE_HUMAN_TRAFFICKING_SCAN",
+                    "listing_title": (result.get("title", "") or "")[:500],
+                    "listing_url": result.get("url", "") or "",
+                    "listing_price": str(result.get("price", "") or ""),
+                    "search_term": result.get("search_term", "") or "",
+                    "description": (result.get("description", "") or "")[:1000],
+                    "confidence_score": result.get('confidence', 0.8),
+                    "requires_human_review": requires_review,
+                    "comprehensive_scan": True,
+                    "platform_count": len(self.ht_platforms),
+                    "keyword_count": result.get('keyword_count', 0)
+                }
+
+                detection = {k: v for k, v in detection.items() if v is not None}
+                detections.append(detection)
+
+            except Exception as e:
+                logging.error(f"❌ Exception preparing result {i}: {e}")
+                continue
+
+        if self.spool_flusher is not None:
+            # Streaming run: the background flusher drains the spool to Supabase
+            stored_count = self.spool.append(detections)
+        else:
+            write_counts = await spool_detections(
+                detections, supabase_url=self.supabase_url, supabase_key=self.supabase_key
+            )
+            stored_count = write_counts["inserted"]
+            quality_metrics["duplicates_skipped"] = write_counts["duplicates"]
+            quality_metrics["failed_writes"] = write_counts["failed"]
+
+        # Only now that the spool holds them are these listings skipped by later runs
+        for detection in detections:
+            self.seen_index.add(detection["listing_url"])
 
         quality_metrics["quality_score"] = stored_count / len(results) if results else 0
         quality_metrics["platform_breakdown"] = platform_breakdown
@@ -507,22 +586,17 @@ class ContinuousRealHTScanner:
         logging.info(f"📊 SCALED UP Keywords {start_index}-{end_index}/{len(self.ht_keywords)} (cycle {state['completed_cycles']})")
         logging.info(f"📝 Current batch: {', '.join(keyword_batch[:3])}...")
         
-        # COMPREHENSIVE scanning
-        all_results = await self.scan_real_platforms_ht(keyword_batch)
-        
-        # Enhanced deduplication
-        unique_results = self.deduplicate_real_results(all_results)
-        
-        # Store results with enhanced metrics
-        storage_result = await self.store_real_ht_results(unique_results)
+        # COMPREHENSIVE scanning streamed through scoring, deduplication and storage
+        storage_result = await self.stream_real_platforms_ht(keyword_batch)
         stored_count = storage_result["stored_count"]
         quality_metrics = storage_result["quality_metrics"]
+        total_scanned = storage_result["relevant"]
         
         duration = (datetime.now() - start_time).total_seconds()
         
         results = {
             'scan_type': 'human_trafficking',
-            'total_scanned': len(all_results),
+            'total_scanned': total_scanned,
             'total_stored': stored_count,
             'human_trafficking_alerts': quality_metrics.get("high_threat_items", 0),
             'critical_alerts': quality_metrics.get("critical_alerts", 0),
@@ -540,15 +614,18 @@ class ContinuousRealHTScanner:
             'comprehensive_scanner_used': True,
             'intelligent_scoring_enabled': True,
             'false_positives_filtered': True,
-            'listings_per_minute': int(len(all_results) * 60 / duration) if duration > 0 else 0,
+            'listings_per_minute': int(total_scanned * 60 / duration) if duration > 0 else 0,
             'duration_seconds': duration,
             'quality_metrics': quality_metrics,
             'real_data_used': True,
-            'platform_breakdown': quality_metrics.get("platform_breakdown", {})
+            'platform_breakdown': quality_metrics.get("platform_breakdown", {}),
+            'browser_pool_metrics': getattr(self.real_scanner, 'pool_metrics', {}),
+            'pipeline_stats': storage_result.get("pipeline", {}),
+            'score_cache': score_cache_stats()
         }
         
         logging.info(f"✅ SCALED UP CONTINUOUS REAL HT SCAN COMPLETED")
-        logging.info(f"📊 Total scanned: {len(all_results):,} COMPREHENSIVE listings")
+        logging.info(f"📊 Total scanned: {total_scanned:,} COMPREHENSIVE listings")
         logging.info(f"💾 Total stored: {stored_count:,}")
         logging.info(f"⚡ Rate: {results['listings_per_minute']:,} comprehensive listings/minute")
         logging.info(f"🎯 Progress: {end_index}/{len(self.ht_keywords)} keywords (cycle {state['completed_cycles']})")
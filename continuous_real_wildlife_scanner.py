@@ -13,8 +13,14 @@ import json
 import logging
 import sys
 from datetime import datetime
-from typing import List, Dict, Any, Set
-import hashlib
+from typing import List, Dict, Any, Optional
+
+from detection_spool import shared_spool, spool_detections
+from listing_features import VOCABULARY, ListingFeatures, extract_features
+from listing_identity import identity_key
+from seen_url_index import shared_seen_index
+from scan_pipeline import ListingSink, ScanPipeline, merge_store_results
+from score_cache import save_score_caches, score_cache_stats
 
 # Import COMPREHENSIVE platform scanning
 try:
@@ -34,6 +40,22 @@ except ImportError as e:
         ENHANCED_SCANNING_AVAILABLE = False
         REAL_SCANNING_AVAILABLE = False
 
+# Relevance / fallback-score term lists, matched through the shared feature vocabulary
+WILDLIFE_CONTEXT_MASK = VOCABULARY.register([
+    'ivory', 'bone', 'horn', 'tusk', 'shell', 'fur', 'leather', 'skin',
+    'traditional', 'medicine', 'carving', 'antique', 'vintage', 'rare',
+    'specimen', 'taxidermy', 'mounted', 'collection', 'artifact',
+    'endangered', 'protected', 'wildlife', 'exotic', 'illegal',
+    'smuggled', 'black market', 'poaching', 'trafficking',
+    'tiger', 'elephant', 'rhino', 'pangolin', 'bear', 'turtle',
+    'shark', 'whale', 'coral', 'python', 'crocodile', 'leopard'
+])
+HIGH_VALUE_MASK = VOCABULARY.register(['ivory', 'rhino horn', 'tiger bone', 'pangolin', 'bear bile'])
+BASIC_HIGH_RISK_MASK = VOCABULARY.register(['ivory', 'rhino horn', 'tiger bone', 'pangolin', 'bear bile', 'shark fin'])
+BASIC_MEDIUM_RISK_MASK = VOCABULARY.register(['traditional medicine', 'chinese medicine', 'wildlife carving', 'exotic leather'])
+AUTHENTICITY_MASK = VOCABULARY.register(['authentic', 'genuine', 'certificate', 'certified', 'real', 'original'])
+COLLECTION_MASK = VOCABULARY.register(['private collection', 'estate sale', 'family heirloom', 'vintage', 'antique'])
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -83,8 +105,12 @@ class ContinuousRealWildlifeScanner:
         # Load wildlife keywords
         self.wildlife_keywords = self._load_all_1452_wildlife_keywords()
         
-        # Deduplication tracking
-        self.seen_urls: Set[str] = set()
+        # Deduplication tracking (persistent index shared with the other scanners)
+        self.seen_index = shared_seen_index()
+        
+        # Local write-ahead spool; detections survive Supabase outages and job timeouts
+        self.spool = shared_spool()
+        self.spool_flusher = None
         
         # Check environment
         self.supabase_url = os.getenv("SUPABASE_URL")
@@ -166,56 +192,14 @@ class ContinuousRealWildlifeScanner:
             platform_stats = {}
             
             for result in real_results:
-                # Skip if not wildlife-related
-                if not self._is_wildlife_related(result, keywords):
+                processed = self._process_wildlife_listing(result, keywords)
+                if processed is None:
                     continue
                 
                 # Track platform statistics
-                platform = result.get('platform', 'unknown')
+                platform = processed.get('platform', 'unknown')
                 platform_stats[platform] = platform_stats.get(platform, 0) + 1
-                
-                # Add metadata
-                result['scan_type'] = 'wildlife'
-                result['real_data'] = True
-                result['comprehensive_scan'] = True
-                result['scaled_up_scan'] = True
-                result['platform_count'] = len(self.real_platforms)
-                result['keyword_count'] = len(keywords)
-                result['scan_timestamp'] = datetime.now().isoformat()
-                
-                # Apply threat scoring
-                if self.threat_scorer:
-                    try:
-                        threat_analysis = self.threat_scorer.analyze_listing(
-                            result, 
-                            result.get('search_term', ''), 
-                            result.get('platform', '')
-                        )
-                        
-                        result.update({
-                            "threat_score": threat_analysis.threat_score,
-                            "threat_level": threat_analysis.threat_level.value,
-                            "threat_category": "wildlife",
-                            "confidence": threat_analysis.confidence,
-                            "requires_human_review": threat_analysis.requires_human_review,
-                            "reasoning": threat_analysis.reasoning,
-                            "wildlife_indicators": threat_analysis.wildlife_indicators
-                        })
-                    except Exception as e:
-                        logging.warning(f"Threat analysis failed: {e}")
-                        result.update({
-                            "threat_score": self._calculate_basic_wildlife_score(result),
-                            "threat_level": "BASIC_ANALYSIS",
-                            "threat_category": "wildlife"
-                        })
-                else:
-                    result.update({
-                        "threat_score": self._calculate_basic_wildlife_score(result),
-                        "threat_level": "BASIC_ANALYSIS", 
-                        "threat_category": "wildlife"
-                    })
-                
-                processed_results.append(result)
+                processed_results.append(processed)
             
             # Log platform statistics
             logging.info(f"📊 Platform results breakdown:")
@@ -229,25 +213,127 @@ class ContinuousRealWildlifeScanner:
             logging.error(f"❌ COMPREHENSIVE platform scanning failed: {e}")
             return []
 
-    def _is_wildlife_related(self, result: Dict, keywords: List[str]) -> bool:
+    def _process_wildlife_listing(self, result: Dict, keywords: List[str]) -> Optional[Dict]:
+        """Relevance filter, metadata and threat scoring for one listing (None = not wildlife)"""
+        # One feature extraction shared by the relevance check and every scorer
+        features = extract_features(result)
+        
+        # Skip if not wildlife-related
+        if not self._is_wildlife_related(result, keywords, features):
+            return None
+        
+        # Add metadata
+        result['scan_type'] = 'wildlife'
+        result['real_data'] = True
+        result['comprehensive_scan'] = True
+        result['scaled_up_scan'] = True
+        result['platform_count'] = len(self.real_platforms)
+        result['keyword_count'] = len(keywords)
+        result['scan_timestamp'] = datetime.now().isoformat()
+        
+        # Apply threat scoring
+        if self.threat_scorer:
+            try:
+                threat_analysis = self.threat_scorer.analyze_features(features)
+                
+                result.update({
+                    "threat_score": threat_analysis.threat_score,
+                    "threat_level": threat_analysis.threat_level.value,
+                    "threat_category": "wildlife",
+                    "confidence": threat_analysis.confidence,
+                    "requires_human_review": threat_analysis.requires_human_review,
+                    "reasoning": threat_analysis.reasoning,
+                    "wildlife_indicators": threat_analysis.wildlife_indicators
+                })
+            except Exception as e:
+                logging.warning(f"Threat analysis failed: {e}")
+                result.update({
+                    "threat_score": self._calculate_basic_wildlife_score(result, features),
+                    "threat_level": "BASIC_ANALYSIS",
+                    "threat_category": "wildlife"
+                })
+        else:
+            result.update({
+                "threat_score": self._calculate_basic_wildlife_score(result, features),
+                "threat_level": "BASIC_ANALYSIS", 
+                "threat_category": "wildlife"
+            })
+        
+        return result
+
+    async def stream_real_platforms_wildlife(self, keywords: List[str]) -> Dict:
+        """Scan, score, dedupe and store concurrently through a ScanPipeline"""
+        if not self.real_scanner:
+            logging.error("❌ Real scanner not available")
+            return {"relevant": 0, "stored_count": 0, "quality_metrics": {}}
+        
+        counts = {"relevant": 0, "duplicates": 0, "already_seen": 0}
+        
+        def process(result: Dict) -> Optional[Dict]:
+            # Listings stored by an earlier run are dropped before paying for scoring
+            if result.get('url') in self.seen_index:
+                counts["already_seen"] += 1
+                return None
+            processed = self._process_wildlife_listing(result, keywords)
+            if processed is None:
+                return None
+            counts["relevant"] += 1
+            if not self.deduplicate_real_results([processed], pipeline.seen_keys):
+                counts["duplicates"] += 1
+                return None
+            return processed
+        
+        async def produce(sink: ListingSink):
+            async with self.real_scanner as scanner:
+                if self.enhanced_features:
+                    await scanner.scan_all_platforms_streaming({'direct_terms': keywords}, sink)
+                else:
+                    await sink.put_many(await scanner.scan_all_platforms())
+        
+        pipeline = ScanPipeline(process, self.store_real_wildlife_results, name='wildlife')
+        logging.info(f"🔍 STREAMING SCAN: {len(keywords)} wildlife keywords across {len(self.real_platforms)} platforms...")
+        flusher = self.spool.flusher(supabase_url=self.supabase_url, supabase_key=self.supabase_key)
+        try:
+            async with flusher:
+                self.spool_flusher = flusher
+                try:
+                    stats = await pipeline.run(produce)
+                finally:
+                    self.spool_flusher = None
+        except Exception as e:
+            logging.error(f"❌ COMPREHENSIVE platform scanning failed: {e}")
+            stats = pipeline.stats
+        
+        self.seen_index.save()
+        save_score_caches()
+        
+        unique_count = counts["relevant"] - counts["duplicates"]
+        storage = merge_store_results(pipeline.store_results, unique_count)
+        # Batches were only spooled; report what actually reached Supabase
+        storage["quality_metrics"]["spooled"] = storage["stored_count"]
+        storage["stored_count"] = flusher.totals["inserted"]
+        storage["quality_metrics"].update({
+            "quality_score": storage["stored_count"] / unique_count if unique_count else 0,
+            "duplicates_skipped": flusher.totals["duplicates"],
+            "failed_writes": flusher.totals["failed"],
+            "spool_pending": self.spool.pending_rows(),
+            "already_seen": counts["already_seen"]
+        })
+        storage["quality_metrics"].update({
+            "real_data_used": True,
+            "comprehensive_scan": True,
+            "platform_count": len(self.real_platforms)
+        })
+        return {"relevant": counts["relevant"] + counts["already_seen"], "pipeline": stats, **storage}
+
+    def _is_wildlife_related(self, result: Dict, keywords: List[str], features: ListingFeatures = None) -> bool:
         """Enhanced wildlife relevance detection"""
-        title = result.get('title', '').lower()
-        description = result.get('description', '').lower()
-        search_term = result.get('search_term', '').lower()
-        
-        # EXPANDED wildlife indicators
-        wildlife_indicators = [
-            'ivory', 'bone', 'horn', 'tusk', 'shell', 'fur', 'leather', 'skin',
-            'traditional', 'medicine', 'carving', 'antique', 'vintage', 'rare',
-            'specimen', 'taxidermy', 'mounted', 'collection', 'artifact',
-            'endangered', 'protected', 'wildlife', 'exotic', 'illegal',
-            'smuggled', 'black market', 'poaching', 'trafficking',
-            'tiger', 'elephant', 'rhino', 'pangolin', 'bear', 'turtle',
-            'shark', 'whale', 'coral', 'python', 'crocodile', 'leopard'
-        ]
+        if features is None:
+            features = extract_features(result)
+        search_term = features.search_term.lower()
         
         term_match = any(keyword.lower() in search_term for keyword in keywords)
-        context_match = any(indicator in title or indicator in description for indicator in wildlife_indicators)
+        context_match = bool(features.field_bits & WILDLIFE_CONTEXT_MASK)
         
         # Enhanced relevance scoring
         relevance_score = 0
@@ -257,76 +343,68 @@ class ContinuousRealWildlifeScanner:
             relevance_score += 30
         
         # Check for high-value wildlife terms
-        high_value_terms = ['ivory', 'rhino horn', 'tiger bone', 'pangolin', 'bear bile']
-        if any(term in title or term in description or term in search_term for term in high_value_terms):
+        if (features.field_bits | features.search_bits) & HIGH_VALUE_MASK:
             relevance_score += 40
         
         return relevance_score >= 50
 
-    def _calculate_basic_wildlife_score(self, result: Dict) -> int:
+    def _calculate_basic_wildlife_score(self, result: Dict, features: ListingFeatures = None) -> int:
         """Enhanced wildlife threat scoring"""
-        title = result.get('title', '').lower()
-        description = result.get('description', '').lower()
-        price = result.get('price', '').lower()
+        if features is None:
+            features = extract_features(result)
+        field_bits = features.field_bits
+        price = features.price_text.lower()
         
         score = 40
         
         # High-risk wildlife products
-        high_risk = ['ivory', 'rhino horn', 'tiger bone', 'pangolin', 'bear bile', 'shark fin']
-        for term in high_risk:
-            if term in title or term in description:
-                score += 35
-                break
+        if field_bits & BASIC_HIGH_RISK_MASK:
+            score += 35
         
         # Medium-risk indicators
-        medium_risk = ['traditional medicine', 'chinese medicine', 'wildlife carving', 'exotic leather']
-        for term in medium_risk:
-            if term in title or term in description:
-                score += 20
-                break
+        if field_bits & BASIC_MEDIUM_RISK_MASK:
+            score += 20
         
         # Suspicious pricing patterns
         if any(term in price for term in ['cash only', 'contact', 'offer', 'negotiate', 'private']):
             score += 15
         
         # Authenticity claims (often suspicious)
-        authenticity = ['authentic', 'genuine', 'certificate', 'certified', 'real', 'original']
-        score += sum(5 for term in authenticity if term in title or term in description)
+        score += 5 * bin(field_bits & AUTHENTICITY_MASK).count('1')
         
         # Collection/estate indicators
-        collection_terms = ['private collection', 'estate sale', 'family heirloom', 'vintage', 'antique']
-        score += sum(8 for term in collection_terms if term in title or term in description)
+        score += 8 * bin(field_bits & COLLECTION_MASK).count('1')
         
         return min(100, max(20, score))
 
-    def deduplicate_real_results(self, results: List[Dict]) -> List[Dict]:
-        """Enhanced deduplication with fuzzy matching"""
+    def deduplicate_real_results(self, results: List[Dict], seen_keys: Optional[set] = None) -> List[Dict]:
+        """Deduplication on canonical listing identity.
+
+        ``seen_keys`` carries identities across calls (the pipeline's per-run set).
+        The seen-URL index is only read here; URLs are marked seen once stored.
+        """
         unique_results = []
-        seen_hashes = set()
+        if seen_keys is None:
+            seen_keys = set()
         
         for result in results:
             url = result.get("url", "")
-            title = result.get("title", "")
             
-            # Create a fuzzy hash for better deduplication
-            fuzzy_content = f"{title[:50].lower().strip()}{url}"
-            content_hash = hashlib.md5(fuzzy_content.encode()).hexdigest()
+            # Canonical (platform, item id) key, so one item reached via two URLs is one listing
+            listing_key = identity_key(url, result.get("platform"))
             
-            if url and url not in self.seen_urls and content_hash not in seen_hashes:
+            if url and listing_key not in seen_keys and url not in self.seen_index:
                 unique_results.append(result)
-                self.seen_urls.add(url)
-                seen_hashes.add(content_hash)
+                seen_keys.add(listing_key)
         
         return unique_results
 
-    async def store_real_wildlife_results(self, results: List[Dict]) -> Dict:
+    async def store_real_wildlife_results(self, results: List[Dict], index_offset: int = 0) -> Dict:
         """Enhanced storage with better error handling and metrics"""
         if not results:
             logging.warning("⚠️ No real results to store")
             return {"stored_count": 0, "quality_metrics": {}}
 
-        import aiohttp
-        
         stored_count = 0
         platform_breakdown = {}
         quality_metrics = {
@@ -338,74 +416,70 @@ class ContinuousRealWildlifeScanner:
             "platform_count": len(self.real_platforms)
         }
 
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal",
-        }
+        detections = []
+        logging.info(f"🔄 Storing {len(results)} COMPREHENSIVE wildlife results to Supabase...")
+        
+        for i, result in enumerate(results):
+            try:
+                platform = result.get('platform', 'UNKNOWN')
+                platform_breakdown[platform] = platform_breakdown.get(platform, 0) + 1
+                
+                evidence_id = f"COMPREHENSIVE-WILDLIFE-{platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{i + index_offset:04d}"
 
-        async with aiohttp.ClientSession() as session:
-            logging.info(f"🔄 Storing {len(results)} COMPREHENSIVE wildlife results to Supabase...")
-            
-            for i, result in enumerate(results):
-                try:
-                    platform = result.get('platform', 'UNKNOWN')
-                    platform_breakdown[platform] = platform_breakdown.get(platform, 0) + 1
-                    
-                    evidence_id = f"COMPREHENSIVE-WILDLIFE-{platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{i:04d}"
-
-                    threat_score = result.get('threat_score', 40)
-                    threat_level = result.get('threat_level', 'WILDLIFE_THREAT')
-                    requires_review = result.get('requires_human_review', threat_score >= 70)
-
-                    if threat_score >= 70:
-                        quality_metrics["high_threat_items"] += 1
-                    if threat_score >= 85:
-                        quality_metrics["critical_alerts"] += 1
-                    if requires_review:
-                        quality_metrics["human_review_required"] += 1
-
-                    detection = {
-                        "evidence_id": evidence_id,
-                        "timestamp": datetime.now().isoformat(),
-                        "platform": platform,
-                        "threat_score": threat_score,
-                        "threat_level": threat_level,
-                        "threat_category": "wildlife",
-                        "species_involved": f"Comprehensive wildlife scan: {result.get('search_term', 'unknown')}",
-                        "alert_sent": False,
-                        "status": "COMPREHENSIVE_WILDLIFE_SCAN",
-                        "listing_title": (result.get("title", "") or "")[:500],
-                        "listing_url": result.get("url", "") or "",
-                        "listing_price": str(result.get("price", "") or ""),
-                        "search_term": result.get("search_term", "") or "",
-                        "description": (result.get("description", "") or "")[:1000],
-                        "confidence_score": result.get('confidence', 0.7),
-                        "requires_human_review": requires_review,
-                        "comprehensive_scan": True,
-                        "platform_count": len(self.real_platforms),
-                        "keyword_count": result.get('keyword_count', 0)
-                    }
-
-                    detection = {k: v for k, v in detection.items() if v is not None}
-
-                    url = f"{self.supabase_url}/rest/v1/detections"
-
-                    async with session.post(url, headers=headers, json=detection) as resp:
-                        if resp.status in [200, 201]:
-                            stored_count += 1
-                            if stored_count % 50 == 0:  # Log every 50 items
-                                logging.info(f"✅ Stored {stored_count}/{len(results)} COMPREHENSIVE wildlife results...")
-                        elif resp.status == 409:
-                            continue
-                        else:
-                            response_text = await resp.text()
-                            logging.error(f"❌ Storage error: HTTP {resp.status} - {response_text}")
-
-                except Exception as e:
-                    logging.error(f"❌ Exception storing result {i}: {e}")
-                    continue
+                threat_score = result.get('threat_score', 40)
+                threat_level = result.get('threat_level', 'WILDLIFE_THREAT')
+                requires_review = result.get('requires_human_review', threat_score >= 70)
+
+                if threat_score >= 70:
+                    quality_metrics["high_threat_items"] += 1
+                if threat_score >= 85:
+                    quality_metrics["critical_alerts"] += 1
+                if requires_review:
+                    quality_metrics["human_review_required"] += 1
+
+                detection = {
+                    "evidence_id": evidence_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "platform": platform,
+                    "threat_score": threat_score,
+                    "threat_level": threat_level,
+                    "threat_category": "wildlife",
+                    "species_involved": f"Comprehensive wildlife scan: {result.get('search_term', 'unknown')}",
+                    "alert_sent": False,
+                    "status": "COMPREHENSIVE_WILDLIFE_SCAN",
+                    "listing_title": (result.get("title", "") or "")[:500],
+                    "listing_url": result.get("url", "") or "",
+                    "listing_price": str(result.get("price", "") or ""),
+                    "search_term": result.get("search_term", "") or "",
+                    "description": (result.get("description", "") or "")[:1000],
+                    "confidence_score": result.get('confidence', 0.7),
+                    "requires_human_review": requires_review,
+                    "comprehensive_scan": True,
+                    "platform_count": len(self.real_platforms),
+                    "keyword_count": result.get('keyword_count', 0)
+                }
+
+                detection = {k: v for k, v in detection.items() if v is not None}
+                detections.append(detection)
+
+            except Exception as e:
+                logging.error(f"❌ Exception preparing result {i}: {e}")
+                continue
+
+        if self.spool_flusher is not None:
+            # Streaming run: the background flusher drains the spool to Supabase
+            stored_count = self.spool.append(detections)
+        else:
+            write_counts = await spool_detections(
+                detections, supabase_url=self.supabase_url, supabase_key=self.supabase_key
+            )
+            stored_count = write_counts["inserted"]
+            quality_metrics["duplicates_skipped"] = write_counts["duplicates"]
+            quality_metrics["failed_writes"] = write_counts["failed"]
+
+        # Only now that the spool holds them are these listings skipped by later runs
+        for detection in detections:
+            self.seen_index.add(detection["listing_url"])
 
         quality_metrics["quality_score"] = stored_count / len(results) if results else 0
         quality_metrics["platform_breakdown"] = platform_breakdown
@@ -459,22 +533,17 @@ class ContinuousRealWildlifeScanner:
         logging.info(f"📊 SCALED UP Keywords {start_index}-{end_index}/{len(self.wildlife_keywords)} (cycle {state['completed_cycles']})")
         logging.info(f"📝 Current batch: {', '.join(keyword_batch[:5])}...")
         
-        # COMPREHENSIVE scanning
-        all_results = await self.scan_real_platforms_wildlife(keyword_batch)
-        
-        # Enhanced deduplication
-        unique_results = self.deduplicate_real_results(all_results)
-        
-        # Store results with enhanced metrics
-        storage_result = await self.store_real_wildlife_results(unique_results)
+        # COMPREHENSIVE scanning streamed through scoring, deduplication and storage
+        storage_result = await self.stream_real_platforms_wildlife(keyword_batch)
         stored_count = storage_result["stored_count"]
         quality_metrics = storage_result["quality_metrics"]
+        total_scanned = storage_result["relevant"]
         
         duration = (datetime.now() - start_time).total_seconds()
         
         results = {
             'scan_type': 'wildlife',
-            'total_scanned': len(all_results),
+            'total_scanned': total_scanned,
             'total_stored': stored_count,
             'platforms_scanned': self.real_platforms,
             'platform_count': len(self.real_platforms),
@@ -482,7 +551,7 @@ class ContinuousRealWildlifeScanner:
             'keywords_progress': f"{end_index}/{len(self.wildlife_keywords)}",
             'completed_cycles': state['completed_cycles'],
             'duration_seconds': duration,
-            'listings_per_minute': int(len(all_results) * 60 / duration) if duration > 0 else 0,
+            'listings_per_minute': int(total_scanned * 60 / duration) if duration > 0 else 0,
             'timestamp': datetime.now().isoformat(),
             'quality_metrics': quality_metrics,
             'real_data_used': True,
@@ -495,11 +564,14 @@ class ContinuousRealWildlifeScanner:
             'high_threat_items': quality_metrics.get("high_threat_items", 0),
             'critical_alerts': quality_metrics.get("critical_alerts", 0),
             'human_review_required': quality_metrics.get("human_review_required", 0),
-            'platform_breakdown': quality_metrics.get("platform_breakdown", {})
+            'platform_breakdown': quality_metrics.get("platform_breakdown", {}),
+            'browser_pool_metrics': getattr(self.real_scanner, 'pool_metrics', {}),
+            'pipeline_stats': storage_result.get("pipeline", {}),
+            'score_cache': score_cache_stats()
         }
         
         logging.info(f"✅ SCALED UP CONTINUOUS REAL WILDLIFE SCAN COMPLETED")
-        logging.info(f"📊 Total scanned: {len(all_results):,} COMPREHENSIVE listings")
+        logging.info(f"📊 Total scanned: {total_scanned:,} COMPREHENSIVE listings")
         logging.info(f"💾 Total stored: {stored_count:,}")
         logging.info(f"⚡ Rate: {results['listings_per_minute']:,} comprehensive listings/minute")
         logging.info(f"🎯 Progress: {end_index}/{len(self.wildlife_keywords)} keywords (cycle {state['completed_cycles']})")
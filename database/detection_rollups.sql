@@ -0,0 +1,164 @@
+-- WildGuard AI: Pre-aggregated detection rollups for the dashboard
+-- Run in the Supabase SQL editor. Counters are kept per bucket
+-- (hour / day / total) for three dimensions:
+--   platform     (platform, threat_level)
+--   search_term  (search_term, threat_level)
+--   full         (platform, threat_level, threat_category, search_term)
+-- so the stats endpoints read O(buckets) rows instead of every detection.
+
+CREATE TABLE IF NOT EXISTS detection_rollups (
+    granularity TEXT NOT NULL,              -- 'hour' | 'day' | 'total'
+    bucket_start TIMESTAMPTZ NOT NULL,      -- 1970-01-01 for 'total'
+    dimension TEXT NOT NULL,                -- 'platform' | 'search_term' | 'full'
+    platform TEXT NOT NULL DEFAULT '',
+    threat_level TEXT NOT NULL DEFAULT '',
+    threat_category TEXT NOT NULL DEFAULT '',
+    search_term TEXT NOT NULL DEFAULT '',
+    detections BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, dimension, bucket_start, platform, threat_level, threat_category, search_term)
+);
+
+-- Incremental state: rows with id in (rolled_up_id, pending_max_id] are folded
+-- in on the next refresh. Ids are only picked up one refresh after they are
+-- seen, so inserts still in flight when max(id) was read are not skipped.
+CREATE TABLE IF NOT EXISTS detection_rollup_state (
+    name TEXT PRIMARY KEY,
+    rolled_up_id BIGINT NOT NULL DEFAULT 0,
+    pending_max_id BIGINT NOT NULL DEFAULT 0,
+    last_refresh TIMESTAMPTZ
+);
+INSERT INTO detection_rollup_state (name) VALUES ('detections') ON CONFLICT DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_detections_id ON detections(id);
+
+CREATE OR REPLACE FUNCTION refresh_detection_rollups(hour_retention_days INT DEFAULT 7)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    state detection_rollup_state%ROWTYPE;
+    upper_id BIGINT;
+    folded BIGINT := 0;
+BEGIN
+    -- One refresher at a time; a concurrent caller just returns
+    IF NOT pg_try_advisory_xact_lock(hashtext('detection_rollups')) THEN
+        RETURN 0;
+    END IF;
+
+    SELECT * INTO state FROM detection_rollup_state WHERE name = 'detections' FOR UPDATE;
+    upper_id := state.pending_max_id;
+
+    IF upper_id > state.rolled_up_id THEN
+        WITH new_rows AS (
+            SELECT
+                COALESCE(d.platform, '') AS platform,
+                COALESCE(d.threat_level, '') AS threat_level,
+                COALESCE(d.threat_category, '') AS threat_category,
+                COALESCE(d.search_term, '') AS search_term,
+                d.timestamp::timestamptz AS ts
+            FROM detections d
+            WHERE d.id > state.rolled_up_id AND d.id <= upper_id AND d.timestamp IS NOT NULL
+        ),
+        bucketed AS (
+            SELECT
+                g.granularity,
+                CASE g.granularity
+                    WHEN 'hour' THEN date_trunc('hour', r.ts)
+                    WHEN 'day' THEN date_trunc('day', r.ts)
+                    ELSE TIMESTAMPTZ '1970-01-01 00:00:00+00'
+                END AS bucket_start,
+                k.dimension,
+                CASE WHEN k.dimension IN ('platform', 'full') THEN r.platform ELSE '' END AS platform,
+                r.threat_level,
+                CASE WHEN k.dimension = 'full' THEN r.threat_category ELSE '' END AS threat_category,
+                CASE WHEN k.dimension IN ('search_term', 'full') THEN r.search_term ELSE '' END AS search_term
+            FROM new_rows r
+            CROSS JOIN (VALUES ('hour'), ('day'), ('total')) AS g(granularity)
+            CROSS JOIN (VALUES ('platform'), ('search_term'), ('full')) AS k(dimension)
+            WHERE r.ts >= now() - make_interval(days => hour_retention_days) OR g.granularity <> 'hour'
+        )
+        INSERT INTO detection_rollups AS t
+            (granularity, bucket_start, dimension, platform, threat_level, threat_category, search_term, detections)
+        SELECT granularity, bucket_start, dimension, platform, threat_level, threat_category, search_term, COUNT(*)
+        FROM bucketed
+        GROUP BY granularity, bucket_start, dimension, platform, threat_level, threat_category, search_term
+        ON CONFLICT (granularity, dimension, bucket_start, platform, threat_level, threat_category, search_term)
+        DO UPDATE SET detections = t.detections + EXCLUDED.detections;
+
+        SELECT COUNT(*) INTO folded FROM detections WHERE id > state.rolled_up_id AND id <= upper_id;
+    END IF;
+
+    -- Hourly buckets only back the "last 24h" figures; keep them short-lived
+    DELETE FROM detection_rollups
+    WHERE granularity = 'hour' AND bucket_start < now() - make_interval(days => hour_retention_days);
+
+    UPDATE detection_rollup_state
+    SET rolled_up_id = GREATEST(rolled_up_id, upper_id),
+        pending_max_id = GREATEST(upper_id, (SELECT COALESCE(MAX(id), 0) FROM detections)),
+        last_refresh = now()
+    WHERE name = 'detections';
+
+    RETURN folded;
+END;
+$$;
+
+-- Full recount, for after deletes or in-place edits of detections (e.g. duplicate cleanup)
+CREATE OR REPLACE FUNCTION rebuild_detection_rollups(hour_retention_days INT DEFAULT 7)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('detection_rollups'));
+    TRUNCATE detection_rollups;
+    UPDATE detection_rollup_state
+    SET rolled_up_id = 0, pending_max_id = (SELECT COALESCE(MAX(id), 0) FROM detections)
+    WHERE name = 'detections';
+    RETURN refresh_detection_rollups(hour_retention_days);
+END;
+$$;
+
+-- Everything /api/stats/realtime shows, in one round trip instead of six:
+-- exact counts from detections, distinct platforms / search terms from rollups
+CREATE OR REPLACE FUNCTION dashboard_realtime_stats(since TIMESTAMPTZ)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT json_build_object(
+        'total_detections', (SELECT COUNT(*) FROM detections),
+        'today_detections', (SELECT COUNT(*) FROM detections WHERE timestamp >= since),
+        'high_priority_alerts', (SELECT COUNT(*) FROM detections
+                                 WHERE timestamp >= since AND threat_level IN ('HIGH', 'CRITICAL')),
+        'alerts_sent', (SELECT COUNT(*) FROM detections WHERE timestamp >= since AND alert_sent),
+        -- Busiest first, as detection_rollups.distinct() orders them
+        'platforms', (SELECT COALESCE(json_agg(platform ORDER BY detections DESC), '[]'::json)
+                      FROM (SELECT platform, SUM(detections) AS detections FROM detection_rollups
+                            WHERE granularity = 'total' AND dimension = 'platform' AND platform <> ''
+                            GROUP BY platform) p),
+        'species_count', (SELECT COUNT(DISTINCT search_term) FROM detection_rollups
+                          WHERE granularity = 'total' AND dimension = 'search_term' AND search_term <> '')
+    );
+$$;
+
+-- Dashboard (anon key) reads rollups and may trigger the incremental refresh
+ALTER TABLE detection_rollups ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS detection_rollups_read ON detection_rollups;
+CREATE POLICY detection_rollups_read ON detection_rollups FOR SELECT USING (true);
+GRANT SELECT ON detection_rollups TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_detection_rollups(INT) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION dashboard_realtime_stats(TIMESTAMPTZ) TO anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_detection_rollups(INT) FROM PUBLIC, anon, authenticated;
+
+-- Initial fill
+SELECT rebuild_detection_rollups();
+
+SELECT granularity, dimension, COUNT(*) AS buckets, SUM(detections) AS detections
+FROM detection_rollups
+GROUP BY granularity, dimension
+ORDER BY granularity, dimension;
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Detection Events
+The event bus between detection writers and the dashboard feed
+(backend/detection_feed.py). DetectionWriter publishes a compact event for
+every newly inserted detection; FeedHub subscribes and pushes them to
+browsers instead of having them poll.
+
+Both sides pick the bus with ``event_bus_from_env()``: Redis pub/sub when
+REDIS_URL is set and redis is installed, otherwise one in-process bus shared
+by every publisher and hub in the process (a scanner hosting its own
+dashboard). Publishing never fails a write: errors are logged and dropped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+CHANNEL = os.getenv('DETECTION_EVENTS_CHANNEL', 'wildguard:detections')
+REDIS_URL = os.getenv('REDIS_URL')
+
+EVENT_FIELDS = ('evidence_id', 'timestamp', 'platform', 'threat_level', 'threat_score',
+                'threat_category', 'search_term', 'listing_url')
+TITLE_CHARS = 140
+
+
+def compact_event(row: Dict) -> Dict:
+    """The few fields a dashboard needs to show a new detection"""
+    event = {field: row.get(field) for field in EVENT_FIELDS if row.get(field) is not None}
+    if row.get('listing_title'):
+        event['listing_title'] = row['listing_title'][:TITLE_CHARS]
+    return event
+
+
+class InMemoryEventBus:
+    """In-process pub/sub; also the stand-in for Redis in tests"""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    async def publish(self, events: List[Dict]):
+        for queue in self._subscribers:
+            queue.put_nowait(events)
+
+    async def subscribe(self) -> AsyncIterator[List[Dict]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    async def close(self):
+        pass
+
+
+class RedisEventBus:
+    """Redis pub/sub on CHANNEL; each message is a JSON array of events"""
+
+    def __init__(self, url: str = REDIS_URL, channel: str = CHANNEL):
+        import redis.asyncio as redis_asyncio
+
+        self.redis = redis_asyncio.from_url(url)
+        self.channel = channel
+
+    async def publish(self, events: List[Dict]):
+        await self.redis.publish(self.channel, json.dumps(events, default=str))
+
+    async def subscribe(self) -> AsyncIterator[List[Dict]]:
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        yield json.loads(message['data'])
+            except Exception as e:
+                # redis.exceptions.ConnectionError / TimeoutError are RedisErrors, not OSErrors
+                logging.warning(f"⚠️ Detection events lost Redis ({e}); retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def close(self):
+        await self.redis.close()
+
+
+# Shared by every publisher and subscriber in a process that has no Redis
+LOCAL_BUS = InMemoryEventBus()
+
+
+def event_bus_from_env(redis_url: Optional[str] = REDIS_URL, channel: str = CHANNEL):
+    """Redis when a URL is given and redis is installed, else the process-wide LOCAL_BUS"""
+    if redis_url:
+        try:
+            return RedisEventBus(redis_url, channel)
+        except ImportError:
+            logging.warning("⚠️ REDIS_URL set but redis is not installed - detection events stay in-process")
+    return LOCAL_BUS
+
+
+class DetectionEventPublisher:
+    """Publishes one message (a list of compact events) per written batch"""
+
+    def __init__(self, bus=None):
+        self._owns_bus = bus is None
+        self.bus = bus if bus is not None else event_bus_from_env()
+        self.published = 0
+
+    async def publish(self, rows: List[Dict]) -> int:
+        """Publish events for ``rows``; returns how many were sent"""
+        events = [compact_event(row) for row in rows]
+        if not events:
+            return 0
+        try:
+            await self.bus.publish(events)
+        except Exception as e:
+            logging.warning(f"⚠️ Detection event publish failed: {e}")
+            return 0
+        self.published += len(events)
+        return len(events)
+
+    async def close(self):
+        if self._owns_bus:
+            await self.bus.close()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Detection Spool
+Durable local write-ahead log for detections. Every row is appended to a local
+segment file first; a background flusher drains sealed segments to Supabase
+through DetectionWriter. Rows that cannot be written stay on disk and are
+replayed by the next run (the spool directory is cached between Actions runs).
+
+Segment format: one ``<crc32 hex> <json>`` line per detection. A sealed segment
+(``.seg``) has a ``.sha256`` sidecar holding the file digest and row count.
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from detection_writer import DetectionWriter
+
+DEFAULT_SPOOL_DIR = os.getenv('DETECTION_SPOOL_DIR', 'detection_spool')
+
+
+class DetectionSpool:
+    """Append-only segment files holding detections until Supabase accepts them"""
+
+    def __init__(self, directory: str = None, segment_max_rows: int = 1000,
+                 segment_max_age: float = 30.0):
+        self.directory = directory or DEFAULT_SPOOL_DIR
+        self.segment_max_rows = segment_max_rows
+        self.segment_max_age = segment_max_age
+        os.makedirs(self.directory, exist_ok=True)
+        self._active_path: Optional[str] = None
+        self._active_file = None
+        self._active_rows = 0
+        self._active_opened = 0.0
+        self._sequence = 0
+        self.stats = {'spooled': 0, 'segments_sealed': 0, 'segments_acked': 0,
+                      'corrupt_lines': 0, 'recovered_segments': 0}
+        self._recover_open_segments()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, rows: List[Dict]) -> int:
+        """Append detections to the active segment; returns rows spooled"""
+        for row in rows:
+            if self._active_file is None:
+                self._open_segment()
+            payload = json.dumps(row, default=str, separators=(',', ':'))
+            self._active_file.write(f"{zlib.crc32(payload.encode()):08x} {payload}\n")
+            self._active_rows += 1
+            if self._active_rows >= self.segment_max_rows:
+                self.seal()
+        if self._active_file is not None:
+            self._active_file.flush()
+        self.stats['spooled'] += len(rows)
+        return len(rows)
+
+    def seal(self):
+        """Close the active segment and make it available to the flusher"""
+        if self._active_file is None:
+            return
+        self._active_file.flush()
+        os.fsync(self._active_file.fileno())
+        self._active_file.close()
+        self._active_file = None
+        self._seal_path(self._active_path, self._active_rows)
+        self._active_path = None
+        self._active_rows = 0
+
+    def seal_if_stale(self):
+        if self._active_file is not None and time.monotonic() - self._active_opened >= self.segment_max_age:
+            self.seal()
+
+    def _open_segment(self):
+        self._sequence += 1
+        name = f"segment-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:05d}.open"
+        self._active_path = os.path.join(self.directory, name)
+        self._active_file = open(self._active_path, 'a', encoding='utf-8')
+        self._active_opened = time.monotonic()
+
+    def _seal_path(self, open_path: str, rows: int):
+        sealed_path = open_path[:-len('.open')] + '.seg'
+        digest = _file_sha256(open_path)
+        with open(sealed_path + '.sha256', 'w') as f:
+            f.write(f"{digest} {rows}\n")
+        os.replace(open_path, sealed_path)
+        self.stats['segments_sealed'] += 1
+
+    def _recover_open_segments(self):
+        """Seal segments left open by a run that died, keeping only intact lines"""
+        for path in glob.glob(os.path.join(self.directory, '*.open')):
+            rows, corrupt = _read_lines(path)
+            with open(path, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    payload = json.dumps(row, default=str, separators=(',', ':'))
+                    f.write(f"{zlib.crc32(payload.encode()):08x} {payload}\n")
+            self._seal_path(path, len(rows))
+            self.stats['recovered_segments'] += 1
+            self.stats['corrupt_lines'] += corrupt
+            logging.warning(f"🧯 Recovered spool segment {os.path.basename(path)}: {len(rows)} rows, {corrupt} torn lines dropped")
+        # Segments claimed by a flusher that never acknowledged them go back in the queue
+        for path in glob.glob(os.path.join(self.directory, '*.seg.inflight-*')):
+            os.replace(path, path[:path.index('.inflight-')])
+
+    # ------------------------------------------------------------------
+    # Draining
+    # ------------------------------------------------------------------
+
+    def pending_segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, '*.seg')))
+
+    def pending_rows(self) -> int:
+        total = 0
+        for path in self.pending_segments():
+            try:
+                with open(path + '.sha256') as f:
+                    total += int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+        return total + self._active_rows
+
+    def _claim(self, path: str) -> Optional[str]:
+        """Atomically take a sealed segment so concurrent flushers never double-send it"""
+        claimed = f"{path}.inflight-{os.getpid()}"
+        try:
+            os.replace(path, claimed)
+            return claimed
+        except FileNotFoundError:
+            return None
+
+    def _load_segment(self, claimed: str) -> List[Dict]:
+        sealed = claimed[:claimed.index('.inflight-')]
+        expected = None
+        try:
+            with open(sealed + '.sha256') as f:
+                expected = f.read().split()[0]
+        except (OSError, IndexError):
+            pass
+        rows, corrupt = _read_lines(claimed)
+        if expected and _file_sha256(claimed) != expected:
+            logging.warning(f"⚠️ Spool segment {os.path.basename(sealed)} failed its checksum; "
+                            f"replaying {len(rows)} intact rows ({corrupt} dropped)")
+        self.stats['corrupt_lines'] += corrupt
+        return rows
+
+    def _ack(self, claimed: str):
+        sealed = claimed[:claimed.index('.inflight-')]
+        os.remove(claimed)
+        try:
+            os.remove(sealed + '.sha256')
+        except FileNotFoundError:
+            pass
+        self.stats['segments_acked'] += 1
+
+    async def drain(self, writer: DetectionWriter) -> Dict[str, int]:
+        """Write every sealed segment through ``writer``.
+
+        A segment is deleted once Supabase has accepted, de-duplicated or
+        rejected (400/409/422) its rows; anything else, transient failures and
+        auth/config errors alike, is re-spooled for the next drain.
+        """
+        before = dict(writer.totals)
+        for path in self.pending_segments():
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+            rows = self._load_segment(claimed)
+            writer.retry_rows = []
+            await writer.write(rows)
+            retry_rows = writer.retry_rows
+            writer.retry_rows = []
+            if retry_rows:
+                self.append(retry_rows)
+                self.seal()
+            self._ack(claimed)
+            if retry_rows and len(retry_rows) == len(rows):
+                # Supabase is unavailable; keep the rest for later
+                break
+        return {key: writer.totals[key] - before[key] for key in writer.totals}
+
+    def flusher(self, interval: float = 5.0, **writer_kwargs) -> 'SpoolFlusher':
+        return SpoolFlusher(self, interval=interval, **writer_kwargs)
+
+    def close(self):
+        self.seal()
+
+
+class SpoolFlusher:
+    """Background task draining a DetectionSpool while scanning continues.
+
+    Entering replays whatever earlier runs left behind; leaving seals the active
+    segment and does a final drain. ``totals`` holds the writer's counts.
+    """
+
+    def __init__(self, spool: DetectionSpool, interval: float = 5.0, **writer_kwargs):
+        self.spool = spool
+        self.interval = interval
+        self.writer = DetectionWriter(**writer_kwargs)
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        return self.writer.totals
+
+    async def __aenter__(self):
+        await self.writer.__aenter__()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        replay = self.spool.pending_rows()
+        if replay:
+            logging.info(f"📼 Replaying {replay} spooled detections from earlier runs")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        await self._task
+        self.spool.seal()
+        try:
+            await self.spool.drain(self.writer)
+        finally:
+            await self.writer.__aexit__(None, None, None)
+        left = self.spool.pending_rows()
+        logging.info(f"📼 Spool flushed: {self.totals} ({left} rows left for the next run)")
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                self.spool.seal_if_stale()
+                await self.spool.drain(self.writer)
+            except Exception as e:
+                logging.error(f"❌ Spool flush error: {e}")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_lines(path: str) -> Tuple[List[Dict], int]:
+    """Parse a segment, skipping lines whose CRC does not match (torn or corrupt)"""
+    rows, corrupt = [], 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            crc, _, payload = line.partition(' ')
+            try:
+                if int(crc, 16) != zlib.crc32(payload.encode()):
+                    raise ValueError('crc mismatch')
+                rows.append(json.loads(payload))
+            except ValueError:
+                corrupt += 1
+    return rows, corrupt
+
+
+_shared_spool: Optional[DetectionSpool] = None
+
+
+def shared_spool() -> DetectionSpool:
+    """Process-wide spool so every store path appends to the same segments"""
+    global _shared_spool
+    if _shared_spool is None:
+        _shared_spool = DetectionSpool()
+    return _shared_spool
+
+
+async def spool_detections(rows: List[Dict], session=None, **writer_kwargs) -> Dict[str, int]:
+    """Spool ``rows`` and drain the spool right away (for store paths with no flusher).
+
+    Anything Supabase does not take stays spooled for the next run.
+    """
+    spool = shared_spool()
+    spool.append(rows)
+    spool.seal()
+    async with DetectionWriter(session=session, **writer_kwargs) as writer:
+        return await spool.drain(writer)
+
+
+def spool_detections_sync(rows: List[Dict], **writer_kwargs) -> Dict[str, int]:
+    """Blocking wrapper for synchronous scanners (requests-based code paths)"""
+    return asyncio.run(spool_detections(rows, **writer_kwargs))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Bulk Detection Writer
+Buffers detection rows and writes them to Supabase as array inserts with
+``on_conflict=listing_url`` / ignore-duplicates, so storing a scan costs one
+round trip per batch instead of one (or two) per listing.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from detection_events import DetectionEventPublisher
+
+DEFAULT_BATCH_SIZE = int(os.getenv('DETECTION_WRITE_BATCH', '200'))
+# Fold new rows into the dashboard rollups (database/detection_rollups.sql) on close
+REFRESH_ROLLUPS = os.getenv('DETECTION_REFRESH_ROLLUPS', 'true').lower() == 'true'
+# Announce inserted rows to the dashboard feed (detection_events.py)
+PUBLISH_EVENTS = os.getenv('DETECTION_PUBLISH_EVENTS', 'true').lower() == 'true'
+
+# Statuses worth retrying
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Statuses that reject the rows themselves; only these isolate and drop rows.
+# Anything else (401/403/404/405/406: bad key, wrong table, schema drift) is
+# a configuration problem, so the rows are kept for a later retry.
+REJECTED_ROW_STATUSES = {400, 409, 413, 422}
+
+
+class DetectionWriter:
+    """Shared async bulk upsert writer for the ``detections`` table.
+
+    Usage::
+
+        async with DetectionWriter(url, key) as writer:
+            await writer.add(row)          # flushes every ``batch_size`` rows
+        writer.totals                      # {'inserted', 'duplicates', 'failed'}
+
+    Each flushed batch appends ``{'rows', 'inserted', 'duplicates', 'failed'}``
+    to ``batch_results``.
+    """
+
+    def __init__(self, supabase_url: str = None, supabase_key: str = None,
+                 batch_size: int = None, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_cap: float = 20.0,
+                 session: aiohttp.ClientSession = None, table: str = 'detections',
+                 conflict_column: str = 'listing_url', refresh_rollups: bool = None,
+                 publisher: DetectionEventPublisher = None):
+        self.supabase_url = supabase_url or os.getenv('SUPABASE_URL')
+        self.supabase_key = supabase_key or os.getenv('SUPABASE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        self.batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.table = table
+        self.conflict_column = conflict_column
+        self.refresh_rollups = (REFRESH_ROLLUPS if refresh_rollups is None else refresh_rollups) \
+            and table == 'detections'
+        self._owns_publisher = publisher is None and PUBLISH_EVENTS and table == 'detections'
+        self.publisher = DetectionEventPublisher() if self._owns_publisher else publisher
+        self.session = session
+        self._owns_session = session is None
+        self._buffer: List[Dict] = []
+        self.batch_results: List[Dict[str, int]] = []
+        # Rows that failed for transient reasons (worth re-queueing, e.g. by the spool)
+        self.retry_rows: List[Dict] = []
+        self.totals = {'inserted': 0, 'duplicates': 0, 'failed': 0}
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.supabase_url}/rest/v1/{self.table}"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}",
+            "Content-Type": "application/json",
+            # Only the inserted rows come back, which is how duplicates are counted
+            "Prefer": "resolution=ignore-duplicates,return=representation",
+        }
+
+    async def __aenter__(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.flush()
+            if self.refresh_rollups and self.totals['inserted']:
+                await self.refresh_detection_rollups()
+            if self._owns_publisher:
+                await self.publisher.close()
+        finally:
+            if self._owns_session and self.session:
+                await self.session.close()
+                self.session = None
+
+    async def add(self, row: Dict) -> Optional[Dict[str, int]]:
+        """Buffer one row; returns the batch result when this row triggered a flush"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            results = await self.flush()
+            return results[-1] if results else None
+        return None
+
+    async def write(self, rows: List[Dict]) -> Dict[str, int]:
+        """Buffer and flush ``rows``; returns their combined counts"""
+        before = dict(self.totals)
+        for row in rows:
+            await self.add(row)
+        await self.flush()
+        return {key: self.totals[key] - before[key] for key in self.totals}
+
+    async def flush(self) -> List[Dict[str, int]]:
+        """Send everything buffered in ``batch_size`` chunks"""
+        results = []
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            result = await self._write_batch(batch)
+            for key in self.totals:
+                self.totals[key] += result[key]
+            self.batch_results.append(result)
+            results.append(result)
+        return results
+
+    async def refresh_detection_rollups(self) -> Optional[int]:
+        """Run the incremental rollup refresh; returns rows folded in (None if unavailable).
+
+        New rows are folded in one refresh after they are first seen, so this
+        call picks up the previous writer's rows and queues this one's.
+        """
+        url = f"{self.supabase_url}/rest/v1/rpc/refresh_detection_rollups"
+        try:
+            async with self.session.post(url, headers={**self.headers, "Prefer": "return=representation"},
+                                         json={}) as resp:
+                if resp.status == 404:
+                    logging.info("ℹ️ Rollup refresh function not installed - skipping")
+                    self.refresh_rollups = False
+                    return None
+                if resp.status != 200:
+                    logging.warning(f"⚠️ Rollup refresh HTTP {resp.status}: {(await resp.text())[:100]}")
+                    return None
+                folded = await resp.json(content_type=None)
+                logging.info(f"📊 Rollups refreshed: {folded} detections folded in")
+                return folded
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"⚠️ Rollup refresh failed: {e}")
+            return None
+
+    async def _write_batch(self, batch: List[Dict]) -> Dict[str, int]:
+        result = {'rows': len(batch), 'inserted': 0, 'duplicates': 0, 'failed': 0}
+        if not self.supabase_url or not self.supabase_key:
+            logging.error("❌ DetectionWriter: missing Supabase credentials")
+            result['failed'] = len(batch)
+            self.retry_rows.extend(batch)
+            return result
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+            self._owns_session = True
+
+        # Drop repeats of the same listing inside one batch up front
+        unique_rows = []
+        seen = set()
+        for row in batch:
+            key = row.get(self.conflict_column)
+            if key and key in seen:
+                result['duplicates'] += 1
+                continue
+            seen.add(key)
+            unique_rows.append(row)
+
+        # PostgREST bulk inserts need identical keys on every object
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in unique_rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        inserted_rows: List[Dict] = []
+        for rows in groups.values():
+            inserted, failed = await self._post_rows(rows, inserted_rows)
+            result['inserted'] += inserted
+            result['failed'] += failed
+            result['duplicates'] += len(rows) - inserted - failed
+
+        if self.publisher is not None and inserted_rows:
+            await self.publisher.publish(inserted_rows)
+
+        logging.info(f"💾 Bulk write: {result['inserted']} inserted, "
+                     f"{result['duplicates']} duplicates, {result['failed']} failed "
+                     f"({len(batch)} rows)")
+        return result
+
+    async def _post_rows(self, rows: List[Dict], inserted_rows: List[Dict] = None) -> tuple:
+        """POST one array insert; returns (inserted, failed).
+
+        Rows that were actually inserted (not duplicates) are appended to
+        ``inserted_rows`` when given.
+
+        Retries transient failures with full-jitter backoff. A batch rejected for
+        its content (e.g. another unique constraint) is split in half until the
+        offending rows are isolated, so one bad row cannot sink the whole batch.
+        Rows that are not written for any other reason go to ``retry_rows``.
+        """
+        params = {'on_conflict': self.conflict_column, 'select': self.conflict_column}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.session.post(self.endpoint, params=params,
+                                             headers=self.headers, json=rows) as resp:
+                    if resp.status in (200, 201):
+                        try:
+                            returned = await resp.json(content_type=None)
+                        except Exception:
+                            returned = None
+                        if isinstance(returned, list):
+                            if inserted_rows is not None:
+                                keys = {r.get(self.conflict_column) for r in returned if isinstance(r, dict)}
+                                inserted_rows.extend(r for r in rows if r.get(self.conflict_column) in keys)
+                            return len(returned), 0
+                        if inserted_rows is not None:
+                            inserted_rows.extend(rows)
+                        return len(rows), 0
+                    response_text = await resp.text()
+                    if resp.status in REJECTED_ROW_STATUSES:
+                        if len(rows) > 1:
+                            middle = len(rows) // 2
+                            left = await self._post_rows(rows[:middle], inserted_rows)
+                            right = await self._post_rows(rows[middle:], inserted_rows)
+                            return left[0] + right[0], left[1] + right[1]
+                        if resp.status == 409 or 'duplicate' in response_text.lower():
+                            return 0, 0
+                        logging.error(f"❌ Detection rejected: HTTP {resp.status} - {response_text[:200]}")
+                        return 0, 1
+                    if resp.status not in RETRYABLE_STATUSES:
+                        logging.error(f"❌ Bulk write refused: HTTP {resp.status} - {response_text[:200]} "
+                                      f"(keeping {len(rows)} rows for retry)")
+                        self.retry_rows.extend(rows)
+                        return 0, len(rows)
+                    logging.warning(f"⚠️ Bulk write HTTP {resp.status} (attempt {attempt + 1}): {response_text[:100]}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"⚠️ Bulk write error (attempt {attempt + 1}): {e}")
+
+            if attempt < self.max_retries:
+                delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+                await asyncio.sleep(random.uniform(0, delay))
+
+        logging.error(f"❌ Bulk write gave up on {len(rows)} rows after {self.max_retries + 1} attempts")
+        self.retry_rows.extend(rows)
+        return 0, len(rows)
+
+
+async def write_detections(rows: List[Dict], session: aiohttp.ClientSession = None,
+                           **kwargs) -> Dict[str, int]:
+    """One-shot helper: bulk upsert ``rows`` and return the combined counts"""
+    async with DetectionWriter(session=session, **kwargs) as writer:
+        return await writer.write(rows)
+
+
+def write_detections_sync(rows: List[Dict], **kwargs) -> Dict[str, int]:
+    """Blocking wrapper for synchronous scanners (requests-based code paths)"""
+    return asyncio.run(write_detections(rows, **kwargs))
@@ -15,7 +15,6 @@ import logging
 from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime, timedelta
-from playwright.async_api import async_playwright
 import os
 import base64
 from fake_useragent import UserAgent
@@ -26,6 +25,11 @@ import sys
 import re
 import urllib.parse
 
+from browser_pool import BrowserPool, browser_session
+from request_scheduler import ScanJob, shared_scheduler
+from latency_tracker import PlatformLatencyTracker
+from scan_pipeline import ListingBuffer, ListingSink
+
 # Add path for keyword database
 sys.path.append('/Users/parkercase/conservation-bot')
 try:
@@ -68,12 +72,19 @@ class EnhancedRealPlatformScanner:
         }
         
         self.session = None
+        self.browser_pool = None
+        self.pool_metrics = {}
+        self.listing_sink = None
         self.retry_config = {
             'max_retries': 4,  # Increased retries
             'base_delay': 1,   # Faster initial retry
             'max_delay': 45,   # Longer max delay
-            'timeout_multiplier': 1.8  # More aggressive timeout scaling
+            'timeout_multiplier': 1.8,  # More aggressive timeout scaling
+            'min_attempt_seconds': 15   # Don't start an attempt with less budget than this
         }
+        
+        # Observed latency drives per-platform timeouts and the total retry budget
+        self.latency = PlatformLatencyTracker()
 
     async def __aenter__(self):
         timeout = aiohttp.ClientTimeout(total=300)  # Increased timeout
@@ -83,11 +94,28 @@ class EnhancedRealPlatformScanner:
             connector=connector,
             headers={'User-Agent': self.ua.random}
         )
+        
+        # One bounded browser pool shared by every Playwright-based platform
+        self.browser_pool = await BrowserPool().start()
+        for scanner in self.platforms.values():
+            if hasattr(scanner, 'browser_pool'):
+                scanner.browser_pool = self.browser_pool
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        logging.info(f"🚦 Request scheduler stats: {shared_scheduler().get_stats()}")
+        self.latency.save_state()
+        logging.info(f"⏱️ Platform latency: {self.latency.get_summary()}")
+        if self.browser_pool:
+            self.pool_metrics = self.browser_pool.get_metrics()
+            logging.info(f"🧭 Browser pool metrics: {self.pool_metrics}")
+            await self.browser_pool.close()
+            self.browser_pool = None
+            for scanner in self.platforms.values():
+                if hasattr(scanner, 'browser_pool'):
+                    scanner.browser_pool = None
 
     async def scan_all_platforms_enhanced(self, keywords: Dict) -> List[Dict]:
         """Enhanced scanning with ALL platforms working"""
@@ -127,58 +155,117 @@ class EnhancedRealPlatformScanner:
         logging.info(f"✅ COMPREHENSIVE scan completed: {len(results)} results from {successful_platforms}/{len(self.platforms)} platforms")
         return results
 
+    async def scan_all_platforms_streaming(self, keywords: Dict, sink: ListingSink) -> Dict[str, int]:
+        """Stream listings into ``sink`` as each platform parses its pages"""
+        expanded_keywords = {
+            'direct_terms': keywords['direct_terms'][:50] if len(keywords['direct_terms']) > 15 else keywords['direct_terms']
+        }
+        
+        logging.info(f"🚀 STREAMING SCAN: {len(expanded_keywords['direct_terms'])} keywords across {len(self.platforms)} platforms")
+        
+        self.listing_sink = sink
+        for scanner in self.platforms.values():
+            scanner.listing_sink = sink
+        try:
+            await asyncio.gather(*[
+                self._scan_platform_with_retry(platform_name, scanner, expanded_keywords)
+                for platform_name, scanner in self.platforms.items()
+            ], return_exceptions=True)
+        finally:
+            self.listing_sink = None
+            for scanner in self.platforms.values():
+                scanner.listing_sink = None
+        
+        logging.info(f"✅ STREAMING scan completed: {sum(sink.counts.values())} listings from "
+                     f"{len(sink.counts)}/{len(self.platforms)} platforms")
+        return dict(sink.counts)
+
     async def scan_all_platforms(self) -> List[Dict]:
         """Fallback method for compatibility"""
         keywords = {'direct_terms': get_optimized_search_terms()[:50]}  # EXPANDED
         return await self.scan_all_platforms_enhanced(keywords)
 
     async def _scan_platform_with_retry(self, platform_name: str, scanner, keywords: Dict) -> List[Dict]:
-        """Scan platform with enhanced retry logic"""
-        last_exception = None
+        """Scan platform with retries bounded by a latency-derived time budget"""
+        default_timeout = self._get_platform_timeout(platform_name)
+        base_timeout = self.latency.timeout_for(platform_name, default_timeout)
+        budget = self.latency.retry_budget(platform_name, default_timeout)
+        deadline = time.monotonic() + budget
+        
+        # Platforms that have been failing every recent run get a single attempt
+        max_attempts = 1 if self.latency.is_dead(platform_name) else self.retry_config['max_retries']
+        if max_attempts == 1 and self.retry_config['max_retries'] > 1:
+            logging.warning(f"{platform_name}: recent success rate ~0%, single attempt only")
         
-        for attempt in range(self.retry_config['max_retries']):
+        for attempt in range(max_attempts):
+            # Calculate delay and timeout for this attempt
+            if attempt > 0:
+                delay = min(
+                    self.retry_config['base_delay'] * (2 ** (attempt - 1)),
+                    self.retry_config['max_delay']
+                )
+                if time.monotonic() + delay >= deadline:
+                    break
+                logging.info(f"{platform_name}: Retry {attempt} after {delay}s delay")
+                await asyncio.sleep(delay)
+            
+            remaining = deadline - time.monotonic()
+            if remaining < self.retry_config['min_attempt_seconds']:
+                logging.warning(f"{platform_name}: retry budget of {budget:.0f}s exhausted")
+                break
+            timeout = min(base_timeout * (self.retry_config['timeout_multiplier'] ** attempt), remaining)
+            
+            # Queue for browser capacity before the clock starts: waiting on other
+            # platforms is neither this platform's timeout nor its latency
+            lease = await self.browser_pool.lease(platform_name) if self._uses_browser_pool(scanner) else None
+            attempt_start = time.monotonic()
             try:
-                # Calculate delay and timeout for this attempt
-                if attempt > 0:
-                    delay = min(
-                        self.retry_config['base_delay'] * (2 ** (attempt - 1)),
-                        self.retry_config['max_delay']
-                    )
-                    logging.info(f"{platform_name}: Retry {attempt} after {delay}s delay")
-                    await asyncio.sleep(delay)
-                
-                timeout = self._get_platform_timeout(platform_name) * (self.retry_config['timeout_multiplier'] ** attempt)
-                
                 results = await asyncio.wait_for(
                     scanner.scan_enhanced(keywords, self.session, attempt),
                     timeout=timeout
                 )
+                self.latency.record(platform_name, time.monotonic() - attempt_start, bool(results))
+                
+                if self.listing_sink is not None and not isinstance(results, ListingBuffer):
+                    for listing in results:
+                        await self.listing_sink.put(platform_name, listing)
                 
                 if results:
                     logging.info(f"✅ {platform_name}: SUCCESS on attempt {attempt + 1} - {len(results)} results")
                     return results
                 else:
                     logging.warning(f"{platform_name}: No results on attempt {attempt + 1}")
-                    if attempt == self.retry_config['max_retries'] - 1:
-                        return []
                     
-            except asyncio.TimeoutError as e:
-                last_exception = e
+            except asyncio.TimeoutError:
+                self.latency.record(platform_name, timeout, False)
                 logging.warning(f"{platform_name}: Timeout on attempt {attempt + 1} (timeout: {timeout:.1f}s)")
             except Exception as e:
-                last_exception = e
+                self.latency.record(platform_name, time.monotonic() - attempt_start, False)
                 logging.warning(f"{platform_name}: Error on attempt {attempt + 1}: {e}")
                 
                 # For certain errors, don't retry
                 if any(error_type in str(e).lower() for error_type in ['blocked', 'captcha', 'forbidden', 'access denied']):
                     logging.warning(f"{platform_name}: Permanent failure detected, not retrying")
                     break
+            finally:
+                if lease is not None:
+                    lease.release()
+                # Keep whatever a timed-out or failed attempt already parsed
+                if self.listing_sink is not None:
+                    await self.listing_sink.drain(platform_name)
+            
+            if self.listing_sink is not None and self.listing_sink.counts.get(platform_name):
+                logging.info(f"✅ {platform_name}: streamed {self.listing_sink.counts[platform_name]} partial results")
+                return []
         
-        logging.error(f"{platform_name}: Failed all {self.retry_config['max_retries']} attempts")
+        logging.error(f"{platform_name}: No results within {max_attempts} attempts / {budget:.0f}s budget")
         return []
 
+    def _uses_browser_pool(self, scanner) -> bool:
+        return self.browser_pool is not None and hasattr(scanner, 'browser_pool')
+
     def _get_platform_timeout(self, platform_name: str) -> int:
-        """Get optimized timeout for each platform"""
+        """Default timeout for each platform until enough latency history exists"""
         timeouts = {
             'taobao': 180,      # INCREASED for complex sites
             'aliexpress': 120,  # INCREASED for stealth measures
@@ -204,10 +291,10 @@ class EnhancedEbayScanner:
         self.cert_id = os.getenv("EBAY_CERT_ID")
         self.oauth_token = None
         self.token_expiry = None
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """Enhanced eBay scanning with EXPANDED keyword support"""
-        results = []
         search_terms = keywords["direct_terms"][:15]  # INCREASED from 8 to 15
         
         try:
@@ -217,40 +304,41 @@ class EnhancedEbayScanner:
                 "Content-Type": "application/json",
             }
 
-            for term in search_terms:
-                params = {"q": term, "limit": "25"}  # INCREASED from 20 to 25
+            async def fetch_term(job: ScanJob) -> List[Dict]:
+                params = {"q": job.keyword, "limit": "25"}  # INCREASED from 20 to 25
                 
                 async with session.get(
                     "https://api.ebay.com/buy/browse/v1/item_summary/search",
                     headers=headers, params=params
                 ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        items = data.get("itemSummaries", [])
-                        
-                        for item in items:
-                            results.append({
-                                "title": item.get("title", ""),
-                                "price": item.get("price", {}).get("value", ""),
-                                "url": item.get("itemWebUrl", ""),
-                                "search_term": term,
-                                "platform": "ebay",
-                                "location": item.get("itemLocation", {}).get("postalCode", ""),
-                                "image": item.get("image", {}).get("imageUrl", ""),
-                                "attempt": attempt + 1,
-                                "enhanced_scan": True
-                            })
-                    elif resp.status == 429:  # Rate limited
-                        await asyncio.sleep(10 * (attempt + 1))
-                        continue
+                    if resp.status == 429:  # Rate limited
+                        shared_scheduler().penalize('ebay', 10 * (attempt + 1))
+                        return []
+                    if resp.status != 200:
+                        return []
+                    data = await resp.json()
                 
-                await asyncio.sleep(0.5 * (attempt + 1))  # Reduced delay for faster scanning
+                return [{
+                    "title": item.get("title", ""),
+                    "price": item.get("price", {}).get("value", ""),
+                    "url": item.get("itemWebUrl", ""),
+                    "search_term": job.keyword,
+                    "platform": "ebay",
+                    "location": item.get("itemLocation", {}).get("postalCode", ""),
+                    "image": item.get("image", {}).get("imageUrl", ""),
+                    "attempt": attempt + 1,
+                    "enhanced_scan": True
+                } for item in data.get("itemSummaries", [])]
+
+            # Terms run in parallel within eBay's host budget
+            jobs = [ScanJob('ebay', term) for term in search_terms]
+            term_results = await shared_scheduler().run_jobs(jobs, fetch_term)
 
         except Exception as e:
             logging.error(f"eBay enhanced scan error: {e}")
             raise
         
-        return results
+        return [listing for listings in term_results if listings for listing in listings]
 
     async def get_access_token(self, session):
         """OAuth token management - ALREADY WORKING"""
@@ -290,27 +378,16 @@ class SuperStealthAliExpressScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
     
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """SUPER STEALTH AliExpress scanning with ADVANCED anti-bot measures"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'aliexpress')
         search_terms = keywords["direct_terms"][:6]  # INCREASED from 4 to 6
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'aliexpress') as browser:
             try:
-                # ENHANCED: More sophisticated browser launch
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox', '--disable-setuid-sandbox', '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor', '--disable-dev-shm-usage',
-                        '--disable-blink-features=AutomationControlled',  # NEW: Hide automation
-                        '--disable-extensions', '--no-first-run', '--disable-default-apps',
-                        '--disable-background-timer-throttling', '--disable-renderer-backgrounding',
-                        '--disable-backgrounding-occluded-windows', '--disable-ipc-flooding-protection'
-                    ]
-                )
-                
                 # ENHANCED: More realistic browser context
                 context = await browser.new_context(
                     user_agent=self.ua.random,
@@ -521,13 +598,12 @@ class SuperStealthAliExpressScanner:
                             logging.warning(f"AliExpress: All URLs failed for {term} (attempt {attempt + 1})")
                         
                         # ENHANCED: Variable delays between searches
-                        await asyncio.sleep(random.uniform(6, 12) * (attempt + 1))
+                        await results.flush()
+                        await shared_scheduler().throttle('aliexpress')
                         
                     except Exception as e:
                         logging.warning(f"AliExpress STEALTH error for {term} (attempt {attempt + 1}): {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"AliExpress STEALTH browser error (attempt {attempt + 1}): {e}")
         
@@ -539,10 +615,12 @@ class OptimizedMercadoLibreScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
     
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """OPTIMIZED MercadoLibre scanning with LONGER timeouts and BETTER selectors"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'mercadolibre')
         search_terms = keywords["direct_terms"][:5]  # INCREASED from 3 to 5
         
         # ENHANCED: More countries for better coverage
@@ -554,12 +632,8 @@ class OptimizedMercadoLibreScanner:
             'pe': 'https://listado.mercadolibre.com.pe'  # NEW: Peru
         }
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'mercadolibre') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080}
@@ -705,13 +779,12 @@ class OptimizedMercadoLibreScanner:
                             logging.info(f"✅ MercadoLibre {country}: Found {len(products)} products for '{term}' (attempt {attempt + 1})")
                             
                             # OPTIMIZED: Shorter delays for faster scanning
-                            await asyncio.sleep(random.uniform(2, 4) * (attempt + 1))
+                            await results.flush()
+                            await shared_scheduler().throttle('mercadolibre')
                             
                         except Exception as e:
                             logging.warning(f"MercadoLibre {country} error for {term} (attempt {attempt + 1}): {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"MercadoLibre OPTIMIZED browser error (attempt {attempt + 1}): {e}")
         
@@ -723,6 +796,8 @@ class EnhancedOLXScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
         # ENHANCED: More regions for better coverage
         self.regions = [
             {'code': 'pl', 'url': 'https://www.olx.pl', 'search_path': '/oferty?q={}'},
@@ -734,19 +809,14 @@ class EnhancedOLXScanner:
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """Enhanced OLX scanning with MORE regions"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'olx')
         search_terms = keywords["direct_terms"][:5]  # INCREASED from 3 to 5
         
         # ENHANCED: Use more regions per attempt
         selected_regions = self.regions[attempt:attempt+3] if attempt < len(self.regions) else self.regions[:3]
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'olx') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 for region in selected_regions:
                     try:
                         context = await browser.new_context(
@@ -852,7 +922,8 @@ class EnhancedOLXScanner:
                                         logging.debug(f"OLX item extraction error: {e}")
                                         continue
                                 
-                                await asyncio.sleep(random.uniform(1, 3))
+                                await results.flush()
+                                await shared_scheduler().throttle('olx')
                                 
                             except Exception as e:
                                 logging.warning(f"OLX {region['code']} error for {term} (attempt {attempt + 1}): {e}")
@@ -864,8 +935,6 @@ class EnhancedOLXScanner:
                         logging.warning(f"OLX {region['code']} region error (attempt {attempt + 1}): {e}")
                         continue
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"OLX browser launch error (attempt {attempt + 1}): {e}")
         
@@ -877,6 +946,8 @@ class EnhancedCraigslistScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
         # Major US cities for comprehensive coverage
         self.cities = [
             {'code': 'newyork', 'url': 'https://newyork.craigslist.org'},
@@ -893,19 +964,14 @@ class EnhancedCraigslistScanner:
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """FULLY IMPLEMENTED Craigslist scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'craigslist')
         search_terms = keywords["direct_terms"][:4]
         
         # Rotate cities based on attempt
         selected_cities = self.cities[attempt:attempt+3] if attempt < len(self.cities) else self.cities[:3]
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'craigslist') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 for city in selected_cities:
                     try:
                         context = await browser.new_context(
@@ -959,7 +1025,8 @@ class EnhancedCraigslistScanner:
                                     results.append(listing)
                                 
                                 logging.info(f"✅ Craigslist {city['code']}: Found {len(listings)} listings for '{term}'")
-                                await asyncio.sleep(random.uniform(2, 4))
+                                await results.flush()
+                                await shared_scheduler().throttle('craigslist')
                                 
                             except Exception as e:
                                 logging.warning(f"Craigslist {city['code']} error for {term}: {e}")
@@ -969,8 +1036,6 @@ class EnhancedCraigslistScanner:
                     except Exception as e:
                         logging.warning(f"Craigslist {city['code']} error: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Craigslist browser error: {e}")
         
@@ -982,6 +1047,8 @@ class EnhancedGumtreeScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
         # Major UK regions
         self.regions = [
             {'code': 'london', 'url': 'https://www.gumtree.com', 'region': 'london'},
@@ -993,18 +1060,13 @@ class EnhancedGumtreeScanner:
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """FULLY IMPLEMENTED Gumtree scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'gumtree')
         search_terms = keywords["direct_terms"][:4]
         
         selected_regions = self.regions[attempt:attempt+2] if attempt < len(self.regions) else self.regions[:2]
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'gumtree') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 for region in selected_regions:
                     try:
                         context = await browser.new_context(
@@ -1077,7 +1139,8 @@ class EnhancedGumtreeScanner:
                                     results.append(listing)
                                 
                                 logging.info(f"✅ Gumtree {region['code']}: Found {len(listings)} listings for '{term}'")
-                                await asyncio.sleep(random.uniform(3, 5))
+                                await results.flush()
+                                await shared_scheduler().throttle('gumtree')
                                 
                             except Exception as e:
                                 logging.warning(f"Gumtree {region['code']} error for {term}: {e}")
@@ -1087,8 +1150,6 @@ class EnhancedGumtreeScanner:
                     except Exception as e:
                         logging.warning(f"Gumtree {region['code']} error: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Gumtree browser error: {e}")
         
@@ -1100,22 +1161,16 @@ class EnhancedTaobaoScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """FULLY IMPLEMENTED Taobao scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'taobao')
         search_terms = keywords["direct_terms"][:3]  # Limit for complex site
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'taobao') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox', '--disable-setuid-sandbox', '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor', '--disable-dev-shm-usage'
-                    ]
-                )
-                
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080},
@@ -1211,13 +1266,12 @@ class EnhancedTaobaoScanner:
                                 logging.debug(f"Taobao URL {search_url} failed: {e}")
                                 continue
                         
-                        await asyncio.sleep(random.uniform(5, 8))
+                        await results.flush()
+                        await shared_scheduler().throttle('taobao')
                         
                     except Exception as e:
                         logging.warning(f"Taobao error for {term}: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Taobao browser error: {e}")
         
@@ -1229,19 +1283,16 @@ class EnhancedMercariScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """FULLY IMPLEMENTED Mercari scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'mercari')
         search_terms = keywords["direct_terms"][:4]
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'mercari') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080}
@@ -1313,13 +1364,12 @@ class EnhancedMercariScanner:
                             results.append(item)
                         
                         logging.info(f"✅ Mercari: Found {len(items)} items for '{term}'")
-                        await asyncio.sleep(random.uniform(3, 5))
+                        await results.flush()
+                        await shared_scheduler().throttle('mercari')
                         
                     except Exception as e:
                         logging.warning(f"Mercari error for {term}: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Mercari browser error: {e}")
         
@@ -1331,19 +1381,16 @@ class EnhancedMarktplaatsScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """NEW PLATFORM: Marktplaats scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'marktplaats')
         search_terms = keywords["direct_terms"][:4]
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'marktplaats') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080}
@@ -1413,13 +1460,12 @@ class EnhancedMarktplaatsScanner:
                             results.append(listing)
                         
                         logging.info(f"✅ Marktplaats: Found {len(listings)} listings for '{term}'")
-                        await asyncio.sleep(random.uniform(3, 5))
+                        await results.flush()
+                        await shared_scheduler().throttle('marktplaats')
                         
                     except Exception as e:
                         logging.warning(f"Marktplaats error for {term}: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Marktplaats browser error: {e}")
         
@@ -1431,19 +1477,16 @@ class EnhancedAvitoScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """NEW PLATFORM: Avito scanning with REAL results"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'avito')
         search_terms = keywords["direct_terms"][:3]  # Limit for international site
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'avito') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080},
@@ -1516,13 +1559,12 @@ class EnhancedAvitoScanner:
                             results.append(listing)
                         
                         logging.info(f"✅ Avito: Found {len(listings)} listings for '{term}'")
-                        await asyncio.sleep(random.uniform(4, 6))
+                        await results.flush()
+                        await shared_scheduler().throttle('avito')
                         
                     except Exception as e:
                         logging.warning(f"Avito error for {term}: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Avito browser error: {e}")
         
@@ -1534,22 +1576,19 @@ class EnhancedFacebookMarketplaceScanner:
     
     def __init__(self):
         self.ua = UserAgent()
+        self.browser_pool = None  # Shared pool assigned by EnhancedRealPlatformScanner
+        self.listing_sink = None  # Set while streaming into a ScanPipeline
 
     async def scan_enhanced(self, keywords: Dict, session: aiohttp.ClientSession, attempt: int = 0) -> List[Dict]:
         """BONUS PLATFORM: Facebook Marketplace scanning (limited due to auth requirements)"""
-        results = []
+        results = ListingBuffer(self.listing_sink, 'facebook')
         search_terms = keywords["direct_terms"][:2]  # Very limited due to auth
         
         # Note: Facebook Marketplace requires authentication, so this is a simplified implementation
         # In practice, this would need proper Facebook authentication
         
-        async with async_playwright() as p:
+        async with browser_session(self.browser_pool, 'facebook') as browser:
             try:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-                )
-                
                 context = await browser.new_context(
                     user_agent=self.ua.random,
                     viewport={'width': 1920, 'height': 1080}
@@ -1570,8 +1609,6 @@ class EnhancedFacebookMarketplaceScanner:
                     except Exception as e:
                         logging.warning(f"Facebook Marketplace error for {term}: {e}")
                 
-                await browser.close()
-                
             except Exception as e:
                 logging.error(f"Facebook Marketplace browser error: {e}")
         
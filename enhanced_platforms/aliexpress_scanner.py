@@ -16,6 +16,8 @@ import random
 from fake_useragent import UserAgent
 import time
 
+from listing_identity import identify
+
 class AliExpressScanner:
     """
     Real AliExpress scanner that works with actual data
@@ -398,11 +400,11 @@ class AliExpressScanner:
                 if match:
                     return match.group(1)
             
-            # Fallback: use hash of URL
-            return str(abs(hash(url)) % 1000000)
+            # Fallback: stable digest of the normalized URL
+            return identify(url, 'aliexpress').item_id
             
         except:
-            return str(random.randint(100000, 999999))
+            return identify(url, 'aliexpress').item_id
 
 
 async def test_aliexpress_scanner():
@@ -4,7 +4,6 @@ WildGuard AI - Enhanced Threat Scoring System
 Builds on existing scoring to dramatically improve accuracy
 """
 
-import re
 import json
 import logging
 from typing import Dict, List, Tuple, Optional
@@ -12,6 +11,9 @@ from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 
+from score_cache import shared_score_cache, table_version
+from listing_features import ListingFeatures, TermTable, VOCABULARY, extract_features, parse_price
+
 class ThreatCategory(Enum):
     WILDLIFE = "WILDLIFE"
     HUMAN_TRAFFICKING = "HUMAN_TRAFFICKING"
@@ -38,6 +40,21 @@ class EnhancedThreatAnalysis:
     reasoning: str
     requires_human_review: bool
 
+    def to_dict(self) -> Dict:
+        return {**self.__dict__, 'threat_category': self.threat_category.value,
+                'threat_level': self.threat_level.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EnhancedThreatAnalysis':
+        return cls(**{**data, 'threat_category': ThreatCategory(data['threat_category']),
+                      'threat_level': ThreatLevel(data['threat_level']),
+                      'wildlife_indicators': list(data['wildlife_indicators']),
+                      'human_trafficking_indicators': list(data['human_trafficking_indicators']),
+                      'exclusion_factors': list(data['exclusion_factors'])})
+
+# Bump when scoring logic (not just the weight tables) changes, to invalidate cached scores
+SCORING_REVISION = 1
+
 class EnhancedThreatScorer:
     """
     Enhanced threat scoring that builds on existing system
@@ -46,6 +63,7 @@ class EnhancedThreatScorer:
     def __init__(self):
         self.load_detection_databases()
         self.initialize_scoring_weights()
+        self.compile_term_tables()
         
     def load_detection_databases(self):
         """Load comprehensive detection databases"""
@@ -202,29 +220,95 @@ class EnhancedThreatScorer:
             'metaphorical': -15,         # Moderate negative for metaphors
             'legitimate_services': -35   # Strong negative for legitimate services
         }
+        
+        # Platform risk profiles
+        self.platform_risk_multipliers = {
+            'craigslist': 1.2,      # High anonymity, local transactions
+            'facebook': 1.1,        # Large user base, some verification
+            'gumtree': 1.15,        # Similar to Craigslist
+            'aliexpress': 1.1,      # International, varying regulation
+            'taobao': 1.15,         # Chinese platform, different regulations
+            'olx': 1.1,             # International classified ads
+            'ebay': 1.0,            # More regulated, buyer protection
+            'mercadolibre': 1.05,   # Regional leader, some regulation
+            'marktplaats': 1.0      # EU regulated
+        }
     
+    def compile_term_tables(self):
+        """Register every indicator list with the shared feature vocabulary (call again after editing them)"""
+        wildlife_entries = []
+        for group in ('critical_species', 'high_priority'):
+            for species_type, terms in self.wildlife_indicators[group].items():
+                wildlife_entries.extend((term, (group, species_type, term)) for term in terms)
+        wildlife_entries.extend((term, ('scientific_terms', None, term))
+                                for term in self.wildlife_indicators['scientific_terms'])
+        for lang_type, terms in self.wildlife_indicators['trafficking_language'].items():
+            wildlife_entries.extend((term, ('trafficking_language', lang_type, term)) for term in terms)
+        self._wildlife_table = TermTable(wildlife_entries)
+
+        # Same order (and labels) the indicators are reported in
+        self._human_labels = {
+            'age_concerns': "Age concern",
+            'control_patterns': "Control indicator",
+            'escort_services': "Adult service",
+            'financial_exploitation': "Financial exploitation",
+            'coded_language': "Coded language",
+            'suspicious_employment': "Suspicious employment"
+        }
+        self._human_table = TermTable(
+            (term, (category, term))
+            for category in self._human_labels
+            for term in self.human_trafficking_indicators[category]
+        )
+        self._exclusion_table = TermTable(
+            (pattern, (category, pattern))
+            for category, patterns in self.exclusion_patterns.items()
+            for pattern in patterns
+        )
+
+        self._toy_mask = VOCABULARY.register(['toy', 'plush', 'stuffed', 'replica', 'costume'])
+        self._availability_mask = VOCABULARY.register(['24/7', '24 hours', 'anytime', 'always available'])
+        self._cash_mask = VOCABULARY.register(['cash only', 'cash preferred', 'no credit cards'])
+        self.score_cache = shared_score_cache('enhanced_threat_scorer', self.weights_version())
+
+    def weights_version(self) -> str:
+        """Hash of every table the score depends on; cached scores from other versions are dropped"""
+        return table_version(SCORING_REVISION, self.wildlife_indicators, self.human_trafficking_indicators,
+                             self.exclusion_patterns, self.price_analysis, self.wildlife_weights,
+                             self.human_trafficking_weights, self.exclusion_weights,
+                             self.platform_risk_multipliers)
+
     def enhance_existing_score(self, listing_data: Dict, original_score: int) -> EnhancedThreatAnalysis:
         """
         Enhance the existing threat score with sophisticated analysis
         """
-        
-        title = listing_data.get('listing_title', '').lower()
-        description = listing_data.get('description', '').lower()
-        price_str = listing_data.get('listing_price', '')
-        search_term = listing_data.get('search_term', '').lower()
-        platform = listing_data.get('platform', '')
-        
-        text = f"{title} {description} {search_term}".lower()
+        return self.enhance_features(extract_features(listing_data), original_score)
+
+    def enhance_features(self, features: ListingFeatures, original_score: int) -> EnhancedThreatAnalysis:
+        """``enhance_existing_score`` over already-extracted ListingFeatures (no text rescans)"""
+        if self.score_cache is None:
+            return self._score_features(features, original_score)
+        key = f"{features.content_key}:{original_score}"
+        cached = self.score_cache.get(key)
+        if cached is not None:
+            return EnhancedThreatAnalysis.from_dict(cached)
+        analysis = self._score_features(features, original_score)
+        self.score_cache.put(key, analysis.to_dict())
+        return analysis
+
+    def _score_features(self, features: ListingFeatures, original_score: int) -> EnhancedThreatAnalysis:
+        features.refresh()
+        platform = features.platform
         
         # Step 1: Check for exclusions first
-        exclusion_factors = self._check_exclusions(text, price_str)
+        exclusion_factors = self._check_exclusions(features)
         exclusion_penalty = sum(self.exclusion_weights.get(factor['type'], 0) for factor in exclusion_factors)
         
         # Step 2: Analyze wildlife trafficking indicators
-        wildlife_score, wildlife_indicators = self._analyze_wildlife_indicators(text, price_str)
+        wildlife_score, wildlife_indicators = self._analyze_wildlife_indicators(features)
         
         # Step 3: Analyze human trafficking indicators
-        human_score, human_indicators = self._analyze_human_trafficking_indicators(text, price_str)
+        human_score, human_indicators = self._analyze_human_trafficking_indicators(features)
         
         # Step 4: Determine primary threat category
         threat_category = self._determine_threat_category(wildlife_score, human_score, exclusion_penalty)
@@ -266,32 +350,30 @@ class EnhancedThreatScorer:
             requires_human_review=requires_review
         )
     
-    def _check_exclusions(self, text: str, price_str: str) -> List[Dict]:
+    def _check_exclusions(self, features: ListingFeatures) -> List[Dict]:
         """Check for exclusion patterns that indicate false positives"""
         
         exclusions = []
         
-        for category, patterns in self.exclusion_patterns.items():
-            for pattern in patterns:
-                if pattern in text:
-                    exclusions.append({
-                        'type': category,
-                        'reason': f"Exclusion pattern: {pattern}",
-                        'weight': self.exclusion_weights.get(category, 0)
-                    })
-                    # If we find ivory soap or similar, it's definitely safe
-                    if pattern in ['ivory soap', 'ivory colored', 'ivory white', 'ivory brand']:
-                        exclusions.append({
-                            'type': 'strong_exclusion',
-                            'reason': f"Strong exclusion: {pattern}",
-                            'weight': -50  # Very strong negative weight
-                        })
+        for category, pattern in self._exclusion_table.find(features.term_bits):
+            exclusions.append({
+                'type': category,
+                'reason': f"Exclusion pattern: {pattern}",
+                'weight': self.exclusion_weights.get(category, 0)
+            })
+            # If we find ivory soap or similar, it's definitely safe
+            if pattern in ['ivory soap', 'ivory colored', 'ivory white', 'ivory brand']:
+                exclusions.append({
+                    'type': 'strong_exclusion',
+                    'reason': f"Strong exclusion: {pattern}",
+                    'weight': -50  # Very strong negative weight
+                })
         
         # Price-based exclusions
-        price = self._extract_price(price_str)
+        price = features.price
         if price is not None and price < self.price_analysis['very_low']:
             # Very cheap items with toy indicators
-            if any(word in text for word in ['toy', 'plush', 'stuffed', 'replica', 'costume']):
+            if features.term_bits & self._toy_mask:
                 exclusions.append({
                     'type': 'price_exclusion',
                     'reason': f"Very low price (${price}) with toy indicators",
@@ -300,38 +382,22 @@ class EnhancedThreatScorer:
         
         return exclusions
     
-    def _analyze_wildlife_indicators(self, text: str, price_str: str) -> Tuple[int, List[str]]:
+    def _analyze_wildlife_indicators(self, features: ListingFeatures) -> Tuple[int, List[str]]:
         """Analyze for wildlife trafficking indicators"""
         
         score = 0
         indicators = []
         
-        # Critical species detection
-        for species_type, terms in self.wildlife_indicators['critical_species'].items():
-            for term in terms:
-                if term in text:
-                    score += self.wildlife_weights['critical_species']
-                    indicators.append(f"Critical species: {term}")
-        
-        # High priority species
-        for species_type, terms in self.wildlife_indicators['high_priority'].items():
-            for term in terms:
-                if term in text:
-                    score += self.wildlife_weights['high_priority']
-                    indicators.append(f"High priority: {term}")
-        
-        # Scientific terms
-        for term in self.wildlife_indicators['scientific_terms']:
-            if term in text:
-                score += self.wildlife_weights['scientific_terms']
+        for group, kind, term in self._wildlife_table.find(features.term_bits):
+            score += self.wildlife_weights[group]
+            if group == 'critical_species':
+                indicators.append(f"Critical species: {term}")
+            elif group == 'high_priority':
+                indicators.append(f"High priority: {term}")
+            elif group == 'scientific_terms':
                 indicators.append(f"Scientific name: {term}")
-        
-        # Trafficking language
-        for lang_type, terms in self.wildlife_indicators['trafficking_language'].items():
-            matches = [term for term in terms if term in text]
-            if matches:
-                score += self.wildlife_weights['trafficking_language'] * len(matches)
-                indicators.extend([f"Trafficking language ({lang_type}): {term}" for term in matches])
+            else:
+                indicators.append(f"Trafficking language ({kind}): {term}")
         
         # Multiple indicators bonus
         if len(indicators) >= 3:
@@ -339,7 +405,7 @@ class EnhancedThreatScorer:
             indicators.append("Multiple wildlife indicators detected")
         
         # Price analysis bonus
-        price = self._extract_price(price_str)
+        price = features.price
         if price is not None:
             if price > self.price_analysis['very_high'] and indicators:
                 score += 20
@@ -350,61 +416,32 @@ class EnhancedThreatScorer:
         
         return min(score, 100), indicators
     
-    def _analyze_human_trafficking_indicators(self, text: str, price_str: str) -> Tuple[int, List[str]]:
+    def _analyze_human_trafficking_indicators(self, features: ListingFeatures) -> Tuple[int, List[str]]:
         """Analyze for human trafficking indicators"""
         
+        labels = self._human_labels
         score = 0
         indicators = []
+        service_count = 0
         
-        # Age concerns (highest priority)
-        for term in self.human_trafficking_indicators['age_concerns']:
-            if term in text:
-                score += self.human_trafficking_weights['age_concerns']
-                indicators.append(f"Age concern: {term}")
-        
-        # Control patterns
-        for term in self.human_trafficking_indicators['control_patterns']:
-            if term in text:
-                score += self.human_trafficking_weights['control_patterns']
-                indicators.append(f"Control indicator: {term}")
-        
-        # Escort services
-        for term in self.human_trafficking_indicators['escort_services']:
-            if term in text:
-                score += self.human_trafficking_weights['escort_services']
-                indicators.append(f"Adult service: {term}")
-        
-        # Financial exploitation
-        for term in self.human_trafficking_indicators['financial_exploitation']:
-            if term in text:
-                score += self.human_trafficking_weights['financial_exploitation']
-                indicators.append(f"Financial exploitation: {term}")
-        
-        # Coded language
-        for term in self.human_trafficking_indicators['coded_language']:
-            if term in text:
-                score += self.human_trafficking_weights['coded_language']
-                indicators.append(f"Coded language: {term}")
-        
-        # Suspicious employment
-        for term in self.human_trafficking_indicators['suspicious_employment']:
-            if term in text:
-                score += self.human_trafficking_weights['suspicious_employment']
-                indicators.append(f"Suspicious employment: {term}")
+        for category, term in self._human_table.find(features.term_bits):
+            score += self.human_trafficking_weights[category]
+            indicators.append(f"{labels[category]}: {term}")
+            if category == 'escort_services':
+                service_count += 1
         
         # Pattern analysis
         # 24/7 availability
-        if any(term in text for term in ['24/7', '24 hours', 'anytime', 'always available']):
+        if features.term_bits & self._availability_mask:
             score += 15
             indicators.append("24/7 availability pattern")
         
         # Cash only
-        if any(term in text for term in ['cash only', 'cash preferred', 'no credit cards']):
+        if features.term_bits & self._cash_mask:
             score += 12
             indicators.append("Cash-only payment pattern")
         
         # Multiple services
-        service_count = sum(1 for term in self.human_trafficking_indicators['escort_services'] if term in text)
         if service_count >= 3:
             score += 20
             indicators.append(f"Multiple services offered: {service_count}")
@@ -600,47 +637,11 @@ class EnhancedThreatScorer:
     def _get_platform_risk_multiplier(self, platform: str) -> float:
         """Get platform-specific risk multiplier"""
         
-        # Platform risk profiles
-        risk_multipliers = {
-            'craigslist': 1.2,      # High anonymity, local transactions
-            'facebook': 1.1,        # Large user base, some verification
-            'gumtree': 1.15,        # Similar to Craigslist
-            'aliexpress': 1.1,      # International, varying regulation
-            'taobao': 1.15,         # Chinese platform, different regulations
-            'olx': 1.1,             # International classified ads
-            'ebay': 1.0,            # More regulated, buyer protection
-            'mercadolibre': 1.05,   # Regional leader, some regulation
-            'marktplaats': 1.0      # EU regulated
-        }
-        
-        return risk_multipliers.get(platform.lower(), 1.0)
+        return self.platform_risk_multipliers.get(platform.lower(), 1.0)
     
     def _extract_price(self, price_str: str) -> Optional[float]:
         """Extract numeric price from price string"""
-        
-        if not price_str:
-            return None
-        
-        # Remove currency symbols and extract numbers
-        price_clean = re.sub(r'[^\d.,]', '', str(price_str))
-        if not price_clean:
-            return None
-        
-        try:
-            # Handle different decimal separators
-            if ',' in price_clean and '.' in price_clean:
-                # Assume comma is thousands separator
-                price_clean = price_clean.replace(',', '')
-            elif ',' in price_clean:
-                # Could be decimal separator in some locales
-                if price_clean.count(',') == 1 and len(price_clean.split(',')[1]) <= 2:
-                    price_clean = price_clean.replace(',', '.')
-                else:
-                    price_clean = price_clean.replace(',', '')
-            
-            return float(price_clean)
-        except:
-            return None
+        return parse_price(price_str)
 
 
 def test_enhanced_scoring():
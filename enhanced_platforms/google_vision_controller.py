@@ -9,14 +9,58 @@ import aiohttp
 import base64
 import json
 import logging
-import sqlite3
 import hashlib
+import io
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import calendar
 
+from enhanced_platforms.image_prefilter import ImagePrefilter, exempt_from_reject, expected_information_gain
+from enhanced_platforms.vision_store import PHASH_BANDS, VisionStore
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+VISION_API_URL = "https://vision.googleapis.com/v1/images:annotate"
+VISION_FEATURES = [
+    {"type": "LABEL_DETECTION", "maxResults": 15},
+    {"type": "TEXT_DETECTION", "maxResults": 5},
+    {"type": "OBJECT_LOCALIZATION", "maxResults": 10}
+]
+VISION_BATCH_SIZE = min(16, int(os.getenv('VISION_BATCH_SIZE', '16')))  # API limit: 16 images per annotate call
+VISION_PREFETCH_CONCURRENCY = int(os.getenv('VISION_PREFETCH_CONCURRENCY', '8'))
+VISION_MAX_IMAGE_BYTES = 4 * 1024 * 1024  # Vision API limit is 20MB
+# With the pre-classifier on, download up to this many images per remaining quota unit so it has some to rank
+VISION_PREFILTER_OVERFETCH = float(os.getenv('VISION_PREFILTER_OVERFETCH', '2'))
+VISION_MAX_DIMENSION = int(os.getenv('VISION_MAX_DIMENSION', '1024'))  # labels/OCR don't need more
+# Reposted photos (new CDN URL, resize, re-encode) land within a few bits of each other.
+# The 64-bit dHash is split into PHASH_BANDS (4) bands, so any match within 3 bits shares a band exactly.
+PHASH_RADIUS = min(PHASH_BANDS - 1, int(os.getenv('VISION_PHASH_RADIUS', '3')))
+
+
+def dhash(image) -> int:
+    """64-bit difference hash of a PIL image"""
+    pixels = list(image.convert('L').resize((9, 8), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def _phash_bands(phash: int) -> List[int]:
+    return [(phash >> (16 * band)) & 0xFFFF for band in range(PHASH_BANDS)]
+
+
+def _to_sqlite_int(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
 @dataclass
 class VisionAnalysis:
     has_wildlife_indicators: bool
@@ -28,6 +72,18 @@ class VisionAnalysis:
     cost_used: bool  # True if this used our quota
     cache_hit: bool
 
+@dataclass
+class PreparedImage:
+    payload: bytes  # downscaled bytes sent to the API
+    content_hash: str  # digest of the downloaded bytes
+    phash: Optional[int]  # 64-bit dHash (None without Pillow)
+    
+    def matches(self, other: 'PreparedImage') -> bool:
+        if self.content_hash == other.content_hash:
+            return True
+        return self.phash is not None and other.phash is not None and \
+            bin(self.phash ^ other.phash).count('1') <= PHASH_RADIUS
+
 class GoogleVisionController:
     """
     Google Vision API integration with strict 1000/month quota management
@@ -44,6 +100,10 @@ class GoogleVisionController:
         
         self.monthly_quota = 1000  # Hard limit
         self.current_month_usage = 0
+        self.cache_stats = {'url_hits': 0, 'content_hits': 0, 'near_duplicate_hits': 0}
+        self.store: Optional[VisionStore] = None
+        self.prefilter = ImagePrefilter()
+        self.prefilter_stats = {'checked': 0, 'rejected': 0}
         
         # Only initialize if API key is available
         if self.api_key:
@@ -90,35 +150,9 @@ class GoogleVisionController:
         ]
     
     def _init_quota_db(self):
-        """Initialize SQLite database for quota tracking"""
+        """Open the SQLite store (WAL, one connection) for quota tracking and caching"""
         try:
-            # Ensure directory exists
-            db_dir = os.path.dirname(self.db_path)
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir, exist_ok=True)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vision_quota (
-                    month_year TEXT PRIMARY KEY,
-                    requests_used INTEGER,
-                    last_updated TEXT
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vision_cache (
-                    image_hash TEXT PRIMARY KEY,
-                    analysis_result TEXT,
-                    timestamp TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
+            self.store = VisionStore(self.db_path)
             logging.info(f"✅ Vision quota database initialized at: {self.db_path}")
             
         except Exception as e:
@@ -129,58 +163,49 @@ class GoogleVisionController:
         """Load current month's usage"""
         if not self.api_key:
             return
-            
-        current_month = datetime.now().strftime('%Y-%m')
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT requests_used FROM vision_quota WHERE month_year = ?', (current_month,))
-            result = cursor.fetchone()
-            
-            if result:
-                self.current_month_usage = result[0]
-            else:
-                self.current_month_usage = 0
-                cursor.execute('INSERT INTO vision_quota (month_year, requests_used, last_updated) VALUES (?, 0, ?)', 
-                             (current_month, datetime.now().isoformat()))
-                conn.commit()
-            
-            conn.close()
-            
+            self.current_month_usage = self.store.call(self.store.get_usage, datetime.now().strftime('%Y-%m'))
             logging.info(f"Vision API quota: {self.current_month_usage}/{self.monthly_quota} used this month")
             
         except Exception as e:
             logging.error(f"Failed to load monthly usage: {e}")
             self.current_month_usage = 0
     
-    def _update_quota_usage(self):
-        """Update quota usage in database"""
-        if not self.api_key:
-            return
-            
-        current_month = datetime.now().strftime('%Y-%m')
-        self.current_month_usage += 1
+    async def _reserve_quota(self, images: int) -> int:
+        """Atomically claim quota for ``images`` API calls; returns how many were granted"""
+        if not self.api_key or images <= 0:
+            return 0
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            granted, self.current_month_usage = await self.store.run(
+                self.store.reserve_quota, datetime.now().strftime('%Y-%m'), images, self.monthly_quota)
+            if granted < images:
+                logging.warning(f"Vision API quota: only {granted}/{images} images fit in the monthly cap")
+            return granted
             
-            cursor.execute('''
-                UPDATE vision_quota 
-                SET requests_used = ?, last_updated = ?
-                WHERE month_year = ?
-            ''', (self.current_month_usage, datetime.now().isoformat(), current_month))
-            
-            conn.commit()
-            conn.close()
-            
-            logging.info(f"Vision API quota updated: {self.current_month_usage}/{self.monthly_quota}")
+        except Exception as e:
+            logging.error(f"Failed to reserve quota: {e}")
+            return 0
+    
+    async def _release_quota(self, images: int):
+        """Return reserved quota for images that were not analyzed"""
+        if not self.api_key or images <= 0:
+            return
+        
+        try:
+            self.current_month_usage = await self.store.run(
+                self.store.add_usage, datetime.now().strftime('%Y-%m'), -images)
             
         except Exception as e:
             logging.error(f"Failed to update quota usage: {e}")
     
+    def close(self):
+        """Commit pending cache writes, close the store and stop pre-classifier workers"""
+        if self.store:
+            self.store.close()
+        self.prefilter.close()
+    
     def can_use_quota(self) -> Tuple[bool, str]:
         """Check if we can use Vision API quota"""
         
@@ -234,98 +259,277 @@ class GoogleVisionController:
         """
         Analyze listing image with strict quota management
         """
+        results = await self.analyze_listing_images([(listing_data, enhanced_analysis)])
+        return results[0]
+    
+    async def analyze_listing_images(self, candidates: List[Tuple[Dict, Dict]]) -> List[Optional[VisionAnalysis]]:
+        """
+        Analyze many listing images with batched annotate calls
         
-        # Check if we should analyze
-        should_analyze, reason = self.should_analyze_image(listing_data, enhanced_analysis)
-        if not should_analyze:
-            logging.debug(f"Skipping vision analysis: {reason}")
-            return None
+        ``candidates`` is a list of ``(listing_data, enhanced_analysis)`` pairs; the
+        result list is parallel to it (None where no analysis was done). Images are
+        prefetched concurrently over one session, downscaled off the event loop and
+        sent up to VISION_BATCH_SIZE per request. Quota is charged per image.
         
-        image_url = listing_data.get('image_url')
-        if not image_url:
-            return None
+        Downloaded images are looked up by content digest and perceptual hash, so
+        a photo already analyzed under another URL (reposts, CDN size variants)
+        reuses the stored analysis instead of spending quota.
+        """
+        results: List[Optional[VisionAnalysis]] = [None] * len(candidates)
+        pending: Dict[str, List[int]] = {}  # image hash -> candidate positions
+        image_urls: Dict[str, str] = {}
+        
+        for position, (listing_data, enhanced_analysis) in enumerate(candidates):
+            should_analyze, reason = self.should_analyze_image(listing_data, enhanced_analysis)
+            if not should_analyze:
+                logging.debug(f"Skipping vision analysis: {reason}")
+                continue
+            
+            image_url = listing_data.get('image_url')
+            image_hash = hashlib.md5(image_url.encode()).hexdigest()
+            if image_hash in pending:
+                pending[image_hash].append(position)
+                continue
+            
+            # Check cache first
+            cached_result = await self._get_cached_analysis(image_hash)
+            if cached_result:
+                logging.debug("Using cached vision analysis")
+                self.cache_stats['url_hits'] += 1
+                results[position] = cached_result
+                continue
+            
+            # Reserve quota for every image we are about to send
+            overfetch = VISION_PREFILTER_OVERFETCH if self.prefilter.enabled else 1
+            if len(pending) >= (self.monthly_quota - self.current_month_usage) * overfetch:
+                logging.debug("Skipping vision analysis: monthly quota reserved by this batch")
+                continue
+            pending[image_hash] = [position]
+            image_urls[image_hash] = image_url
         
-        # Check cache first
-        image_hash = hashlib.md5(image_url.encode()).hexdigest()
-        cached_result = self._get_cached_analysis(image_hash)
-        if cached_result:
-            logging.debug("Using cached vision analysis")
-            return cached_result
+        if not pending:
+            return results
         
         try:
-            # Download image
-            image_data = await self._download_image(image_url)
-            if not image_data:
-                return None
+            images = await self._prefetch_images(image_urls)
             
-            # Call Vision API
-            analysis = await self._call_vision_api(image_data)
+            # Same photo under another URL: reuse a stored analysis, or one
+            # already going out in this batch, instead of spending quota
+            hashes = []
+            aliases: Dict[str, List[str]] = {}
+            for image_hash in pending:
+                image = images.get(image_hash)
+                if not image:
+                    continue
+                cached_result = await self._get_cached_image_analysis(image)
+                if cached_result:
+                    await self._cache_analysis(image_hash, cached_result)
+                    for position in pending[image_hash]:
+                        results[position] = cached_result
+                    continue
+                twin = next((other for other in hashes if images[other].matches(image)), None)
+                if twin:
+                    aliases.setdefault(twin, []).append(image_hash)
+                    pending[twin].extend(pending[image_hash])
+                    continue
+                hashes.append(image_hash)
             
-            # Update quota
-            self._update_quota_usage()
-            analysis.cost_used = True
+            hashes = await self._prefilter_and_rank(hashes, images, candidates, pending)
             
-            # Cache result
-            self._cache_analysis(image_hash, analysis)
+            # Claim quota before calling the API, so concurrent scanners cannot both spend the last units
+            granted = await self._reserve_quota(len(hashes))
+            hashes = hashes[:granted]
             
-            return analysis
+            analyzed = 0
+            try:
+                for i in range(0, len(hashes), VISION_BATCH_SIZE):
+                    chunk = hashes[i:i + VISION_BATCH_SIZE]
+                    try:
+                        analyses = await self._call_vision_api_batch(
+                            [images[image_hash].payload for image_hash in chunk])
+                    except Exception as e:
+                        logging.error(f"Vision API error: {e}")
+                        continue
+                
+                    for image_hash, analysis in zip(chunk, analyses):
+                        if analysis is None:
+                            continue
+                        analyzed += 1
+                        await self._cache_analysis(image_hash, analysis)
+                        await self._cache_image_analysis(images[image_hash], analysis)
+                        for alias in aliases.get(image_hash, []):
+                            await self._cache_analysis(alias, analysis)
+                        for n, position in enumerate(pending[image_hash]):
+                            # Duplicates of an image in the same batch are served like cache hits
+                            results[position] = analysis if n == 0 else VisionAnalysis(
+                                **{**analysis.__dict__, 'cost_used': False, 'cache_hit': True})
+            finally:
+                # Hand back quota reserved for images the API did not analyze
+                await self._release_quota(granted - analyzed)
+                await self.store.run(self.store.flush)
+            
+            if len(hashes) > 1:
+                logging.info(f"📸 Vision batch: {analyzed}/{len(hashes)} images analyzed in "
+                             f"{(len(hashes) + VISION_BATCH_SIZE - 1) // VISION_BATCH_SIZE} request(s)")
             
         except Exception as e:
             logging.error(f"Vision API error: {e}")
-            return None
+        
+        return results
+    
+    async def _prefilter_and_rank(self, hashes: List[str], images: Dict[str, PreparedImage],
+                                  candidates: List[Tuple[Dict, Dict]], pending: Dict[str, List[int]]) -> List[str]:
+        """Order by expected information gain, dropping images the pre-classifier rejects (if configured to)"""
+        verdicts = await self.prefilter.classify({image_hash: images[image_hash].payload for image_hash in hashes})
+        
+        ranked = []
+        for image_hash in hashes:
+            enhanced_analysis = candidates[pending[image_hash][0]][1]
+            verdict = verdicts.get(image_hash)
+            if verdict:
+                self.prefilter_stats['checked'] += 1
+                # Human-review and critical-species listings are always worth a look
+                if verdict.reject and not exempt_from_reject(enhanced_analysis):
+                    self.prefilter_stats['rejected'] += 1
+                    logging.debug(f"Skipping vision analysis: pre-classifier rejected image "
+                                  f"(p={verdict.non_candidate_probability:.2f}, {verdict.reason})")
+                    continue
+            ranked.append((expected_information_gain(enhanced_analysis, verdict), image_hash))
+        
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        if len(ranked) < len(hashes):
+            logging.info(f"🧹 Vision pre-classifier: {len(hashes) - len(ranked)}/{len(hashes)} images rejected")
+        return [image_hash for _, image_hash in ranked]
     
-    async def _download_image(self, image_url: str) -> Optional[bytes]:
+    async def _prefetch_images(self, image_urls: Dict[str, str]) -> Dict[str, Optional[PreparedImage]]:
+        """Download all images concurrently over one session, then hash and downscale them in worker threads"""
+        semaphore = asyncio.Semaphore(VISION_PREFETCH_CONCURRENCY)
+        timeout = aiohttp.ClientTimeout(total=15)
+        
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async def fetch(image_url: str) -> Optional[bytes]:
+                async with semaphore:
+                    return await self._download_image(image_url, session)
+            
+            downloads = await asyncio.gather(*(fetch(url) for url in image_urls.values()))
+        
+        loop = asyncio.get_running_loop()
+        prepared = await asyncio.gather(*(
+            loop.run_in_executor(None, self._prepare_image, content) if content else asyncio.sleep(0)
+            for content in downloads
+        ))
+        return dict(zip(image_urls, prepared))
+    
+    async def _download_image(self, image_url: str, session: aiohttp.ClientSession = None) -> Optional[bytes]:
         """Download image with size limits"""
+        if session is None:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as own_session:
+                return await self._download_image(image_url, own_session)
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, timeout=15) as response:
-                    if response.status == 200:
-                        # Limit image size to 4MB (Vision API limit is 20MB)
-                        content = await response.read()
-                        if len(content) > 4 * 1024 * 1024:  # 4MB
-                            logging.warning(f"Image too large: {len(content)} bytes")
+            async with session.get(image_url) as response:
+                if response.status == 200:
+                    # Limit image size to 4MB, without reading past the cap
+                    if (response.content_length or 0) > VISION_MAX_IMAGE_BYTES:
+                        logging.warning(f"Image too large: {response.content_length} bytes")
+                        return None
+                    chunks = []
+                    size = 0
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        size += len(chunk)
+                        if size > VISION_MAX_IMAGE_BYTES:
+                            logging.warning(f"Image too large: over {VISION_MAX_IMAGE_BYTES} bytes")
                             return None
-                        return content
+                        chunks.append(chunk)
+                    return b''.join(chunks)
         except Exception as e:
             logging.warning(f"Image download failed: {e}")
         
         return None
     
+    @staticmethod
+    def _prepare_image(content: bytes) -> PreparedImage:
+        """Content digest, perceptual hash and downscaled payload (hash/resize need Pillow)"""
+        content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if not PIL_AVAILABLE:
+            return PreparedImage(content, content_hash, None)
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                phash = dhash(image)
+        except Exception as e:
+            logging.debug(f"Image hash skipped: {e}")
+            return PreparedImage(content, content_hash, None)
+        return PreparedImage(GoogleVisionController._downscale_image(content), content_hash, phash)
+    
+    @staticmethod
+    def _downscale_image(content: bytes) -> bytes:
+        """Shrink images larger than VISION_MAX_DIMENSION to cut request payload (needs Pillow)"""
+        if not PIL_AVAILABLE:
+            return content
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                if max(image.size) <= VISION_MAX_DIMENSION:
+                    return content
+                image.thumbnail((VISION_MAX_DIMENSION, VISION_MAX_DIMENSION))
+                if image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                buffer = io.BytesIO()
+                image.save(buffer, format='JPEG', quality=85)
+            resized = buffer.getvalue()
+            return resized if len(resized) < len(content) else content
+        except Exception as e:
+            logging.debug(f"Image downscale skipped: {e}")
+            return content
+    
     async def _call_vision_api(self, image_data: bytes) -> VisionAnalysis:
         """Call Google Vision API"""
-        
-        # Encode image
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
+        analysis = (await self._call_vision_api_batch([image_data]))[0]
+        if analysis is None:
+            raise Exception("Vision API returned no annotations for image")
+        return analysis
+    
+    async def _call_vision_api_batch(self, images: List[bytes]) -> List[Optional[VisionAnalysis]]:
+        """One annotate call for up to VISION_BATCH_SIZE images; None for images the API rejected"""
         
         # Prepare request
         request_data = {
             "requests": [
                 {
-                    "image": {"content": image_base64},
-                    "features": [
-                        {"type": "LABEL_DETECTION", "maxResults": 15},
-                        {"type": "TEXT_DETECTION", "maxResults": 5},
-                        {"type": "OBJECT_LOCALIZATION", "maxResults": 10}
-                    ]
+                    "image": {"content": base64.b64encode(image_data).decode('utf-8')},
+                    "features": VISION_FEATURES
                 }
+                for image_data in images
             ]
         }
         
-        url = f"https://vision.googleapis.com/v1/images:annotate?key={self.api_key}"
+        url = f"{VISION_API_URL}?key={self.api_key}"
         
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=request_data, timeout=30) as response:
+            async with session.post(url, json=request_data, timeout=aiohttp.ClientTimeout(total=60)) as response:
                 if response.status == 200:
                     result = await response.json()
-                    return self._parse_vision_response(result)
                 else:
                     error_text = await response.text()
                     raise Exception(f"Vision API error {response.status}: {error_text}")
+        
+        # Responses come back in request order
+        analyses = []
+        responses = result.get('responses', [])
+        for i in range(len(images)):
+            annotations = responses[i] if i < len(responses) else {}
+            if 'error' in annotations:
+                logging.warning(f"Vision API image error: {annotations['error'].get('message', annotations['error'])}")
+                analyses.append(None)
+            else:
+                analyses.append(self._parse_annotations(annotations))
+        return analyses
     
     def _parse_vision_response(self, response: Dict) -> VisionAnalysis:
         """Parse Google Vision API response"""
-        
-        annotations = response.get('responses', [{}])[0]
+        return self._parse_annotations(response.get('responses', [{}])[0])
+    
+    def _parse_annotations(self, annotations: Dict) -> VisionAnalysis:
+        """Parse one image's annotations from a Vision API response"""
         
         # Extract labels
         labels = []
@@ -408,61 +612,95 @@ class GoogleVisionController:
             'analysis_type': analysis_type
         }
     
-    def _get_cached_analysis(self, image_hash: str) -> Optional[VisionAnalysis]:
+    async def _get_cached_analysis(self, image_hash: str) -> Optional[VisionAnalysis]:
         """Get cached vision analysis"""
         if not self.api_key:
             return None
             
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT analysis_result FROM vision_cache WHERE image_hash = ?', (image_hash,))
-            result = cursor.fetchone()
-            conn.close()
-            
+            result = await self.store.run(self.store.get_url_analysis, image_hash)
             if result:
-                data = json.loads(result[0])
-                analysis = VisionAnalysis(**data)
-                analysis.cache_hit = True
-                analysis.cost_used = False
-                return analysis
+                return self._load_cached_analysis(result)
         except Exception as e:
             logging.warning(f"Cache lookup failed: {e}")
         
         return None
     
-    def _cache_analysis(self, image_hash: str, analysis: VisionAnalysis):
-        """Cache vision analysis result"""
+    async def _get_cached_image_analysis(self, image: PreparedImage) -> Optional[VisionAnalysis]:
+        """Cached analysis for the same image bytes, or a perceptual near-duplicate"""
         if not self.api_key:
-            return
-            
+            return None
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            result = await self.store.run(self.store.get_content_analysis, image.content_hash)
+            hit_type = 'content_hits'
             
-            # Prepare data for caching
-            cache_data = {
-                'has_wildlife_indicators': analysis.has_wildlife_indicators,
-                'has_human_trafficking_indicators': analysis.has_human_trafficking_indicators,
-                'detected_labels': analysis.detected_labels,
-                'detected_text': analysis.detected_text,
-                'confidence_score': analysis.confidence_score,
-                'analysis_type': analysis.analysis_type,
-                'cost_used': False,  # Cache hits don't cost quota
-                'cache_hit': True
-            }
+            if not result and image.phash is not None:
+                # Multi-index lookup: candidates share at least one 16-bit band
+                candidates = await self.store.run(self.store.find_by_bands, _phash_bands(image.phash))
+                best = None
+                for phash, analysis_result in candidates:
+                    distance = bin((phash & 0xFFFFFFFFFFFFFFFF) ^ image.phash).count('1')
+                    if distance <= PHASH_RADIUS and (best is None or distance < best[0]):
+                        best = (distance, analysis_result)
+                if best:
+                    result = best[1]
+                    hit_type = 'near_duplicate_hits'
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO vision_cache (image_hash, analysis_result, timestamp)
-                VALUES (?, ?, ?)
-            ''', (image_hash, json.dumps(cache_data), datetime.now().isoformat()))
+            if result:
+                logging.debug(f"Using cached vision analysis ({hit_type.replace('_hits', '')} match)")
+                self.cache_stats[hit_type] += 1
+                return self._load_cached_analysis(result)
+        except Exception as e:
+            logging.warning(f"Image cache lookup failed: {e}")
+        
+        return None
+    
+    @staticmethod
+    def _load_cached_analysis(analysis_result: str) -> VisionAnalysis:
+        analysis = VisionAnalysis(**json.loads(analysis_result))
+        analysis.cache_hit = True
+        analysis.cost_used = False
+        return analysis
+    
+    @staticmethod
+    def _serialize_analysis(analysis: VisionAnalysis) -> str:
+        return json.dumps({
+            'has_wildlife_indicators': analysis.has_wildlife_indicators,
+            'has_human_trafficking_indicators': analysis.has_human_trafficking_indicators,
+            'detected_labels': analysis.detected_labels,
+            'detected_text': analysis.detected_text,
+            'confidence_score': analysis.confidence_score,
+            'analysis_type': analysis.analysis_type,
+            'cost_used': False,  # Cache hits don't cost quota
+            'cache_hit': True
+        })
+    
+    async def _cache_analysis(self, image_hash: str, analysis: VisionAnalysis):
+        """Cache vision analysis result (batched write)"""
+        if not self.api_key:
+            return
             
-            conn.commit()
-            conn.close()
+        try:
+            await self.store.run(self.store.put_url_analysis, image_hash, self._serialize_analysis(analysis))
         except Exception as e:
             logging.warning(f"Failed to cache analysis: {e}")
     
+    async def _cache_image_analysis(self, image: PreparedImage, analysis: VisionAnalysis):
+        """Cache vision analysis under the image content and perceptual hash (batched write)"""
+        if not self.api_key:
+            return
+        
+        try:
+            if image.phash is not None:
+                phash, bands = _to_sqlite_int(image.phash), _phash_bands(image.phash)
+            else:
+                phash, bands = None, [None] * PHASH_BANDS
+            await self.store.run(self.store.put_image_analysis, image.content_hash, phash, bands,
+                                 self._serialize_analysis(analysis))
+        except Exception as e:
+            logging.warning(f"Failed to cache image analysis: {e}")
+    
     def enhance_score_with_vision(self, enhanced_score: int, vision_analysis: VisionAnalysis) -> Tuple[int, str]:
         """Enhance threat score based on vision analysis"""
         
@@ -542,7 +780,9 @@ class GoogleVisionController:
             'days_remaining': days_remaining,
             'daily_budget_remaining': int(daily_budget_remaining),
             'api_key_configured': bool(self.api_key),
-            'database_path': self.db_path
+            'database_path': self.db_path,
+            'cache_hits': dict(self.cache_stats),
+            'prefilter': dict(self.prefilter_stats)
         }
 
 
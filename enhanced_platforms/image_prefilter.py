@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Local Image Pre-Classifier
+Cheap CPU checks run before an image is allowed to spend Google Vision quota.
+Toys, cartoons, posters / prints and stock product shots (the same things
+GoogleVisionController.exclusion_terms catches after the fact) are recognised
+from a 128px thumbnail:
+
+    colour histogram   few flat, saturated colours -> toy / cartoon / print
+    edge density       very little texture -> illustration / render
+    text-area ratio    many high-contrast 8px blocks -> poster, screenshot, ad
+    border whiteness   plain white studio background -> stock photo
+
+A tiny logistic model combines them into P(non-candidate), which ranks images
+by expected information gain so scarce quota goes to the most uncertain
+listings first. The weights are hand-set and uncalibrated, so by default
+nothing is rejected outright: set VISION_PREFILTER_REJECT (e.g. 0.8) only
+once they have been checked against a labelled sample. Even then, listings
+naming a critical species or flagged for human review are never rejected.
+Feature extraction runs in a process pool. Requires Pillow; without it every
+image passes and only the ranking applies.
+"""
+
+import asyncio
+import io
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+try:
+    from PIL import Image, ImageFilter, ImageStat
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+PREFILTER_ENABLED = os.getenv('VISION_PREFILTER_ENABLED', 'true').lower() == 'true'
+# Unset: ranking only, no image is skipped on the model's say-so
+REJECT_THRESHOLD = float(os.getenv('VISION_PREFILTER_REJECT')) if os.getenv('VISION_PREFILTER_REJECT') else None
+DEFAULT_WORKERS = int(os.getenv('VISION_PREFILTER_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+THUMBNAIL_SIZE = 128
+BLOCK_SIZE = 8
+
+COLOUR_BITS = 4  # per channel: 4096 bins, so ivory / bone tones do not share a bin with white
+
+# Logistic weights over the features below (all scaled to 0..1). Hand-set
+# priors: saturated flat colour and text blocks push towards "non-candidate";
+# colour variety and natural texture pull away. A white studio background is
+# as typical of a trafficked item's product shot as of a stock photo, so it
+# only counts for a little.
+MODEL_BIAS = -3.0
+MODEL_WEIGHTS = {
+    'dominant_colour_share': 1.5,
+    'saturation': 2.0,
+    'colour_entropy': -2.0,
+    'flatness': 1.5,
+    'text_ratio': 6.0,
+    'border_white': 0.5,
+}
+
+
+@dataclass
+class PrefilterResult:
+    features: Dict[str, float]
+    non_candidate_probability: float
+    reject: bool
+    reason: str
+
+
+def extract_image_features(content: bytes) -> Dict[str, float]:
+    """Colour, edge, text-area and border features from a small thumbnail"""
+    with Image.open(io.BytesIO(content)) as image:
+        image.draft('RGB', (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))  # JPEG: decode at reduced scale
+        rgb = image.convert('RGB')
+    rgb.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    width, height = rgb.size
+    pixels = width * height
+    gray = rgb.convert('L')
+
+    # Colour histogram over COLOUR_BITS bits per channel
+    shift = 8 - COLOUR_BITS
+    colours = sorted((count for count, _ in rgb.point(lambda v: v >> shift).getcolors(1 << 3 * COLOUR_BITS)),
+                     reverse=True)
+    dominant_colour_share = sum(colours[:3]) / pixels
+    colour_entropy = -sum(c / pixels * math.log2(c / pixels) for c in colours) / (3 * COLOUR_BITS)
+    saturation = ImageStat.Stat(rgb.convert('HSV').getchannel('S')).mean[0] / 255
+
+    # Edge density
+    edges = gray.filter(ImageFilter.FIND_EDGES)
+    edge_histogram = edges.histogram()
+    edge_density = sum(edge_histogram[48:]) / pixels
+    flatness = 1 - min(1.0, edge_density / 0.15)
+
+    # Text-like blocks: dense sharp edges over high-contrast luminance
+    blocks = (max(1, width // BLOCK_SIZE), max(1, height // BLOCK_SIZE))
+    block_edges = edges.resize(blocks, Image.BOX).tobytes()
+    block_mean = gray.resize(blocks, Image.BOX).tobytes()
+    block_square = gray.point(lambda v: v * v // 255).resize(blocks, Image.BOX).tobytes()
+    text_blocks = 0
+    for edge, mean, square in zip(block_edges, block_mean, block_square):
+        variance = max(0, square * 255 - mean * mean)
+        if edge > 60 and variance > 25 * 25:
+            text_blocks += 1
+    text_ratio = text_blocks / (blocks[0] * blocks[1])
+
+    # Near-white pixels in the outer ring
+    ring = max(1, min(width, height) // 12)
+    border_histogram = [0] * 256
+    for box in ((0, 0, width, ring), (0, height - ring, width, height),
+                (0, ring, ring, height - ring), (width - ring, ring, width, height - ring)):
+        if box[2] > box[0] and box[3] > box[1]:
+            for value, count in enumerate(gray.crop(box).histogram()):
+                border_histogram[value] += count
+    border_pixels = sum(border_histogram) or 1
+    border_white = sum(border_histogram[235:]) / border_pixels
+
+    return {
+        'dominant_colour_share': round(dominant_colour_share, 4),
+        'saturation': round(saturation, 4),
+        'colour_entropy': round(colour_entropy, 4),
+        'edge_density': round(edge_density, 4),
+        'flatness': round(flatness, 4),
+        'text_ratio': round(text_ratio, 4),
+        'border_white': round(border_white, 4),
+    }
+
+
+def non_candidate_probability(features: Dict[str, float]) -> float:
+    z = MODEL_BIAS + sum(weight * features[name] for name, weight in MODEL_WEIGHTS.items())
+    return 1 / (1 + math.exp(-z))
+
+
+def classify_image(content: bytes, reject_threshold: Optional[float] = REJECT_THRESHOLD) -> Optional[PrefilterResult]:
+    """Features and verdict for one image (None if it cannot be decoded)"""
+    try:
+        features = extract_image_features(content)
+    except Exception:
+        return None
+    probability = non_candidate_probability(features)
+    strongest = max(MODEL_WEIGHTS, key=lambda name: MODEL_WEIGHTS[name] * features[name])
+    return PrefilterResult(
+        features=features,
+        non_candidate_probability=round(probability, 4),
+        reject=reject_threshold is not None and probability >= reject_threshold,
+        reason=f"{strongest}={features[strongest]:.2f}"
+    )
+
+
+def exempt_from_reject(enhanced_analysis: Dict) -> bool:
+    """Listings too important to skip on an image heuristic: human review or a critical species"""
+    if enhanced_analysis.get('requires_human_review', False):
+        return True
+    if enhanced_analysis.get('threat_level') == 'CRITICAL':
+        return True
+    return any(indicator.startswith('Critical species')
+               for indicator in enhanced_analysis.get('wildlife_indicators', ()))
+
+
+def expected_information_gain(enhanced_analysis: Dict, verdict: Optional[PrefilterResult] = None) -> float:
+    """How much a vision call is expected to change the outcome for a listing.
+
+    Binary entropy of the text-based threat score (a 50 is maximally
+    uncertain), discounted by the chance the image is not a real candidate.
+    Listings flagged for human review always rank first.
+    """
+    p = min(0.99, max(0.01, enhanced_analysis.get('enhanced_score', 0) / 100))
+    gain = -(p * math.log2(p) + (1 - p) * math.log2(1 - p))
+    if verdict is not None:
+        gain *= 1 - verdict.non_candidate_probability
+    if enhanced_analysis.get('requires_human_review', False):
+        gain += 1.0
+    return gain
+
+
+class ImagePrefilter:
+    """Runs ``classify_image`` over a batch of images in a process pool"""
+
+    def __init__(self, workers: int = None, reject_threshold: Optional[float] = REJECT_THRESHOLD):
+        self.enabled = PIL_AVAILABLE and PREFILTER_ENABLED
+        self.workers = workers or DEFAULT_WORKERS
+        self.reject_threshold = reject_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if PREFILTER_ENABLED and not PIL_AVAILABLE:
+            logging.info("ℹ️ Pillow not installed - vision pre-classifier disabled")
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def classify(self, images: Dict[str, bytes]) -> Dict[str, Optional[PrefilterResult]]:
+        if not self.enabled or not images:
+            return {}
+        loop = asyncio.get_running_loop()
+        try:
+            pool = self._executor()
+            verdicts = await asyncio.gather(*(
+                loop.run_in_executor(pool, classify_image, content, self.reject_threshold)
+                for content in images.values()
+            ))
+        except Exception as e:
+            # A broken pool must not cost the batch its vision calls; let every image through
+            logging.warning(f"Vision pre-classifier unavailable: {e}")
+            self.close()
+            return {}
+        return dict(zip(images, verdicts))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
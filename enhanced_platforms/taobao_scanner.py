@@ -17,6 +17,8 @@ from fake_useragent import UserAgent
 import time
 import base64
 
+from listing_identity import identify
+
 class TaobaoScanner:
     """
     Real Taobao scanner that works with actual data
@@ -562,11 +564,11 @@ class TaobaoScanner:
                 if match:
                     return match.group(1)
             
-            # Fallback
-            return str(abs(hash(url)) % 1000000)
+            # Fallback: stable digest of the normalized URL
+            return identify(url, 'taobao').item_id
             
         except:
-            return str(random.randint(100000, 999999))
+            return identify(url, 'taobao').item_id
 
 
 async def test_taobao_scanner():
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Vision Quota / Cache Store
+One SQLite connection (WAL, synchronous=NORMAL) for GoogleVisionController's
+quota counter and analysis caches, owned by a dedicated worker thread so
+async callers never block the event loop on disk I/O.
+
+Cache writes are batched: they join an open transaction that commits every
+VISION_STORE_BATCH_OPS writes or VISION_STORE_FLUSH_MS milliseconds, whichever
+comes first. Quota changes are committed immediately as atomic
+``requests_used = requests_used + ?`` updates, so scanners sharing the
+database cannot over-spend the monthly cap.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+DEFAULT_BATCH_OPS = int(os.getenv('VISION_STORE_BATCH_OPS', '50'))
+DEFAULT_FLUSH_MS = int(os.getenv('VISION_STORE_FLUSH_MS', '500'))
+PHASH_BANDS = 4
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS vision_quota (
+        month_year TEXT PRIMARY KEY,
+        requests_used INTEGER,
+        last_updated TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS vision_cache (
+        image_hash TEXT PRIMARY KEY,
+        analysis_result TEXT,
+        timestamp TEXT
+    )
+    ''',
+    # Content-keyed cache: exact digest of the image bytes plus a perceptual
+    # hash indexed per 16-bit band for near-duplicate lookups
+    '''
+    CREATE TABLE IF NOT EXISTS vision_image_cache (
+        content_hash TEXT PRIMARY KEY,
+        phash INTEGER,
+        band0 INTEGER,
+        band1 INTEGER,
+        band2 INTEGER,
+        band3 INTEGER,
+        analysis_result TEXT,
+        timestamp TEXT
+    )
+    ''',
+] + [f'CREATE INDEX IF NOT EXISTS idx_vision_image_band{band} ON vision_image_cache(band{band})'
+     for band in range(PHASH_BANDS)]
+
+# Fixed SQL text, so sqlite3's statement cache prepares each once per connection
+SELECT_USAGE = 'SELECT requests_used FROM vision_quota WHERE month_year = ?'
+INSERT_MONTH = 'INSERT OR IGNORE INTO vision_quota (month_year, requests_used, last_updated) VALUES (?, 0, ?)'
+ADD_USAGE = '''
+    UPDATE vision_quota
+    SET requests_used = MAX(0, requests_used + ?), last_updated = ?
+    WHERE month_year = ?
+'''
+SELECT_URL = 'SELECT analysis_result FROM vision_cache WHERE image_hash = ?'
+UPSERT_URL = '''
+    INSERT OR REPLACE INTO vision_cache (image_hash, analysis_result, timestamp)
+    VALUES (?, ?, ?)
+'''
+SELECT_CONTENT = 'SELECT analysis_result FROM vision_image_cache WHERE content_hash = ?'
+SELECT_BANDS = '''
+    SELECT phash, analysis_result FROM vision_image_cache
+    WHERE band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?
+'''
+UPSERT_IMAGE = '''
+    INSERT OR REPLACE INTO vision_image_cache
+    (content_hash, phash, band0, band1, band2, band3, analysis_result, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+class VisionStore:
+    """Single-connection vision quota / cache store.
+
+    Methods other than ``close`` run on the store thread; call them through
+    ``call`` (blocking) or ``run`` (awaitable)::
+
+        store.call(store.get_usage, month)
+        await store.run(store.get_url_analysis, image_hash)
+    """
+
+    def __init__(self, db_path: str, batch_ops: int = None, flush_ms: int = None):
+        self.db_path = db_path
+        self.batch_ops = max(1, batch_ops or DEFAULT_BATCH_OPS)
+        self.flush_seconds = (DEFAULT_FLUSH_MS if flush_ms is None else flush_ms) / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vision-store')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending_ops = 0
+        self._first_pending = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self.stats = {'reads': 0, 'writes': 0, 'commits': 0}
+        self.call(self._open)
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Thread dispatch
+    # ------------------------------------------------------------------
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run ``fn`` on the store thread and wait for it"""
+        return self._executor.submit(fn, *args).result()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn`` on the store thread without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ------------------------------------------------------------------
+    # Connection / transactions (store thread only)
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly below
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                                     timeout=30, cached_statements=64)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def _write(self, sql: str, params: Tuple):
+        """Batched write: joins the open transaction, committed by ``flush``"""
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN')
+            self._first_pending = time.monotonic()
+            self._schedule_flush()
+        self._conn.execute(sql, params)
+        self._pending_ops += 1
+        self.stats['writes'] += 1
+        if self._pending_ops >= self.batch_ops or time.monotonic() - self._first_pending >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Commit batched writes"""
+        if self._conn is not None and self._conn.in_transaction:
+            self._conn.execute('COMMIT')
+            self.stats['commits'] += 1
+        self._pending_ops = 0
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_seconds, self._timed_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timed_flush(self):
+        try:
+            self._executor.submit(self.flush)
+        except RuntimeError:
+            pass  # store already closed
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        try:
+            self.call(self._close)
+        except RuntimeError:
+            # At interpreter exit the worker thread is already gone
+            self._close()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _close(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logging.warning(f"Vision store final commit failed: {e}")
+        self._conn.close()
+        self._conn = None
+
+    # ------------------------------------------------------------------
+    # Quota (store thread only; committed immediately)
+    # ------------------------------------------------------------------
+
+    def get_usage(self, month: str) -> int:
+        self.flush()
+        self._conn.execute(INSERT_MONTH, (month, datetime.now().isoformat()))
+        self.stats['reads'] += 1
+        return self._conn.execute(SELECT_USAGE, (month,)).fetchone()[0]
+
+    def add_usage(self, month: str, delta: int) -> int:
+        """Atomically adjust this month's usage; returns the new total"""
+        self.flush()
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._conn.execute(INSERT_MONTH, (month, datetime.now().isoformat()))
+            self._conn.execute(ADD_USAGE, (delta, datetime.now().isoformat(), month))
+            used = self._conn.execute(SELECT_USAGE, (month,)).fetchone()[0]
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        self.stats['commits'] += 1
+        return used
+
+    def reserve_quota(self, month: str, count: int, limit: int) -> Tuple[int, int]:
+        """Claim up to ``count`` units under ``limit``; returns (granted, new total).
+
+        The read and increment share one write-locked transaction, so two
+        scanners reserving at once cannot both claim the last units.
+        """
+        self.flush()
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._conn.execute(INSERT_MONTH, (month, datetime.now().isoformat()))
+            used = self._conn.execute(SELECT_USAGE, (month,)).fetchone()[0]
+            granted = max(0, min(count, limit - used))
+            if granted:
+                self._conn.execute(ADD_USAGE, (granted, datetime.now().isoformat(), month))
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        self.stats['commits'] += 1
+        return granted, used + granted
+
+    # ------------------------------------------------------------------
+    # Caches (store thread only; writes batched)
+    # ------------------------------------------------------------------
+
+    def get_url_analysis(self, image_hash: str) -> Optional[str]:
+        self.stats['reads'] += 1
+        row = self._conn.execute(SELECT_URL, (image_hash,)).fetchone()
+        return row[0] if row else None
+
+    def put_url_analysis(self, image_hash: str, analysis_result: str):
+        self._write(UPSERT_URL, (image_hash, analysis_result, datetime.now().isoformat()))
+
+    def get_content_analysis(self, content_hash: str) -> Optional[str]:
+        self.stats['reads'] += 1
+        row = self._conn.execute(SELECT_CONTENT, (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    def find_by_bands(self, bands: List[int]) -> List[Tuple[int, str]]:
+        """``(phash, analysis_result)`` rows sharing at least one band"""
+        self.stats['reads'] += 1
+        return self._conn.execute(SELECT_BANDS, bands).fetchall()
+
+    def put_image_analysis(self, content_hash: str, phash: Optional[int], bands: List[Optional[int]],
+                           analysis_result: str):
+        self._write(UPSERT_IMAGE, (content_hash, phash, *bands, analysis_result, datetime.now().isoformat()))
@@ -0,0 +1,40 @@
+-- WildGuard AI: Indexes for evidence search, threat lists and bulk export
+-- Run these SQL commands in your Supabase SQL editor
+
+-- Keyset pagination walks detections newest first by (timestamp, id), rows
+-- without a timestamp last (ORDER BY timestamp DESC NULLS LAST, id DESC)
+CREATE INDEX IF NOT EXISTS idx_detections_timestamp_id ON detections(timestamp DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_detections_platform_timestamp_id ON detections(platform, timestamp DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_detections_threat_level_timestamp_id ON detections(threat_level, timestamp DESC NULLS LAST, id DESC);
+
+-- Trigram indexes let ILIKE '%term%' use a bitmap index scan instead of a
+-- sequential scan. Every column in the search OR needs one, or Postgres
+-- falls back to scanning the table.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_detections_listing_title_trgm ON detections USING gin (listing_title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_detections_search_term_trgm ON detections USING gin (search_term gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_detections_species_involved_trgm ON detections USING gin (species_involved gin_trgm_ops);
+
+ANALYZE detections;
+
+-- Verify the indexes
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'detections'
+  AND indexname IN (
+      'idx_detections_timestamp_id',
+      'idx_detections_platform_timestamp_id',
+      'idx_detections_threat_level_timestamp_id',
+      'idx_detections_listing_title_trgm',
+      'idx_detections_search_term_trgm',
+      'idx_detections_species_involved_trgm'
+  )
+ORDER BY indexname;
+
+-- Check the search plan uses the trigram indexes (expect BitmapOr over idx_*_trgm)
+EXPLAIN
+SELECT id, timestamp, listing_title
+FROM detections
+WHERE listing_title ILIKE '%ivory%' OR search_term ILIKE '%ivory%' OR species_involved ILIKE '%ivory%'
+ORDER BY timestamp DESC NULLS LAST, id DESC
+LIMIT 21;
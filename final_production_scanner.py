@@ -21,6 +21,8 @@ import random
 import hashlib
 from bs4 import BeautifulSoup
 import re
+from request_scheduler import ScanJob, shared_scheduler
+from detection_spool import spool_detections
 
 # Import keywords and new platforms
 from comprehensive_endangered_keywords import (
@@ -238,79 +240,83 @@ class FinalProductionScanner:
         # OPTIMIZED: More keywords for Avito since it performs well
         keyword_limit = 25 if historical_mode else 18  # INCREASED
         
-        for keyword in keywords[:keyword_limit]:
-            try:
-                search_query = keyword.replace(' ', '+')
-                if historical_mode:
-                    # Historical mode: search older listings (60+ days old)
-                    url = f"https://www.avito.ru/rossiya?q={search_query}&s=1"  # Oldest first
-                else:
-                    url = f"https://www.avito.ru/rossiya?q={search_query}&s=104"  # Recent first
-                
-                async with self.session.get(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        html = await resp.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Enhanced Avito selectors
-                        items = soup.find_all('div', {'data-marker': 'item'}) or \
-                               soup.find_all('div', class_=re.compile(r'item-view|iva-item')) or \
-                               soup.find_all('article')
+        async def fetch_keyword(job: ScanJob) -> List[Dict]:
+            keyword = job.keyword
+            found = []
+            search_query = keyword.replace(' ', '+')
+            if historical_mode:
+                # Historical mode: search older listings (60+ days old)
+                url = f"https://www.avito.ru/rossiya?q={search_query}&s=1"  # Oldest first
+            else:
+                url = f"https://www.avito.ru/rossiya?q={search_query}&s=104"  # Recent first
+            
+            async with self.session.get(url, headers=headers) as resp:
+                if resp.status == 429:
+                    shared_scheduler().penalize('avito', 30)
+                    return found
+                if resp.status != 200:
+                    return found
+                html = await resp.text()
+            
+            soup = BeautifulSoup(html, 'html.parser')
+            
+            # Enhanced Avito selectors
+            items = soup.find_all('div', {'data-marker': 'item'}) or \
+                   soup.find_all('div', class_=re.compile(r'item-view|iva-item')) or \
+                   soup.find_all('article')
+            
+            # OPTIMIZED: More items per keyword
+            item_limit = 40 if historical_mode else 25  # INCREASED
+            for item in items[:item_limit]:
+                try:
+                    # Extract data
+                    title_elem = item.find(['h3', 'h2'], {'data-marker': 'item-title'}) or \
+                                item.find('a', {'data-marker': 'item-title'}) or \
+                                item.find('a', href=re.compile(r'/items/'))
+                    
+                    title = title_elem.get_text(strip=True) if title_elem else ""
+                    
+                    price_elem = item.find('span', {'data-marker': 'item-price'}) or \
+                               item.find('span', class_=re.compile(r'price'))
+                    price = price_elem.get_text(strip=True) if price_elem else ""
+                    
+                    link_elem = item.find('a', {'data-marker': 'item-title'}) or \
+                              item.find('a', href=re.compile(r'/items/'))
+                    link = link_elem.get('href') if link_elem else ""
+                    
+                    if link and title and len(title.strip()) > 3:
+                        if not link.startswith('http'):
+                            link = f"https://www.avito.ru{link}"
                         
-                        # OPTIMIZED: More items per keyword
-                        item_limit = 40 if historical_mode else 25  # INCREASED
-                        for item in items[:item_limit]:
-                            try:
-                                # Extract data
-                                title_elem = item.find(['h3', 'h2'], {'data-marker': 'item-title'}) or \
-                                            item.find('a', {'data-marker': 'item-title'}) or \
-                                            item.find('a', href=re.compile(r'/items/'))
-                                
-                                title = title_elem.get_text(strip=True) if title_elem else ""
-                                
-                                price_elem = item.find('span', {'data-marker': 'item-price'}) or \
-                                           item.find('span', class_=re.compile(r'price'))
-                                price = price_elem.get_text(strip=True) if price_elem else ""
-                                
-                                link_elem = item.find('a', {'data-marker': 'item-title'}) or \
-                                          item.find('a', href=re.compile(r'/items/'))
-                                link = link_elem.get('href') if link_elem else ""
-                                
-                                if link and title and len(title.strip()) > 3:
-                                    if not link.startswith('http'):
-                                        link = f"https://www.avito.ru{link}"
-                                    
-                                    if link not in self.seen_urls:
-                                        item_id = re.search(r'/items/(\d+)', link)
-                                        item_id = item_id.group(1) if item_id else hashlib.md5(link.encode()).hexdigest()[:8]
-                                        
-                                        results.append({
-                                            "title": title,
-                                            "price": price,
-                                            "url": link,
-                                            "item_id": item_id,
-                                            "search_term": keyword,
-                                            "platform": "avito",
-                                            "scan_time": datetime.now().isoformat(),
-                                            "historical": historical_mode,
-                                            "region": "Russia",
-                                            "listing_age_estimate": "60+ days" if historical_mode else "recent"
-                                        })
-                                        self.seen_urls.add(link)
-                                        
-                            except Exception as e:
-                                logging.debug(f"Avito item error: {e}")
-                                continue
-                
-                # OPTIMIZED: Faster delays for Avito (star performer)
-                if historical_mode:
-                    await asyncio.sleep(random.uniform(3, 5))  # Slightly longer for historical
-                else:
-                    await asyncio.sleep(random.uniform(1.5, 3))  # FASTER for current scans
-                
-            except Exception as e:
-                logging.warning(f"Avito keyword {keyword}: {e}")
-                continue
+                        if link not in self.seen_urls:
+                            item_id = re.search(r'/items/(\d+)', link)
+                            item_id = item_id.group(1) if item_id else hashlib.md5(link.encode()).hexdigest()[:8]
+                            
+                            found.append({
+                                "title": title,
+                                "price": price,
+                                "url": link,
+                                "item_id": item_id,
+                                "search_term": keyword,
+                                "platform": "avito",
+                                "scan_time": datetime.now().isoformat(),
+                                "historical": historical_mode,
+                                "region": "Russia",
+                                "listing_age_estimate": "60+ days" if historical_mode else "recent"
+                            })
+                            self.seen_urls.add(link)
+                            
+                except Exception as e:
+                    logging.debug(f"Avito item error: {e}")
+                    continue
+            
+            return found
+        
+        # Keywords run in parallel within Avito's host budget instead of fixed sleeps
+        jobs = [ScanJob('avito', keyword) for keyword in keywords[:keyword_limit]]
+        for found in await shared_scheduler().run_jobs(jobs, fetch_keyword):
+            if found:
+                results.extend(found)
         
         logging.info(f"Avito{'[HIST]' if historical_mode else ''}: {len(results)} results")
         return results
@@ -409,7 +415,7 @@ class FinalProductionScanner:
                     finally:
                         await page.close()
                     
-                    await asyncio.sleep(random.uniform(8, 12))  # Longer delays for Facebook
+                    await shared_scheduler().throttle('facebook_marketplace')
                 
                 await context.close()
                 await browser.close()
@@ -510,7 +516,7 @@ class FinalProductionScanner:
                         await page.close()
                         await context.close()
                     
-                    await asyncio.sleep(random.uniform(3, 5))
+                    await shared_scheduler().throttle('gumtree')
                 
                 await browser.close()
         
@@ -552,14 +558,7 @@ class FinalProductionScanner:
         if not results:
             return 0
         
-        stored_count = 0
-        
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
+        detections = []
         
         for result in results:
             try:
@@ -567,7 +566,7 @@ class FinalProductionScanner:
                 
                 threat_score = self.calculate_threat_score(result)
                 
-                detection = {
+                detections.append({
                     'evidence_id': evidence_id,
                     'timestamp': datetime.now().isoformat(),
                     'platform': platform,
@@ -581,31 +580,21 @@ class FinalProductionScanner:
                     'listing_price': str(result.get('price', '') or ''),
                     'search_term': result.get('search_term', '') or '',
                     'confidence_score': threat_score
-                }
-                
-                url = f"{self.supabase_url}/rest/v1/detections"
-                
-                async with self.session.post(url, headers=headers, json=detection) as resp:
-                    if resp.status in [200, 201]:
-                        stored_count += 1
-                    elif resp.status == 409:
-                        logging.debug(f"Skipping duplicate: {result.get('url', '')}")
-                        continue
-                    else:
-                        response_text = await resp.text()
-                        if any(word in response_text.lower() for word in ['unique', 'duplicate', 'conflict']):
-                            logging.debug(f"Duplicate detected: {result.get('url', '')}")
-                            continue
+                })
                         
             except Exception as e:
-                if any(word in str(e).lower() for word in ['unique', 'duplicate', 'conflict']):
-                    logging.debug(f"Skipping duplicate: {result.get('url', '')}")
-                    continue
-                else:
-                    logging.warning(f"Storage error: {e}")
-                    continue
+                logging.warning(f"Storage error: {e}")
+                continue
+        
+        # Spooled locally first, then array-upserted; listings already in the table are skipped server-side
+        write_counts = await spool_detections(
+            detections, session=self.session,
+            supabase_url=self.supabase_url, supabase_key=self.supabase_key
+        )
+        if write_counts['duplicates']:
+            logging.debug(f"Skipped {write_counts['duplicates']} duplicate {platform} listings")
         
-        return stored_count
+        return write_counts['inserted']
 
     def calculate_threat_score(self, result: Dict) -> int:
         """Calculate threat score"""
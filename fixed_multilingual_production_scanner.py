@@ -20,6 +20,8 @@ from urllib.parse import urlparse, urlencode
 import re
 from dotenv import load_dotenv
 
+from detection_spool import spool_detections_sync
+
 # Load environment variables
 load_dotenv()
 
@@ -819,75 +821,37 @@ class MultilingualScanner:
             logger.error("Cannot save to Supabase: Missing credentials")
             return 0
         
-        saved_count = 0
+        detections = []
         
         for listing in listings:
-            try:
-                evidence_id = f"MULTILINGUAL-{listing.platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{listing.listing_id}"
-                
-                # Check if URL already exists
-                check_url = f"{self.supabase_url}/rest/v1/detections"
-                check_params = {
-                    'select': 'id',
-                    'listing_url': f'eq.{listing.url}'
-                }
-                check_headers = {
-                    'apikey': self.supabase_key,
-                    'Authorization': f'Bearer {self.supabase_key}'
-                }
-                
-                check_response = requests.get(check_url, params=check_params, headers=check_headers)
-                
-                if check_response.status_code == 200 and check_response.json():
-                    continue  # Skip duplicates
-                
-                # Insert new listing
-                insert_url = f"{self.supabase_url}/rest/v1/detections"
-                insert_headers = {
-                    'apikey': self.supabase_key,
-                    'Authorization': f'Bearer {self.supabase_key}',
-                    'Content-Type': 'application/json',
-                    'Prefer': 'return=minimal'
-                }
-                
-                data = {
-                    'evidence_id': evidence_id,
-                    'timestamp': listing.timestamp,
-                    'platform': listing.platform,
-                    'threat_score': int(listing.confidence_score * 100),
-                    'threat_level': 'MULTILINGUAL_SCAN',
-                    'species_involved': f'Multilingual scan: {listing.keyword} ({listing.language})',
-                    'alert_sent': False,
-                    'status': f'MULTILINGUAL_{listing.platform.upper()}_{listing.language.upper()}',
-                    'listing_title': listing.title[:500],
-                    'listing_url': listing.url,
-                    'listing_price': listing.price,
-                    'search_term': listing.keyword
-                }
-                
-                response = requests.post(insert_url, json=data, headers=insert_headers)
-                
-                if response.status_code in [200, 201]:
-                    saved_count += 1
-                    logger.info(f"Saved: {listing.platform} - {listing.title[:50]} ({listing.language})")
-                elif response.status_code == 409:
-                    continue  # Skip duplicates
-                else:
-                    response_text = response.text
-                    if "unique" in response_text.lower() and "listing_url" in response_text.lower():
-                        continue  # Skip duplicates
-                    else:
-                        logger.error(f"Failed to save listing: {response.status_code} - {response_text[:100]}")
-                
-            except Exception as e:
-                error_msg = str(e).lower()
-                if "unique" in error_msg and "listing_url" in error_msg:
-                    continue  # Skip duplicates
-                else:
-                    logger.error(f"Error saving listing: {e}")
-                    continue
+            evidence_id = f"MULTILINGUAL-{listing.platform.upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{listing.listing_id}"
+            
+            detections.append({
+                'evidence_id': evidence_id,
+                'timestamp': listing.timestamp,
+                'platform': listing.platform,
+                'threat_score': int(listing.confidence_score * 100),
+                'threat_level': 'MULTILINGUAL_SCAN',
+                'species_involved': f'Multilingual scan: {listing.keyword} ({listing.language})',
+                'alert_sent': False,
+                'status': f'MULTILINGUAL_{listing.platform.upper()}_{listing.language.upper()}',
+                'listing_title': listing.title[:500],
+                'listing_url': listing.url,
+                'listing_price': listing.price,
+                'search_term': listing.keyword
+            })
+        
+        # Spooled locally, then one array upsert per batch; on_conflict=listing_url replaces the per-listing existence GET
+        try:
+            write_counts = spool_detections_sync(
+                detections, supabase_url=self.supabase_url, supabase_key=self.supabase_key
+            )
+        except Exception as e:
+            logger.error(f"Error saving listings: {e}")
+            return 0
         
-        return saved_count
+        logger.info(f"Saved {write_counts['inserted']} listings ({write_counts['duplicates']} duplicates skipped)")
+        return write_counts['inserted']
 
 def run_multilingual_production_scan():
     """Run the multilingual production scanner"""
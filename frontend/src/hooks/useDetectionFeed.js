@@ -0,0 +1,89 @@
+import { useState, useEffect, useRef } from 'react';
+
+const FEED_URL = process.env.REACT_APP_FEED_URL; // e.g. ws://localhost:8000/ws/detections
+const MAX_RECONNECT_DELAY = 30000;
+
+/**
+ * Subscribes to the backend detection push feed (backend/detection_feed.py)
+ * Calls onDetections(events) for new detections and onResync() when events were
+ * missed and the caller should refetch. Reconnects with backoff, resuming from
+ * the last seen sequence number so nothing is skipped.
+ * Returns { isConnected, isEnabled }; isEnabled is false when no feed URL is set.
+ */
+export const useDetectionFeed = ({ onDetections, onResync, platforms, minLevel } = {}) => {
+  const [isConnected, setIsConnected] = useState(false);
+  const handlers = useRef({ onDetections, onResync });
+  handlers.current = { onDetections, onResync };
+
+  useEffect(() => {
+    if (!FEED_URL) return undefined;
+
+    let socket = null;
+    let reconnectTimer = null;
+    let reconnectDelay = 1000;
+    let closedByUs = false;
+    let lastSeq = null;
+    let epoch = null;
+
+    const connect = () => {
+      const params = new URLSearchParams();
+      if (lastSeq !== null && epoch) {
+        params.set('since', lastSeq);
+        params.set('epoch', epoch);
+      }
+      if (platforms && platforms.length) params.set('platforms', platforms.join(','));
+      if (minLevel) params.set('min_level', minLevel);
+      const query = params.toString();
+
+      socket = new WebSocket(query ? `${FEED_URL}?${query}` : FEED_URL);
+
+      socket.onopen = () => {
+        console.log('Detection feed connected');
+        reconnectDelay = 1000;
+        setIsConnected(true);
+      };
+
+      socket.onmessage = (message) => {
+        let data;
+        try {
+          data = JSON.parse(message.data);
+        } catch (error) {
+          console.warn('Ignoring malformed feed message');
+          return;
+        }
+
+        if (data.type === 'hello') {
+          // A different epoch means a restarted hub; the server sends a resync
+          epoch = data.epoch;
+          if (lastSeq === null) lastSeq = data.seq;
+        } else if (data.type === 'detections') {
+          lastSeq = data.last_seq;
+          handlers.current.onDetections && handlers.current.onDetections(data.events);
+        } else if (data.type === 'resync') {
+          lastSeq = data.seq;
+          handlers.current.onResync && handlers.current.onResync();
+        }
+      };
+
+      socket.onclose = () => {
+        setIsConnected(false);
+        if (closedByUs) return;
+        console.log('Detection feed closed, reconnecting in', reconnectDelay, 'ms');
+        reconnectTimer = setTimeout(connect, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closedByUs = true;
+      clearTimeout(reconnectTimer);
+      if (socket) socket.close();
+    };
+  }, [platforms && platforms.join(','), minLevel]);
+
+  return { isConnected, isEnabled: Boolean(FEED_URL) };
+};
+
+export default useDetectionFeed;
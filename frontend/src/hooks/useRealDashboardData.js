@@ -1,5 +1,27 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import WildGuardDataService from '../services/supabaseService';
+import { useDetectionFeed } from './useDetectionFeed';
+
+const FEED_RESYNC_DEBOUNCE = 5000; // At most one refetch per 5s after resync notices
+const FEED_FALLBACK_INTERVAL = 5 * 60000; // Safety-net poll while the feed is connected
+const ALERT_LEVELS = ['HIGH', 'CRITICAL', 'MEDIUM']; // as getRecentAlerts
+const HIGH_PRIORITY_LEVELS = ['HIGH', 'CRITICAL'];
+
+/**
+ * A feed event (backend compact_event) in the shape getRecentAlerts returns
+ */
+const alertFromEvent = (event) => ({
+  id: event.evidence_id,
+  timestamp: new Date(event.timestamp || Date.now()).toLocaleString(),
+  threat: event.search_term || 'Unknown threat',
+  platform: event.platform,
+  severity: event.threat_level,
+  threatScore: event.threat_score,
+  listingTitle: event.listing_title,
+  listingUrl: event.listing_url,
+  alertSent: false,
+  status: 'ACTIVE'
+});
 
 /**
  * Custom hook for managing dashboard data with optimized Supabase connection
@@ -208,21 +230,74 @@ export const useRealDashboardData = (refreshInterval = 60000) => { // Increased
     loadDashboardData();
   }, []);
 
+  // Apply pushed detections to the in-memory data instead of refetching;
+  // only a resync (missed events) triggers a full reload
+  const applyFeedEvents = (events) => {
+    if (!events || !events.length) return;
+    const highPriority = events.filter(e => HIGH_PRIORITY_LEVELS.includes(e.threat_level)).length;
+
+    setRealTimeStats(prev => ({
+      ...prev,
+      totalDetections: (prev.totalDetections || 0) + events.length,
+      todayDetections: (prev.todayDetections || 0) + events.length,
+      highPriorityAlerts: (prev.highPriorityAlerts || 0) + highPriority,
+      lastUpdated: new Date().toISOString()
+    }));
+
+    setPlatformActivity(prev => prev.map(entry => {
+      const mine = events.filter(e => (e.platform || '').toLowerCase() === entry.platform);
+      if (!mine.length) return entry;
+      return {
+        ...entry,
+        totalDetections: entry.totalDetections + mine.length,
+        highThreat: entry.highThreat + mine.filter(e => HIGH_PRIORITY_LEVELS.includes(e.threat_level)).length,
+        recentActivity: entry.recentActivity + mine.length
+      };
+    }));
+
+    const alerts = events.filter(e => ALERT_LEVELS.includes(e.threat_level)).reverse().map(alertFromEvent);
+    if (alerts.length) {
+      setRecentAlerts(prev => {
+        const ids = new Set(alerts.map(a => a.id));
+        return [...alerts, ...prev.filter(a => !ids.has(a.id))].slice(0, Math.max(prev.length, 10));
+      });
+    }
+    setLastUpdated(new Date());
+  };
+
+  const resyncTimer = useRef(null);
+  const scheduleResync = () => {
+    if (resyncTimer.current) return;
+    resyncTimer.current = setTimeout(() => {
+      resyncTimer.current = null;
+      loadDashboardData(true);
+    }, FEED_RESYNC_DEBOUNCE);
+  };
+  const { isConnected: isFeedConnected } = useDetectionFeed({
+    onDetections: applyFeedEvents,
+    onResync: scheduleResync
+  });
+
+  useEffect(() => () => clearTimeout(resyncTimer.current), []);
+
   // Set up automatic refresh interval (reduced frequency for performance)
+  // Slowed down, not stopped, while the push feed is connected: detections the
+  // feed never hears about (e.g. from a writer without an event bus) still show up
   useEffect(() => {
     if (!refreshInterval) return;
+    const pollInterval = isFeedConnected ? Math.max(refreshInterval, FEED_FALLBACK_INTERVAL) : refreshInterval;
 
-    console.log('Setting up auto-refresh interval:', refreshInterval, 'ms');
+    console.log('Setting up auto-refresh interval:', pollInterval, 'ms');
     const interval = setInterval(() => {
       console.log('Auto-refresh triggered');
       loadDashboardData(true);
-    }, refreshInterval);
+    }, pollInterval);
 
     return () => {
       console.log('Clearing auto-refresh interval');
       clearInterval(interval);
     };
-  }, [refreshInterval]);
+  }, [refreshInterval, isFeedConnected]);
 
   // Calculate summary statistics
   const summaryStats = {
@@ -272,6 +347,7 @@ export const useRealDashboardData = (refreshInterval = 60000) => { // Increased
     isRefreshing,
     error,
     lastUpdated,
+    isFeedConnected,
     
     // Actions
     refreshData,
@@ -13,13 +13,14 @@ import logging
 import os
 import argparse
 from datetime import datetime, timedelta
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import hashlib
-from urllib.parse import urlparse
 import re
 from dotenv import load_dotenv
 
+from seen_url_index import SeenUrlIndex, shared_seen_index
+
 # Load environment variables
 load_dotenv()
 
@@ -106,62 +107,22 @@ class KeywordStateManager:
         return batch_keywords, progress_info
 
 class DuplicateFilter:
-    """Duplicate prevention system compatible with existing scanner"""
+    """Duplicate prevention backed by the shared persistent seen-URL index"""
     
-    def __init__(self, cache_file: str = "url_cache.json"):
-        self.cache_file = cache_file
-        self.url_cache = self._load_cache()
+    def __init__(self, index: SeenUrlIndex = None):
+        self.index = index or shared_seen_index()
         
-    def _load_cache(self) -> Set[str]:
-        """Load existing URL cache"""
-        try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    data = json.load(f)
-                    return set(data.get('urls', []))
-        except Exception as e:
-            logger.error(f"Error loading URL cache: {e}")
-        return set()
-    
     def save_cache(self):
-        """Save URL cache to file"""
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump({"urls": list(self.url_cache)}, f)
-        except Exception as e:
-            logger.error(f"Error saving URL cache: {e}")
+        """Persist the seen-URL index"""
+        self.index.save()
     
     def is_duplicate(self, url: str) -> bool:
         """Check if URL has been seen before"""
-        normalized_url = self._normalize_url(url)
-        return normalized_url in self.url_cache
+        return url in self.index
     
     def add_url(self, url: str):
-        """Add URL to cache"""
-        normalized_url = self._normalize_url(url)
-        self.url_cache.add(normalized_url)
-    
-    def _normalize_url(self, url: str) -> str:
-        """Normalize URL to catch variations"""
-        tracking_params = ['utm_source', 'utm_medium', 'utm_campaign', 'ref', 'source', 'fbclid']
-        parsed = urlparse(url)
-        
-        if parsed.query:
-            params = []
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    if key not in tracking_params:
-                        params.append(param)
-            query = '&'.join(params)
-        else:
-            query = ''
-        
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if query:
-            normalized += f"?{query}"
-            
-        return normalized.lower().strip('/')
+        """Add URL to the index"""
+        self.index.add(url)
 
 class GumtreeAvitoScanner:
     """Dedicated scanner for Gumtree and Avito platforms"""
@@ -4,12 +4,31 @@ WildGuard AI - Intelligent Threat Scoring System
 Replaces random scoring with sophisticated threat analysis
 """
 
+import os
 import re
 import json
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
+from score_cache import shared_score_cache, table_version
+from listing_features import URL_RISK_TERMS, VOCABULARY, ListingFeatures, TermTable, extract_features, parse_price
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+ROUND_PRICES = (100, 200, 500, 1000, 2000, 5000)
+
+# Bump when scoring logic (not just the weight tables) changes, to invalidate cached scores
+SCORING_REVISION = 1
+
+# Rows scoring below this get scores only, no indicator lists or reasoning text
+DEFAULT_ANALYSIS_THRESHOLD = int(os.getenv('THREAT_ANALYSIS_THRESHOLD', '40'))
+
 class ThreatLevel(Enum):
     SAFE = "SAFE"
     LOW = "LOW" 
@@ -35,6 +54,54 @@ class ThreatAnalysis:
     false_positive_risk: float
     requires_human_review: bool
 
+    def to_dict(self) -> Dict:
+        return {**self.__dict__, 'threat_level': self.threat_level.value,
+                'threat_category': self.threat_category.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ThreatAnalysis':
+        return cls(**{**data, 'threat_level': ThreatLevel(data['threat_level']),
+                      'threat_category': ThreatCategory(data['threat_category']),
+                      'wildlife_indicators': list(data['wildlife_indicators']),
+                      'human_trafficking_indicators': list(data['human_trafficking_indicators'])})
+
+@dataclass
+class ListingBatch:
+    """Columnar batch of listings for ``IntelligentThreatScorer.analyze_batch``"""
+    titles: List[str]
+    descriptions: List[str]
+    prices: List[str]
+    urls: List[str]
+    platforms: List[str]
+    search_terms: List[str]
+
+    @classmethod
+    def from_listings(cls, listings: Sequence[Dict]) -> 'ListingBatch':
+        return cls(
+            titles=[listing.get('title', '') or '' for listing in listings],
+            descriptions=[listing.get('description', '') or '' for listing in listings],
+            prices=[str(listing.get('price', '') or '') for listing in listings],
+            urls=[listing.get('url', '') or '' for listing in listings],
+            platforms=[listing.get('platform', '') or '' for listing in listings],
+            search_terms=[listing.get('search_term', '') or '' for listing in listings]
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+@dataclass
+class BatchThreatScores:
+    """Per-row scores for a batch; ``analyses[i]`` is None for rows under the threshold"""
+    threat_scores: List[int]
+    threat_levels: List[ThreatLevel]
+    threat_categories: List[ThreatCategory]
+    confidences: List[float]
+    requires_human_review: List[bool]
+    analyses: List[Optional[ThreatAnalysis]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.threat_scores)
+
 class IntelligentThreatScorer:
     """
     Sophisticated threat scoring system that analyzes listing content
@@ -132,26 +199,96 @@ class IntelligentThreatScorer:
             'es': 1.05, # Spanish - some trafficking routes
             'fr': 1.05  # French - West Africa routes
         }
+        
+        # Platform-specific risk multipliers
+        self.platform_multipliers = {
+            'craigslist': 1.2,      # Higher risk platform
+            'gumtree': 1.15,        # Moderate risk
+            'olx': 1.1,             # Some risk
+            'avito': 1.1,           # Some risk
+            'ebay': 0.95,           # Lower risk (more regulated)
+            'aliexpress': 1.0,      # Baseline
+            'taobao': 1.1,          # Some risk for traditional medicine
+            'marktplaats': 1.0,     # Baseline
+            'mercadolibre': 1.05    # Slight risk
+        }
+        
+        # Coded language patterns for human trafficking
+        self.coded_patterns = [
+            (re.compile(r'\b(full|complete|all inclusive)\s+service\b', re.IGNORECASE), 25, "coded service language"),
+            (re.compile(r'\b(discrete|discreet|confidential)\b', re.IGNORECASE), 15, "discretion emphasis"),
+            (re.compile(r'\b24/?7\b', re.IGNORECASE), 12, "24/7 availability"),
+            (re.compile(r'\bcash\s+only\b', re.IGNORECASE), 10, "cash only payment")
+        ]
+        
+        self.compile_indicators()
+
+    def compile_indicators(self):
+        """Register all indicator dictionaries with the shared feature vocabulary (call again after editing them)"""
+        entries = []
+        for group, indicators in (('wildlife', self.wildlife_indicators),
+                                  ('human_trafficking', self.human_trafficking_indicators),
+                                  ('false_positive', self.false_positive_reducers)):
+            for category, terms in indicators.items():
+                for term, weight in terms.items():
+                    entries.append((term, (group, category, term, weight)))
+        self._indicator_table = TermTable(entries)
+        self._indicator_entries = self._indicator_table.payloads
+        self._wildlife_terms = frozenset(term for terms in self.wildlife_indicators.values() for term in terms)
+        if NUMPY_AVAILABLE:
+            groups = np.array([group for group, _, _, _ in self._indicator_entries])
+            weights = np.array([weight for _, _, _, weight in self._indicator_entries], dtype=np.int64)
+            # Per-entry weight vectors; summed over each row's hits for the group scores
+            self._group_weights = {g: np.where(groups == g, weights, 0) for g in ('wildlife', 'human_trafficking', 'false_positive')}
+            self._group_masks = {g: (groups == g).astype(np.int64) for g in ('wildlife', 'human_trafficking')}
+        self.score_cache = shared_score_cache('intelligent_threat_scorer', self.weights_version())
+
+    def weights_version(self) -> str:
+        """Hash of every table the score depends on; cached scores from other versions are dropped"""
+        return table_version(SCORING_REVISION, self.wildlife_indicators, self.human_trafficking_indicators,
+                             self.false_positive_reducers, self.platform_multipliers,
+                             [(pattern.pattern, weight, description) for pattern, weight, description in self.coded_patterns])
+
+    def _match_indicators(self, text: str) -> Dict[str, List[Tuple[str, str, int]]]:
+        """One pass over ``text``: matched (category, term, weight) per indicator group"""
+        return self._matches_from_bits(VOCABULARY.mask(VOCABULARY.matcher.find_terms(text)))
+
+    def _matches_from_bits(self, term_bits: int) -> Dict[str, List[Tuple[str, str, int]]]:
+        matches = {'wildlife': [], 'human_trafficking': [], 'false_positive': []}
+        for group, category, term, weight in self._indicator_table.find(term_bits):
+            matches[group].append((category, term, weight))
+        return matches
 
     def analyze_listing(self, listing_data: Dict, search_term: str = "", platform: str = "") -> ThreatAnalysis:
         """
         Perform comprehensive threat analysis on a listing
         """
-        title = (listing_data.get('title', '') or '').lower()
-        description = (listing_data.get('description', '') or '').lower()
-        price = str(listing_data.get('price', '') or '')
-        url = listing_data.get('url', '') or ''
-        
-        # Combine all text for analysis
-        full_text = f"{title} {description} {search_term}".lower()
+        return self.analyze_features(extract_features(listing_data, search_term, platform))
+
+    def analyze_features(self, features: ListingFeatures) -> ThreatAnalysis:
+        """``analyze_listing`` over already-extracted ListingFeatures (no text rescans)"""
+        if self.score_cache is None:
+            return self._score_features(features)
+        cached = self.score_cache.get(features.content_key)
+        if cached is not None:
+            return ThreatAnalysis.from_dict(cached)
+        analysis = self._score_features(features)
+        self.score_cache.put(features.content_key, analysis.to_dict())
+        return analysis
+
+    def _score_features(self, features: ListingFeatures) -> ThreatAnalysis:
+        features.refresh()
+        full_text = features.text
+        search_term = features.search_term
         
-        # Calculate component scores
-        wildlife_score, wildlife_indicators = self._calculate_wildlife_score(full_text, search_term)
-        human_trafficking_score, ht_indicators = self._calculate_human_trafficking_score(full_text, search_term)
-        false_positive_reduction = self._calculate_false_positive_reduction(full_text)
+        # Calculate component scores from the shared term bitset
+        matches = self._matches_from_bits(features.term_bits)
+        wildlife_score, wildlife_indicators = self._calculate_wildlife_score(full_text, search_term, matches)
+        human_trafficking_score, ht_indicators = self._calculate_human_trafficking_score(full_text, search_term, matches)
+        false_positive_reduction = self._calculate_false_positive_reduction(full_text, matches)
         
         # Apply platform-specific adjustments
-        platform_multiplier = self._get_platform_multiplier(platform)
+        platform_multiplier = self._get_platform_multiplier(features.platform)
         wildlife_score = int(wildlife_score * platform_multiplier)
         human_trafficking_score = int(human_trafficking_score * platform_multiplier)
         
@@ -160,12 +297,12 @@ class IntelligentThreatScorer:
         human_trafficking_score = max(0, human_trafficking_score + false_positive_reduction)
         
         # Price analysis
-        price_adjustment = self._analyze_price_risk(price, wildlife_score, human_trafficking_score)
+        price_adjustment = self._price_risk(features.price, wildlife_score, human_trafficking_score)
         wildlife_score += price_adjustment
         human_trafficking_score += price_adjustment
         
         # URL analysis
-        url_adjustment = self._analyze_url_risk(url)
+        url_adjustment = self._analyze_url_risk(features.url, features.url_risk_terms)
         wildlife_score += url_adjustment
         human_trafficking_score += url_adjustment
         
@@ -201,91 +338,184 @@ class IntelligentThreatScorer:
             requires_human_review=requires_review
         )
 
-    def _calculate_wildlife_score(self, text: str, search_term: str) -> Tuple[int, List[str]]:
+    def analyze_batch(self, batch: ListingBatch, threshold: int = None) -> BatchThreatScores:
+        """Score a columnar batch of listings.
+
+        Scores are identical to ``analyze_listing``. Term matching is one pass per
+        row; weights, platform multipliers, price risk, levels and review flags
+        are computed as NumPy vectors, and full ``ThreatAnalysis`` objects
+        (indicator lists, reasoning) are only built for rows scoring at least
+        ``threshold``. Without NumPy this falls back to ``analyze_listing`` per row.
+        """
+        threshold = DEFAULT_ANALYSIS_THRESHOLD if threshold is None else threshold
+        n = len(batch)
+        features = [extract_features({'title': batch.titles[i], 'description': batch.descriptions[i],
+                                      'price': batch.prices[i], 'url': batch.urls[i]},
+                                     batch.search_terms[i], batch.platforms[i]) for i in range(n)]
+        if not NUMPY_AVAILABLE:
+            analyses = [self.analyze_features(row_features) for row_features in features]
+            return BatchThreatScores(
+                threat_scores=[a.threat_score for a in analyses],
+                threat_levels=[a.threat_level for a in analyses],
+                threat_categories=[a.threat_category for a in analyses],
+                confidences=[a.confidence for a in analyses],
+                requires_human_review=[a.requires_human_review for a in analyses],
+                analyses=[a if a.threat_score >= threshold else None for a in analyses]
+            )
+        if n == 0:
+            return BatchThreatScores([], [], [], [], [], [])
+
+        texts = [row_features.text for row_features in features]
+
+        # Sparse (row, entry) hits; per-row group sums via weighted bincount
+        row_hits = [self._indicator_table.find_indices(row_features.term_bits) for row_features in features]
+        rows = np.repeat(np.arange(n), [len(indices) for indices in row_hits])
+        cols = np.fromiter((i for indices in row_hits for i in indices), dtype=np.int64, count=len(rows))
+
+        def row_sums(vector):
+            return np.bincount(rows, weights=vector[cols], minlength=n).astype(np.int64)
+
+        coded = np.array([[1 if pattern.search(text) else 0 for pattern, _, _ in self.coded_patterns]
+                          for text in texts], dtype=np.int64)
+        coded_weights = np.array([weight for _, weight, _ in self.coded_patterns], dtype=np.int64)
+        search_boost = np.array([term.lower() in self._wildlife_terms for term in batch.search_terms])
+
+        wildlife = row_sums(self._group_weights['wildlife']) + 15 * search_boost
+        ht = row_sums(self._group_weights['human_trafficking']) + coded @ coded_weights
+        fp_reduction = row_sums(self._group_weights['false_positive'])
+        indicator_count = (row_sums(self._group_masks['wildlife']) + search_boost
+                           + row_sums(self._group_masks['human_trafficking']) + coded.sum(axis=1))
+
+        # Platform multiplier (int() truncation matches analyze_listing for non-negative scores)
+        multipliers = np.array([self._get_platform_multiplier(platform) for platform in batch.platforms])
+        wildlife = np.floor(wildlife * multipliers).astype(np.int64)
+        ht = np.floor(ht * multipliers).astype(np.int64)
+        wildlife = np.maximum(0, wildlife + fp_reduction)
+        ht = np.maximum(0, ht + fp_reduction)
+
+        # Price risk
+        prices = np.array([np.nan if f.price is None else f.price for f in features], dtype=np.float64)
+        has_price = ~np.isnan(prices)
+        prices = np.nan_to_num(prices, nan=-1.0)
+        price_adjustment = np.where((wildlife > 20) & (prices > 1000), 8,
+                                    np.where((wildlife > 30) & (prices > 500), 5, 0))
+        price_adjustment += np.where(((wildlife > 25) | (ht > 25)) & (prices < 50), 6, 0)
+        price_adjustment += np.where(np.isin(prices, ROUND_PRICES), 3, 0)
+        price_adjustment = np.where(has_price, price_adjustment, 0)
+
+        url_adjustment = np.array([self._analyze_url_risk(f.url, f.url_risk_terms) for f in features], dtype=np.int64)
+        wildlife = wildlife + price_adjustment + url_adjustment
+        ht = ht + price_adjustment + url_adjustment
+
+        final = np.clip(np.maximum(wildlife, ht), 0, 100)
+        categories = np.select(
+            [(wildlife >= 25) & (ht >= 30), wildlife >= 25, ht >= 30],
+            [3, 1, 2], default=0)
+        levels = np.select([final >= 80, final >= 60, final >= 40, final >= 20], [4, 3, 2, 1], default=0)
+
+        max_score = np.maximum(wildlife, ht)
+        confidence = np.minimum(0.9, max_score / 100.0) + np.minimum(0.3, indicator_count * 0.05)
+        confidence = np.minimum(1.0, np.maximum(0.1, confidence))
+        review = (final >= 80) | ((final >= 50) & (confidence >= 0.7)) | ((categories >= 2) & (final >= 45))
+
+        level_enum = [ThreatLevel.SAFE, ThreatLevel.LOW, ThreatLevel.MEDIUM, ThreatLevel.HIGH, ThreatLevel.CRITICAL]
+        category_enum = [ThreatCategory.SAFE, ThreatCategory.WILDLIFE, ThreatCategory.HUMAN_TRAFFICKING, ThreatCategory.BOTH]
+        result = BatchThreatScores(
+            threat_scores=final.tolist(),
+            threat_levels=[level_enum[level] for level in levels.tolist()],
+            threat_categories=[category_enum[category] for category in categories.tolist()],
+            confidences=confidence.tolist(),
+            requires_human_review=review.tolist(),
+            analyses=[None] * n
+        )
+
+        # Full reasoning objects only where someone will read them
+        for row in np.nonzero(final >= threshold)[0].tolist():
+            wildlife_indicators, ht_indicators = [], []
+            for index in sorted(row_hits[row]):
+                group, category, term, _ = self._indicator_entries[index]
+                if group == 'wildlife':
+                    wildlife_indicators.append(f"{term} ({category})")
+                elif group == 'human_trafficking':
+                    ht_indicators.append(f"{term} ({category})")
+            if search_boost[row]:
+                wildlife_indicators.append(f"High-risk search term: {batch.search_terms[row]}")
+            ht_indicators.extend(description for (_, _, description), hit in zip(self.coded_patterns, coded[row]) if hit)
+            result.analyses[row] = ThreatAnalysis(
+                threat_score=result.threat_scores[row],
+                threat_level=result.threat_levels[row],
+                threat_category=result.threat_categories[row],
+                confidence=result.confidences[row],
+                reasoning=self._generate_reasoning(int(wildlife[row]), int(ht[row]), wildlife_indicators,
+                                                   ht_indicators, int(fp_reduction[row])),
+                wildlife_indicators=wildlife_indicators,
+                human_trafficking_indicators=ht_indicators,
+                false_positive_risk=self._calculate_false_positive_risk(int(fp_reduction[row]), result.confidences[row]),
+                requires_human_review=result.requires_human_review[row]
+            )
+        return result
+
+    def analyze_listings(self, listings: Sequence[Dict], threshold: int = None) -> BatchThreatScores:
+        """``analyze_batch`` over listing dicts (``search_term`` / ``platform`` read from each)"""
+        return self.analyze_batch(ListingBatch.from_listings(listings), threshold)
+
+    def _calculate_wildlife_score(self, text: str, search_term: str, matches: Dict = None) -> Tuple[int, List[str]]:
         """Calculate wildlife trafficking threat score"""
+        if matches is None:
+            matches = self._match_indicators(text)
         score = 0
         indicators = []
         
         # Check all wildlife indicator categories
-        for category, terms in self.wildlife_indicators.items():
-            for term, weight in terms.items():
-                if term in text:
-                    score += weight
-                    indicators.append(f"{term} ({category})")
+        for category, term, weight in matches['wildlife']:
+            score += weight
+            indicators.append(f"{term} ({category})")
         
         # Boost score if search term is high-risk
-        if search_term.lower() in [term for terms in self.wildlife_indicators.values() for term in terms.keys()]:
+        if search_term.lower() in self._wildlife_terms:
             score += 15
             indicators.append(f"High-risk search term: {search_term}")
         
         return score, indicators
 
-    def _calculate_human_trafficking_score(self, text: str, search_term: str) -> Tuple[int, List[str]]:
+    def _calculate_human_trafficking_score(self, text: str, search_term: str, matches: Dict = None) -> Tuple[int, List[str]]:
         """Calculate human trafficking threat score"""
+        if matches is None:
+            matches = self._match_indicators(text)
         score = 0
         indicators = []
         
         # Check all human trafficking indicator categories
-        for category, terms in self.human_trafficking_indicators.items():
-            for term, weight in terms.items():
-                if term in text:
-                    score += weight
-                    indicators.append(f"{term} ({category})")
+        for category, term, weight in matches['human_trafficking']:
+            score += weight
+            indicators.append(f"{term} ({category})")
         
         # Check for coded language patterns
-        coded_patterns = [
-            (r'\b(full|complete|all inclusive)\s+service\b', 25, "coded service language"),
-            (r'\b(discrete|discreet|confidential)\b', 15, "discretion emphasis"),
-            (r'\b24/?7\b', 12, "24/7 availability"),
-            (r'\bcash\s+only\b', 10, "cash only payment")
-        ]
-        
-        for pattern, weight, description in coded_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern, weight, description in self.coded_patterns:
+            if pattern.search(text):
                 score += weight
                 indicators.append(description)
         
         return score, indicators
 
-    def _calculate_false_positive_reduction(self, text: str) -> int:
+    def _calculate_false_positive_reduction(self, text: str, matches: Dict = None) -> int:
         """Calculate reduction in score due to legitimate indicators"""
-        reduction = 0
-        
-        for category, terms in self.false_positive_reducers.items():
-            for term, weight in terms.items():
-                if term in text:
-                    reduction += weight  # These are negative weights
-        
-        return reduction
+        if matches is None:
+            matches = self._match_indicators(text)
+        # These are negative weights
+        return sum(weight for _, _, weight in matches['false_positive'])
 
     def _get_platform_multiplier(self, platform: str) -> float:
         """Get platform-specific risk multiplier"""
-        platform_multipliers = {
-            'craigslist': 1.2,      # Higher risk platform
-            'gumtree': 1.15,        # Moderate risk
-            'olx': 1.1,             # Some risk
-            'avito': 1.1,           # Some risk
-            'ebay': 0.95,           # Lower risk (more regulated)
-            'aliexpress': 1.0,      # Baseline
-            'taobao': 1.1,          # Some risk for traditional medicine
-            'marktplaats': 1.0,     # Baseline
-            'mercadolibre': 1.05    # Slight risk
-        }
-        return platform_multipliers.get(platform.lower(), 1.0)
+        return self.platform_multipliers.get(platform.lower(), 1.0)
 
     def _analyze_price_risk(self, price_str: str, wildlife_score: int, ht_score: int) -> int:
         """Analyze price for risk indicators"""
-        if not price_str:
-            return 0
-        
-        # Extract numeric value
-        price_match = re.search(r'[\d,]+\.?\d*', price_str.replace(',', ''))
-        if not price_match:
-            return 0
-        
-        try:
-            price = float(price_match.group())
-        except:
+        return self._price_risk(parse_price(price_str), wildlife_score, ht_score)
+
+    def _price_risk(self, price: Optional[float], wildlife_score: int, ht_score: int) -> int:
+        """Price risk adjustment for an already-parsed price"""
+        if price is None:
             return 0
         
         adjustment = 0
@@ -301,21 +531,23 @@ class IntelligentThreatScorer:
             adjustment += 6
         
         # Round numbers often used in illegal sales
-        if price in [100, 200, 500, 1000, 2000, 5000]:
+        if price in ROUND_PRICES:
             adjustment += 3
         
         return adjustment
 
-    def _analyze_url_risk(self, url: str) -> int:
+    def _analyze_url_risk(self, url: str, risk_terms: Tuple[str, ...] = None) -> int:
         """Analyze URL for risk indicators"""
         if not url:
             return 0
         
         adjustment = 0
         url_lower = url.lower()
+        if risk_terms is None:
+            risk_terms = [term for term in URL_RISK_TERMS if term in url_lower]
         
         # Suspicious URL patterns
-        if any(term in url_lower for term in ['private', 'discrete', 'special', 'exclusive']):
+        if risk_terms:
             adjustment += 5
         
         # Multiple redirects or obfuscated URLs
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Multi-Pattern Keyword Matcher
+Compiles a fixed term dictionary once into a single trie-shaped regex and finds
+every term occurring in a text in one pass. Semantics match ``term in text``
+(plain substring, overlapping matches included), so scores built on it are
+identical to the old per-term loops.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a trie node; terminal nodes make the rest optional (greedy = longest)"""
+    alternatives = [re.escape(char) + _trie_pattern(child)
+                    for char, child in sorted(node.items()) if char != '']
+    if not alternatives:
+        return ''
+    body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+class KeywordMatcher:
+    """One-pass matcher returning the payloads of every term found in a text.
+
+    ``entries`` is an iterable of ``(term, payload)``; a term may carry several
+    payloads (e.g. the same phrase weighted in two categories). ``find`` returns
+    payloads in entry order, so callers see matches in dictionary order.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]]):
+        self._payloads: Dict[str, List[Tuple[int, Any]]] = {}
+        for index, (term, payload) in enumerate(entries):
+            if term:
+                self._payloads.setdefault(term, []).append((index, payload))
+
+        trie: Dict = {}
+        for term in self._payloads:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self._regex = re.compile(_trie_pattern(trie)) if self._payloads else None
+
+        # The regex reports the longest term starting at each position; every
+        # shorter term matching there is a prefix of it, known ahead of time.
+        self._prefixes = {
+            term: tuple(term[:i] for i in range(1, len(term) + 1) if term[:i] in self._payloads)
+            for term in self._payloads
+        }
+
+    @property
+    def terms(self) -> Set[str]:
+        return set(self._payloads)
+
+    def find_terms(self, text: str) -> Set[str]:
+        """Every term that occurs in ``text``"""
+        found: Set[str] = set()
+        if self._regex is None or not text:
+            return found
+        search = self._regex.search
+        match = search(text)
+        while match:
+            found.update(self._prefixes[match.group()])
+            match = search(text, match.start() + 1)
+        return found
+
+    def find_spans(self, text: str) -> List[Tuple[str, int]]:
+        """``(term, start)`` for every occurrence of every term"""
+        spans: List[Tuple[str, int]] = []
+        if self._regex is None or not text:
+            return spans
+        search = self._regex.search
+        match = search(text)
+        while match:
+            start = match.start()
+            spans.extend((term, start) for term in self._prefixes[match.group()])
+            match = search(text, start + 1)
+        return spans
+
+    def find(self, text: str) -> List[Any]:
+        """Payloads of every matched term, in entry order"""
+        hits = []
+        for term in self.find_terms(text):
+            hits.extend(self._payloads[term])
+        hits.sort(key=lambda hit: hit[0])
+        return [payload for _, payload in hits]
+
+    def find_indices(self, text: str) -> List[int]:
+        """Entry indices of every matched term (for building hit matrices)"""
+        return [index for term in self.find_terms(text) for index, _ in self._payloads[term]]
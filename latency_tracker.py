@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Platform Latency Tracker
+Rolling per-platform latency and success history, persisted between runs.
+Derives scan timeouts and retry budgets from observed p95 instead of fixed tables.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+
+class PlatformLatencyTracker:
+    """Rolling p50/p95 latency and success rate per platform"""
+
+    def __init__(self, state_file: str = None, window: int = 50,
+                 timeout_factor: float = 1.5, min_timeout: float = 20,
+                 max_timeout: float = 300, min_samples: int = 3,
+                 dead_window: int = 8, dead_success_rate: float = 0.05):
+        self.state_file = state_file or os.getenv('PLATFORM_LATENCY_STATE', 'platform_latency_state.json')
+        self.window = window
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.dead_window = dead_window
+        self.dead_success_rate = dead_success_rate
+        # platform -> list of [duration_seconds, succeeded, unix_time]
+        self.samples: Dict[str, List[list]] = {}
+        self.load_state()
+
+    def load_state(self):
+        """Load latency history from the previous runs"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    data = json.load(f)
+                self.samples = {p: s[-self.window:] for p, s in data.get('samples', {}).items()}
+                logging.info(f"⏱️ Loaded latency history for {len(self.samples)} platforms")
+        except Exception as e:
+            logging.warning(f"Latency state load error: {e}")
+            self.samples = {}
+
+    def save_state(self):
+        """Persist latency history for the next run"""
+        try:
+            with open(self.state_file, 'w') as f:
+                json.dump({'samples': self.samples, 'updated': time.time()}, f)
+        except Exception as e:
+            logging.warning(f"Latency state save error: {e}")
+
+    def record(self, platform: str, duration: float, succeeded: bool):
+        """Record one scan attempt; timeouts are recorded as failures at the timeout value"""
+        history = self.samples.setdefault(platform, [])
+        history.append([round(duration, 2), bool(succeeded), int(time.time())])
+        if len(history) > self.window:
+            del history[:-self.window]
+
+    def _percentile(self, platform: str, pct: float) -> Optional[float]:
+        durations = sorted(d for d, ok, _ in self.samples.get(platform, []) if ok)
+        if len(durations) < self.min_samples:
+            return None
+        index = min(len(durations) - 1, int(round(pct / 100 * (len(durations) - 1))))
+        return durations[index]
+
+    def p50(self, platform: str) -> Optional[float]:
+        return self._percentile(platform, 50)
+
+    def p95(self, platform: str) -> Optional[float]:
+        return self._percentile(platform, 95)
+
+    def success_rate(self, platform: str, last: int = None) -> Optional[float]:
+        history = self.samples.get(platform, [])
+        if last:
+            history = history[-last:]
+        if not history:
+            return None
+        return sum(1 for _, ok, _ in history if ok) / len(history)
+
+    def timeout_for(self, platform: str, default: float) -> float:
+        """p95 × factor once enough successful samples exist, else ``default``"""
+        p95 = self.p95(platform)
+        if p95 is None:
+            return default
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.timeout_factor))
+
+    def retry_budget(self, platform: str, default: float) -> float:
+        """Total seconds one scan may spend on a platform across all attempts"""
+        timeout = self.timeout_for(platform, default)
+        if self.is_dead(platform):
+            return timeout
+        return timeout * 2.5
+
+    def is_dead(self, platform: str) -> bool:
+        """True when the recent success rate is near zero, so retries are wasted"""
+        history = self.samples.get(platform, [])
+        if len(history) < self.dead_window:
+            return False
+        return self.success_rate(platform, last=self.dead_window) <= self.dead_success_rate
+
+    def get_summary(self) -> Dict[str, Dict]:
+        return {
+            platform: {
+                'p50': self.p50(platform),
+                'p95': self.p95(platform),
+                'success_rate': round(self.success_rate(platform) or 0, 2),
+                'samples': len(samples),
+                'dead': self.is_dead(platform)
+            }
+            for platform, samples in self.samples.items()
+        }
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Shared Listing Features
+One extraction stage per listing, consumed by every scorer (IntelligentThreatScorer,
+EnhancedThreatScorer, WildlifeQualityFilter and the scanners' relevance checks):
+normalized text, parsed price, URL features and matched-term bitsets.
+
+Scorers register their term lists with the shared ``TermVocabulary``. A single
+compiled matcher over the union of all of them scans ``title description
+search_term`` once, and each occurrence is attributed to the fields it lies in,
+so a scorer can ask for terms anywhere, in the title+description body, or
+within one field, without rescanning.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from keyword_matcher import KeywordMatcher
+from listing_identity import detect_platform
+
+PRICE_TOKEN = re.compile(r'\d[\d.,]*')
+# Digit-group separators other than '.' and ',': "25 000 ₽", "1\u00a0500 €", "CHF 1'500"
+DIGIT_GROUP_GAP = re.compile(r"(?<=\d)[\s\u00a0\u202f\u2009'’](?=\d{3}(?!\d))")
+URL_RISK_TERMS = ('private', 'discrete', 'special', 'exclusive')
+
+
+def parse_price(price_str: Any) -> Optional[float]:
+    """Numeric value of the first price in ``price_str``, or None.
+
+    Space, NBSP and apostrophe digit grouping ("25 000 ₽", "12 345,67 руб")
+    is joined first. Separator handling follows EnhancedThreatScorer's old
+    _extract_price: with both ',' and '.' the comma is a thousands separator;
+    a lone comma followed by at most two digits is a decimal separator. Unlike
+    _extract_price, which glued every digit in the string together, text
+    holding two prices ("$100 - $200") yields the first one.
+    """
+    if not price_str:
+        return None
+    match = PRICE_TOKEN.search(DIGIT_GROUP_GAP.sub('', str(price_str)))
+    if not match:
+        return None
+    price_clean = match.group().rstrip('.,')
+    try:
+        if ',' in price_clean and '.' in price_clean:
+            price_clean = price_clean.replace(',', '')
+        elif ',' in price_clean:
+            if price_clean.count(',') == 1 and len(price_clean.split(',')[1]) <= 2:
+                price_clean = price_clean.replace(',', '.')
+            else:
+                price_clean = price_clean.replace(',', '')
+        return float(price_clean)
+    except ValueError:
+        return None
+
+
+class TermVocabulary:
+    """Every term any scorer looks for, each with a stable bit index"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._matcher: Optional[KeywordMatcher] = None
+
+    def register(self, terms: Iterable[str]) -> int:
+        """Add terms (idempotent); returns their bit mask"""
+        bits = 0
+        for term in terms:
+            if not term:
+                continue
+            if term not in self._index:
+                self._index[term] = len(self._index)
+                self._matcher = None
+            bits |= 1 << self._index[term]
+        return bits
+
+    def index(self, term: str) -> int:
+        return self._index[term]
+
+    def mask(self, terms: Iterable[str]) -> int:
+        bits = 0
+        for term in terms:
+            bits |= 1 << self._index[term]
+        return bits
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        if self._matcher is None:
+            self._matcher = KeywordMatcher((term, index) for term, index in self._index.items())
+        return self._matcher
+
+
+VOCABULARY = TermVocabulary()
+
+
+class TermTable:
+    """A scorer's ordered ``(term, payload)`` entries, looked up from feature bitsets.
+
+    ``find`` returns payloads of matched entries in entry order, like
+    ``KeywordMatcher.find`` does for raw text.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]], vocabulary: TermVocabulary = None):
+        self.vocabulary = VOCABULARY if vocabulary is None else vocabulary
+        entries = [(term, payload) for term, payload in entries if term]
+        self.mask = self.vocabulary.register(term for term, _ in entries)
+        self.payloads = [payload for _, payload in entries]
+        self._by_index: Dict[int, List[Tuple[int, Any]]] = {}
+        for position, (term, payload) in enumerate(entries):
+            self._by_index.setdefault(self.vocabulary.index(term), []).append((position, payload))
+
+    def _hits(self, bits: int) -> List[Tuple[int, Any]]:
+        bits &= self.mask
+        hits = []
+        while bits:
+            low = bits & -bits
+            hits.extend(self._by_index[low.bit_length() - 1])
+            bits ^= low
+        hits.sort(key=itemgetter(0))
+        return hits
+
+    def find(self, bits: int) -> List[Any]:
+        return [payload for _, payload in self._hits(bits)]
+
+    def find_indices(self, bits: int) -> List[int]:
+        return [position for position, _ in self._hits(bits)]
+
+
+@dataclass
+class ListingFeatures:
+    """Everything the scorers read from one listing, extracted once"""
+    title: str                  # lower-cased, stripped
+    description: str            # lower-cased, stripped
+    search_term: str            # as given (scorers report it verbatim)
+    text: str                   # "title description search_term", lower-cased
+    body: str                   # "title description"
+    price_text: str
+    price: Optional[float]
+    url: str
+    url_lower: str
+    url_risk_terms: Tuple[str, ...]
+    platform: str
+    location: str
+    term_bits: int = 0          # terms anywhere in ``text``
+    body_bits: int = 0          # terms within ``body``
+    field_bits: int = 0         # terms inside the title or inside the description alone
+    search_bits: int = 0        # terms inside the search term
+    vocabulary_size: int = 0
+
+    # URL parsing is only paid for by scorers that use it
+    @cached_property
+    def url_host(self) -> str:
+        return urlparse(self.url_lower).netloc if self.url else ''
+
+    @cached_property
+    def url_platform(self) -> Optional[str]:
+        return detect_platform(self.url) if self.url else None
+
+    @cached_property
+    def content_key(self) -> str:
+        """Fingerprint of everything the threat scorers read (not the raw URL or location).
+
+        The same listing text rescraped under another keyword's page or relisted
+        with a different URL gets the same key.
+        """
+        url_flag = self.url_lower.count('http') > 1 or len(self.url) > 200
+        payload = '\x1f'.join((self.title, self.description, self.search_term, repr(self.price),
+                                self.platform.lower(), ','.join(self.url_risk_terms), str(url_flag)))
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def refresh(self, vocabulary: TermVocabulary = None) -> 'ListingFeatures':
+        """Re-match if terms were registered after extraction (a scorer built later)"""
+        vocabulary = VOCABULARY if vocabulary is None else vocabulary
+        if self.vocabulary_size != len(vocabulary):
+            self.term_bits, self.body_bits, self.field_bits, self.search_bits = _match_fields(
+                self.text, len(self.title), len(self.body), vocabulary)
+            self.vocabulary_size = len(vocabulary)
+        return self
+
+
+def _match_fields(text: str, title_end: int, body_end: int,
+                  vocabulary: TermVocabulary) -> Tuple[int, int, int, int]:
+    """One pass over ``text``; bitsets of terms anywhere / in body / in one field / in search term"""
+    term_bits = body_bits = field_bits = search_bits = 0
+    index = vocabulary._index
+    for term, start in vocabulary.matcher.find_spans(text):
+        bit = 1 << index[term]
+        end = start + len(term)
+        term_bits |= bit
+        if end <= body_end:
+            body_bits |= bit
+            if end <= title_end or start > title_end:
+                field_bits |= bit
+        elif start > body_end:
+            search_bits |= bit
+    return term_bits, body_bits, field_bits, search_bits
+
+
+def extract_features(listing: Dict, search_term: str = None, platform: str = None,
+                     vocabulary: TermVocabulary = None) -> ListingFeatures:
+    """Build ``ListingFeatures`` for a listing dict.
+
+    Accepts both the scanner field names (``title``/``price``/``url``) and the
+    stored detection names (``listing_title``/``listing_price``/``listing_url``).
+    """
+    vocabulary = VOCABULARY if vocabulary is None else vocabulary
+    title = (listing.get('title') or listing.get('listing_title') or '').lower().strip()
+    description = (listing.get('description') or '').lower().strip()
+    if search_term is None:
+        search_term = listing.get('search_term') or ''
+    if platform is None:
+        platform = listing.get('platform') or ''
+    price_text = str(listing.get('price') or listing.get('listing_price') or '')
+    url = listing.get('url') or listing.get('listing_url') or ''
+    url_lower = url.lower()
+
+    body = f"{title} {description}"
+    text = f"{body} {search_term.lower()}"
+    term_bits, body_bits, field_bits, search_bits = _match_fields(text, len(title), len(body), vocabulary)
+
+    return ListingFeatures(
+        title=title,
+        description=description,
+        search_term=search_term,
+        text=text,
+        body=body,
+        price_text=price_text,
+        price=parse_price(price_text),
+        url=url,
+        url_lower=url_lower,
+        url_risk_terms=tuple(term for term in URL_RISK_TERMS if term in url_lower),
+        platform=platform,
+        location=(listing.get('location') or '').lower(),
+        term_bits=term_bits,
+        body_bits=body_bits,
+        field_bits=field_bits,
+        search_bits=search_bits,
+        vocabulary_size=len(vocabulary)
+    )
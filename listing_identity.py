@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Canonical Listing Identity
+Maps any listing URL to a stable ``(platform, item_id)`` key so the same item
+reached through different URLs (tracking params, mobile hosts, slug changes)
+is recognised as one listing, both at ingest time and by the cleanup scripts.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'ref', 'source', 'fbclid', 'gclid', '_trksid', '_trkparms', 'hash', 'spm'}
+
+# Host fragment -> platform name used throughout the scanners
+PLATFORM_HOSTS = [
+    ('ebay.', 'ebay'),
+    ('avito.', 'avito'),
+    ('aliexpress.', 'aliexpress'),
+    ('taobao.', 'taobao'),
+    ('tmall.', 'taobao'),
+    ('mercadolibre.', 'mercadolibre'),
+    ('mercadolivre.', 'mercadolibre'),
+    ('olx.', 'olx'),
+    ('craigslist.', 'craigslist'),
+    ('gumtree.', 'gumtree'),
+    ('mercari.', 'mercari'),
+    ('marktplaats.', 'marktplaats'),
+    ('facebook.', 'facebook_marketplace'),
+]
+
+# One alternation per platform; the first group that matches is the item id
+_ID_PATTERNS = {
+    'ebay': r'/itm/(?:[^/?#]+/)?(\d{9,15})|[?&]item(?:id)?=(\d{9,15})',
+    'avito': r'/items/(\d+)|_(\d{6,})(?:[/?#]|$)',
+    'aliexpress': r'/item/(\d+)\.html|/i/(\d+)\.html|[?&]productId=(\d+)',
+    'taobao': r'[?&]id=(\d+)|/item/(\d+)\.htm',
+    'mercadolibre': r'/(ML[A-Z])-?(\d+)',
+    'olx': r'-ID([A-Za-z0-9]+)\.html|-iid-(\d+)',
+    'craigslist': r'/(\d{9,11})\.html',
+    'gumtree': r'/(\d{8,12})(?:[/?#]|$)',
+    'mercari': r'/item/(m\d+)',
+    'marktplaats': r'/(m\d{6,})-',
+    'facebook_marketplace': r'/marketplace/item/(\d+)',
+}
+_COMPILED = {platform: re.compile(pattern) for platform, pattern in _ID_PATTERNS.items()}
+
+# Platform names used by some scanners for the same site
+_ALIASES = {'facebook': 'facebook_marketplace'}
+
+
+@dataclass(frozen=True)
+class ListingIdentity:
+    """Stable identity of one marketplace listing"""
+    platform: str
+    item_id: str
+    from_url: bool = False  # True when no item id could be extracted
+
+    @property
+    def key(self) -> str:
+        return f"{self.platform}:{self.item_id}"
+
+
+def normalize_url(url: str) -> str:
+    """Lower-case host, drop fragments, tracking params and trailing slashes"""
+    parsed = urlparse(url.strip())
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                             if k.lower() not in TRACKING_PARAMS))
+    normalized = f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+    return f"{normalized}?{query}" if query else normalized
+
+
+def detect_platform(url: str) -> Optional[str]:
+    host = urlparse(url).netloc.lower()
+    for fragment, platform in PLATFORM_HOSTS:
+        if fragment in host:
+            return platform
+    return None
+
+
+def extract_item_id(url: str, platform: str = None) -> Optional[str]:
+    """Platform item id for ``url``, or None when the URL carries none"""
+    if not url:
+        return None
+    platform = _ALIASES.get(platform, platform) or detect_platform(url)
+    pattern = _COMPILED.get(platform)
+    if pattern is None:
+        return None
+    match = pattern.search(url)
+    if not match:
+        return None
+    if platform == 'mercadolibre':
+        return f"{match.group(1)}{match.group(2)}"
+    return next(group for group in match.groups() if group)
+
+
+def identify(url: str, platform: str = None) -> ListingIdentity:
+    """Canonical identity for a listing URL.
+
+    Falls back to a digest of the normalized URL when the platform or item id is
+    unknown, so the key is always stable across runs and processes.
+    """
+    url = url or ''
+    platform = _ALIASES.get(platform, platform) or detect_platform(url) or 'unknown'
+    item_id = extract_item_id(url, platform)
+    if item_id:
+        return ListingIdentity(platform, item_id)
+    digest = hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=12).hexdigest()
+    return ListingIdentity(platform, f"url-{digest}", from_url=True)
+
+
+def identity_key(url: str, platform: str = None) -> str:
+    return identify(url, platform).key
@@ -19,6 +19,7 @@ import random
 import time
 from dotenv import load_dotenv
 import sys
+from request_scheduler import ScanJob, shared_scheduler
 
 # Add path for keyword database
 sys.path.append('/Users/parkercase/conservation-bot')
@@ -178,7 +179,6 @@ class RealEbayScanner:
                 raise RuntimeError(f"eBay OAuth failed: {resp.status}")
 
     async def scan(self, keywords: Dict, session: aiohttp.ClientSession) -> List[Dict]:
-        results = []
         search_terms = keywords["direct_terms"][:8]  # Increased from 3 to 8
         
         try:
@@ -188,38 +188,38 @@ class RealEbayScanner:
                 "Content-Type": "application/json",
             }
 
-            for term in search_terms:
-                params = {"q": term, "limit": "20"}  # Increased from 15 to 20
+            async def fetch_term(job: ScanJob) -> List[Dict]:
+                params = {"q": job.keyword, "limit": "20"}  # Increased from 15 to 20
                 
                 async with session.get(
                     "https://api.ebay.com/buy/browse/v1/item_summary/search",
                     headers=headers, params=params
                 ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        items = data.get("itemSummaries", [])
-                        
-                        for item in items:
-                            results.append({
-                                "title": item.get("title", ""),
-                                "price": item.get("price", {}).get("value", ""),
-                                "url": item.get("itemWebUrl", ""),
-                                "search_term": term,
-                                "platform": "ebay",
-                                "location": item.get("itemLocation", {}).get("postalCode", ""),
-                                "image": item.get("image", {}).get("imageUrl", "")
-                            })
-                    
-                    elif resp.status == 429:  # Rate limited
-                        await asyncio.sleep(5)
-                        continue
+                    if resp.status == 429:  # Rate limited
+                        shared_scheduler().penalize('ebay', 5)
+                        return []
+                    if resp.status != 200:
+                        return []
+                    data = await resp.json()
                 
-                await asyncio.sleep(0.5)  # Reduced delay for faster scanning
+                return [{
+                    "title": item.get("title", ""),
+                    "price": item.get("price", {}).get("value", ""),
+                    "url": item.get("itemWebUrl", ""),
+                    "search_term": job.keyword,
+                    "platform": "ebay",
+                    "location": item.get("itemLocation", {}).get("postalCode", ""),
+                    "image": item.get("image", {}).get("imageUrl", "")
+                } for item in data.get("itemSummaries", [])]
+
+            jobs = [ScanJob('ebay', term) for term in search_terms]
+            term_results = await shared_scheduler().run_jobs(jobs, fetch_term)
 
         except Exception as e:
             logging.error(f"eBay error: {e}")
+            return []
         
-        return results
+        return [listing for listings in term_results if listings for listing in listings]
 
 
 class RealCraigslistScanner:
@@ -292,7 +292,7 @@ class RealCraigslistScanner:
                         await page.close()
                         await context.close()
                     
-                    await asyncio.sleep(random.uniform(2, 4))  # Reduced delay
+                    await shared_scheduler().throttle('craigslist')
             
             await browser.close()
         
@@ -437,7 +437,7 @@ class RealAliExpressScanner:
                     logging.info(f"AliExpress: Found {len(products)} REAL products for '{term}'")
                     
                     # Rate limiting
-                    await asyncio.sleep(random.uniform(4, 8))
+                    await shared_scheduler().throttle('aliexpress')
                     
                 except Exception as e:
                     logging.warning(f"AliExpress error for {term}: {e}")
@@ -520,7 +520,7 @@ class RealOLXScanner:
                             except:
                                 continue
                         
-                        await asyncio.sleep(3)
+                        await shared_scheduler().throttle('olx')
                         
                     except Exception as e:
                         logging.warning(f"OLX {country} error for {term}: {e}")
@@ -603,7 +603,7 @@ class RealGumtreeScanner:
                             except:
                                 continue
                         
-                        await asyncio.sleep(4)
+                        await shared_scheduler().throttle('gumtree')
                         
                     except Exception as e:
                         logging.warning(f"Gumtree {region} error for {term}: {e}")
@@ -704,7 +704,7 @@ class RealMercadoLibreScanner:
                         
                         logging.info(f"MercadoLibre {country}: Found {len(products)} REAL products for '{term}'")
                         
-                        await asyncio.sleep(4)
+                        await shared_scheduler().throttle('mercadolibre')
                         
                     except Exception as e:
                         logging.warning(f"MercadoLibre {country} error for {term}: {e}")
@@ -793,8 +793,8 @@ class RealTaobaoScanner:
                         except:
                             continue
                     
-                    # Longer delays for Taobao
-                    await asyncio.sleep(12)
+                    # Taobao's strict host budget keeps these far apart
+                    await shared_scheduler().throttle('taobao')
                     
                 except Exception as e:
                     logging.warning(f"Taobao error for {term}: {e}")
@@ -865,7 +865,7 @@ class RealMercariScanner:
                         except:
                             continue
                     
-                    await asyncio.sleep(3)
+                    await shared_scheduler().throttle('mercari')
                     
                 except Exception as e:
                     logging.warning(f"Mercari error for {term}: {e}")
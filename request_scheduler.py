@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Per-Host Request Scheduler
+Token-bucket pacing and concurrency caps per platform, shared by every scanner.
+Replaces the hard-coded asyncio.sleep() pacing scattered through the scanners.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class HostBudget:
+    """Request budget for one platform host"""
+    rate: float              # Sustained requests per second
+    burst: int = 1           # Bucket capacity (requests allowed back-to-back)
+    max_concurrency: int = 1 # Requests in flight at once
+    jitter: float = 0.0      # Extra random delay (seconds) to keep traffic human-like
+
+
+@dataclass
+class ScanJob:
+    """One unit of scanner work submitted to the scheduler"""
+    platform: str
+    keyword: str
+    page: int = 1
+
+
+# Budgets derived from the sleeps the scanners used to hard-code between requests
+PLATFORM_BUDGETS = {
+    'ebay': HostBudget(rate=2.0, burst=4, max_concurrency=4),            # Browse API, was 0.3-0.5s
+    'avito': HostBudget(rate=0.45, burst=2, max_concurrency=2, jitter=0.5),  # was uniform(1.5, 3)
+    'aliexpress': HostBudget(rate=0.11, burst=1, max_concurrency=1, jitter=2.0),  # was uniform(6, 12)
+    'taobao': HostBudget(rate=0.15, burst=1, max_concurrency=1, jitter=1.5),      # was uniform(5, 8)
+    'mercadolibre': HostBudget(rate=0.33, burst=2, max_concurrency=2, jitter=0.5),
+    'olx': HostBudget(rate=0.5, burst=2, max_concurrency=3, jitter=0.5),
+    'craigslist': HostBudget(rate=0.33, burst=2, max_concurrency=3, jitter=0.5),
+    'gumtree': HostBudget(rate=0.25, burst=1, max_concurrency=2, jitter=0.5),
+    'mercari': HostBudget(rate=0.25, burst=1, max_concurrency=2, jitter=0.5),
+    'marktplaats': HostBudget(rate=0.25, burst=1, max_concurrency=2, jitter=0.5),
+    'facebook': HostBudget(rate=0.1, burst=1, max_concurrency=1, jitter=2.0),     # was uniform(8, 12)
+    'facebook_marketplace': HostBudget(rate=0.1, burst=1, max_concurrency=1, jitter=2.0),
+}
+
+DEFAULT_BUDGET = HostBudget(rate=0.33, burst=1, max_concurrency=2, jitter=0.5)
+
+
+class TokenBucket:
+    """Classic token bucket; ``reserve`` returns the wait until the next token"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        # No refill while paused: ``updated`` sits at the end of the pause
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        # Waiters queued behind a pause are spaced out after it, not released together
+        return max(0.0, self.paused_until - now) + max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds: float):
+        """Hold every request to this host for ``seconds`` (e.g. after HTTP 429)"""
+        now = time.monotonic()
+        self._refill(now)
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, self.paused_until)
+
+
+class _HostState:
+    def __init__(self, budget: HostBudget):
+        self.budget = budget
+        self.bucket = TokenBucket(budget.rate, budget.burst)
+        self.semaphore = asyncio.Semaphore(budget.max_concurrency)
+
+
+class RequestScheduler:
+    """Runs platform jobs as fast as each host's budget allows"""
+
+    def __init__(self, budgets: Dict[str, HostBudget] = None):
+        self.budgets = dict(PLATFORM_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self._hosts: Dict[str, _HostState] = {}
+        self._loop = None
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _host(self, platform: str) -> _HostState:
+        # asyncio primitives are bound to one event loop; rebuild them per loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._hosts = {}
+        if platform not in self._hosts:
+            self._hosts[platform] = _HostState(self.budgets.get(platform, DEFAULT_BUDGET))
+            self.stats.setdefault(platform, {'requests': 0, 'wait_seconds': 0.0, 'penalties': 0})
+        return self._hosts[platform]
+
+    async def throttle(self, platform: str):
+        """Wait for this platform's next request token"""
+        host = self._host(platform)
+        wait = host.bucket.reserve()
+        if host.budget.jitter:
+            wait += random.uniform(0, host.budget.jitter)
+        stats = self.stats[platform]
+        stats['requests'] += 1
+        stats['wait_seconds'] += wait
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def slot(self, platform: str):
+        """Async context manager: a concurrency slot plus a request token"""
+        return _Slot(self, platform)
+
+    def penalize(self, platform: str, seconds: float):
+        """Back the whole host off after a rate-limit response"""
+        self._host(platform).bucket.pause(seconds)
+        self.stats[platform]['penalties'] += 1
+        logging.warning(f"{platform}: rate limited, pausing host for {seconds:.1f}s")
+
+    async def run_jobs(self, jobs: Iterable[ScanJob],
+                       handler: Callable[[ScanJob], Awaitable[Any]]) -> List[Any]:
+        """Run ``handler`` for every job in parallel within each host's budget.
+
+        Results are returned in job order; a failed job yields ``None`` and is logged.
+        """
+        async def _run(job: ScanJob):
+            async with self.slot(job.platform):
+                try:
+                    return await handler(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"{job.platform} job '{job.keyword}' page {job.page} failed: {e}")
+                    return None
+
+        return await asyncio.gather(*[_run(job) for job in jobs])
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {platform: dict(values) for platform, values in self.stats.items()}
+
+
+class _Slot:
+    def __init__(self, scheduler: RequestScheduler, platform: str):
+        self.scheduler = scheduler
+        self.platform = platform
+        self._host: Optional[_HostState] = None
+
+    async def __aenter__(self):
+        self._host = self.scheduler._host(self.platform)
+        await self._host.semaphore.acquire()
+        try:
+            await self.scheduler.throttle(self.platform)
+        except BaseException:
+            self._host.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._host.semaphore.release()
+
+
+_shared_scheduler: Optional[RequestScheduler] = None
+
+
+def shared_scheduler() -> RequestScheduler:
+    """Process-wide scheduler so every scanner instance shares the same host budgets"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = RequestScheduler()
+    return _shared_scheduler
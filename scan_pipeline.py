@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Streaming Scan Pipeline
+Platforms push listings as pages are parsed; score/dedupe and store workers
+consume them concurrently through bounded queues. Nothing waits for the slowest
+platform, and every stored batch survives a job timeout.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+_DONE = object()
+
+
+class ListingSink:
+    """Bounded hand-off from platform scanners into the pipeline"""
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.counts: Dict[str, int] = {}
+        self._buffers: List['ListingBuffer'] = []
+
+    async def put(self, platform: str, listing: Dict):
+        """Tag a listing the way scan_all_platforms_enhanced does and enqueue it (waits when full)"""
+        listing["platform"] = platform
+        listing["scan_timestamp"] = datetime.utcnow().isoformat()
+        listing["comprehensive_scan"] = True
+        await self.queue.put(listing)
+        self.counts[platform] = self.counts.get(platform, 0) + 1
+
+    async def put_many(self, listings: List[Dict]):
+        for listing in listings:
+            await self.put(listing.get('platform', 'unknown'), listing)
+
+    async def drain(self, platform: str = None):
+        """Flush listings a scanner appended but never flushed (e.g. cancelled by a timeout)"""
+        for buffer in list(self._buffers):
+            if platform is None or buffer.platform == platform:
+                await buffer.flush()
+                self._buffers.remove(buffer)
+
+
+class ListingBuffer(list):
+    """Scanner result list that streams its items into a ListingSink on ``flush``.
+
+    With no sink it is an ordinary list, so scanners behave as before when
+    they are not running inside a pipeline.
+    """
+
+    def __init__(self, sink: Optional[ListingSink], platform: str):
+        super().__init__()
+        self.sink = sink
+        self.platform = platform
+        self._flushed = 0
+        if sink is not None:
+            sink._buffers.append(self)
+
+    async def flush(self):
+        if self.sink is None:
+            return
+        while self._flushed < len(self):
+            # Count a listing only once the sink has it: a put cancelled by a
+            # scan timeout leaves it for the follow-up drain()
+            await self.sink.put(self.platform, self[self._flushed])
+            self._flushed += 1
+
+
+class ScanPipeline:
+    """scan → process (filter/score/dedupe) → batched store, connected by bounded queues"""
+
+    def __init__(self, process: Callable[[Dict], Optional[Dict]],
+                 store: Callable[[List[Dict], int], Awaitable[Dict]],
+                 queue_size: int = 500, process_workers: int = 2,
+                 store_batch_size: int = 50, flush_interval: float = 10.0,
+                 name: str = 'scan'):
+        self.process = process
+        self.store = store
+        self.queue_size = queue_size
+        self.process_workers = process_workers
+        self.store_batch_size = store_batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.stats = {
+            'scanned': 0,
+            'processed': 0,
+            'dropped': 0,
+            'stored_batches': 0,
+            'peak_scan_queue': 0,
+            'first_store_seconds': None
+        }
+        self.store_results: List[Dict] = []
+        # Listing identity keys offered to ``process`` this run, for within-run dedupe
+        self.seen_keys: Set[str] = set()
+
+    async def run(self, produce: Callable[[ListingSink], Awaitable[Any]]) -> Dict:
+        """Run ``produce(sink)`` and the consumer stages until everything is stored"""
+        start = time.monotonic()
+        scan_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        store_queue: asyncio.Queue = asyncio.Queue(maxsize=self.store_batch_size * 4)
+        sink = ListingSink(scan_queue)
+
+        workers = [asyncio.create_task(self._process_worker(scan_queue, store_queue))
+                   for _ in range(self.process_workers)]
+        storer = asyncio.create_task(self._store_worker(store_queue, start))
+
+        try:
+            await produce(sink)
+            await sink.drain()
+        finally:
+            # Stop consumers after they finish what was already produced
+            for _ in workers:
+                await scan_queue.put(_DONE)
+            await asyncio.gather(*workers, return_exceptions=True)
+            await store_queue.put(_DONE)
+            await storer
+
+        self.stats['platform_counts'] = dict(sink.counts)
+        self.stats['duration_seconds'] = round(time.monotonic() - start, 1)
+        logging.info(f"🔀 {self.name} pipeline: {self.stats}")
+        return self.stats
+
+    async def _process_worker(self, scan_queue: asyncio.Queue, store_queue: asyncio.Queue):
+        while True:
+            listing = await scan_queue.get()
+            if listing is _DONE:
+                return
+            self.stats['scanned'] += 1
+            self.stats['peak_scan_queue'] = max(self.stats['peak_scan_queue'], scan_queue.qsize() + 1)
+            try:
+                processed = self.process(listing)
+            except Exception as e:
+                logging.warning(f"{self.name} pipeline: processing failed: {e}")
+                processed = None
+            if processed is None:
+                self.stats['dropped'] += 1
+                continue
+            self.stats['processed'] += 1
+            await store_queue.put(processed)
+
+    async def _store_worker(self, store_queue: asyncio.Queue, start: float):
+        batch: List[Dict] = []
+        offset = 0
+        finished = False
+        while not finished:
+            try:
+                item = await asyncio.wait_for(store_queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                finished = True
+            elif item is not None:
+                batch.append(item)
+
+            # Write full batches immediately and trickles every flush_interval
+            if batch and (finished or item is None or len(batch) >= self.store_batch_size):
+                try:
+                    result = await self.store(batch, offset)
+                    self.store_results.append(result)
+                    self.stats['stored_batches'] += 1
+                    if self.stats['first_store_seconds'] is None:
+                        self.stats['first_store_seconds'] = round(time.monotonic() - start, 1)
+                except Exception as e:
+                    logging.error(f"{self.name} pipeline: store batch failed: {e}")
+                offset += len(batch)
+                batch = []
+
+
+def merge_store_results(store_results: List[Dict], total: int) -> Dict:
+    """Combine per-batch ``{"stored_count", "quality_metrics"}`` dicts into one"""
+    stored_count = 0
+    quality_metrics: Dict[str, Any] = {}
+    platform_breakdown: Dict[str, int] = {}
+    for result in store_results:
+        stored_count += result.get("stored_count", 0)
+        for key, value in result.get("quality_metrics", {}).items():
+            if key == "platform_breakdown":
+                for platform, count in value.items():
+                    platform_breakdown[platform] = platform_breakdown.get(platform, 0) + count
+            elif key == "quality_score":
+                continue
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                quality_metrics[key] = value
+            else:
+                quality_metrics[key] = quality_metrics.get(key, 0) + value
+    quality_metrics["quality_score"] = stored_count / total if total else 0
+    quality_metrics["platform_breakdown"] = platform_breakdown
+    return {"stored_count": stored_count, "quality_metrics": quality_metrics}
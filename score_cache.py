@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Threat Score Cache
+Memoizes scorer output by listing content, so the same text rescraped under
+another keyword, platform page or relisted URL is not scored twice.
+
+Each scorer gets one cache named after it and versioned by a hash of its weight
+tables: editing any term, weight or multiplier changes the version and the old
+entries are dropped on load. Entries live in an in-memory LRU and are persisted
+as JSON (``<name>.json`` under SCORE_CACHE_DIR) between runs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv('SCORE_CACHE_DIR', 'score_cache')
+DEFAULT_MAX_ENTRIES = int(os.getenv('SCORE_CACHE_MAX_ENTRIES', '50000'))
+SCORE_CACHE_ENABLED = os.getenv('SCORE_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def table_version(*tables: Any) -> str:
+    """Stable hash of a scorer's weight tables"""
+    payload = json.dumps(tables, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ScoreCache:
+    """LRU of serialized scorer results keyed by listing content fingerprint"""
+
+    def __init__(self, name: str, version: str, directory: str = None, max_entries: int = None):
+        self.name = name
+        self.version = version
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.path = os.path.join(self.directory, f"{name}.json")
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'loaded': 0, 'evicted': 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.version:
+                logging.info(f"🗂️ Score cache {self.name}: weight tables changed, discarding "
+                             f"{len(data.get('entries', []))} cached scores")
+                self._dirty = True
+                return
+            for key, value in data.get('entries', [])[-self.max_entries:]:
+                self._entries[key] = value
+            self.stats['loaded'] = len(self._entries)
+            logging.info(f"🗂️ Score cache {self.name}: {len(self._entries):,} cached scores loaded")
+        except Exception as e:
+            logging.warning(f"Score cache load error ({self.path}): {e}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self._entries.get(key)
+        if value is None:
+            self.stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, key: str, value: Dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evicted'] += 1
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self):
+        """Write the cache (least recently used first) and atomically replace the file"""
+        if not self._dirty:
+            return
+        start = time.perf_counter()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'entries': list(self._entries.items())},
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            logging.info(f"💾 Score cache {self.name} saved: {len(self._entries):,} scores "
+                         f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logging.warning(f"Score cache save error ({self.path}): {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            'version': self.version
+        }
+
+
+_caches: Dict[str, ScoreCache] = {}
+
+
+def shared_score_cache(name: str, version: str) -> Optional[ScoreCache]:
+    """Process-wide cache per scorer (None when SCORE_CACHE_ENABLED is false)"""
+    if not SCORE_CACHE_ENABLED:
+        return None
+    cache = _caches.get(name)
+    if cache is None or cache.version != version:
+        if cache is not None:
+            cache.save()
+        cache = _caches[name] = ScoreCache(name, version)
+    return cache
+
+
+def save_score_caches():
+    for cache in _caches.values():
+        cache.save()
+
+
+def score_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit / miss summary per scorer, for scan result dicts"""
+    return {name: cache.summary() for name, cache in _caches.items()}
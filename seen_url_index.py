@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Persistent Seen-URL Index
+One on-disk index of every listing already stored, shared by all scanners.
+Entries are keyed by ListingIdentity, not raw URL.
+
+File layout (little-endian):
+    header   magic, entry count, bloom bit count, bloom hash count
+    bloom    Bloom filter bits over the fingerprints
+    keys     sorted uint64 URL fingerprints
+    stamps   uint32 last-seen unix time, parallel to keys
+
+The file is mmap'd and searched in place, so opening it costs milliseconds
+regardless of size. New and re-seen URLs (lookup hits included) live in
+memory until ``save``, which merges them in, drops entries past the TTL, trims
+least-recently-seen entries over ``max_entries`` and atomically replaces the
+file. The merge is vectorised with NumPy when it is installed.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional
+
+from listing_identity import identity_key
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MAGIC = b'WGSEEN01'
+HEADER = struct.Struct('<8sQQI4x')
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 4
+
+DEFAULT_INDEX_PATH = os.getenv('SEEN_URL_INDEX', 'seen_url_index.bin')
+DEFAULT_TTL_DAYS = float(os.getenv('SEEN_URL_TTL_DAYS', '90'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('SEEN_URL_MAX_ENTRIES', '5000000'))
+
+
+def url_fingerprint(key: str) -> int:
+    """64-bit fingerprint of a listing identity key"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _bloom_positions(fingerprint: int, bits: int):
+    # Kirsch-Mitzenmacher double hashing from the two halves of the fingerprint
+    h1 = fingerprint & 0xFFFFFFFF
+    h2 = (fingerprint >> 32) | 1
+    for i in range(BLOOM_HASHES):
+        yield (h1 + i * h2) % bits
+
+
+class SeenUrlIndex:
+    """Set-like index of listing URL fingerprints with TTL / LRU eviction"""
+
+    def __init__(self, path: str = None, ttl_days: float = None, max_entries: int = None):
+        self.path = path or DEFAULT_INDEX_PATH
+        self.ttl_seconds = (DEFAULT_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self._file = None
+        self._mmap = None
+        self._count = 0
+        self._bloom_bits = 0
+        self._bloom = None
+        self._keys = None
+        self._stamps = None
+        self._loaded_stat = None
+        # fingerprint -> last-seen time, for URLs added or re-seen this run
+        self._touched: Dict[int, int] = {}
+        self.stats = {'lookups': 0, 'hits': 0, 'bloom_rejects': 0, 'added': 0}
+        self._open()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        self._close_map()
+        start = time.perf_counter()
+        try:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+                return
+            self._file = open(self.path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count, bloom_bits, hashes = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or hashes != BLOOM_HASHES:
+                raise ValueError(f"unrecognised seen-URL index {self.path}")
+            view = memoryview(self._mmap)
+            offset = HEADER.size
+            bloom_bytes = _padded(bloom_bits // 8)
+            self._bloom = view[offset:offset + bloom_bytes]
+            offset += bloom_bytes
+            self._keys = view[offset:offset + count * 8].cast('Q')
+            offset += count * 8
+            self._stamps = view[offset:offset + count * 4].cast('I')
+            self._count = count
+            self._bloom_bits = bloom_bits
+            self._loaded_stat = _stat_key(self.path)
+            logging.info(f"🧭 Seen-URL index: {count:,} URLs mapped in {(time.perf_counter() - start) * 1000:.1f}ms")
+        except Exception as e:
+            logging.warning(f"Seen-URL index load error: {e}")
+            self._close_map()
+
+    def _close_map(self):
+        for view in (self._bloom, self._keys, self._stamps):
+            if view is not None:
+                view.release()
+        self._bloom = self._keys = self._stamps = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+        self._bloom_bits = 0
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        # Canonical (platform, item id) key, so one item reached via two URLs is one entry
+        return identity_key(url)
+
+    def _position(self, fingerprint: int) -> int:
+        """Index of ``fingerprint`` in the mapped keys, or -1"""
+        if not self._count:
+            return -1
+        for bit in _bloom_positions(fingerprint, self._bloom_bits):
+            if not self._bloom[bit >> 3] & (1 << (bit & 7)):
+                self.stats['bloom_rejects'] += 1
+                return -1
+        i = bisect_left(self._keys, fingerprint)
+        if i < self._count and self._keys[i] == fingerprint:
+            return i
+        return -1
+
+    def _contains_fingerprint(self, fingerprint: int) -> bool:
+        if fingerprint in self._touched:
+            return True
+        i = self._position(fingerprint)
+        if i < 0:
+            return False
+        return time.time() - self._stamps[i] <= self.ttl_seconds
+
+    def __contains__(self, url: str) -> bool:
+        if not url:
+            return False
+        self.stats['lookups'] += 1
+        fingerprint = url_fingerprint(self.key_for(url))
+        found = self._contains_fingerprint(fingerprint)
+        if found:
+            self.stats['hits'] += 1
+            # A hit counts as use, so eviction is least-recently-seen, not oldest-added
+            self._touched[fingerprint] = int(time.time())
+        return found
+
+    def add(self, url: str):
+        if not url:
+            return
+        fingerprint = url_fingerprint(self.key_for(url))
+        if fingerprint not in self._touched and self._position(fingerprint) < 0:
+            self.stats['added'] += 1
+        self._touched[fingerprint] = int(time.time())
+
+    def check_and_add(self, url: str) -> bool:
+        """True if ``url`` is new (and records it); False if it was already seen"""
+        if not url:
+            return False
+        self.stats['lookups'] += 1
+        fingerprint = url_fingerprint(self.key_for(url))
+        seen = self._contains_fingerprint(fingerprint)
+        if seen:
+            self.stats['hits'] += 1
+        else:
+            self.stats['added'] += 1
+        # Refresh last-seen either way so active listings stay in the LRU window
+        self._touched[fingerprint] = int(time.time())
+        return not seen
+
+    def __len__(self) -> int:
+        return self._count + sum(1 for fp in self._touched if self._position(fp) < 0)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Merge this run's URLs into the file, evict expired / LRU entries, replace atomically"""
+        start = time.perf_counter()
+        try:
+            # Another scanner may have saved since we opened; merge its entries too
+            if os.path.exists(self.path) and _stat_key(self.path) != self._loaded_stat:
+                touched = self._touched
+                self._open()
+                self._touched = touched
+
+            now = int(time.time())
+            cutoff = now - self.ttl_seconds
+            merge = _merge_numpy if NUMPY_AVAILABLE else _merge_python
+            keys, stamps, bloom, bloom_bits, evicted = merge(
+                self._keys, self._stamps, self._count, self._touched, cutoff, self.max_entries)
+
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, len(keys), bloom_bits, BLOOM_HASHES))
+                f.write(bloom)
+                f.write(keys)
+                f.write(stamps)
+                f.flush()
+                os.fsync(f.fileno())
+            self._close_map()
+            os.replace(tmp_path, self.path)
+            self._touched = {}
+            self._open()
+            logging.info(f"💾 Seen-URL index saved: {len(keys):,} URLs ({evicted:,} evicted) "
+                         f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logging.warning(f"Seen-URL index save error: {e}")
+
+    def close(self):
+        self._close_map()
+
+
+def _bloom_size(count: int) -> int:
+    return max(64, _padded(count * BLOOM_BITS_PER_ENTRY // 8) * 8)
+
+
+def _merge_python(mapped_keys, mapped_stamps, count: int, touched: Dict[int, int],
+                  cutoff: float, max_entries: int):
+    """Merge mapped and touched entries; returns (keys, stamps, bloom, bloom bits, evicted)"""
+    merged: Dict[int, int] = {}
+    for i in range(count):
+        stamp = mapped_stamps[i]
+        if stamp >= cutoff:
+            merged[mapped_keys[i]] = stamp
+    for fingerprint, stamp in touched.items():
+        if stamp >= merged.get(fingerprint, 0):
+            merged[fingerprint] = stamp
+
+    evicted = 0
+    if len(merged) > max_entries:
+        # Keep the most recently seen entries
+        keep = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:max_entries]
+        evicted = len(merged) - len(keep)
+        merged = dict(keep)
+
+    keys = array('Q', sorted(merged))
+    stamps = array('I', (merged[k] for k in keys))
+    bloom_bits = _bloom_size(len(keys))
+    bloom = bytearray(bloom_bits // 8)
+    for fingerprint in keys:
+        for bit in _bloom_positions(fingerprint, bloom_bits):
+            bloom[bit >> 3] |= 1 << (bit & 7)
+    return keys, stamps, bloom, bloom_bits, evicted
+
+
+def _merge_numpy(mapped_keys, mapped_stamps, count: int, touched: Dict[int, int],
+                 cutoff: float, max_entries: int):
+    """Same result as ``_merge_python`` with array operations instead of per-entry loops"""
+    # np.array copies, so nothing keeps the mmap exported once save() remaps the file
+    keys = np.array(mapped_keys, dtype='<u8') if count else np.empty(0, dtype='<u8')
+    stamps = np.array(mapped_stamps, dtype='<u4') if count else np.empty(0, dtype='<u4')
+    live = stamps >= cutoff
+    keys = np.concatenate([keys[live], np.fromiter(touched.keys(), dtype='<u8', count=len(touched))])
+    stamps = np.concatenate([stamps[live], np.fromiter(touched.values(), dtype='<u4', count=len(touched))])
+
+    # Sort by key then stamp and keep the last (newest) stamp of each key
+    order = np.lexsort((stamps, keys))
+    keys, stamps = keys[order], stamps[order]
+    newest = np.ones(len(keys), dtype=bool)
+    newest[:-1] = keys[1:] != keys[:-1]
+    keys, stamps = keys[newest], stamps[newest]
+
+    evicted = 0
+    if len(keys) > max_entries:
+        # Keep the most recently seen entries, still in key order
+        keep = np.sort(np.argpartition(stamps, len(keys) - max_entries)[len(keys) - max_entries:])
+        evicted = len(keys) - len(keep)
+        keys, stamps = keys[keep], stamps[keep]
+
+    bloom_bits = _bloom_size(len(keys))
+    bits = np.zeros(bloom_bits, dtype=bool)
+    h1 = keys & np.uint64(0xFFFFFFFF)
+    h2 = (keys >> np.uint64(32)) | np.uint64(1)
+    for i in range(BLOOM_HASHES):
+        bits[(h1 + np.uint64(i) * h2) % np.uint64(bloom_bits)] = True
+    bloom = np.packbits(bits, bitorder='little')
+    return keys, stamps, bloom, bloom_bits, evicted
+
+
+def _padded(nbytes: int) -> int:
+    """Round up to 8 bytes so the key array stays aligned"""
+    return (nbytes + 7) // 8 * 8
+
+
+def _stat_key(path: str):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+_shared_index: Optional[SeenUrlIndex] = None
+
+
+def shared_seen_index() -> SeenUrlIndex:
+    """Process-wide index so every scanner in one process shares lookups"""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = SeenUrlIndex()
+    return _shared_index
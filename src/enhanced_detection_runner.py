@@ -6,13 +6,12 @@ Target: 100-200k quality detections daily with <20% UNRATED
 """
 
 import asyncio
-import aiohttp
 import os
 import json
 import logging
 import sys
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any
 import traceback
 import time
 import random
@@ -32,6 +31,8 @@ from quality_filters import WildlifeQualityFilter
 
 # Import existing scanner
 from final_production_scanner import FinalProductionScanner
+from detection_spool import spool_detections
+from seen_url_index import shared_seen_index
 
 # Setup logging
 logging.basicConfig(
@@ -69,8 +70,7 @@ class EnhancedWildlifeDetectionRunner:
         }
         
         # URL deduplication
-        self.seen_urls: Set[str] = set()
-        self.load_url_cache()
+        self.seen_index = shared_seen_index()
         
         # Keyword management with better rotation (OPTIMIZED)
         self.keyword_batch_size = int(os.getenv('BATCH_SIZE', '100'))  # Doubled from 50
@@ -146,34 +146,9 @@ class EnhancedWildlifeDetectionRunner:
         logging.info(f"🔄 Using fallback keywords: {len(keywords):,}")
         return keywords
 
-    def load_url_cache(self):
-        """Load URL cache for deduplication"""
-        try:
-            cache_file = Path('/tmp/enhanced_wildguard_urls.json')
-            if cache_file.exists():
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    self.seen_urls = set(data.get('seen_urls', []))
-                    logging.info(f"📁 Loaded {len(self.seen_urls):,} URLs from cache")
-        except Exception as e:
-            logging.warning(f"Cache load error: {e}")
-            self.seen_urls = set()
-
     def save_url_cache(self):
-        """Save URL cache with rotation"""
-        try:
-            # Keep cache manageable
-            if len(self.seen_urls) > 150000:
-                self.seen_urls = set(list(self.seen_urls)[-100000:])
-            
-            cache_file = Path('/tmp/enhanced_wildguard_urls.json')
-            data = {'seen_urls': list(self.seen_urls), 'updated': datetime.now().isoformat()}
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
-            
-            logging.debug(f"💾 Saved {len(self.seen_urls):,} URLs to cache")
-        except Exception as e:
-            logging.warning(f"Cache save error: {e}")
+        """Persist the shared seen-URL index"""
+        self.seen_index.save()
 
     def get_next_keyword_batch(self) -> List[str]:
         """Get next batch of keywords with smart rotation (OPTIMIZED)"""
@@ -235,7 +210,7 @@ class EnhancedWildlifeDetectionRunner:
             
             # Enhanced duplicate prevention
             url = result.get('url', '')
-            if url in self.seen_urls:
+            if url in self.seen_index:
                 continue
             
             # Additional hash-based duplicate checking for performance
@@ -270,7 +245,7 @@ class EnhancedWildlifeDetectionRunner:
                 }
                 
                 accepted_results.append(enhanced_result)
-                self.seen_urls.add(url)
+                self.seen_index.add(url)
                 
                 logging.debug(f"✅ {platform}: {result.get('title', '')[:50]}... ({threat_level}, {quality_assessment['qualityScore']:.1%})")
             
@@ -299,57 +274,38 @@ class EnhancedWildlifeDetectionRunner:
         if not results:
             return 0
         
-        stored_count = 0
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            for result in results:
-                try:
-                    # Create detection record
-                    evidence_id = f"ENHANCED-{result['platform'].upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{result.get('item_id', 'unknown')}"
-                    
-                    detection = {
-                        'evidence_id': evidence_id,
-                        'timestamp': datetime.now().isoformat(),
-                        'platform': result['platform'],
-                        'threat_score': int(result['quality_score'] * 100),
-                        'threat_level': result['threat_level'],
-                        'species_involved': f"Keywords: {', '.join(result.get('keywords_used', []))}",
-                        'alert_sent': result['threat_level'] in ['CRITICAL', 'HIGH'],
-                        'status': f'ENHANCED_PRODUCTION_{result["platform"].upper()}' + ('_HISTORICAL' if result.get('historical_scan') else ''),
-                        'listing_title': (result.get('title', '') or '')[:500],
-                        'listing_url': result.get('url', '') or '',
-                        'listing_price': str(result.get('price', '') or ''),
-                        'search_term': result.get('search_term', '') or '',
-                        'confidence_score': int(result['confidence'] * 100),
-                        'quality_score': result['quality_score'],
-                        'enhanced_scan': True
-                    }
-                    
-                    url = f"{self.supabase_url}/rest/v1/detections"
-                    
-                    async with session.post(url, headers=headers, json=detection) as resp:
-                        if resp.status in [200, 201]:
-                            stored_count += 1
-                        elif resp.status == 409:
-                            # Duplicate - skip silently
-                            continue
-                        else:
-                            response_text = await resp.text()
-                            if 'duplicate' not in response_text.lower():
-                                logging.warning(f"Storage error {resp.status}: {response_text[:100]}")
+        detections = []
+        for result in results:
+            try:
+                # Create detection record
+                evidence_id = f"ENHANCED-{result['platform'].upper()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{result.get('item_id', 'unknown')}"
                 
-                except Exception as e:
-                    if 'duplicate' not in str(e).lower():
-                        logging.warning(f"Storage error: {e}")
-                    continue
+                detections.append({
+                    'evidence_id': evidence_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'platform': result['platform'],
+                    'threat_score': int(result['quality_score'] * 100),
+                    'threat_level': result['threat_level'],
+                    'species_involved': f"Keywords: {', '.join(result.get('keywords_used', []))}",
+                    'alert_sent': result['threat_level'] in ['CRITICAL', 'HIGH'],
+                    'status': f'ENHANCED_PRODUCTION_{result["platform"].upper()}' + ('_HISTORICAL' if result.get('historical_scan') else ''),
+                    'listing_title': (result.get('title', '') or '')[:500],
+                    'listing_url': result.get('url', '') or '',
+                    'listing_price': str(result.get('price', '') or ''),
+                    'search_term': result.get('search_term', '') or '',
+                    'confidence_score': int(result['confidence'] * 100),
+                    'quality_score': result['quality_score'],
+                    'enhanced_scan': True
+                })
+            
+            except Exception as e:
+                logging.warning(f"Storage error: {e}")
+                continue
         
-        return stored_count
+        write_counts = await spool_detections(
+            detections, supabase_url=self.supabase_url, supabase_key=self.supabase_key
+        )
+        return write_counts['inserted']
 
     async def run_historical_backfill(self, platform: str, keywords: List[str]) -> int:
         """Run historical backfill scan for older listings (2+ months)"""
@@ -476,6 +432,7 @@ class EnhancedWildlifeDetectionRunner:
             'threat_distribution': self.session_stats['by_threat_level'],
             'platform_performance': self.session_stats['by_platform'],
             'top_rejection_reasons': dict(sorted(self.session_stats['rejection_reasons'].items(), key=lambda x: x[1], reverse=True)[:10]),
+            'filter_rules': self.quality_filter.get_filter_stats()['rules'],
             'quality_metrics': {
                 'unrated_percentage': round((self.session_stats['by_threat_level']['UNRATED'] / max(1, self.session_stats['total_scanned'])) * 100, 1),
                 'high_threat_percentage': round(((self.session_stats['by_threat_level']['CRITICAL'] + self.session_stats['by_threat_level']['HIGH']) / max(1, self.session_stats['total_accepted'])) * 100, 1)
@@ -547,6 +504,12 @@ class EnhancedWildlifeDetectionRunner:
             for reason, count in list(stats['top_rejection_reasons'].items())[:5]:
                 print(f"   {reason}: {count:,}")
         
+        # Filter rule hit counts / cost (for tuning rule order under load)
+        if stats['filter_rules']:
+            print(f"\n🧮 FILTER RULES:")
+            for rule, rule_stats in list(stats['filter_rules'].items())[:8]:
+                print(f"   {rule}: {rule_stats['hits']:,} hits / {rule_stats['checks']:,} checks ({rule_stats['time_ms']:.1f}ms)")
+        
         print("\n" + "="*80)
 
 # Main execution
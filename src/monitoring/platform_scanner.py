@@ -23,6 +23,7 @@ import sys
 # Add path for keyword database
 sys.path.append('/Users/parkercase/conservation-bot')
 from enhanced_keywords import get_massive_keyword_database, get_optimized_search_terms, get_platform_specific_terms
+from latency_tracker import PlatformLatencyTracker
 
 load_dotenv('/Users/parkercase/conservation-bot/backend/.env')
 
@@ -46,6 +47,10 @@ class PlatformScanner:
         
         self.keywords = get_massive_keyword_database()
         self.session = None
+        # Own state file: its scanners differ from EnhancedRealPlatformScanner's
+        # for the same platform names, so their latencies must not mix
+        self.latency = PlatformLatencyTracker(
+            os.getenv('PLATFORM_SCANNER_LATENCY_STATE', 'platform_scanner_latency_state.json'))
 
     async def __aenter__(self):
         timeout = aiohttp.ClientTimeout(total=120)
@@ -60,6 +65,7 @@ class PlatformScanner:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        self.latency.save_state()
 
     async def scan_all_platforms(self) -> List[Dict[Any, Any]]:
         """Scan all 8 platforms with REAL data only"""
@@ -90,26 +96,27 @@ class PlatformScanner:
         return results
 
     async def _scan_platform_real(self, platform_name: str, scanner, keywords: Dict) -> List[Dict]:
-        """Scan platform with REAL data only - optimized timeouts"""
+        """Scan platform with REAL data only - timeouts derived from observed latency"""
+        # Fallback timeouts until the latency tracker has enough history
+        timeouts = {
+            'ebay': 40,      # Fast API
+            'craigslist': 60,   # Playwright but reliable
+            'aliexpress': 45,   # Shorter timeout for speed
+            'olx': 35,         # Shorter timeout
+            'gumtree': 35,     # Shorter timeout
+            'mercadolibre': 40, # Shorter timeout
+            'taobao': 30,      # Very short due to anti-bot
+            'mercari': 30      # Shorter timeout
+        }
+        
+        timeout = self.latency.timeout_for(platform_name, timeouts.get(platform_name, 35))
+        start = time.monotonic()
         try:
-            # Platform-specific optimized timeouts
-            timeouts = {
-                'ebay': 40,      # Fast API
-                'craigslist': 60,   # Playwright but reliable
-                'aliexpress': 45,   # Shorter timeout for speed
-                'olx': 35,         # Shorter timeout
-                'gumtree': 35,     # Shorter timeout
-                'mercadolibre': 40, # Shorter timeout
-                'taobao': 30,      # Very short due to anti-bot
-                'mercari': 30      # Shorter timeout
-            }
-            
-            timeout = timeouts.get(platform_name, 35)
-            
             results = await asyncio.wait_for(
                 scanner.scan(keywords, self.session),
                 timeout=timeout
             )
+            self.latency.record(platform_name, time.monotonic() - start, bool(results))
             
             if results:
                 logging.info(f"{platform_name}: {len(results)} REAL results")
@@ -119,9 +126,11 @@ class PlatformScanner:
                 return []
                 
         except asyncio.TimeoutError:
-            logging.warning(f"{platform_name}: Timeout after {timeout}s")
+            self.latency.record(platform_name, timeout, False)
+            logging.warning(f"{platform_name}: Timeout after {timeout:.0f}s")
             return []
         except Exception as e:
+            self.latency.record(platform_name, time.monotonic() - start, False)
             logging.error(f"{platform_name}: Error - {e}")
             return []
 
@@ -7,9 +7,18 @@ Prevents UNRATED classifications and focuses on quality detections
 import re
 import logging
 import os
+import sys
+import time
 from typing import Dict, List, Tuple, Any
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_matcher import KeywordMatcher
+from listing_features import ListingFeatures, TermTable, VOCABULARY, extract_features
+
+# Non-wildlife regex rules are re-ordered by hit rate / cost every N assessments
+RULE_REORDER_INTERVAL = 500
+
 
 class WildlifeQualityFilter:
     """Advanced quality filtering to reduce UNRATED classifications from 95% to ~15%"""
@@ -370,19 +379,148 @@ class WildlifeQualityFilter:
             "zimbabwe",
         ]
 
+        # Suspicious sales language (lowers quality)
+        self.suspicious_terms = [
+            "quick sale",
+            "must sell",
+            "no questions",
+            "cash only",
+            "discrete",
+            "urgent sale",
+            "moving sale",
+        ]
+
+        # Threat level indicators
+        self.critical_indicators = [
+            "live",
+            "ivory",
+            "rhino horn",
+            "tiger bone",
+            "pangolin scale",
+            "bear bile",
+            "elephant tusk",
+            "endangered",
+            "protected species",
+        ]
+        self.high_indicators = [
+            "traditional medicine",
+            "authentic",
+            "rare specimen",
+            "wild caught",
+            "illegal",
+            "black market",
+            "no permit",
+            "undocumented",
+        ]
+
+        # Patterns that clearly indicate non-wildlife items
+        self.non_wildlife_patterns = [
+            ("clothing_sizes", r"\b(size|sizes?)\s+(xs|s|m|l|xl|xxl)\b"),
+            ("new_items", r"\b(brand\s+new|mint\s+condition|unopened)\b"),
+            ("digital_items", r"\b(digital\s+download|instant\s+download)\b"),
+            ("decorative_items", r"\b(home\s+decor|wall\s+hanging|shelf\s+display)\b"),
+            ("costume_items", r"\b(costume\s+party|halloween|cosplay)\b"),
+            ("toys", r"\b(children\'?s?\s+toy|kids\s+toy|baby\s+toy)\b"),
+            ("art_prints", r"\b(art\s+print|canvas\s+print|poster\s+print)\b"),
+            ("toy_weapons", r"\b(replica\s+gun|toy\s+gun|airsoft)\b"),
+            ("games", r"\b(video\s+game|board\s+game|card\s+game)\b"),
+        ]
+
+        # Read once; assess_quality runs per listing
+        self.quality_threshold = float(os.getenv('QUALITY_THRESHOLD', '0.2'))
+        self.assessments = 0
+        self.rule_stats: Dict[str, Dict[str, float]] = {}
+        self.compile_rules()
+
         logging.info(
             "✅ WildlifeQualityFilter initialized with comprehensive filtering rules"
         )
 
+    def compile_rules(self):
+        """Register every term list with the shared feature vocabulary and compile the regex rules once.
+
+        Call again after editing the term lists.
+        """
+        entries = []
+        for group, lists in (
+            ("reject", self.reject_terms),
+            ("multilingual", self.multilingual_rejects),
+            ("wildlife", self.wildlife_terms),
+        ):
+            for category, terms in lists.items():
+                entries.extend((term, (group, category, term)) for term in terms)
+        for group, terms in (
+            ("critical", self.critical_species),
+            ("suspicious", self.suspicious_terms),
+            ("critical_indicator", self.critical_indicators),
+            ("high_indicator", self.high_indicators),
+        ):
+            entries.extend((term, (group, group, term)) for term in terms)
+        self._term_table = TermTable(entries)
+        self._region_matcher = KeywordMatcher(
+            (region, region) for region in self.high_risk_regions
+        )
+        self._pattern_rules = [
+            (name, re.compile(pattern, re.IGNORECASE))
+            for name, pattern in self.non_wildlife_patterns
+        ]
+
+    def _record(self, rule: str, hit: bool = False, elapsed: float = 0.0):
+        stats = self.rule_stats.get(rule)
+        if stats is None:
+            stats = self.rule_stats[rule] = {"hits": 0, "checks": 0, "time": 0.0}
+        stats["checks"] += 1
+        stats["hits"] += hit
+        stats["time"] += elapsed
+
+    def match_terms(self, text: str) -> Dict[str, List[Tuple[str, str]]]:
+        """One pass over ``text``: (category, term) hits per rule group, in list order"""
+        start = time.perf_counter()
+        hits = self.hits_from_bits(VOCABULARY.mask(VOCABULARY.matcher.find_terms(text)))
+        self._record("term_matcher", elapsed=time.perf_counter() - start)
+        return hits
+
+    def hits_from_bits(self, term_bits: int) -> Dict[str, List[Tuple[str, str]]]:
+        """Rule-group hits from a ListingFeatures term bitset"""
+        hits = {
+            "reject": [],
+            "multilingual": [],
+            "wildlife": [],
+            "critical": [],
+            "suspicious": [],
+            "critical_indicator": [],
+            "high_indicator": [],
+        }
+        for group, category, term in self._term_table.find(term_bits):
+            hits[group].append((category, term))
+        return hits
+
+    def _reorder_rules(self):
+        """Most decisive rules per second of CPU first, so early exit happens sooner"""
+        def hit_rate_per_cost(rule):
+            stats = self.rule_stats.get(f"pattern:{rule[0]}")
+            if not stats or not stats["checks"]:
+                return 0.0
+            return stats["hits"] / max(stats["time"], 1e-9)
+
+        self._pattern_rules.sort(key=hit_rate_per_cost, reverse=True)
+
     def assess_quality(self, listing: Dict[str, Any]) -> Dict[str, Any]:
         """
         Main quality assessment function
         Returns: {shouldInclude, qualityScore, threatLevel, confidence, reason}
         """
         try:
-            title = (listing.get("title", "") or "").lower().strip()
-            description = (listing.get("description", "") or "").lower().strip()
-            full_text = f"{title} {description}".strip()
+            features = extract_features(listing)
+        except Exception as e:
+            return self._assessment_error(e)
+        return self.assess_features(features)
+
+    def assess_features(self, features: ListingFeatures) -> Dict[str, Any]:
+        """``assess_quality`` over already-extracted ListingFeatures (no text rescans)"""
+        try:
+            features.refresh()
+            full_text = features.body.strip()
 
             if not full_text or len(full_text) < 3:
                 return {
@@ -393,8 +531,15 @@ class WildlifeQualityFilter:
                     "reason": "Empty or too short text",
                 }
 
+            self.assessments += 1
+            if self.assessments % RULE_REORDER_INTERVAL == 0:
+                self._reorder_rules()
+
+            # Term hits within title + description, shared by every step below
+            hits = self.hits_from_bits(features.body_bits)
+
             # Immediate rejection check
-            rejection_result = self.should_reject(full_text)
+            rejection_result = self.should_reject(full_text, hits)
             if rejection_result["should_reject"]:
                 return {
                     "shouldInclude": False,
@@ -405,19 +550,18 @@ class WildlifeQualityFilter:
                 }
 
             # Calculate quality score
-            quality_score = self.calculate_quality_score(full_text, listing)
+            quality_score = self.calculate_quality_score(full_text, features, hits)
 
             # Determine threat level based on quality score
             threat_level = self.determine_threat_level(
-                quality_score, full_text, listing
+                quality_score, full_text, features, hits
             )
 
             # Calculate confidence level
-            confidence = self.calculate_confidence(quality_score, full_text)
+            confidence = self.calculate_confidence(quality_score, full_text, hits)
 
             # Decision: Only include if quality score > 20% (OPTIMIZED)
-            quality_threshold = float(os.getenv('QUALITY_THRESHOLD', '0.2'))
-            should_include = quality_score > quality_threshold
+            should_include = quality_score > self.quality_threshold
 
             return {
                 "shouldInclude": should_include,
@@ -432,36 +576,40 @@ class WildlifeQualityFilter:
             }
 
         except Exception as e:
-            logging.error(f"Quality assessment error: {e}")
-            return {
-                "shouldInclude": False,
-                "qualityScore": 0.0,
-                "threatLevel": "UNRATED",
-                "confidence": 0.1,
-                "reason": f"Assessment error: {str(e)}",
-            }
+            return self._assessment_error(e)
 
-    def should_reject(self, text: str) -> Dict[str, Any]:
+    def _assessment_error(self, error: Exception) -> Dict[str, Any]:
+        logging.error(f"Quality assessment error: {error}")
+        return {
+            "shouldInclude": False,
+            "qualityScore": 0.0,
+            "threatLevel": "UNRATED",
+            "confidence": 0.1,
+            "reason": f"Assessment error: {str(error)}",
+        }
+
+    def should_reject(self, text: str, hits: Dict = None) -> Dict[str, Any]:
         """Check if listing should be immediately rejected"""
+        if hits is None:
+            hits = self.match_terms(text)
+
         # Check English reject terms
-        for category, terms in self.reject_terms.items():
-            for term in terms:
-                if term in text:
-                    return {
-                        "should_reject": True,
-                        "reason": f"Contains {category} term: '{term}'",
-                        "confidence": 0.9,
-                    }
+        for category, term in hits["reject"]:
+            self._record(f"reject:{category}", hit=True)
+            return {
+                "should_reject": True,
+                "reason": f"Contains {category} term: '{term}'",
+                "confidence": 0.9,
+            }
 
         # Check multilingual reject terms
-        for language, terms in self.multilingual_rejects.items():
-            for term in terms:
-                if term in text:
-                    return {
-                        "should_reject": True,
-                        "reason": f"Contains {language} reject term: '{term}'",
-                        "confidence": 0.85,
-                    }
+        for language, term in hits["multilingual"]:
+            self._record(f"multilingual:{language}", hit=True)
+            return {
+                "should_reject": True,
+                "reason": f"Contains {language} reject term: '{term}'",
+                "confidence": 0.85,
+            }
 
         # Check for obvious non-wildlife patterns
         if self.contains_obvious_non_wildlife_patterns(text):
@@ -475,151 +623,99 @@ class WildlifeQualityFilter:
 
     def contains_obvious_non_wildlife_patterns(self, text: str) -> bool:
         """Check for patterns that clearly indicate non-wildlife items"""
-        non_wildlife_patterns = [
-            r"\b(size|sizes?)\s+(xs|s|m|l|xl|xxl)\b",  # Clothing sizes
-            r"\b(brand\s+new|mint\s+condition|unopened)\b",  # New items
-            r"\b(digital\s+download|instant\s+download)\b",  # Digital items
-            r"\b(home\s+decor|wall\s+hanging|shelf\s+display)\b",  # Decorative items
-            r"\b(costume\s+party|halloween|cosplay)\b",  # Costume items
-            r"\b(children\'?s?\s+toy|kids\s+toy|baby\s+toy)\b",  # Toys
-            r"\b(art\s+print|canvas\s+print|poster\s+print)\b",  # Art prints
-            r"\b(replica\s+gun|toy\s+gun|airsoft)\b",  # Toy weapons
-            r"\b(video\s+game|board\s+game|card\s+game)\b",  # Games
-        ]
-
-        for pattern in non_wildlife_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for name, pattern in self._pattern_rules:
+            start = time.perf_counter()
+            hit = pattern.search(text) is not None
+            self._record(f"pattern:{name}", hit, time.perf_counter() - start)
+            if hit:
                 return True
 
         return False
 
-    def calculate_quality_score(self, text: str, listing: Dict[str, Any]) -> float:
+    def calculate_quality_score(
+        self, text: str, features: ListingFeatures, hits: Dict = None
+    ) -> float:
         """Calculate quality score (0-1) based on multiple factors (OPTIMIZED)"""
+        if hits is None:
+            hits = self.match_terms(text)
         score = 0.3  # Lowered base score to rely more on content analysis
 
         # Wildlife terms boost (ENHANCED scoring)
         wildlife_matches = 0
-        for category, terms in self.wildlife_terms.items():
-            for term in terms:
-                if term in text:
-                    wildlife_matches += 1
-                    if category == "live":
-                        score += 0.18  # INCREASED - Live animals critical
-                    elif category == "parts":
-                        score += 0.15  # INCREASED - Animal parts very concerning
-                    elif category == "trafficking":
-                        score += 0.13  # INCREASED - Trafficking indicators important
-                    else:
-                        score += 0.10  # INCREASED - General wildlife terms
+        for category, term in hits["wildlife"]:
+            wildlife_matches += 1
+            if category == "live":
+                score += 0.18  # INCREASED - Live animals critical
+            elif category == "parts":
+                score += 0.15  # INCREASED - Animal parts very concerning
+            elif category == "trafficking":
+                score += 0.13  # INCREASED - Trafficking indicators important
+            else:
+                score += 0.10  # INCREASED - General wildlife terms
 
         # Critical species boost (ENHANCED)
         critical_matches = 0
-        for species in self.critical_species:
-            if species in text:
-                critical_matches += 1
-                score += 0.18  # INCREASED for critical species
+        for _ in hits["critical"]:
+            critical_matches += 1
+            score += 0.18  # INCREASED for critical species
 
         # Price analysis
-        price_str = str(listing.get("price", "") or "").lower()
-        price_numbers = re.findall(r"[\d,]+\.?\d*", price_str)
-        if price_numbers:
-            try:
-                price = float(price_numbers[0].replace(",", ""))
-                if price > 10000:  # Very high prices suspicious for wildlife
-                    score += 0.18  # INCREASED
-                elif price > 1000:
-                    score += 0.12  # INCREASED
-                elif price > 100:
-                    score += 0.08   # INCREASED
-                elif price > 0 and price < 10:  # Very low prices likely fake
-                    score -= 0.15
-            except (ValueError, IndexError):
-                pass
+        price = features.price
+        if price is not None:
+            if price > 10000:  # Very high prices suspicious for wildlife
+                score += 0.18  # INCREASED
+            elif price > 1000:
+                score += 0.12  # INCREASED
+            elif price > 100:
+                score += 0.08   # INCREASED
+            elif price > 0 and price < 10:  # Very low prices likely fake
+                score -= 0.15
 
         # Geographic risk analysis
-        location = (listing.get("location", "") or "").lower()
-        for region in self.high_risk_regions:
-            if region in location:
-                score += 0.08
-                break
+        if self._region_matcher.find_terms(features.location):
+            score += 0.08
 
         # Text quality indicators
-        title_length = len(listing.get("title", "") or "")
+        title_length = len(features.title)
         if title_length > 50:  # Detailed titles often better
             score += 0.05
         elif title_length < 10:  # Very short titles often low quality
             score -= 0.10
 
         # Search term relevance
-        search_term = (listing.get("search_term", "") or "").lower()
+        search_term = features.search_term.lower()
         if search_term in text:
             score += 0.05
 
         # Platform-specific adjustments
-        platform = listing.get("platform", "").lower()
+        platform = features.platform.lower()
         if platform == "avito":  # High-performing platform
             score += 0.03
         elif platform == "facebook_marketplace":  # Often lower quality
             score -= 0.02
 
         # Suspicious terms that lower quality
-        suspicious_terms = [
-            "quick sale",
-            "must sell",
-            "no questions",
-            "cash only",
-            "discrete",
-            "urgent sale",
-            "moving sale",
-        ]
-        for term in suspicious_terms:
-            if term in text:
-                score -= 0.05
+        for _ in hits["suspicious"]:
+            score -= 0.05
 
         # Ensure score stays within bounds
         return max(0.0, min(1.0, score))
 
     def determine_threat_level(
-        self, quality_score: float, text: str, listing: Dict[str, Any]
+        self, quality_score: float, text: str, features: ListingFeatures = None, hits: Dict = None
     ) -> str:
         """Determine threat level based on quality score and content analysis (OPTIMIZED)"""
-        quality_threshold = float(os.getenv('QUALITY_THRESHOLD', '0.2'))
-        if quality_score < quality_threshold:
+        if quality_score < self.quality_threshold:
             return "UNRATED"
+        if hits is None:
+            hits = self.match_terms(text)
 
         # Check for CRITICAL indicators
-        critical_indicators = [
-            "live",
-            "ivory",
-            "rhino horn",
-            "tiger bone",
-            "pangolin scale",
-            "bear bile",
-            "elephant tusk",
-            "endangered",
-            "protected species",
-        ]
-
-        if quality_score > 0.75 and any(  # LOWERED threshold
-            indicator in text for indicator in critical_indicators
-        ):
+        if quality_score > 0.75 and hits["critical_indicator"]:  # LOWERED threshold
             return "CRITICAL"
 
         # Check for HIGH threat indicators
-        high_indicators = [
-            "traditional medicine",
-            "authentic",
-            "rare specimen",
-            "wild caught",
-            "illegal",
-            "black market",
-            "no permit",
-            "undocumented",
-        ]
-
-        if quality_score > 0.65 or any(  # LOWERED threshold
-            indicator in text for indicator in high_indicators
-        ):
+        if quality_score > 0.65 or hits["high_indicator"]:  # LOWERED threshold
             return "HIGH"
 
         # MEDIUM threat
@@ -629,8 +725,12 @@ class WildlifeQualityFilter:
         # LOW threat
         return "LOW"
 
-    def calculate_confidence(self, quality_score: float, text: str) -> float:
+    def calculate_confidence(
+        self, quality_score: float, text: str, hits: Dict = None
+    ) -> float:
         """Calculate confidence level for the assessment"""
+        if hits is None:
+            hits = self.match_terms(text)
         confidence = 0.5  # Base confidence
 
         # Higher confidence for extreme scores
@@ -640,21 +740,11 @@ class WildlifeQualityFilter:
             confidence = 0.75
 
         # Boost confidence for clear indicators
-        clear_wildlife = sum(
-            1
-            for category in self.wildlife_terms.values()
-            for term in category
-            if term in text
-        )
+        clear_wildlife = len(hits["wildlife"])
         if clear_wildlife > 3:
             confidence += 0.1
 
-        clear_rejects = sum(
-            1
-            for category in self.reject_terms.values()
-            for term in category
-            if term in text
-        )
+        clear_rejects = len(hits["reject"])
         if clear_rejects > 0:
             confidence = 0.95
 
@@ -666,8 +756,8 @@ class WildlifeQualityFilter:
 
         return max(0.1, min(0.99, confidence))
 
-    def get_filter_stats(self) -> Dict[str, int]:
-        """Get statistics about filter rules"""
+    def get_filter_stats(self) -> Dict[str, Any]:
+        """Get statistics about filter rules, per-rule hit counts and time spent"""
         return {
             "reject_categories": len(self.reject_terms),
             "total_reject_terms": sum(
@@ -680,6 +770,19 @@ class WildlifeQualityFilter:
             "multilingual_languages": len(self.multilingual_rejects),
             "critical_species": len(self.critical_species),
             "high_risk_regions": len(self.high_risk_regions),
+            "quality_threshold": self.quality_threshold,
+            "assessments": self.assessments,
+            "pattern_rule_order": [name for name, _ in self._pattern_rules],
+            "rules": {
+                rule: {
+                    "hits": stats["hits"],
+                    "checks": stats["checks"],
+                    "time_ms": round(stats["time"] * 1000, 3),
+                }
+                for rule, stats in sorted(
+                    self.rule_stats.items(), key=lambda item: -item[1]["hits"]
+                )
+            },
         }
 
 
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Threat Scoring Micro-Benchmark
+Per-listing cost of IntelligentThreatScorer keyword matching: the original
+per-term substring loops versus the compiled one-pass matcher, and listing
+throughput of analyze_listing versus the columnar analyze_batch. Also checks
+that each pair produces identical scores, and that the shared price parser
+agrees with EnhancedThreatScorer's original _extract_price.
+
+Scorers run with their score cache disabled, since every round after the
+first would otherwise be cache lookups; the cache is timed as its own case.
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from enhanced_platforms.enhanced_threat_scorer import EnhancedThreatScorer
+from intelligent_threat_scoring_system import NUMPY_AVAILABLE, IntelligentThreatScorer, ListingBatch
+from listing_features import VOCABULARY, extract_features, parse_price
+from score_cache import ScoreCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from quality_filters import WildlifeQualityFilter
+
+# (template, digit-group separator) for single prices as scanners see them;
+# space grouping is how Avito and OLX write prices
+PRICE_FORMATS = (("${}", ","), ("$ {}", ""), ("{} €", "."), ("€ {}", "\u00a0"), ("RUB {}", " "),
+                 ("{} ₽", " "), ("{},00 руб", " "), ("£{}.50", ","), ("{},99 zł", ""), ("CHF {}", "'"))
+FILLER = ("vintage antique rare collectible original authentic condition shipping "
+          "worldwide offer box figurine statue handmade decor gift set lot").split()
+
+
+def format_price(amount: int, template: str, separator: str) -> str:
+    return template.format(f"{amount:,}".replace(',', separator))
+
+
+def build_listings(scorer: IntelligentThreatScorer, count: int = 2000, seed: int = 7):
+    """Synthetic listings mixing filler words with indicator terms"""
+    rng = random.Random(seed)
+    terms = [term for indicators in (scorer.wildlife_indicators, scorer.human_trafficking_indicators,
+                                     scorer.false_positive_reducers)
+             for category in indicators.values() for term in category]
+    listings = []
+    for i in range(count):
+        words = rng.sample(FILLER, 6) + rng.sample(terms, rng.randint(0, 3))
+        rng.shuffle(words)
+        listings.append({
+            'title': ' '.join(words[:6]).title(),
+            'description': ' '.join(words[6:]) if rng.random() < 0.5 else '',
+            'price': format_price(rng.choice([15, 80, 100, 500, 1200, 2500, 25000, 150000]), *rng.choice(PRICE_FORMATS)),
+            'url': f"https://example.com/item/{i}",
+            'search_term': rng.choice(terms),
+            'platform': rng.choice(['ebay', 'craigslist', 'avito', 'olx', 'gumtree'])
+        })
+    return listings
+
+
+def legacy_extract_price(price_str):
+    """EnhancedThreatScorer._extract_price before the shared parser, kept as the reference"""
+    if not price_str:
+        return None
+    price_clean = re.sub(r'[^\d.,]', '', str(price_str))
+    if not price_clean:
+        return None
+    try:
+        if ',' in price_clean and '.' in price_clean:
+            price_clean = price_clean.replace(',', '')
+        elif ',' in price_clean:
+            if price_clean.count(',') == 1 and len(price_clean.split(',')[1]) <= 2:
+                price_clean = price_clean.replace(',', '.')
+            else:
+                price_clean = price_clean.replace(',', '')
+        return float(price_clean)
+    except ValueError:
+        return None
+
+
+def check_prices(listings) -> int:
+    """Listings whose price parse_price reads differently from the original parser"""
+    mismatches = [l['price'] for l in listings if parse_price(l['price']) != legacy_extract_price(l['price'])]
+    print(f"💶 Prices parsed as before: {'YES' if not mismatches else f'NO ({len(mismatches)} mismatches)'}")
+    for price in sorted(set(mismatches))[:5]:
+        print(f"   {price!r}: {legacy_extract_price(price)} -> {parse_price(price)}")
+    return len(mismatches)
+
+
+def uncached(scorer):
+    """``scorer`` with its score cache switched off, so rounds time the scoring itself"""
+    scorer.score_cache = None
+    return scorer
+
+
+def legacy_match(scorer: IntelligentThreatScorer, text: str, search_term: str):
+    """The original per-term loops, kept here as the benchmark baseline"""
+    wildlife_score, wildlife = 0, []
+    for category, terms in scorer.wildlife_indicators.items():
+        for term, weight in terms.items():
+            if term in text:
+                wildlife_score += weight
+                wildlife.append(f"{term} ({category})")
+    if search_term.lower() in [term for terms in scorer.wildlife_indicators.values() for term in terms.keys()]:
+        wildlife_score += 15
+        wildlife.append(f"High-risk search term: {search_term}")
+
+    ht_score, ht = 0, []
+    for category, terms in scorer.human_trafficking_indicators.items():
+        for term, weight in terms.items():
+            if term in text:
+                ht_score += weight
+                ht.append(f"{term} ({category})")
+    for pattern, weight, description in [
+        (r'\b(full|complete|all inclusive)\s+service\b', 25, "coded service language"),
+        (r'\b(discrete|discreet|confidential)\b', 15, "discretion emphasis"),
+        (r'\b24/?7\b', 12, "24/7 availability"),
+        (r'\bcash\s+only\b', 10, "cash only payment")
+    ]:
+        if re.search(pattern, text, re.IGNORECASE):
+            ht_score += weight
+            ht.append(description)
+
+    reduction = 0
+    for category, terms in scorer.false_positive_reducers.items():
+        for term, weight in terms.items():
+            if term in text:
+                reduction += weight
+    return (wildlife_score, wildlife), (ht_score, ht), reduction
+
+
+def compiled_match(scorer: IntelligentThreatScorer, text: str, search_term: str):
+    matches = scorer._match_indicators(text)
+    return (scorer._calculate_wildlife_score(text, search_term, matches),
+            scorer._calculate_human_trafficking_score(text, search_term, matches),
+            scorer._calculate_false_positive_reduction(text, matches))
+
+
+def run_benchmark(count: int = 2000, rounds: int = 5):
+    scorer = uncached(IntelligentThreatScorer())
+    listings = build_listings(scorer, count)
+    texts = [(f"{l['title']} {l['description']} {l['search_term']}".lower(), l['search_term']) for l in listings]
+
+    mismatches = sum(1 for text, term in texts if legacy_match(scorer, text, term) != compiled_match(scorer, text, term))
+
+    print("⚡ WildGuard AI - Threat Scoring Micro-Benchmark")
+    print("=" * 60)
+    print(f"📦 {count:,} synthetic listings, best of {rounds} rounds")
+    print(f"🔍 Identical scores/indicators: {'YES' if not mismatches else f'NO ({mismatches} mismatches)'}")
+    check_prices(listings)
+
+    results = {}
+    for name, match in (('per-term loops', legacy_match), ('compiled matcher', compiled_match)):
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for text, term in texts:
+                match(scorer, text, term)
+            best = min(best, time.perf_counter() - start)
+        results[name] = best / count * 1e6
+        print(f"   {name:<18} {results[name]:7.1f} µs/listing")
+
+    start = time.perf_counter()
+    for listing in listings:
+        scorer.analyze_listing(listing, listing['search_term'], listing['platform'])
+    full = (time.perf_counter() - start) / count * 1e6
+    print(f"   {'analyze_listing':<18} {full:7.1f} µs/listing (end to end)")
+    print(f"🚀 Matching speed-up: {results['per-term loops'] / results['compiled matcher']:.2f}x")
+    results.update(run_batch_benchmark(scorer, listings, rounds))
+    results.update(run_shared_features_benchmark(scorer, listings, rounds))
+    return results
+
+
+def run_batch_benchmark(scorer: IntelligentThreatScorer, listings, rounds: int = 5):
+    """Listings/sec: analyze_listing one at a time versus analyze_batch over columns"""
+    count = len(listings)
+    batch = ListingBatch.from_listings(listings)
+    batch_scores = scorer.analyze_batch(batch)
+    single = [scorer.analyze_listing(l, l['search_term'], l['platform']) for l in listings]
+    identical = batch_scores.threat_scores == [a.threat_score for a in single] and \
+        batch_scores.confidences == [a.confidence for a in single]
+
+    print(f"\n📊 Batch scoring ({'NumPy' if NUMPY_AVAILABLE else 'no NumPy, per-row fallback'})")
+    print(f"🔍 Identical scores: {'YES' if identical else 'NO'}")
+    results = {}
+    for name, run in (('analyze_listing', lambda: [scorer.analyze_listing(l, l['search_term'], l['platform'])
+                                                   for l in listings]),
+                      ('analyze_batch', lambda: scorer.analyze_batch(ListingBatch.from_listings(listings)))):
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = count / best
+        print(f"   {name:<18} {results[name]:9,.0f} listings/sec")
+    print(f"🚀 Batch speed-up: {results['analyze_batch'] / results['analyze_listing']:.2f}x "
+          f"({sum(a is not None for a in batch_scores.analyses)}/{count} rows got full reasoning)")
+    results.update(run_score_cache_benchmark(scorer, listings, rounds))
+    return results
+
+
+def run_score_cache_benchmark(scorer: IntelligentThreatScorer, listings, rounds: int = 5):
+    """Listings/sec of analyze_listing with a cold and a warm score cache (a throwaway one)"""
+    count = len(listings)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        scorer.score_cache = ScoreCache('benchmark', scorer.weights_version(), directory=directory)
+        try:
+            start = time.perf_counter()
+            for listing in listings:
+                scorer.analyze_listing(listing, listing['search_term'], listing['platform'])
+            results['analyze_listing cold cache'] = count / (time.perf_counter() - start)
+
+            best = float('inf')
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for listing in listings:
+                    scorer.analyze_listing(listing, listing['search_term'], listing['platform'])
+                best = min(best, time.perf_counter() - start)
+            results['analyze_listing warm cache'] = count / best
+        finally:
+            scorer.score_cache = None
+
+    print("\n🗂️ Score cache (analyze_listing; not part of the scorer comparisons above)")
+    for name in ('analyze_listing cold cache', 'analyze_listing warm cache'):
+        print(f"   {name.replace('analyze_listing ', ''):<18} {results[name]:9,.0f} listings/sec")
+    return results
+
+
+def run_shared_features_benchmark(scorer: IntelligentThreatScorer, listings, rounds: int = 5):
+    """All three scorers per listing: each extracting on its own versus one shared ListingFeatures"""
+    enhanced = uncached(EnhancedThreatScorer())
+    quality = WildlifeQualityFilter()
+    count = len(listings)
+
+    def separate(listing):
+        return (scorer.analyze_listing(listing, listing['search_term'], listing['platform']),
+                enhanced.enhance_existing_score(listing, 50),
+                quality.assess_quality(listing))
+
+    def shared(listing):
+        features = extract_features(listing)
+        return (scorer.analyze_features(features),
+                enhanced.enhance_features(features, 50),
+                quality.assess_features(features))
+
+    identical = all(separate(listing) == shared(listing) for listing in listings)
+    passes = {}
+    matcher = VOCABULARY.matcher
+    find_spans = matcher.find_spans
+    for name, run in (('separate', separate), ('shared', shared)):
+        calls = [0]
+
+        def counting(text, calls=calls):
+            calls[0] += 1
+            return find_spans(text)
+
+        matcher.find_spans = counting
+        run(listings[0])
+        passes[name] = calls[0]
+    matcher.find_spans = find_spans
+
+    print("\n🧩 Three scorers per listing (IntelligentThreatScorer + EnhancedThreatScorer + WildlifeQualityFilter)")
+    print(f"🔍 Identical results, shared vs separate extraction: {'YES' if identical else 'NO'}")
+    results = {}
+    for name, run in (('separate', separate), ('shared', shared)):
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for listing in listings:
+                run(listing)
+            best = min(best, time.perf_counter() - start)
+        results[f'{name} features'] = best / count * 1e6
+        print(f"   {name + ' features':<18} {results[f'{name} features']:7.1f} µs/listing ({passes[name]} text pass{'es' if passes[name] > 1 else ''})")
+    print(f"🚀 Shared-features speed-up: {results['separate features'] / results['shared features']:.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
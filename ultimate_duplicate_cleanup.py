@@ -14,9 +14,10 @@ import os
 from datetime import datetime
 from typing import Dict, List, Set
 import hashlib
-from urllib.parse import urlparse
 from collections import defaultdict
 
+from listing_identity import identity_key
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -39,36 +40,11 @@ class UltimateDuplicateCleanup:
         logger.info("Ultimate Duplicate Cleanup System initialized")
     
     def normalize_url(self, url: str) -> str:
-        """Normalize URLs to catch variations"""
+        """Canonical listing key, so URL variations of one item group together"""
         if not url:
             return ""
-        
-        try:
-            # Remove common tracking parameters
-            tracking_params = ['utm_source', 'utm_medium', 'utm_campaign', 'ref', 'source', 'fbclid']
-            parsed = urlparse(url)
-            
-            # Remove tracking parameters from query string
-            if parsed.query:
-                params = []
-                for param in parsed.query.split('&'):
-                    if '=' in param:
-                        key = param.split('=')[0]
-                        if key not in tracking_params:
-                            params.append(param)
-                query = '&'.join(params)
-            else:
-                query = ''
-            
-            # Rebuild URL without tracking params
-            normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            if query:
-                normalized += f"?{query}"
-            
-            return normalized.lower().strip('/')
-        except:
-            return url.lower().strip('/')
-    
+        return identity_key(url)
+
     def fetch_all_listings(self) -> List[Dict]:
         """Fetch all listings from Supabase"""
         logger.info("Fetching all listings from database...")
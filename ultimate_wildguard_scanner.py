@@ -26,6 +26,7 @@ from enhanced_platforms.taobao_scanner import TaobaoScanner
 
 # Import enhanced scoring
 from enhanced_platforms.enhanced_threat_scorer import EnhancedThreatScorer
+from score_cache import save_score_caches, score_cache_stats
 
 # Import Vision API controller
 from enhanced_platforms.google_vision_controller import GoogleVisionController
@@ -224,6 +225,8 @@ class UltimateWildGuardScanner:
         enhanced_results = []
         vision_analyses = []
         
+        # Steps 1-2: original and enhanced scores for every result
+        scored = []
         for result in raw_results:
             try:
                 # Step 1: Calculate original score (base scanner method)
@@ -232,24 +235,37 @@ class UltimateWildGuardScanner:
                 
                 # Step 2: Enhanced threat scoring
                 enhanced_analysis = self.threat_scorer.enhance_existing_score(result, original_score)
-                
-                # Step 3: Google Vision analysis (if quota available and criteria met)
-                vision_analysis = None
-                if result.get('image_url'):  # Only if image available
-                    vision_analysis = await self.vision_controller.analyze_listing_image(
-                        result, enhanced_analysis.__dict__
-                    )
+                scored.append((result, enhanced_analysis))
+            except Exception as e:
+                logging.warning(f"Error enhancing result: {e}")
+                # Keep original result as fallback
+                enhanced_results.append(result)
+        
+        # Step 3: Google Vision analysis (if quota available and criteria met), batched
+        with_images = [i for i, (result, _) in enumerate(scored) if result.get('image_url')]
+        vision_results = [None] * len(scored)
+        if with_images:
+            try:
+                batch_results = await self.vision_controller.analyze_listing_images(
+                    [(scored[i][0], scored[i][1].__dict__) for i in with_images]
+                )
+                for i, vision_analysis in zip(with_images, batch_results):
+                    vision_results[i] = vision_analysis
+            except Exception as e:
+                logging.warning(f"Vision batch failed: {e}")
+        
+        for (result, enhanced_analysis), vision_analysis in zip(scored, vision_results):
+            try:
+                if vision_analysis:
+                    vision_analyses.append(vision_analysis)
+                    self.total_vision_analyzed += 1
                     
-                    if vision_analysis:
-                        vision_analyses.append(vision_analysis)
-                        self.total_vision_analyzed += 1
-                        
-                        # Enhance score with vision results
-                        final_score, vision_reasoning = self.vision_controller.enhance_score_with_vision(
-                            enhanced_analysis.enhanced_score, vision_analysis
-                        )
-                        enhanced_analysis.enhanced_score = final_score
-                        enhanced_analysis.reasoning += f"; {vision_reasoning}"
+                    # Enhance score with vision results
+                    final_score, vision_reasoning = self.vision_controller.enhance_score_with_vision(
+                        enhanced_analysis.enhanced_score, vision_analysis
+                    )
+                    enhanced_analysis.enhanced_score = final_score
+                    enhanced_analysis.reasoning += f"; {vision_reasoning}"
                 
                 # Step 4: Prepare enhanced result
                 enhanced_result = result.copy()
@@ -287,6 +303,7 @@ class UltimateWildGuardScanner:
         
         # Store results
         stored_count = await self.store_enhanced_results(enhanced_results)
+        save_score_caches()
         
         return {
             'total_found': len(raw_results),
@@ -294,7 +311,8 @@ class UltimateWildGuardScanner:
             'total_stored': stored_count,
             'vision_analyses': len(vision_analyses),
             'wildlife_threats': self.wildlife_threats,
-            'human_trafficking_threats': self.human_trafficking_threats
+            'human_trafficking_threats': self.human_trafficking_threats,
+            'score_cache': score_cache_stats()
         }
     
     async def store_enhanced_results(self, enhanced_results: List[Dict]) -> int:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+WildGuard AI - Vision Pre-Classifier Benchmark
+Runs the local image pre-classifier over a recorded sample of listing images
+and reports throughput (images/sec, serial and process pool) and how much
+Google Vision quota it would save at each reject threshold.
+
+Usage: python vision_prefilter_benchmark.py [image_dir] [monthly_quota_left] [--reject P ...]
+
+Rejecting is off by default (VISION_PREFILTER_REJECT unset), so the savings
+are reported for the thresholds given with --reject, or DEFAULT_THRESHOLDS.
+
+Each image is paired with a text threat score drawn from the band that
+``should_analyze_image`` sends to Vision (35-80), seeded so runs repeat.
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import random
+import time
+
+from enhanced_platforms.image_prefilter import (PIL_AVAILABLE, REJECT_THRESHOLD, ImagePrefilter, classify_image,
+                                                exempt_from_reject)
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.webp')
+DEFAULT_THRESHOLDS = (0.7, 0.8, 0.9)
+
+
+def load_sample(image_dir: str, seed: int = 7):
+    rng = random.Random(seed)
+    paths = sorted(path for pattern in IMAGE_PATTERNS for path in glob.glob(os.path.join(image_dir, pattern)))
+    sample = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        sample.append((os.path.basename(path), content, {'enhanced_score': rng.randint(35, 80)}))
+    return sample
+
+
+def run_benchmark(image_dir: str = 'screenshots', quota_left: int = None, rounds: int = 3,
+                  thresholds=None):
+    print("🧹 WildGuard AI - Vision Pre-Classifier Benchmark")
+    print("=" * 60)
+    if not PIL_AVAILABLE:
+        print("❌ Pillow is not installed - the pre-classifier is disabled")
+        return {}
+
+    sample = load_sample(image_dir)
+    if not sample:
+        print(f"❌ No images found in {image_dir}")
+        return {}
+    count = len(sample)
+    quota_left = quota_left or max(1, count // 2)
+    print(f"📦 {count} images from {image_dir}, best of {rounds} rounds")
+
+    results = {}
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        # Probabilities only; each threshold is applied to them below
+        verdicts = [classify_image(content, reject_threshold=None) for _, content, _ in sample]
+        best = min(best, time.perf_counter() - start)
+    results['serial images/sec'] = count / best
+    print(f"   {'serial':<14} {results['serial images/sec']:9,.1f} images/sec")
+
+    prefilter = ImagePrefilter()
+    images = {name: content for name, content, _ in sample}
+
+    async def pooled():
+        await prefilter.classify(images)  # warm up worker processes
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await prefilter.classify(images)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    best = asyncio.run(pooled())
+    prefilter.close()
+    results['pool images/sec'] = count / best
+    print(f"   {f'pool ({prefilter.workers} procs)':<14} {results['pool images/sec']:9,.1f} images/sec")
+
+    thresholds = sorted(thresholds or ([REJECT_THRESHOLD] if REJECT_THRESHOLD is not None else DEFAULT_THRESHOLDS))
+    print("\n💰 Quota")
+    for threshold in thresholds:
+        kept = [(name, analysis, verdict) for (name, _, analysis), verdict in zip(sample, verdicts)
+                if not (verdict and verdict.non_candidate_probability >= threshold)
+                or exempt_from_reject(analysis)]
+        rejected = count - len(kept)
+        results[f'quota saved @{threshold:g}'] = rejected / count
+        # Whatever is kept is sent highest expected information gain first
+        spent = min(quota_left, len(kept))
+        print(f"   reject p >= {threshold:.2f}  {rejected}/{count} images rejected "
+              f"({rejected / count:.0%} of calls saved), {spent}/{quota_left} units spent")
+
+    print("   most likely non-candidates:")
+    likely = sorted(((verdict.non_candidate_probability, name, verdict.reason)
+                     for (name, _, _), verdict in zip(sample, verdicts) if verdict), reverse=True)
+    for probability, name, reason in likely[:10]:
+        print(f"      {name:<32} p={probability:.2f} ({reason})")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Vision pre-classifier")
+    parser.add_argument('image_dir', nargs='?', default='screenshots')
+    parser.add_argument('quota_left', nargs='?', type=int, default=None, help="Vision units left this month")
+    parser.add_argument('--reject', type=float, action='append', dest='thresholds',
+                        help="P(non-candidate) reject threshold to report (repeatable)")
+    args = parser.parse_args()
+    run_benchmark(args.image_dir, args.quota_left, thresholds=args.thresholds)